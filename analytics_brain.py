@@ -3,6 +3,10 @@ import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from keyboard_heatmap import heatmap_figure
+from key_stats import KeyStats
+from metrics import MetricSet, timed
+from results_index import ResultsIndex
 from results_io import ResultsInOut
 
 
@@ -13,6 +17,13 @@ class AnalyticsBrain:
     This class collects basic statistics from the data which may be useful or interesting to the user. Additionally,
     it produces plots to show the results history and results distribution.
 
+    The statistics and the results distribution come from the results aggregates, so they don't require loading the
+    results. When showing several profiles' results, only the distribution is plotted.
+
+    The results can be filtered by date range and test duration. Filtered statistics, and the results history plot,
+    come from a ResultsIndex, which finds the results in the date range by binary search and caches the aggregates of
+    each filter, so changing filters doesn't load the results again.
+
     Attributes
     ----------
     results_io: ResultsInOut
@@ -33,50 +44,120 @@ class AnalyticsBrain:
         A datetime duration giving the total time spent typing.
     empty_results : bool
         Describes whether the results dataframe is empty.
+    key_stats : KeyStats
+        Instance of the KeyStats class, the source of the keyboard heatmap.
+    results_files : list
+        Results files whose combined results are shown, or None for just the results_io instance's file.
+    aggregates : ResultsAggregates
+        Aggregates of the results shown.
+    filters : dict
+        The date range and test duration the results are filtered by, as the start, end and duration keyword
+        arguments of ResultsIndex.aggregates(). Each is None when not filtered.
+    index : ResultsIndex
+        Index of the results shown, or None until it's first needed.
+    metrics : MetricSet
+        Time taken to update the statistics and build the plots (see metrics.py).
 
     Methods
     -------
+    set_filters(start, end, duration)
+        Sets the date range and test duration the results are filtered by.
     update_stats()
         Updates the dataframe and statistics.
     open_plots(colour_scheme)
         Creates the figure containing the two subplots.
+    open_heatmap(colour_scheme)
+        Creates the keyboard heatmap figure.
 
     """
-    def __init__(self, results_io: ResultsInOut):
+    def __init__(self, results_io: ResultsInOut, key_stats: KeyStats = None):
         """
         Parameters
         ----------
         results_io : ResultsInOut
             instance of the ResultsInOut class
+        key_stats : KeyStats
+            instance of the KeyStats class. A new instance is loaded from the default file if not given.
         """
         self.results_io = results_io
+        self.key_stats = key_stats if key_stats is not None else KeyStats()
+        self.results_files = None
+        self.filters = {"start": None, "end": None, "duration": None}
+        self.index = None
+        self.metrics = MetricSet()
+        self.metrics.histogram("typing_test_analytics_seconds", "Time taken to update the analytics.", label="method")
 
         self.df = None
+        self.aggregates = None
         self.mean_wpm, self.top_wpm, self.avg_acc, self.chars_typed, self.words_est, self.time_spent_typing = None, None, None, None, None, None
         self.empty_results = results_io.empty_results
         self.update_stats()
 
+    def set_filters(self, start=None, end=None, duration=None):
+        """
+        Sets the date range and test duration the statistics and plots are filtered by.
+
+        Parameters
+        ----------
+        start : datetime.date
+            Only include results from this date onwards.
+        end : datetime.date
+            Only include results from before this date.
+        duration : int
+            Only include tests of this duration, in seconds.
+        """
+        self.filters = {"start": start, "end": end, "duration": duration}
+
+    def is_filtered(self):
+        """
+        Returns whether the results are filtered.
+        """
+        return any(value is not None for value in self.filters.values())
+
+    def results_index(self):
+        """
+        Returns the index of the results shown, brought up to date with the results files.
+        """
+        self.results_io.flush()  # Include results waiting to be written
+        files = self.results_files or [self.results_io.filename]
+        if self.index is None or self.index.filenames != files:
+            self.index = ResultsIndex(files)
+        else:
+            self.index.refresh()
+        return self.index
+
+    @timed("typing_test_analytics_seconds")
     def update_df(self):
         """
-        Updates the dataframe to contain the latest data.
+        Updates the dataframe to contain the latest results matching the filters in time order, including archived
+        results.
         """
-        self.df = self.results_io.load_data()
-        self.empty_results = self.results_io.empty_results
+        index = self.results_index()
+        self.df = index.frame(index.query("timestamp", descending=False, **self.filters))
+        self.empty_results = self.df.empty
 
+    @timed("typing_test_analytics_seconds")
     def update_stats(self):
         """
         Updates the statistics.
         """
-        self.update_df()
-        if not self.results_io.empty_results:
-            self.mean_wpm = round(self.df["wpm"].mean())
-            self.top_wpm = round(self.df["wpm"].max())
-            self.avg_acc = round(self.df["accuracy"].mean())
+        if self.is_filtered():
+            self.aggregates = self.results_index().aggregates(**self.filters)
+        else:
+            self.aggregates = self.results_io.load_aggregates(self.results_files)
+        self.empty_results = self.aggregates.rows == 0
+        if self.empty_results and self.is_filtered():
+            # Show zeros rather than the statistics of the previous filter
+            self.mean_wpm = self.top_wpm = self.avg_acc = self.chars_typed = self.words_est = 0
+            self.time_spent_typing = datetime.timedelta(0)
+        elif not self.empty_results:
+            self.mean_wpm = round(self.aggregates.sum_wpm / self.aggregates.rows)
+            self.top_wpm = round(self.aggregates.max_wpm)
+            self.avg_acc = round(self.aggregates.sum_accuracy / self.aggregates.rows)
 
-            self.chars_typed = round((self.df.wpm * 5 * self.df.duration/60).sum())
+            self.chars_typed = round(self.aggregates.sum_chars)
             self.words_est = round(self.chars_typed/5)
-            seconds_spent_typing = float(self.df.duration.sum())
-            self.time_spent_typing = datetime.timedelta(seconds=seconds_spent_typing)
+            self.time_spent_typing = datetime.timedelta(seconds=self.aggregates.sum_duration)
 
     def configure_plots(self, colour_scheme):
         """
@@ -142,16 +223,15 @@ class AnalyticsBrain:
         ax : matplotlib.axes.Axes
             The axes to plot the histogram on.
         """
-        df = self.df
+        histogram = self.aggregates.histogram
+        bin_width = self.aggregates.BIN_WIDTH
 
-        sns.histplot(data=df,
-                     x="wpm",
-                     stat="count",
-                     binrange=(0, self.top_wpm + (5 - self.top_wpm % 5)),
-                     binwidth=5,
-                     color=colour_scheme["highlight"],
-                     edgecolor=colour_scheme["main_text"],
-                     ax=ax)
+        ax.bar([wpm_bin * bin_width for wpm_bin in histogram],
+               list(histogram.values()),
+               width=bin_width,
+               align="edge",
+               color=colour_scheme["highlight"],
+               edgecolor=colour_scheme["main_text"])
 
         ax.grid(alpha=0.25)
 
@@ -166,6 +246,7 @@ class AnalyticsBrain:
         ax.set_xlim(0)
         ax.set_ylim(0)
 
+    @timed("typing_test_analytics_seconds")
     def open_plots(self, colour_scheme):
         """
         Creates the figure and subplots.
@@ -180,10 +261,32 @@ class AnalyticsBrain:
             return
 
         self.configure_plots(colour_scheme)
-        self.update_df()
+        if self.aggregates is None:
+            self.update_stats()
+
+        if self.results_files is not None:
+            fig, ax = plt.subplots(1, 1, figsize=(8, 6))
+            self.wpm_hist(colour_scheme, ax)
+            return fig
 
+        self.update_df()
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 6))
         self.wpm_time_figure(colour_scheme, ax1)
         self.wpm_hist(colour_scheme, ax2)
         fig.subplots_adjust(hspace=0.6)
         return fig
+
+    @timed("typing_test_analytics_seconds")
+    def open_heatmap(self, colour_scheme):
+        """
+        Creates the keyboard heatmap of the error rate and mean latency of each key and finger.
+
+        The heatmap is built from the keystroke statistics arrays, which are updated after every test, so it takes
+        the same time however many tests have been taken.
+
+        Parameters
+        ----------
+        colour_scheme : dict
+            Colour scheme to apply to the figure.
+        """
+        return heatmap_figure(self.key_stats, colour_scheme)
@@ -1,9 +1,18 @@
+import datetime
 import tkinter as tk
+from tkinter import ttk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 
 
 from analytics_brain import AnalyticsBrain
+from diagnostics import profiled
+from history_ui import DURATION_CHOICES, parse_duration
+from results_index import parse_date
+
+CUSTOM_RANGE = "Custom range"
+# Periods the analytics can be filtered to, with their length in days
+PERIODS = {"All time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 365 days": 365, CUSTOM_RANGE: None}
 
 
 class AnalyticsUI:
@@ -21,25 +30,45 @@ class AnalyticsUI:
         Instance of the AnalyticsBrain class.
     colour_scheme : dict
         The current colour scheme for the app.
-    top_wpm : tkinter.Label
+    top_wpm : tkinter.ttk.Label
         Tkinter Label displaying the highest WPM (words per minute) value in the data.
-    avg_wpm : tkinter.Label
+    avg_wpm : tkinter.ttk.Label
         Tkinter Label displaying the mean WPM (words per minute) value.
-    avg_acc : tkinter.Label
+    avg_acc : tkinter.ttk.Label
         Tkinter Label displaying the mean typing accuracy.
-    chars_typed : tkinter.Label
+    chars_typed : tkinter.ttk.Label
         Tkinter Label displaying the number of characters typed in all tests in the data.
-    words_est : tkinter.Label
+    words_est : tkinter.ttk.Label
         Tkinter Label displaying an estimate for the total number of words typed, assuming 5 character words.
-    typing_time : tkinter.Label
+    typing_time : tkinter.ttk.Label
         Tkinter Label displaying the total time spent typing; The sum of the durations of all tests in the data.
-    close_button : tkinter.Button
+    close_button : tkinter.ttk.Button
         Tkinter button widget that closes the analytics page.
+    heatmap_button : tkinter.ttk.Button
+        Tkinter button widget that switches between the results plots and the keyboard heatmap.
+    show_heatmap : bool
+        Whether the keyboard heatmap is shown instead of the results plots.
+    filters_frame : tkinter.ttk.Frame
+        Tkinter frame containing the filter widgets.
+    period_var : tkinter.StringVar
+        The period chosen in the period menu, one of PERIODS.
+    start_entry : tkinter.ttk.Entry
+        Entry for the first date of a custom range, as YYYY-MM-DD.
+    end_entry : tkinter.ttk.Entry
+        Entry for the last date of a custom range, as YYYY-MM-DD.
+    duration_var : tkinter.StringVar
+        The duration chosen in the duration menu.
+    filter_status : tkinter.ttk.Label
+        Label explaining why the filters couldn't be applied.
 
     Methods
     -------
     config_cs(colour_scheme)
         Configures the analytics page UI according to the given colour scheme.
+    toggle_heatmap()
+        Switches between the results plots and the keyboard heatmap.
+    apply_filters()
+        Filters the statistics and plots to the chosen period and duration.
     hide()
         Hides the analytics page UI
     show()
@@ -63,6 +92,13 @@ class AnalyticsUI:
 
         self.top_wpm, self.avg_wpm, self.avg_acc, self.chars_typed, self.words_est, self.typing_time, self.close_button = self.create_widgets(root)
 
+        self.heatmap_button = ttk.Button(root, text="Key Heatmap", style="Accent.TButton", command=self.toggle_heatmap)
+        self.heatmap_button.grid(row=3, column=2, sticky="")
+        self.show_heatmap = False
+
+        (self.filters_frame, self.period_var, self.start_entry, self.end_entry, self.duration_var,
+         self.filter_status) = self.create_filters(root)
+
         self.canvas = None
 
     def create_widgets(self, root):
@@ -74,41 +110,70 @@ class AnalyticsUI:
         root : tkinter.Tk
             Parent widget.
         """
-        top_wpm = tk.Label(root, font=("Arial", 16))
+        top_wpm = ttk.Label(root)
         top_wpm.grid(row=0, column=2, padx=10, pady=10, sticky="s")
-        avg_wpm = tk.Label(root, font=("Arial", 16))
+        avg_wpm = ttk.Label(root)
         avg_wpm.grid(row=1, column=2, padx=10, pady=10, sticky="ns")
-        avg_acc = tk.Label(root, font=("Arial", 16))
+        avg_acc = ttk.Label(root)
         avg_acc.grid(row=2, column=2, padx=10, pady=10, sticky="n")
 
-        chars_typed = tk.Label(root, font=("Arial", 16))
+        chars_typed = ttk.Label(root)
         chars_typed.grid(row=0, column=3, padx=10, pady=10, sticky="s")
-        words_est = tk.Label(root, font=("Arial", 16))
+        words_est = ttk.Label(root)
         words_est.grid(row=1, column=3, padx=10, pady=10, sticky="ns")
-        typing_time = tk.Label(root, font=("Arial", 16))
+        typing_time = ttk.Label(root)
         typing_time.grid(row=2, column=3, padx=10, pady=10, sticky="n")
 
-        close_button = tk.Button(root, text="close", font=("Arial", 16))
-        close_button.grid(row=3, column=2, columnspan=2, sticky="")
+        close_button = ttk.Button(root, text="close", style="Accent.TButton")
+        close_button.grid(row=3, column=3, sticky="")
         return top_wpm, avg_wpm, avg_acc, chars_typed, words_est, typing_time, close_button
 
+    def create_filters(self, root):
+        """
+        Creates the widgets to filter the analytics by period and test duration. Choosing from a menu applies the
+        filters straight away; a custom range is applied with the Apply button.
+
+        Parameters
+        ----------
+        root : tkinter.Tk
+            Parent widget.
+        """
+        filters_frame = ttk.Frame(root)
+        filters_frame.grid(row=4, column=0, columnspan=4)
+
+        period_var = tk.StringVar(value="All time")
+        period_menu = ttk.OptionMenu(filters_frame, period_var, "All time", *PERIODS, command=self.apply_filters)
+        period_menu.grid(row=0, column=0, padx=10)
+
+        ttk.Label(filters_frame, text="From", style="Small.TLabel").grid(row=0, column=1)
+        start_entry = ttk.Entry(filters_frame, width=11, font=("Arial", "14"))
+        start_entry.grid(row=0, column=2, padx=5)
+        ttk.Label(filters_frame, text="to", style="Small.TLabel").grid(row=0, column=3)
+        end_entry = ttk.Entry(filters_frame, width=11, font=("Arial", "14"))
+        end_entry.grid(row=0, column=4, padx=5)
+
+        duration_var = tk.StringVar(value=DURATION_CHOICES[0])
+        duration_menu = ttk.OptionMenu(filters_frame, duration_var, DURATION_CHOICES[0], *DURATION_CHOICES,
+                                       command=self.apply_filters)
+        duration_menu.grid(row=0, column=5, padx=10)
+
+        apply_button = ttk.Button(filters_frame, text="Apply", style="Small.Primary.TButton",
+                                  command=self.apply_filters)
+        apply_button.grid(row=0, column=6, padx=5)
+        filter_status = ttk.Label(filters_frame, style="Small.TLabel")
+        filter_status.grid(row=1, column=0, columnspan=7)
+        return filters_frame, period_var, start_entry, end_entry, duration_var, filter_status
+
     def configure_cs(self, colour_scheme):
         """
-        Configures the colour scheme of the analytics page widgets according to the given colour scheme.
+        Sets the colour scheme of the analytics page's figures. The widgets are styled by the theme engine (see
+        theme.py).
 
         Parameters
         ----------
         colour_scheme : dict
             The colour scheme to apply.
         """
-        self.top_wpm.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.avg_wpm.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.avg_acc.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.chars_typed.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.words_est.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.typing_time.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.close_button.configure(bg=colour_scheme["highlight"], fg=colour_scheme["main_text"])
-
         self.colour_scheme = colour_scheme
 
     def update_stat_widgets(self):
@@ -122,6 +187,7 @@ class AnalyticsUI:
         self.words_est.configure(text=f"Estimated words typed: {self.analytics_brain.words_est}")
         self.typing_time.configure(text=f"Time spent typing: {self.analytics_brain.time_spent_typing}")
 
+    @profiled
     def open_analytics_page(self, colour_scheme):
         """
         Performs the procedure to open the analytics page.
@@ -136,13 +202,59 @@ class AnalyticsUI:
         self.analytics_brain.update_stats()
         self.update_stat_widgets()
 
-        if self.analytics_brain.empty_results:
+        if self.show_heatmap:
+            fig = self.analytics_brain.open_heatmap(colour_scheme)
+        elif self.analytics_brain.empty_results:
             return
-
-        fig = self.analytics_brain.open_plots(colour_scheme)
+        else:
+            fig = self.analytics_brain.open_plots(colour_scheme)
         self.canvas = FigureCanvasTkAgg(fig, self.root)
         self.canvas.get_tk_widget().grid(row=0, rowspan=4, column=0, columnspan=2, sticky="news")
 
+    def toggle_heatmap(self):
+        """
+        Switches between the results plots and the keyboard heatmap.
+        """
+        self.show_heatmap = not self.show_heatmap
+        self.heatmap_button.configure(text="Results" if self.show_heatmap else "Key Heatmap")
+        self.close_figure()
+        self.open_analytics_page(self.colour_scheme)
+
+    def apply_filters(self, choice=None):
+        """
+        Filters the statistics and plots to the chosen period and test duration, and redraws them.
+
+        Parameters
+        ----------
+        choice : str
+            The menu choice, when called by a menu. Unused, as every filter is read from the widgets.
+        """
+        period = self.period_var.get()
+        try:
+            if period == CUSTOM_RANGE:
+                start, end = parse_date(self.start_entry.get()), parse_date(self.end_entry.get(), end=True)
+            elif PERIODS[period]:
+                # The last n days include today
+                start, end = datetime.date.today() - datetime.timedelta(days=PERIODS[period] - 1), None
+            else:
+                start, end = None, None
+        except ValueError as e:
+            self.filter_status.configure(text=str(e))
+            return
+        self.filter_status.configure(text="")
+        self.analytics_brain.set_filters(start, end, parse_duration(self.duration_var.get()))
+        self.close_figure()
+        self.open_analytics_page(self.colour_scheme)
+
+    def close_figure(self):
+        """
+        Removes the figure canvas.
+        """
+        if self.canvas:
+            self.canvas.get_tk_widget().destroy()
+            self.canvas = None
+        plt.close("all")
+
     def show(self):
         """
         Procedure to make the analytics page the current display
@@ -154,6 +266,8 @@ class AnalyticsUI:
         self.words_est.grid()
         self.typing_time.grid()
         self.close_button.grid()
+        self.heatmap_button.grid()
+        self.filters_frame.grid()
         self.open_analytics_page(self.colour_scheme)
 
     def hide(self):
@@ -167,6 +281,8 @@ class AnalyticsUI:
         self.words_est.grid_remove()
         self.typing_time.grid_remove()
         self.close_button.grid_remove()
+        self.heatmap_button.grid_remove()
+        self.filters_frame.grid_remove()
 
         plt.close("all")  # close the figure.
 
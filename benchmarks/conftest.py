@@ -0,0 +1,188 @@
+"""
+Shared fixtures and the baseline regression check for the benchmark suite.
+
+Run the suite from the project directory with ``python -m pytest``. Tk widgets are real when a display is available
+(run under ``xvfb-run`` on a headless machine) and replaced by the stand-ins in headless_tk.py otherwise.
+
+Baselines are stored as JSON, mapping each benchmark's name to its median time in seconds:
+
+- ``--bench-save-baseline`` records the medians of the current run.
+- On later runs, any benchmark whose median is slower than its baseline by more than ``--bench-threshold``
+  (a fraction, 0.5 by default) is reported and the session fails.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# The app modules are flat files in the project directory and open their data files relative to the working directory.
+sys.path.insert(0, REPO_ROOT)
+os.chdir(REPO_ROOT)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from headless_tk import HeadlessRoot, headless_home_ui  # noqa: E402
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("baseline", "benchmark baseline comparison")
+    group.addoption("--bench-baseline", default=DEFAULT_BASELINE,
+                    help="JSON file holding the baseline medians (default: benchmarks/baseline.json).")
+    group.addoption("--bench-save-baseline", action="store_true", default=False,
+                    help="Write the medians of this run to the baseline file instead of comparing.")
+    group.addoption("--bench-threshold", type=float, default=0.5,
+                    help="Allowed slowdown as a fraction of the baseline median before the run fails (default: 0.5).")
+
+
+def pytest_configure(config):
+    config._bench_medians = {}
+
+
+@pytest.fixture(autouse=True)
+def _record_median(request):
+    """
+    Records the median time of every benchmark that ran, for the baseline check.
+    """
+    if "benchmark" not in request.fixturenames:
+        yield
+        return
+    benchmark = request.getfixturevalue("benchmark")
+    yield
+    metadata = benchmark.stats
+    if metadata:
+        request.config._bench_medians[request.node.nodeid] = metadata.stats.median
+
+
+def _find_regressions(config):
+    """
+    Compares this run's medians against the stored baseline.
+
+    Returns
+    -------
+    regressions : list
+        Tuples of (benchmark name, baseline median, current median) for every benchmark over the threshold.
+    """
+    with open(config.getoption("--bench-baseline"), "r") as f:
+        baseline = json.load(f)
+    threshold = config.getoption("--bench-threshold")
+    regressions = []
+    for name, median in sorted(config._bench_medians.items()):
+        if name in baseline and median > baseline[name] * (1 + threshold):
+            regressions.append((name, baseline[name], median))
+    return regressions
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    medians = config._bench_medians
+    config._bench_regressions = []
+    if not medians:
+        return
+
+    baseline_file = config.getoption("--bench-baseline")
+    if config.getoption("--bench-save-baseline"):
+        with open(baseline_file, "w") as f:
+            json.dump(medians, f, indent=2, sort_keys=True)
+        return
+
+    if os.path.exists(baseline_file):
+        config._bench_regressions = _find_regressions(config)
+        if config._bench_regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    regressions = getattr(config, "_bench_regressions", [])
+    if not regressions:
+        return
+    terminalreporter.section("benchmark regressions", red=True)
+    for name, before, after in regressions:
+        terminalreporter.write_line(f"{name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms "
+                                    f"({(after / before - 1) * 100:+.0f}%)")
+
+
+def _display_available():
+    if not os.environ.get("DISPLAY"):
+        return False
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+    except Exception:
+        return False
+    return True
+
+
+DISPLAY_AVAILABLE = _display_available()
+
+
+@pytest.fixture
+def tk_root():
+    """
+    A withdrawn Tk root when a display is available, otherwise a headless stand-in.
+    """
+    if not DISPLAY_AVAILABLE:
+        yield HeadlessRoot()
+        return
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def home_ui(tk_root):
+    if not DISPLAY_AVAILABLE:
+        return headless_home_ui()
+    from home_ui import HomeUI
+    return HomeUI(tk_root)
+
+
+def write_results(path, rows, seed=0):
+    """
+    Writes a results file with the given number of synthetic rows.
+
+    Parameters
+    ----------
+    path : str
+        Destination of the csv file.
+    rows : int
+        Number of results to generate.
+    seed : int
+        Seed for the random generator, so files are identical between runs.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2020-01-01T00:00:00")
+    df = pd.DataFrame({
+        "wpm": rng.normal(60, 15, rows).clip(0).round(1),
+        "accuracy": rng.integers(70, 101, rows).astype(float),
+        "timestamp": start + np.sort(rng.integers(0, 4 * 365 * 86400, rows)).astype("timedelta64[s]"),
+        "duration": rng.choice([15, 30, 60], rows),
+        "test_id": [f"en-{test_seed:08x}" for test_seed in rng.integers(0, 2 ** 32, rows)],
+    })
+    df.to_csv(path, index=False)
+
+
+@pytest.fixture(scope="session")
+def results_files(tmp_path_factory):
+    """
+    Factory returning the path of a pristine results file with the given number of rows.
+
+    Files are generated once per session; callers that modify a file should copy it first.
+    """
+    directory = tmp_path_factory.mktemp("results")
+    cache = {}
+
+    def get(rows):
+        if rows not in cache:
+            path = directory / f"results_{rows}.csv"
+            write_results(path, rows)
+            cache[rows] = path
+        return cache[rows]
+
+    return get
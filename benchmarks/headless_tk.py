@@ -0,0 +1,102 @@
+"""
+Stand-ins for the Tk widgets used by the app, so the logic classes can be benchmarked without a display.
+
+When a display is available (a real desktop or Xvfb) the benchmarks use real Tk widgets instead; see conftest.py.
+"""
+from colour_schemes import COLOUR_SCHEMES
+
+
+class HeadlessWidget:
+    """
+    A widget that accepts any Tk method call and does nothing.
+
+    Attributes
+    ----------
+    children : list
+        Widgets returned by winfo_children().
+    options : dict
+        Options set through item assignment, e.g. text['state'] = 'normal'.
+    """
+    def __init__(self, children=None):
+        self.children = children or []
+        self.options = {}
+
+    def __getattr__(self, name):
+        return _noop
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def __getitem__(self, key):
+        return self.options.get(key)
+
+    def winfo_children(self):
+        return self.children
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+class HeadlessRoot(HeadlessWidget):
+    """
+    Root window stand-in. Scheduled callbacks are dropped, so countdowns never fire during a benchmark.
+    """
+    def after(self, ms, func=None, *args):
+        return "after#0"
+
+
+class HeadlessUI:
+    """
+    Generic UI stand-in exposing the given attributes.
+    """
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+    def __getattr__(self, name):
+        return _noop
+
+
+def headless_home_ui():
+    """
+    Builds a stand-in for HomeUI with the attributes TypingTestLogic relies on.
+
+    Returns
+    -------
+    home_ui : HeadlessUI
+        Stand-in for the HomeUI class.
+    """
+    start_buttons = [HeadlessWidget() for _ in range(3)]
+    utility_buttons = [HeadlessWidget() for _ in range(2)]
+    return HeadlessUI(home_frame=HeadlessWidget(),
+                      text=HeadlessWidget(),
+                      timer_txt=HeadlessWidget(),
+                      start_buttons_frame=HeadlessWidget(start_buttons),
+                      utility_buttons_frame=HeadlessWidget(utility_buttons),
+                      options_button=HeadlessWidget(),
+                      test_id_frame=HeadlessWidget(),
+                      retry_button=HeadlessWidget(),
+                      test_id_entry=HeadlessWidget(),
+                      load_id_button=HeadlessWidget(),
+                      race_button=HeadlessWidget(),
+                      start_buttons=start_buttons,
+                      utility_buttons=utility_buttons,
+                      test_focus=True,
+                      colour_scheme=COLOUR_SCHEMES[0])
+
+
+def headless_scoreboard_ui():
+    """
+    Builds a stand-in for ScoreboardUI.
+
+    Returns
+    -------
+    scoreboard_ui : HeadlessUI
+        Stand-in for the ScoreboardUI class.
+    """
+    return HeadlessUI(score_titles=[HeadlessWidget() for _ in range(3)],
+                      scoreboards=[HeadlessWidget() for _ in range(3)],
+                      close_scores_button=HeadlessWidget(),
+                      analytics_button=HeadlessWidget(),
+                      history_button=HeadlessWidget(),
+                      all_profiles_button=HeadlessWidget())
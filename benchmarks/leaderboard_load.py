@@ -0,0 +1,186 @@
+"""
+Load test for the asyncio leaderboard service.
+
+Simulates many app instances, each holding its own keep-alive connection and alternating result uploads with top
+score queries, then reports the throughput and latency percentiles:
+
+    python benchmarks/leaderboard_load.py --clients 2000 --requests 20
+
+By default the service is started in a separate process on a free port. Pass ``--url`` to load an already running
+service instead.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from leaderboard_server import LeaderboardService, start_server  # noqa: E402
+
+DURATIONS = [15, 30, 60]
+
+
+async def request(reader, writer, method, target, data=None):
+    """
+    Sends one request over an open connection and reads the response.
+
+    Returns
+    -------
+    status : int
+        HTTP status code of the response.
+    response : dict
+        The decoded JSON response.
+    """
+    body = b"" if data is None else json.dumps(data).encode("utf-8")
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode("latin-1") + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = next(int(line.split(":", 1)[1]) for line in lines if line.lower().startswith("content-length:"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def simulate_client(client, host, port, requests, batch, latencies, errors):
+    """
+    One simulated app instance: uploads a batch of results on every other request and queries the top scores on
+    the others.
+    """
+    rng = random.Random(client)
+    machine = f"load-{client:05d}"
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        errors.append("connect")
+        return
+    try:
+        for i in range(requests):
+            if i % 2 == 0:
+                results = [{"id": f"{machine}-{i}-{j}", "profile": "Default", "wpm": round(rng.gauss(60, 15), 1),
+                            "accuracy": 95.0, "timestamp": "2024-01-01 00:00:00",
+                            "duration": rng.choice(DURATIONS), "test_id": ""} for j in range(batch)]
+                call = ("POST", "/results", {"machine": machine, "results": results})
+            else:
+                call = ("GET", f"/top?duration={rng.choice(DURATIONS)}&n=10", None)
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, *call)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+async def run_load(url, clients, requests, batch=5):
+    """
+    Runs the simulated clients against a leaderboard service.
+
+    Parameters
+    ----------
+    url : str
+        Base URL of the service.
+    clients : int
+        Number of simulated app instances, each with its own connection.
+    requests : int
+        Requests made by each client.
+    batch : int
+        Results per upload.
+
+    Returns
+    -------
+    report : dict
+        Number of requests and errors, requests per second, and the p50, p99 and maximum latency in milliseconds.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(simulate_client(client, parsed.hostname, parsed.port, requests, batch, latencies, errors)
+                           for client in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {"requests": len(latencies),
+            "errors": len(errors),
+            "requests_per_sec": len(latencies) / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            "max_ms": float(latencies.max()) if len(latencies) else None}
+
+
+def _serve(connection):
+    async def serve():
+        server = await start_server(LeaderboardService(), port=0)
+        connection.send(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+    asyncio.run(serve())
+
+
+def start_server_process():
+    """
+    Starts the leaderboard service in a separate process on a free port.
+
+    Returns
+    -------
+    process : multiprocessing.Process
+        The server process. Terminate it when finished.
+    url : str
+        Base URL of the service.
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child,), daemon=True)
+    process.start()
+    return process, f"http://localhost:{parent.recv()}"
+
+
+def raise_file_limit(clients):
+    """
+    Raises the open file limit so every simulated client can hold a connection, where the hard limit allows.
+    """
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = clients + 256
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted if hard == resource.RLIM_INFINITY else min(wanted, hard),
+                                                    hard))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the leaderboard service.")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client.")
+    parser.add_argument("--batch", type=int, default=5, help="Results per upload.")
+    parser.add_argument("--url", help="URL of a running service (default: start one).")
+    args = parser.parse_args(argv)
+
+    raise_file_limit(args.clients)
+    process, url = (None, args.url) if args.url else start_server_process()
+    try:
+        report = asyncio.run(run_load(url, args.clients, args.requests, args.batch))
+    finally:
+        if process is not None:
+            process.terminate()
+    print(f"{args.clients} clients, {report['requests']} requests, {report['errors']} errors")
+    print(f"{report['requests_per_sec']:.0f} requests/sec, p50 {report['p50_ms']:.2f} ms, "
+          f"p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Load test for the race relay.
+
+Simulates many racers, split evenly between rooms, each holding a connection to the relay and sending progress
+updates at the app's rate while reading everyone else's, then reports the relay's throughput and the update latency
+from sender to receiver:
+
+    python benchmarks/race_relay_load.py --racers 120 --rooms 1 --seconds 5
+
+By default the relay is started in a separate process on a free port. Pass ``--address`` to load an already running
+relay instead.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from race_client import PROGRESS_INTERVAL, parse_address  # noqa: E402
+from race_relay import RaceRelay, encode, start_server  # noqa: E402
+
+
+async def simulate_racer(racer, room, host, port, updates, joined, everyone_joined, latencies, errors):
+    """
+    One simulated racer: joins a room, then sends a progress update every PROGRESS_INTERVAL while recording how long
+    the other racers' updates took to arrive.
+
+    Returns
+    -------
+    received : int
+        Number of progress updates received from the other racers.
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        errors.append("connect")
+        joined()
+        return 0
+    received = 0
+
+    async def read():
+        # Deliveries are counted in each chunk read, but only the first (oldest) is decoded to measure the latency,
+        # so the simulated racers don't use more time than the relay
+        nonlocal received
+        partial = b""
+        while True:
+            chunk = await reader.read(1 << 16)
+            if not chunk:
+                return
+            arrived = time.perf_counter()
+            received += chunk.count(b'"type":"progress"')
+            lines = (partial + chunk).split(b"\n")
+            partial = lines.pop()
+            for line in lines:
+                message = json.loads(line)
+                if message["type"] == "progress":
+                    latencies.append(arrived - message["sent"])
+                    break
+
+    reading = asyncio.ensure_future(read())
+    try:
+        writer.write(encode({"type": "join", "room": room, "name": f"load-{racer:04d}"}))
+        await writer.drain()
+        joined()
+        await everyone_joined.wait()
+        # Spread the racers' updates over the interval, as real racers start at different times
+        await asyncio.sleep(PROGRESS_INTERVAL * (racer % 10) / 10)
+        for update in range(updates):
+            writer.write(encode({"type": "progress", "word": update // 5, "char": update % 5, "wpm": 60.0,
+                                 "done": update == updates - 1, "sent": time.perf_counter()}))
+            await writer.drain()
+            await asyncio.sleep(PROGRESS_INTERVAL)
+        await asyncio.sleep(0.5)  # Wait for the last updates from the others
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        if reading.done() and not reading.cancelled() and reading.exception():
+            errors.append(type(reading.exception()).__name__)
+        reading.cancel()
+        writer.close()
+    return received
+
+
+async def run_load(address, racers, rooms=1, seconds=5.0):
+    """
+    Runs the simulated racers against a race relay.
+
+    Parameters
+    ----------
+    address : str
+        Address of the relay, e.g. "localhost:8767".
+    racers : int
+        Number of simulated racers, each with its own connection.
+    rooms : int
+        Number of rooms the racers are split between.
+    seconds : float
+        How long each racer sends updates for.
+
+    Returns
+    -------
+    report : dict
+        Number of updates sent, delivered and expected (each update goes to everyone else in the room), the
+        deliveries per second, the p50, p99 and maximum latency in milliseconds, and the number of errors.
+    """
+    host, port = parse_address(address)
+    updates = max(1, int(seconds / PROGRESS_INTERVAL))
+    latencies, errors = [], []
+    everyone_joined = asyncio.Event()
+    waiting = [racers]
+
+    def joined():
+        waiting[0] -= 1
+        if not waiting[0]:
+            everyone_joined.set()
+
+    room_sizes = [len(range(room, racers, rooms)) for room in range(rooms)]
+    start = time.perf_counter()
+    received = await asyncio.gather(*(simulate_racer(racer, f"load-room-{racer % rooms}@30", host, port, updates,
+                                                     joined, everyone_joined, latencies, errors)
+                                      for racer in range(racers)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {"updates_sent": racers * updates,
+            "updates_delivered": sum(received),
+            "updates_expected": sum(size * (size - 1) * updates for size in room_sizes),
+            "deliveries_per_sec": sum(received) / elapsed,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            "max_ms": float(latencies.max()) if len(latencies) else None,
+            "errors": len(errors)}
+
+
+def _serve(connection):
+    async def serve():
+        relay = RaceRelay()
+        server = await start_server(relay, port=0)
+        connection.send(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+    asyncio.run(serve())
+
+
+def start_relay_process():
+    """
+    Starts the race relay in a separate process on a free port.
+
+    Returns
+    -------
+    process : multiprocessing.Process
+        The relay process. Terminate it when finished.
+    address : str
+        Address of the relay.
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child,), daemon=True)
+    process.start()
+    return process, f"localhost:{parent.recv()}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the race relay.")
+    parser.add_argument("--racers", type=int, default=120)
+    parser.add_argument("--rooms", type=int, default=1, help="Rooms the racers are split between.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="How long each racer sends updates for.")
+    parser.add_argument("--address", help="Address of a running relay (default: start one).")
+    args = parser.parse_args(argv)
+
+    process, address = (None, args.address) if args.address else start_relay_process()
+    try:
+        report = asyncio.run(run_load(address, args.racers, args.rooms, args.seconds))
+    finally:
+        if process is not None:
+            process.terminate()
+    print(f"{args.racers} racers in {args.rooms} room(s), {report['updates_sent']} updates sent, "
+          f"{report['updates_delivered']}/{report['updates_expected']} delivered, {report['errors']} errors")
+    print(f"{report['deliveries_per_sec']:.0f} deliveries/sec, p50 {report['p50_ms']:.2f} ms, "
+          f"p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
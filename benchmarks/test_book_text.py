@@ -0,0 +1,204 @@
+"""
+Tests and benchmarks for book mode, which streams tests from a memory-mapped text file.
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import book_text
+from book_text import Book, BookIndex, BookPositions
+from key_stats import KeyStats
+from results_io import ResultsInOut
+from typing_test import TypingTestLogic
+
+
+def write_book(path, words):
+    """
+    Writes a book of the given number of words, with lines of varying length, some blank lines and some non-ASCII
+    words.
+    """
+    rng = random.Random(0)
+    vocabulary = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "naïve", "café", "tschüß", "x"]
+    lines, line = [], []
+    for _ in range(words):
+        line.append(rng.choice(vocabulary))
+        if rng.random() < 0.1:
+            lines.append(" ".join(line) + ("\n" if rng.random() < 0.2 else ""))
+            line = []
+    lines.append(" ".join(line))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def book_index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(book_text, "BOOK_INDEX_DIR", str(tmp_path / "book_index"))
+
+
+@pytest.fixture
+def small_book(tmp_path):
+    return write_book(tmp_path / "book.txt", 20_000)
+
+
+def test_index_matches_split(small_book, monkeypatch):
+    monkeypatch.setattr(book_text, "SCAN_CHUNK", 4096)  # Words and lines cross the chunk boundaries
+    with open(small_book, "rb") as f:
+        data = f.read()
+    book = Book(small_book)
+    book.start_indexing()
+    book.wait_for_index()
+    index = book.index
+    assert index.word_count == len(data.split()) == 20_000
+    assert index.line_count == len(data.splitlines())
+
+    words = data.decode("utf-8").split()
+    for word_number in [0, 1, 1023, 1024, 5000, 19_999]:
+        book.seek_word(word_number)
+        assert book.word_number() == word_number
+        assert book.read_words(book.position, 3)[0] == words[word_number:word_number + 3]
+
+    book.seek_line(100)
+    line_start = sum(len(line) for line in data.splitlines(keepends=True)[:100])
+    assert not data[line_start:book.position].strip() and data[book.position] > 0x20
+
+    # The cached index is used the next time the book is opened
+    cached = BookIndex.load(small_book)
+    assert cached.word_count == index.word_count and (cached.offsets == index.offsets).all()
+    book.close()
+
+
+def test_tests_continue_through_book(small_book):
+    with open(small_book, "r", encoding="utf-8") as f:
+        words = f.read().split()
+    book = Book(small_book)
+    test = book.next_test()
+    assert test.words == words[:200]
+    book.advance(57)
+    assert book.next_test().words == words[57:257]
+
+    # At the end of the book, tests start again from the beginning
+    book.seek_fraction(1.0)
+    assert book.next_test().words == words[:200]
+    book.close()
+
+
+def test_seek_fraction_lands_on_word(small_book):
+    with open(small_book, "rb") as f:
+        data = f.read()
+    book = Book(small_book)
+    for fraction in [0.1, 0.25, 0.5, 0.9]:
+        book.seek_fraction(fraction)
+        assert book.position >= int(fraction * len(data))
+        assert data[book.position] > 0x20 and data[book.position - 1] <= 0x20
+    book.close()
+
+
+def test_book_mode_resumes(tmp_path, home_ui, tk_root, small_book):
+    positions_file = str(tmp_path / "book_positions.json")
+
+    def typing_test():
+        results_io = ResultsInOut()
+        results_io.filename = str(tmp_path / "results.csv")
+        return TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")),
+                               BookPositions(positions_file))
+
+    first = typing_test()
+    first.open_book(small_book)
+    first.setup_test()
+    words = first.test_words
+    for word in words[:40]:
+        for char in word:
+            first.check_char(SimpleNamespace(char=char, keysym=char))
+        first.check_word(SimpleNamespace(char=" ", keysym="space"))
+    first.stop_test()
+    first.results_io.close()
+
+    # A new session continues after the words typed
+    second = typing_test()
+    assert second.book is not None
+    assert second.test_words[:160] == words[40:]
+    second.set_word_list(1)
+    assert second.book is None and BookPositions(positions_file).current is None
+    second.results_io.close()
+
+
+def test_retry_keeps_book_position(tmp_path, home_ui, tk_root, small_book):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    typing_test = TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")),
+                                  BookPositions(str(tmp_path / "book_positions.json")))
+    typing_test.open_book(small_book)
+
+    def type_words(count):
+        for word in typing_test.test_words[:count]:
+            for char in word:
+                typing_test.check_char(SimpleNamespace(char=char, keysym=char))
+            typing_test.check_word(SimpleNamespace(char=" ", keysym="space"))
+        typing_test.stop_test()
+
+    typing_test.setup_test()
+    words = typing_test.test_words
+    type_words(40)
+    position = typing_test.book.position
+
+    # Retrying types the same words again, which doesn't move the position
+    typing_test.retry_test()
+    assert typing_test.test_words == words
+    type_words(10)
+    assert typing_test.book.position == position
+    typing_test.setup_test()
+    assert typing_test.test_words[:160] == words[40:]
+    results_io.close()
+
+
+@pytest.mark.parametrize("words", [1_000_000, pytest.param(20_000_000, marks=pytest.mark.slow)])
+def test_next_test_deep_in_book(benchmark, tmp_path, words):
+    book = Book(write_book(tmp_path / "large.txt", words))
+    book.seek_fraction(0.99)
+
+    test = benchmark(book.next_test)
+    assert len(test.words) == 200
+    book.close()
+
+
+def test_retry_keeps_book_position(tmp_path, home_ui, tk_root, small_book):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    typing_test = TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")),
+                                  BookPositions(str(tmp_path / "book_positions.json")))
+    typing_test.open_book(small_book)
+
+    def type_words(count):
+        for word in typing_test.test_words[:count]:
+            for char in word:
+                typing_test.check_char(SimpleNamespace(char=char, keysym=char))
+            typing_test.check_word(SimpleNamespace(char=" ", keysym="space"))
+        typing_test.stop_test()
+
+    typing_test.setup_test()
+    words = typing_test.test_words
+    type_words(40)
+    position = typing_test.book.position
+
+    # Retrying types the same words again, which doesn't move the position
+    typing_test.retry_test()
+    assert typing_test.test_words == words
+    type_words(10)
+    assert typing_test.book.position == position
+    typing_test.setup_test()
+    assert typing_test.test_words[:160] == words[40:]
+    results_io.close()
+
+
+@pytest.mark.parametrize("words", [1_000_000, pytest.param(20_000_000, marks=pytest.mark.slow)])
+def test_build_index(benchmark, tmp_path, words):
+    book = Book(write_book(tmp_path / "large.txt", words))
+
+    index = benchmark.pedantic(BookIndex.build, args=(book._buffer,), rounds=3)
+    assert index.word_count == words
+    book.index = index
+    book.seek_word(words - 1)
+    assert book.word_number() == words - 1
+    book.close()
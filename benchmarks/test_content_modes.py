@@ -0,0 +1,118 @@
+"""
+Tests and benchmarks for the test content modes: punctuation, capitals, numbers and quotes.
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from content_modes import (QUOTE_LENGTHS, apply_modifiers, get_quotes, is_valid_content, next_quote_length,
+                           quote_words, toggle_modifier)
+from key_stats import KeyStats
+from prepared_tests import TEST_WORDS, generate_test
+from results_io import ResultsInOut
+from typing_test import TypingTestLogic
+from word_corpus import WordCorpus, compile_words
+from word_data import make_test_id, parse_test_id
+
+
+@pytest.fixture
+def typing_test(tk_root, home_ui, tmp_path):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    return TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")))
+
+
+def press(typing_test, char, keysym=None):
+    """
+    Sends a key press to the handlers, in the same way the Tk bindings do.
+    """
+    event = SimpleNamespace(char=char, keysym=keysym or char)
+    if event.keysym == "space":
+        typing_test.check_word(event)
+    else:
+        typing_test.check_char(event)
+
+
+def test_content_codes():
+    assert toggle_modifier("", "c") == "c"
+    assert toggle_modifier("c", "p") == "pc"
+    assert toggle_modifier("pcn", "c") == "pn"
+    assert toggle_modifier("qm", "n") == "n"
+    assert [next_quote_length(code) for code in ["", "qs", "qm", "ql", "pc"]] == ["qs", "qm", "ql", "", "qs"]
+    assert all(is_valid_content(code) for code in ["", "p", "pn", "pcn", "qs", "ql"])
+    assert not any(is_valid_content(code) for code in ["x", "cp", "q", "qx", "pp"])
+
+    assert parse_test_id(make_test_id(1, 0x1f2e3d4c, "pc")) == (1, 0x1f2e3d4c, "pc")
+    assert parse_test_id("en-1f2e3d4c") == (0, 0x1f2e3d4c, "")
+    with pytest.raises(ValueError):
+        parse_test_id("en.xyz-1f2e3d4c")
+
+
+def test_modifiers():
+    words = ["alpha"] * 2000
+    punctuated = apply_modifiers(words, "pc", random.Random(0))
+    assert punctuated == apply_modifiers(words, "pc", random.Random(0))
+    assert punctuated[0] == "Alpha"
+    ends = [i for i, word in enumerate(punctuated) if word[-1] in ".?!"]
+    assert all(punctuated[i + 1].lstrip("\"'(")[0] == "A" for i in ends if i + 1 < len(words))
+    assert any(word.endswith(",") for word in punctuated)
+
+    numbered = apply_modifiers(words, "n", random.Random(0))
+    assert 0.1 < sum(word.isdigit() for word in numbered) / len(words) < 0.2
+    capitalised = apply_modifiers(words, "c", random.Random(0))
+    assert {word for word in capitalised} == {"alpha", "Alpha"}
+
+
+def test_quote_lengths():
+    quotes = get_quotes()
+    for length, (_, min_length, max_length) in QUOTE_LENGTHS.items():
+        quote_ids = quotes.ids_of_length(min_length, max_length)
+        assert len(quote_ids)
+        assert all(min_length <= len(quotes[i]) <= (max_length or len(quotes[i])) for i in quote_ids)
+    assert sum(len(quotes.ids_of_length(low, high)) for _, low, high in QUOTE_LENGTHS.values()) == len(quotes)
+
+    words = quote_words(quotes, "l", TEST_WORDS, random.Random(0))
+    assert len(words) >= TEST_WORDS
+    test = generate_test(0, False, None, 0x1234, "ql")
+    assert test.words == generate_test(0, False, None, 0x1234, "ql").words
+    assert test.test_id == "en.ql-00001234" and len(test.words) == TEST_WORDS
+
+
+def test_empty_quote_file_falls_back_to_words(monkeypatch):
+    no_quotes = WordCorpus(compile_words([]))
+    assert quote_words(no_quotes, "m", TEST_WORDS, random.Random(0)) == []
+
+    monkeypatch.setattr("prepared_tests.get_quotes", lambda: no_quotes)
+    test = generate_test(0, False, None, 0x1234, "qm")
+    assert test.words == generate_test(0, False, None, 0x1234).words
+    assert test.test_id == make_test_id(0, 0x1234, "")
+
+
+@pytest.mark.parametrize("content", ["", "pcn", "qm"])
+def test_generate_test_content(benchmark, content):
+    test = benchmark(generate_test, 0, False, None, None, content)
+    assert len(test.words) == TEST_WORDS
+
+
+def test_modifier_keys_and_shifted_characters(typing_test):
+    typing_test.use_test(generate_test(0, False, None, 7, "pc"))
+    typing_test.prepare_user_input()
+    first, second = typing_test.test_words[:2]
+
+    # Shift, Caps Lock and AltGr produce key presses without characters, which aren't typed characters
+    press(typing_test, "", "Shift_L")
+    for char in first:
+        press(typing_test, "", "Caps_Lock")
+        press(typing_test, char)
+    press(typing_test, "\x1b", "Escape")
+    press(typing_test, " ", "space")
+    # Several characters from an input method at once
+    press(typing_test, second + " ", "??")
+    assert typing_test.current_word == 2 and typing_test.current_char == 0
+
+    typing_test.test_duration = 60
+    wpm, accuracy, _ = typing_test.obtain_test_statistics()
+    assert accuracy == 100
+    assert wpm == (len(first) + 1) / 5  # The last word typed isn't counted
+    assert all(expected == typed for _, typed, expected in typing_test.keystrokes)
@@ -0,0 +1,49 @@
+"""
+Tests and benchmarks for the diagnostics mode.
+"""
+import os
+import pstats
+
+import pytest
+
+import diagnostics
+
+
+def callback(n):
+    return sum(range(n))
+
+
+profiled_callback = diagnostics.profiled(callback)
+
+
+@pytest.fixture
+def diagnostics_dir(tmp_path):
+    yield tmp_path
+    diagnostics.stop()
+
+
+def test_profiled_callback_off(benchmark):
+    assert not diagnostics.is_enabled()
+    assert benchmark(profiled_callback, 10) == 45
+
+
+def test_callback_baseline(benchmark):
+    # Compare with test_profiled_callback_off for the cost of the decorator when diagnostics are off
+    assert benchmark(callback, 10) == 45
+
+
+def test_session_reports(diagnostics_dir):
+    diagnostics.start(str(diagnostics_dir))
+    assert diagnostics.is_enabled()
+    for _ in range(3):
+        assert profiled_callback(1000) == 499500
+    data = [bytearray(1024) for _ in range(100)]  # noqa: F841 - held until the session ends
+
+    directory = diagnostics.stop()
+    assert not diagnostics.is_enabled()
+    assert sorted(os.listdir(directory)) == ["callbacks.txt", "memory.txt", "profile.pstats", "profile.txt"]
+    with open(os.path.join(directory, "callbacks.txt")) as f:
+        lines = f.read().splitlines()
+    assert lines[1].split()[:2] == ["callback", "3"]
+    assert "callback" in {function for _, _, function in pstats.Stats(os.path.join(directory, "profile.pstats")).stats}
+    assert diagnostics.stop() is None
@@ -0,0 +1,197 @@
+"""
+Tests and benchmarks for ghost races, where a ghost cursor replays the user's best run of a test.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import ghost_race
+from ghost_race import FRAME_INTERVAL, GhostRace, GhostRun, GhostStore, replay_positions
+from headless_tk import HeadlessRoot, HeadlessWidget, headless_home_ui
+from key_stats import KeyStats
+from prepared_tests import PAGE_WORDS
+from results_io import ResultsInOut
+from typing_test import TypingTestLogic
+
+
+class RecordingText(HeadlessWidget):
+    """
+    Text widget stand-in that remembers where the ghost tag was last added.
+    """
+    def __init__(self):
+        super().__init__()
+        self.ghost_index = None
+
+    def tag_add(self, tag, index, *args):
+        if tag == "ghost":
+            self.ghost_index = index
+
+    def tag_remove(self, tag, *args):
+        if tag == "ghost":
+            self.ghost_index = None
+
+
+class ManualRoot(HeadlessRoot):
+    """
+    Root stand-in that keeps the callbacks scheduled with after(), so a test can run them.
+    """
+    def __init__(self):
+        super().__init__()
+        self.scheduled = []
+
+    def after(self, ms, func=None, *args):
+        self.scheduled.append((ms, func))
+        return f"after#{len(self.scheduled)}"
+
+
+def press(typing_test, char):
+    event = SimpleNamespace(char=char, keysym="space" if char == " " else char)
+    if char == " ":
+        typing_test.check_word(event)
+    else:
+        typing_test.check_char(event)
+
+
+def make_typing_test(tmp_path, tk_root, home_ui, ghosts=None):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    return TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")), ghosts=ghosts)
+
+
+def keystrokes_for(text, interval=0.1, start=100.0):
+    return [(start + i * interval, char, "") for i, char in enumerate(text)]
+
+
+def test_replay_positions():
+    times, words, chars = replay_positions(keystrokes_for("ab c\bd ef", interval=0.5), duration=3)
+    assert times == [0, 0.5, 1, 1.5, 2, 2.5, 3]
+    assert list(zip(words, chars)) == [(0, 1), (0, 2), (1, 0), (1, 1), (1, 0), (1, 1), (2, 0)]
+    assert replay_positions([], 15) == ([], [], [])
+
+
+def test_store_keeps_best_run(tmp_path, monkeypatch):
+    filename = str(tmp_path / "ghosts.json")
+    store = GhostStore(filename)
+    assert store.best("en-00000001", 15) is None and store.fastest(15) is None
+
+    assert store.record("en-00000001", 15, 50.0, keystrokes_for("the fox "))
+    assert not store.record("en-00000001", 15, 40.0, keystrokes_for("the "))
+    assert store.record("en-00000002", 15, 60.0, keystrokes_for("a "))
+    assert store.record("en-00000001", 30, 70.0, keystrokes_for("a "))
+    store.save()
+
+    reloaded = GhostStore(filename)
+    best = reloaded.best("en-00000001", 15)
+    assert best.wpm == 50.0 and best.words[-1] == 2 and len(best.times) == 8
+    assert reloaded.fastest(15) == "en-00000002" and reloaded.fastest(30) == "en-00000001"
+
+    # The slowest run is forgotten when the store is full
+    monkeypatch.setattr(ghost_race, "MAX_GHOSTS", 3)
+    assert reloaded.record("en-00000003", 60, 55.0, keystrokes_for("a "))
+    assert reloaded.best("en-00000001", 15) is None and len(reloaded.runs) == 3
+
+
+def test_ghost_moves_in_batches(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(ghost_race.time, "perf_counter", lambda: clock[0])
+    root = ManualRoot()
+    moves = []
+    race = GhostRace(root, lambda word, char: moves.append((word, char)))
+
+    # 1500 keystrokes in 15 seconds, faster than the frame rate
+    keystrokes = keystrokes_for("abcd " * 300, interval=0.01, start=0)
+    run = GhostRun(60, *replay_positions(keystrokes, 15))
+    race.start(run)
+    ticks = 1
+    while race._after_id is not None:
+        ms, callback = root.scheduled[-1]
+        assert ms >= FRAME_INTERVAL * 1000
+        clock[0] += ms / 1000
+        callback()
+        ticks += 1
+
+    assert race.position == len(run.times)
+    assert moves[-1] == (run.words[-1], run.chars[-1])
+    assert race.moves == len(moves) <= ticks <= 15 / FRAME_INTERVAL + 2 < len(run.times)
+
+
+def test_slow_ghost_waits_for_next_keystroke(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(ghost_race.time, "perf_counter", lambda: clock[0])
+    root = ManualRoot()
+    race = GhostRace(root, lambda word, char: None)
+    race.start(GhostRun(10, [0, 0.5, 2.0], [0, 0, 0], [1, 2, 3]))
+    # One callback per keystroke, scheduled for the keystroke's time
+    assert [ms for ms, _ in root.scheduled] == [500]
+    clock[0] = 0.5
+    race.tick()
+    assert [ms for ms, _ in root.scheduled] == [500, 1500]
+    race.stop()
+    assert race._after_id is None and race.run is None
+
+
+def test_ghost_cursor_index(tmp_path):
+    home_ui = headless_home_ui()
+    home_ui.text = RecordingText()
+    typing_test = make_typing_test(tmp_path, HeadlessRoot(), home_ui)
+    offsets = typing_test.prepared_test.offsets
+    first, second = typing_test.test_words[:2]
+
+    for char in first + "xy ":  # Two excess characters
+        press(typing_test, char)
+    for char in second + "z":  # One excess character, space not pressed yet
+        press(typing_test, char)
+
+    typing_test.show_ghost(0, 2)
+    assert home_ui.text.ghost_index == f"1.{offsets[0] + 2}"
+    typing_test.show_ghost(1, len(second) + 3)  # The ghost's own excess characters aren't in the text
+    assert home_ui.text.ghost_index == f"1.{offsets[1] + len(second) + 2}"
+    typing_test.show_ghost(2, 1)
+    assert home_ui.text.ghost_index == f"1.{offsets[2] + 1 + 3}"
+    typing_test.show_ghost(PAGE_WORDS, 1)  # On the next page
+    assert home_ui.text.ghost_index is None
+
+
+def test_race_against_best_run(tmp_path, tk_root, home_ui):
+    ghosts = GhostStore(str(tmp_path / "ghosts.json"))
+    typing_test = make_typing_test(tmp_path, tk_root, home_ui, ghosts)
+    typing_test.race_best()  # Nothing to race yet
+    assert typing_test.ghost_run is None
+
+    test_id = typing_test.test_id
+    for word in typing_test.test_words[:5]:
+        for char in word + " ":
+            press(typing_test, char)
+    typing_test.stop_test()
+    assert ghosts.best(test_id, 15).words[-1] == 5
+
+    typing_test.setup_test()
+    assert typing_test.test_id != test_id and typing_test.ghost_run is None
+    typing_test.race_best()
+    assert typing_test.test_id == test_id and typing_test.ghost_run is not None
+    press(typing_test, typing_test.test_words[0][0])
+    assert typing_test.ghost_race.run is typing_test.ghost_run
+    typing_test.quick_restart()
+    assert typing_test.ghost_race.run is None
+    typing_test.results_io.close()
+
+
+@pytest.mark.parametrize("ghost", [False, True])
+def test_check_char_while_racing(benchmark, tmp_path, tk_root, home_ui, ghost):
+    ghosts = GhostStore(str(tmp_path / "ghosts.json"))
+    typing_test = make_typing_test(tmp_path, tk_root, home_ui, ghosts)
+    words = typing_test.test_words
+    if ghost:
+        ghosts.record(typing_test.test_id, 15, 80, keystrokes_for(" ".join(words), 0.02))
+    text = " ".join(words[:PAGE_WORDS - 1]) + " "
+
+    def type_page():
+        typing_test.setup_test(test_words=words)
+        for char in text:
+            press(typing_test, char)
+
+    benchmark(type_page)
+    assert typing_test.current_word == PAGE_WORDS - 1
+    assert (typing_test.ghost_race.run is not None) == ghost
+    typing_test.ghost_race.stop()
+    typing_test.results_io.close()
@@ -0,0 +1,75 @@
+"""
+Benchmarks for the keystroke statistics, the weak key practice mode and the keyboard heatmap.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from colour_schemes import COLOUR_SCHEMES
+from key_stats import KeyStats, practice_choices
+from keyboard_heatmap import FINGERS, KEY_LABELS, KeyboardStats, heatmap_figure
+from word_corpus import BigramIndex
+from word_data import get_bigram_index, get_corpus
+
+
+def simulated_keystrokes(words, seed=0):
+    """
+    Keystrokes for typing the given words, with frequent mistakes and slow keystrokes on "th" and "er".
+    """
+    rng = random.Random(seed)
+    keystrokes = []
+    now = 0.0
+    for word in words:
+        for i, char in enumerate(word + " "):
+            bigram = word[i - 1:i + 1] if i else ""
+            weak = bigram in ("th", "er")
+            now += rng.uniform(0.15, 0.3) if weak else rng.uniform(0.05, 0.15)
+            typed = "x" if weak and rng.random() < 0.3 else char
+            keystrokes.append((now, typed, char))
+    return keystrokes
+
+
+@pytest.fixture
+def key_stats(tmp_path):
+    key_stats = KeyStats(str(tmp_path / "key_stats.npz"))
+    for seed in range(20):
+        key_stats.update(simulated_keystrokes(get_corpus(0).choices(60, random.Random(seed)), seed))
+    return key_stats
+
+
+def test_update_one_test(benchmark, tmp_path):
+    keystrokes = simulated_keystrokes(get_corpus(0).choices(60, random.Random(0)))
+    key_stats = KeyStats(str(tmp_path / "key_stats.npz"))
+    benchmark(key_stats.update, keystrokes)
+
+
+def test_weak_bigrams_found(key_stats):
+    assert set(key_stats.weak_bigrams(2)) == {"th", "er"}
+
+
+def test_build_bigram_index(benchmark):
+    corpus = get_corpus(0)
+    benchmark(BigramIndex, corpus)
+
+
+def test_practice_choices(benchmark, key_stats):
+    corpus, bigram_index = get_corpus(0), get_bigram_index(0)
+    words = benchmark(practice_choices, corpus, bigram_index, key_stats, 200)
+    practised = sum("th" in word or "er" in word for word in words)
+    assert len(words) == 200 and practised > 100
+
+
+def test_keyboard_stats(benchmark, key_stats):
+    stats = benchmark(KeyboardStats, key_stats)
+    # "r" and "h" are the second keys of the weak bigrams, and both are typed with index fingers
+    error_rates = dict(zip(KEY_LABELS, stats.key_error_rate))
+    assert error_rates["r"] > 0.05 and error_rates["h"] > 0.05 and error_rates["a"] == 0
+    assert np.nanargmax(stats.finger_error_rate) in (FINGERS.index("Left index"), FINGERS.index("Right index"))
+
+
+def test_heatmap_figure(benchmark, key_stats):
+    def draw():
+        heatmap_figure(key_stats, COLOUR_SCHEMES[0]).canvas.draw()
+
+    benchmark.pedantic(draw, rounds=3)
@@ -0,0 +1,191 @@
+"""
+Benchmarks and checks for exporting results and merging exports into a combined leaderboard.
+"""
+import asyncio
+import datetime
+import io
+import json
+import shutil
+import socket
+import threading
+import urllib.parse
+
+import pandas as pd
+import pytest
+
+from leaderboard import Leaderboard, export_results, load_leaderboard, main, make_server, upload
+from leaderboard_load import run_load
+from leaderboard_server import LeaderboardService, start_server
+from results_archive import compact
+from results_io import ResultsInOut
+
+
+@pytest.fixture
+def exports(tmp_path, results_files):
+    """
+    Exports of a 10k result file from two machines, and of a 1k result file from a third.
+    """
+    paths = []
+    for machine, rows in [("machine-a", 10_000), ("machine-b", 10_000), ("machine-c", 1_000)]:
+        path = tmp_path / f"{machine}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            export_results(str(results_files(rows)), f, machine, "Default")
+        paths.append(str(path))
+    return paths
+
+
+def merge_all(leaderboard, paths):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            leaderboard.merge_export(f)
+    return leaderboard
+
+
+def test_merge_exports(benchmark, exports):
+    leaderboard = benchmark.pedantic(lambda: merge_all(Leaderboard(), exports), rounds=3)
+    assert leaderboard.aggregates().rows == 21_000
+    assert len(leaderboard.sources) == 3
+    assert all(len(heap) <= Leaderboard.TOP_N for heap in leaderboard.top.values())
+
+
+def test_merge_is_repeatable(exports, results_files):
+    once = merge_all(Leaderboard(), exports)
+    twice = merge_all(merge_all(Leaderboard(), exports), exports)
+    assert twice.aggregates().to_dict() == once.aggregates().to_dict()
+    assert twice.top_scores() == once.top_scores()
+
+    # machine-a and machine-b exported the same file, so their best results tie and are kept once each.
+    best_wpm = pd.read_csv(results_files(10_000)).groupby("duration")["wpm"].max()
+    for duration, scores in once.top_scores().items():
+        assert scores[0][0] == best_wpm[duration]
+        assert len({score[1] for score in scores}) == len(scores)
+
+
+def test_export_includes_archived_results(tmp_path, results_files):
+    filename = str(tmp_path / "results.csv")
+    shutil.copy(results_files(10_000), filename)
+    results_io = ResultsInOut(filename)
+    results_io.save_data(80.0, 97.0, datetime.datetime(2024, 6, 1, 12, 0, 0), 30)
+    results_io.close()
+
+    def export():
+        output = io.StringIO()
+        export_results(filename, output, "machine-a", "Default")
+        records = [json.loads(line) for line in output.getvalue().splitlines()[1:]]
+        return {record["id"] for record in records[:-1]}, records[-1]["summary"]["rows"]
+
+    ids_before, rows_before = export()
+    assert compact(filename, 365, now=datetime.datetime(2024, 1, 1))["archived"] > 0
+    ids_after, rows_after = export()
+    assert rows_before == rows_after == 10_001
+    assert ids_after == ids_before and len(ids_after) == 10_001
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        Leaderboard().merge_export(io.StringIO('{"format": "something-else"}\n'))
+
+
+def test_skips_malformed_records(tmp_path, exports, capsys):
+    with open(exports[2], "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    malformed = ['{"id": "truncated", "wpm": 7', '{"id": "no-duration", "wpm": 80.0, "timestamp": "2024-01-01"}',
+                 '{"id": "bad-wpm", "wpm": "fast", "timestamp": "2024-01-01", "duration": 30}', '{"summary": []}']
+    path = tmp_path / "malformed.jsonl"
+    path.write_text("\n".join(lines[:1] + malformed + lines[1:]) + "\n", encoding="utf-8")
+
+    leaderboard = Leaderboard()
+    with open(path, "r", encoding="utf-8") as f:
+        assert leaderboard.merge_export(f) == len(malformed)
+    assert leaderboard.records_skipped == len(malformed)
+    assert leaderboard.results_seen == 1_000 and leaderboard.aggregates().rows == 1_000
+
+    output = str(tmp_path / "leaderboard.json")
+    main(["merge", str(path), "-o", output])
+    assert f"Skipped {len(malformed)} malformed records" in capsys.readouterr().out
+    assert load_leaderboard(output).records_skipped == len(malformed)
+
+
+def test_upload_server(tmp_path, exports):
+    server = make_server(0, str(tmp_path / "leaderboard.json"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://localhost:{server.server_address[1]}"
+    try:
+        upload(exports[2], url)
+        upload(exports[2], url)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    with open(tmp_path / "leaderboard.json", "r") as f:
+        saved = Leaderboard.from_dict(json.load(f))
+    assert saved.exports_merged == 2
+    assert saved.aggregates().rows == 1_000
+
+
+@pytest.fixture
+def leaderboard_service():
+    """
+    The asyncio leaderboard service running on a free port in a background thread. Yields the service and its URL.
+    """
+    service = LeaderboardService()
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(start_server(service, port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield service, f"http://localhost:{server.sockets[0].getsockname()[1]}"
+
+    async def shutdown():
+        server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_results_uploaded(tmp_path, leaderboard_service):
+    service, url = leaderboard_service
+    results_io = ResultsInOut(str(tmp_path / "results.csv"), upload_url=url)
+    for i in range(250):
+        results_io.save_data(50.0 + i / 10, 95.0, datetime.datetime(2024, 1, 1, 12, 0, i % 60), 30)
+    results_io.close()
+
+    stats = results_io.writer_stats()
+    assert stats["rows_uploaded"] == 250 and stats["uploads_dropped"] == 0
+    assert results_io._pool.connections_opened == 1
+    assert service.results_received == 250
+    assert service.leaderboard.top_scores()[30][0][0] == 74.9
+
+
+@pytest.mark.parametrize("content_length", ["ten", "-5"])
+def test_invalid_content_length(leaderboard_service, content_length):
+    service, url = leaderboard_service
+    address = urllib.parse.urlsplit(url)
+    with socket.create_connection((address.hostname, address.port), timeout=5) as connection:
+        connection.sendall(f"POST /results HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode("latin-1"))
+        response = connection.makefile("rb").read()  # Until the service closes the connection
+    assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert b"Connection: close" in response and b"Invalid Content-Length" in response
+
+
+def test_uploads_give_up_when_server_is_down(tmp_path, monkeypatch):
+    monkeypatch.setattr("results_io.UPLOAD_BACKOFF", 0.01)
+    results_io = ResultsInOut(str(tmp_path / "results.csv"), upload_url="http://localhost:9")
+    results_io.save_data(60.0, 95.0, datetime.datetime(2024, 1, 1), 30)
+    results_io.flush()
+    results_io._uploader.join(timeout=5)  # Gives up after the retries
+    results_io.close()
+    assert results_io.writer_stats()["uploads_dropped"] == 1
+    assert len(results_io.load_data()) == 1
+
+
+def test_service_load(benchmark, leaderboard_service):
+    _, url = leaderboard_service
+    report = benchmark.pedantic(lambda: asyncio.run(run_load(url, clients=200, requests=6)), rounds=1)
+    assert report["errors"] == 0 and report["requests"] == 1_200
@@ -0,0 +1,113 @@
+"""
+Tests and benchmarks for the metrics exported for monitoring many copies of the app.
+"""
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from analytics_brain import AnalyticsBrain
+from key_stats import KeyStats
+from metrics import CONTENT_TYPE, MetricSet, MetricsExporter, render
+from results_io import ResultsInOut
+from typing_test import TypingTestLogic
+
+
+def test_render_openmetrics():
+    metric_set = MetricSet()
+    latency = metric_set.histogram("app_latency_seconds", "Latency.", buckets=(0.1, 1))
+    for value in [0.05, 0.1, 0.5, 5]:
+        latency.observe(value)
+    tests = metric_set.counter("app_tests", 'Tests "completed".', label="duration")
+    tests.labels(30).inc()
+    tests.labels(15).inc(2)
+    metric_set.gauge("app_startup_seconds", "Startup time.")  # Not set, so not exported
+
+    assert render([metric_set]).splitlines() == [
+        "# TYPE app_latency_seconds histogram",
+        "# HELP app_latency_seconds Latency.",
+        'app_latency_seconds_bucket{le="0.1"} 2',
+        'app_latency_seconds_bucket{le="1.0"} 3',
+        'app_latency_seconds_bucket{le="+Inf"} 4',
+        "app_latency_seconds_count 4",
+        "app_latency_seconds_sum 5.65",
+        "# TYPE app_tests counter",
+        '# HELP app_tests Tests \\"completed\\".',
+        'app_tests_total{duration="15"} 2',
+        'app_tests_total{duration="30"} 1',
+        "# TYPE app_startup_seconds gauge",
+        "# HELP app_startup_seconds Startup time.",
+        "# EOF",
+    ]
+
+
+@pytest.fixture
+def results_io(tmp_path):
+    results_io = ResultsInOut(str(tmp_path / "results.csv"))
+    yield results_io
+    results_io.close()
+
+
+def test_app_metrics(tmp_path, tk_root, home_ui, results_io):
+    typing_test = TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")))
+    word = typing_test.test_words[0]
+    for char in word:
+        typing_test.check_char(SimpleNamespace(char=char, keysym=char))
+    typing_test.check_word(SimpleNamespace(char=" ", keysym="space"))
+    typing_test.stop_test()
+    results_io.flush()
+    results_io.load_data()
+    analytics_brain = AnalyticsBrain(results_io, typing_test.key_stats)
+
+    assert typing_test.metrics["typing_test_tests_completed"].labels(15).value == 1
+    handlers = typing_test.metrics["typing_test_handler_seconds"]
+    assert handlers.labels("check_char").count() == len(word) and handlers.labels("stop_test").count() == 1
+    assert results_io.metrics["typing_test_results_write_seconds"].labels().count() == 1
+    assert results_io.metrics["typing_test_results_written"].labels().value == 1
+    assert results_io.metrics["typing_test_results_load_seconds"].labels("load_data").count() == 1
+    assert analytics_brain.metrics["typing_test_analytics_seconds"].labels("update_stats").count() == 1
+
+    text = render([typing_test.metrics, results_io.metrics, analytics_brain.metrics])
+    assert 'typing_test_tests_completed_total{duration="15"} 1' in text.splitlines()
+    assert text.endswith("# EOF\n")
+
+
+def test_exporter(tmp_path):
+    metric_set = MetricSet()
+    metric_set.counter("app_tests", "Tests completed.").inc()
+    filename = str(tmp_path / "typing_test.prom")
+    exporter = MetricsExporter([metric_set], filename, port=0, interval=0.05)
+    exporter.start()
+    try:
+        url = f"http://localhost:{exporter.server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert "app_tests_total 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+
+        metric_set["app_tests"].inc()
+        exports = exporter.exports
+        deadline = time.monotonic() + 5
+        while exporter.exports < exports + 2:  # A whole write after the increment
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        exporter.stop()
+    with open(filename, "r", encoding="utf-8") as f:
+        assert "app_tests_total 2" in f.read().splitlines()
+
+
+def test_render_app_metrics(benchmark, tmp_path, tk_root, home_ui, results_io):
+    typing_test = TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")))
+    for duration in [15, 30, 60]:
+        typing_test.metrics["typing_test_tests_completed"].labels(duration).inc()
+    handlers = typing_test.metrics["typing_test_handler_seconds"]
+    for handler in ["check_char", "check_word", "setup_test", "stop_test"]:
+        for i in range(1000):
+            handlers.labels(handler).observe(i / 10_000)
+
+    text = benchmark(render, [typing_test.metrics, results_io.metrics])
+    assert text.count("_bucket{") == 5 * 15
@@ -0,0 +1,107 @@
+"""
+Benchmarks and checks for profile switching and the results aggregates behind the scoreboard and analytics.
+"""
+import datetime
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from analytics_brain import AnalyticsBrain
+from book_text import BOOK_POSITIONS_FILENAME, BookPositions
+from ghost_race import GHOSTS_FILENAME, GhostStore
+from headless_tk import HeadlessUI, HeadlessWidget, headless_home_ui, headless_scoreboard_ui
+from key_stats import FILENAME as KEY_STATS_FILENAME, KeyStats
+from profilelogic import ProfileLogic
+from profiles import DEFAULT_PROFILE, ProfileManager
+from results_io import FILENAME, ResultsInOut, aggregates_path, load_aggregates
+from scoreboardlogic import ScoreBoardLogic
+from typing_test import TypingTestLogic
+
+
+@pytest.fixture
+def profiles(tmp_path, results_files):
+    """
+    A default profile with 100k results and two other profiles with 1k results each.
+    """
+    profiles = ProfileManager(str(tmp_path))
+    shutil.copy(results_files(100_000), profiles.path(FILENAME))
+    for name in ["Alice", "Bob"]:
+        profiles.create(name)
+        shutil.copy(results_files(1_000), profiles.path(FILENAME, name))
+    return profiles
+
+
+def test_aggregates_match_results(profiles):
+    results_io = ResultsInOut(profiles.path(FILENAME))
+    results_io.load_aggregates()  # Built from the file
+    results_io.save_data(150.0, 97.0, datetime.datetime(2024, 1, 1), 15)
+    aggregates = results_io.load_aggregates()  # Updated by the writer
+    results_io.close()
+
+    df = pd.read_csv(results_io.filename)
+    assert aggregates.rows == len(df)
+    assert aggregates.sum_wpm == pytest.approx(df["wpm"].sum())
+    assert aggregates.max_wpm == 150.0
+    assert aggregates.top_scores[15][0] == 150.0
+    assert sum(aggregates.histogram.values()) == len(df)
+
+
+def test_stale_aggregates_are_rebuilt(profiles):
+    filename = profiles.path(FILENAME, "Alice")
+    load_aggregates(filename)
+    with open(filename, "a") as f:
+        f.write("10.0,50.0,2024-01-01 00:00:00,60,\n")  # Written without updating the aggregates
+    assert load_aggregates(filename).rows == 1_001
+
+
+def test_switch_profile_is_isolated(profiles):
+    profiles.switch("Alice")
+    results_io = ResultsInOut(profiles.path(FILENAME))
+    results_io.save_data(80.0, 99.0, datetime.datetime(2024, 1, 1), 30)
+    results_io.close()
+
+    assert load_aggregates(profiles.path(FILENAME, "Alice")).rows == 1_001
+    assert load_aggregates(profiles.path(FILENAME, "Bob")).rows == 1_000
+    assert ProfileManager(profiles.base_dir).current == "Alice"
+    assert not os.path.exists(aggregates_path(profiles.path(FILENAME, DEFAULT_PROFILE)))
+
+
+def test_invalid_profile_names(profiles):
+    for name in ["", "../evil", "alice", DEFAULT_PROFILE]:
+        with pytest.raises(ValueError):
+            profiles.create(name)
+
+
+def test_obtain_scores_all_profiles(benchmark, profiles):
+    results_io = ResultsInOut(profiles.path(FILENAME))
+    analytics_ui = HeadlessUI(close_button=HeadlessWidget(), analytics_brain=AnalyticsBrain(results_io))
+    scoreboard = ScoreBoardLogic(HeadlessUI(), headless_home_ui(), headless_scoreboard_ui(), results_io, analytics_ui,
+                                 profiles)
+    scoreboard.all_profiles = True
+    top_scores = benchmark(scoreboard.obtain_scores)
+    assert all(len(scores) == 10 for scores in top_scores.values())
+
+    analytics_ui.analytics_brain.results_files = scoreboard.results_files()
+    analytics_ui.analytics_brain.update_stats()
+    assert analytics_ui.analytics_brain.aggregates.rows == 102_000
+
+
+def test_switch_profile_discards_practice_tests(profiles, tk_root, home_ui):
+    key_stats = KeyStats(profiles.path(KEY_STATS_FILENAME))
+    results_io = ResultsInOut(profiles.path(FILENAME))
+    typing_test = TypingTestLogic(tk_root, home_ui, results_io, key_stats,
+                                  BookPositions(profiles.path(BOOK_POSITIONS_FILENAME)),
+                                  GhostStore(profiles.path(GHOSTS_FILENAME)))
+    typing_test.set_practice_mode(True)
+    typing_test.test_queue.fill()
+    assert typing_test.test_queue.queues[(0, True, "")]
+
+    # The queued practice tests were chosen from the previous profile's weak keys
+    profile = ProfileLogic(tk_root, profiles, HeadlessUI(), home_ui, HeadlessUI(typing_test=typing_test), results_io,
+                           key_stats)
+    profile.switch_profile("Bob")
+    assert key_stats.filename == profiles.path(KEY_STATS_FILENAME, "Bob")
+    assert not typing_test.test_queue.queues[(0, True, "")]
+    results_io.close()
@@ -0,0 +1,134 @@
+"""
+Tests and a load test for races on a local network through the race relay.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from key_stats import KeyStats
+from race_client import RaceClient, parse_address
+from race_relay import RaceRelay, start_server
+from race_relay_load import run_load
+from results_io import ResultsInOut
+from typing_test import TypingTestLogic
+
+
+@pytest.fixture
+def race_relay():
+    """
+    The race relay running on a free port in a background thread. Yields the relay and its address.
+    """
+    relay = RaceRelay()
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(start_server(relay, port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield relay, f"localhost:{server.sockets[0].getsockname()[1]}"
+
+    async def shutdown():
+        server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def wait_for(condition, timeout=5):
+    """
+    Waits until a condition holds, for the messages to pass through the relay.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def connect(address, name):
+    client = RaceClient(address, name)
+    client.start()
+    wait_for(lambda: client.racer_id is not None)
+    return client
+
+
+def test_parse_address():
+    assert parse_address("192.168.1.10:9000") == ("192.168.1.10", 9000)
+    assert parse_address("racehost") == ("racehost", 8767)
+
+
+def test_progress_reaches_same_room(race_relay):
+    relay, address = race_relay
+    alice, bob, carol = connect(address, "Alice"), connect(address, "Bob"), connect(address, "Carol")
+    alice.join("en-00000001@30")
+    bob.join("en-00000001@30")
+    carol.join("en-00000002@30")
+    wait_for(lambda: relay.stats()["rooms"] == 2 and len(relay.rooms["en-00000001@30"]) == 2)
+
+    alice.send_progress(3, 2, 61.23)
+    wait_for(lambda: bob.updates_received == 1)
+    update = bob.take_updates()[alice.racer_id]
+    assert (update["name"], update["word"], update["char"], update["wpm"], update["done"]) == ("Alice", 3, 2, 61.2,
+                                                                                               False)
+
+    # Someone joining late sees the latest progress of everyone already racing
+    carol.join("en-00000001@30")
+    wait_for(lambda: carol.updates_received == 1)
+    assert carol.take_updates()[alice.racer_id]["word"] == 3
+
+    alice.join("")
+    wait_for(lambda: alice.racer_id in bob.take_updates())
+    assert alice.take_updates() == {} and relay.errors == 0
+    for client in [alice, bob, carol]:
+        client.close()
+    wait_for(lambda: relay.stats()["connections"] == 0 and not relay.rooms)
+
+
+def test_race_in_typing_test(race_relay, tk_root, home_ui, tmp_path):
+    _, address = race_relay
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    client = connect(address, "Alice")
+    typing_test = TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")),
+                                  race_client=client)
+    assert client.room == f"{typing_test.test_id}@15"
+    rival = connect(address, "Bob")
+    rival.join(client.room)
+    wait_for(lambda: client.messages_sent == 1)  # Joining
+
+    # Progress is only sent by race_tick, never by the key press handlers
+    for char in typing_test.test_words[0]:
+        typing_test.check_char(SimpleNamespace(char=char, keysym=char))
+    typing_test.check_word(SimpleNamespace(char=" ", keysym="space"))
+    time.sleep(0.05)
+    assert client.messages_sent == 1
+    rival.send_progress(0, 2, 40)
+    wait_for(lambda: client.updates_received == 1)
+    typing_test.race_tick()
+    assert typing_test.racers[rival.racer_id]["name"] == "Bob"
+    wait_for(lambda: rival.updates_received == 1)
+    assert rival.take_updates()[client.racer_id]["word"] == 1
+
+    typing_test.stop_test()
+    wait_for(lambda: rival.updates_received == 2)
+    assert rival.take_updates()[client.racer_id]["done"]
+    rival_id = rival.racer_id
+    rival.close()
+    wait_for(lambda: rival_id in client._updates)
+    typing_test.race_tick()
+    assert typing_test.racers == {}
+    client.close()
+    results_io.close()
+
+
+def test_relay_load(benchmark, race_relay):
+    relay, address = race_relay
+    report = benchmark.pedantic(lambda: asyncio.run(run_load(address, racers=120, rooms=1, seconds=1)), rounds=1)
+    assert report["errors"] == 0 and relay.messages_dropped == 0
+    assert report["updates_delivered"] == report["updates_expected"] == 120 * 119 * 10
@@ -0,0 +1,194 @@
+"""
+Benchmarks for loading and saving results, and for the scoreboard and analytics built on top of them.
+"""
+import datetime
+import os
+import shutil
+
+import matplotlib.pyplot as plt
+import pytest
+
+from analytics_brain import AnalyticsBrain
+from colour_schemes import COLOUR_SCHEMES
+from headless_tk import HeadlessUI, HeadlessWidget, headless_home_ui, headless_scoreboard_ui
+import results_io as results_io_module
+from results_io import ResultsInOut, aggregates_path, load_aggregates
+from scoreboardlogic import ScoreBoardLogic
+
+SIZES = [1_000, 100_000, pytest.param(1_000_000, marks=pytest.mark.slow)]
+
+
+@pytest.fixture
+def results_io(tmp_path):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    return results_io
+
+
+def use_results(results_io, results_files, rows):
+    """
+    Points the results_io instance at a private copy of a results file with the given number of rows.
+    """
+    shutil.copy(results_files(rows), results_io.filename)
+
+
+def rounds_for(rows):
+    return 3 if rows >= 1_000_000 else 10
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_load_data(benchmark, results_io, results_files, rows):
+    use_results(results_io, results_files, rows)
+    df = benchmark.pedantic(results_io.load_data, rounds=rounds_for(rows))
+    assert len(df) == rows
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_save_data(benchmark, results_io, results_files, rows):
+    use_results(results_io, results_files, rows)
+    timestamp = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+    saved = []
+
+    def save_and_flush():
+        results_io.save_data(72.0, 98.0, timestamp, 30)
+        results_io.flush()
+        saved.append(timestamp)
+
+    benchmark.pedantic(save_and_flush, rounds=rounds_for(rows))
+    assert len(results_io.load_data()) == rows + len(saved)
+
+
+def test_save_data_returns_before_write(benchmark, results_io, results_files):
+    use_results(results_io, results_files, 100_000)
+    timestamp = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    saved = []
+
+    def save():
+        results_io.save_data(72.0, 98.0, timestamp, 30)
+        saved.append(timestamp)
+
+    benchmark.pedantic(save, rounds=100)
+    results_io.close()
+    assert results_io.writer_stats()["rows_written"] == len(saved)
+
+
+def test_failed_write_keeps_writer_running(results_io, monkeypatch):
+    timestamp = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+    def malformed_file():
+        raise ValueError("Malformed results file")
+
+    monkeypatch.setattr(results_io, "_upgrade_file", malformed_file)
+    results_io.save_data(72.0, 98.0, timestamp, 30)
+    results_io.flush()  # Returns even though the write raised
+    assert results_io.writer_stats()["write_errors"] == 1 and results_io.writer_stats()["rows_written"] == 0
+
+    monkeypatch.undo()
+    results_io.save_data(75.0, 99.0, timestamp, 30)
+    assert results_io.close() == []
+    assert len(results_io.load_data()) == 2
+
+
+def test_failed_aggregates_update_doesnt_duplicate_rows(results_io, monkeypatch):
+    timestamp = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    results_io.save_data(70.0, 97.0, timestamp, 30)
+    results_io.flush()
+
+    def full_disk(filename, aggregates):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(results_io_module, "_save_aggregates", full_disk)
+    results_io.save_data(72.0, 98.0, timestamp, 30)
+    results_io.flush()
+    assert results_io.writer_stats()["unwritten"] == 0
+    assert not os.path.exists(aggregates_path(results_io.filename))  # Rebuilt when next read
+
+    monkeypatch.undo()
+    results_io.save_data(75.0, 99.0, timestamp, 30)
+    results_io.close()
+    assert results_io.load_data()["wpm"].tolist() == [70.0, 72.0, 75.0]
+    assert load_aggregates(results_io.filename).rows == 3
+
+
+def test_close_reports_unwritten_results(results_io, monkeypatch, caplog):
+    def read_only():
+        raise PermissionError("Read-only file system")
+
+    monkeypatch.setattr(results_io, "_upgrade_file", read_only)
+    results_io.save_data(72.0, 98.0, datetime.datetime(2024, 1, 1, 12, 0, 0), 30)
+    unwritten = results_io.close()
+    assert [row[0] for row in unwritten] == [72.0]
+    assert "1 results couldn't be written" in caplog.text
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_obtain_scores(benchmark, results_io, results_files, rows):
+    use_results(results_io, results_files, rows)
+    analytics_ui = HeadlessUI(close_button=HeadlessWidget())
+    scoreboard = ScoreBoardLogic(HeadlessUI(), headless_home_ui(), headless_scoreboard_ui(), results_io, analytics_ui)
+    top_scores = benchmark.pedantic(scoreboard.obtain_scores, rounds=rounds_for(rows))
+    assert all(len(scores) == 10 for scores in top_scores.values())
+
+
+@pytest.mark.parametrize("rows", SIZES)
+def test_update_stats(benchmark, results_io, results_files, rows):
+    use_results(results_io, results_files, rows)
+    analytics_brain = AnalyticsBrain(results_io)
+    benchmark.pedantic(analytics_brain.update_stats, rounds=rounds_for(rows))
+
+
+@pytest.mark.parametrize("rows", [1_000, 10_000])
+def test_open_plots(benchmark, results_io, results_files, rows):
+    use_results(results_io, results_files, rows)
+    analytics_brain = AnalyticsBrain(results_io)
+    colour_scheme = COLOUR_SCHEMES[0]
+
+    def open_and_close():
+        fig = analytics_brain.open_plots(colour_scheme)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    benchmark.pedantic(open_and_close, rounds=3)
+
+
+def test_filtered_stats(results_io, results_files):
+    use_results(results_io, results_files, 100_000)
+    analytics_brain = AnalyticsBrain(results_io)
+    df = results_io.load_data()
+
+    analytics_brain.set_filters(datetime.date(2022, 1, 1), datetime.date(2023, 1, 1), 60)
+    analytics_brain.update_stats()
+    expected = df[(df["timestamp"] >= "2022-01-01") & (df["timestamp"] < "2023-01-01") & (df["duration"] == 60)]
+    assert analytics_brain.aggregates.rows == len(expected)
+    assert analytics_brain.top_wpm == round(expected["wpm"].max())
+    assert analytics_brain.mean_wpm == round(expected["wpm"].mean())
+    analytics_brain.update_df()
+    assert len(analytics_brain.df) == len(expected)
+    assert analytics_brain.df["timestamp"].is_monotonic_increasing
+
+    analytics_brain.set_filters(datetime.date(2030, 1, 1))
+    analytics_brain.update_stats()
+    assert analytics_brain.empty_results
+    assert analytics_brain.top_wpm == 0
+
+    analytics_brain.set_filters()
+    analytics_brain.update_stats()
+    assert analytics_brain.aggregates.rows == 100_000
+
+
+@pytest.mark.parametrize("rows", SIZES[1:])
+def test_change_filters(benchmark, results_io, results_files, rows):
+    use_results(results_io, results_files, rows)
+    analytics_brain = AnalyticsBrain(results_io)
+    filters = [(datetime.date(2023, 12, 1), None, None), (datetime.date(2023, 1, 1), None, 30),
+               (datetime.date(2021, 1, 1), datetime.date(2022, 1, 1), 15)]
+
+    def change_filters():
+        for start, end, duration in filters:
+            analytics_brain.set_filters(start, end, duration)
+            analytics_brain.update_stats()
+
+    change_filters()  # The first time each filter is used its aggregates are computed, and afterwards cached
+    benchmark.pedantic(change_filters, rounds=rounds_for(rows))
+    assert analytics_brain.aggregates.rows > 0
@@ -0,0 +1,88 @@
+"""
+Tests and benchmarks for compacting old results into the compressed archive.
+"""
+import datetime
+import os
+import shutil
+
+import pandas as pd
+
+from results_archive import compact, compact_in_background, load_retention, save_retention
+from results_io import ResultsInOut, archive_dir, archive_index, load_aggregates
+
+NOW = datetime.datetime(2024, 1, 1)
+
+
+def copy_results(results_files, tmp_path, rows):
+    filename = str(tmp_path / "results.csv")
+    shutil.copy(results_files(rows), filename)
+    return filename
+
+
+def test_compact(results_files, tmp_path):
+    filename = copy_results(results_files, tmp_path, 100_000)
+    before = load_aggregates(filename)
+
+    report = compact(filename, 365, now=NOW)
+    assert report["archived"] + report["kept"] == 100_000
+    assert len(report["segments"]) == 36  # 2020 to 2022, one per month
+    assert set(os.listdir(archive_dir(filename))) >= set(report["segments"])
+    assert sum(segment["rows"] for segment in archive_index(filename).values()) == report["archived"]
+
+    # The csv only keeps the last year, but the aggregates still count every result
+    results_io = ResultsInOut(filename)
+    assert len(results_io.load_data()) == report["kept"]
+    assert (results_io.load_data()["timestamp"] >= pd.Timestamp(2023, 1, 1)).all()
+    after = load_aggregates(filename)
+    assert after.rows == before.rows
+    assert after.max_wpm == before.max_wpm
+    assert after.top_scores == before.top_scores
+    assert after.histogram == before.histogram
+
+    df = results_io.load_data(include_archive=True)
+    assert len(df) == 100_000
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_compact_repeated(results_files, tmp_path):
+    filename = copy_results(results_files, tmp_path, 10_000)
+    compact(filename, 365, now=NOW)
+    index = archive_index(filename)
+
+    # Nothing left to archive
+    assert compact(filename, 365, now=NOW)["archived"] == 0
+    assert archive_index(filename) == index
+
+    # Archiving more merges into the existing segments
+    report = compact(filename, 180, now=NOW)
+    assert report["archived"] > 0
+    assert sum(segment["rows"] for segment in archive_index(filename).values()) + report["kept"] == 10_000
+    assert load_aggregates(filename).rows == 10_000
+
+
+def test_retention(tmp_path):
+    filename = str(tmp_path / "results.csv")
+    assert load_retention(filename) is None
+    assert compact(filename, load_retention(filename))["archived"] == 0
+    save_retention(filename, 90)
+    assert load_retention(filename) == 90
+
+
+def test_compact_in_background(results_files, tmp_path):
+    filename = copy_results(results_files, tmp_path, 1_000)
+    compact_in_background(filename).join()  # No retention period, so nothing is archived
+    assert not os.path.exists(archive_dir(filename))
+
+    save_retention(filename, 365)
+    compact_in_background(filename).join()
+    assert sum(segment["rows"] for segment in archive_index(filename).values()) == 1_000  # Every result is years old
+    assert load_aggregates(filename).rows == 1_000
+
+
+def test_compact_benchmark(benchmark, results_files, tmp_path):
+    def setup():
+        shutil.rmtree(tmp_path / "results.archive", ignore_errors=True)
+        return (copy_results(results_files, tmp_path, 100_000), 365), {"now": NOW}
+
+    report = benchmark.pedantic(compact, setup=setup, rounds=3)
+    assert report["archived"] > 0
@@ -0,0 +1,124 @@
+"""
+Tests and benchmarks for importing results exported by other typing test programs.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from headless_tk import HeadlessUI, HeadlessWidget, headless_home_ui, headless_scoreboard_ui
+from results_import import import_results
+from results_io import ResultsInOut, load_aggregates
+from scoreboardlogic import ScoreBoardLogic
+
+
+def write_export(path, rows, seed=0):
+    """
+    Writes an export in the style of another program: different column names, millisecond timestamps and a few
+    invalid rows.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2018-01-01T00:00:00", "ms").astype("int64")
+    df = pd.DataFrame({
+        "_id": np.arange(rows),
+        "wpm": rng.normal(60, 15, rows).clip(0).round(2),
+        "acc": rng.uniform(80, 100, rows).round(2),
+        "rawWpm": rng.normal(65, 15, rows).round(2),
+        "testDuration": rng.choice([15.01, 30.0, 59.98, 120.02], rows),
+        "timestamp": start + np.sort(rng.integers(0, 2 * 365 * 86400, rows)) * 1000,
+    })
+    df.loc[::1000, "acc"] = 150  # Invalid
+    df.to_csv(path, index=False)
+    return df
+
+
+@pytest.fixture
+def results_io(tmp_path):
+    results_io = ResultsInOut(str(tmp_path / "results.csv"))
+    yield results_io
+    results_io.close()
+
+
+def test_import(results_io, tmp_path):
+    export = tmp_path / "export.csv"
+    write_export(export, 10_000)
+    results_io.save_data(72.0, 98.0, "2024-01-01 12:00:00", 30)
+
+    report = import_results(results_io, [str(export)])
+    assert report == {"read": 10_000, "imported": 9_990, "invalid": 10, "duplicates": 0}
+    df = results_io.load_data()
+    assert len(df) == 9_991
+    assert set(df["duration"]) == {15, 30, 60, 120}
+    assert df["timestamp"].iloc[1] >= pd.Timestamp(2018, 1, 1)
+    assert load_aggregates(results_io.filename).rows == 9_991
+
+    # Importing the same export again adds nothing
+    report = import_results(results_io, [str(export)])
+    assert report["imported"] == 0 and report["duplicates"] == 9_990
+    assert len(results_io.load_data()) == 9_991
+
+
+def test_import_json_lines_with_mapping(results_io, tmp_path):
+    export = tmp_path / "export.jsonl"
+    results = [{"speed": 50 + i, "accuracy": 95, "when": f"2023-05-0{i + 1}T10:00:00Z", "duration": 60}
+               for i in range(5)]
+    results.append(results[0])  # Duplicate within the export
+    export.write_text("\n".join(json.dumps(result) for result in results))
+
+    report = import_results(results_io, [str(export)], mapping={"wpm": "speed", "timestamp": "when"})
+    assert report == {"read": 6, "imported": 5, "invalid": 0, "duplicates": 1}
+    assert results_io.load_data()["wpm"].tolist() == [50, 51, 52, 53, 54]
+
+
+def test_import_unknown_columns(results_io, tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text("score,acc,timestamp,duration\n60,95,2023-01-01,30\n")
+    with pytest.raises(ValueError):
+        import_results(results_io, [str(export)])
+
+
+class RecordingBoard(HeadlessWidget):
+    """
+    Scoreboard stand-in keeping the lines inserted into it.
+    """
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def insert(self, index, text):
+        self.lines.append(text)
+
+    def delete(self, start, end):
+        self.lines = []
+
+
+@pytest.mark.parametrize("durations", [[120, 15, 30, 60], [15, 120]])
+def test_scoreboard_after_importing_other_durations(results_io, tmp_path, durations):
+    export = tmp_path / "export.csv"
+    export.write_text("wpm,accuracy,timestamp,duration\n" + "".join(
+        f"{duration},95,2023-01-0{i + 1} 10:00:00,{duration}\n" for i, duration in enumerate(durations)))
+    import_results(results_io, [str(export)])
+
+    scoreboard_ui = headless_scoreboard_ui()
+    scoreboard_ui.scoreboards = [RecordingBoard() for _ in range(3)]
+    scoreboard = ScoreBoardLogic(HeadlessUI(), headless_home_ui(), scoreboard_ui, results_io,
+                                 HeadlessUI(close_button=HeadlessWidget()))
+    scoreboard.show_scoreboard()
+    # Each board only shows its own duration, and the 120 second result isn't shown
+    assert [board.lines for board in scoreboard_ui.scoreboards] == [
+        [f"1. {duration}.0\n"] if duration in durations else [] for duration in [15, 30, 60]]
+
+
+@pytest.mark.parametrize("rows", [100_000, pytest.param(1_000_000, marks=pytest.mark.slow)])
+def test_import_benchmark(benchmark, tmp_path, rows):
+    export = tmp_path / "export.csv"
+    write_export(export, rows)
+
+    def setup():
+        results_io = ResultsInOut(str(tmp_path / f"results_{len(list(tmp_path.iterdir()))}.csv"))
+        return (results_io, [str(export)]), {}
+
+    report = benchmark.pedantic(import_results, setup=setup, rounds=3)
+    assert report["invalid"] == rows // 1000
+    assert report["imported"] + report["duplicates"] == rows - rows // 1000
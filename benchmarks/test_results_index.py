@@ -0,0 +1,140 @@
+"""
+Tests and benchmarks for the results index and the results history screen.
+"""
+import datetime
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from headless_tk import HeadlessUI, HeadlessWidget
+from historylogic import HistoryLogic, parse_filters
+from results_archive import compact
+from results_index import ResultsIndex
+from results_io import ResultsInOut
+
+
+def copy_results(results_files, tmp_path, rows):
+    filename = str(tmp_path / "results.csv")
+    shutil.copy(results_files(rows), filename)
+    return filename
+
+
+def history_logic(filename):
+    """
+    Builds a HistoryLogic with stand-in widgets, recording the rows shown.
+    """
+    shown = []
+    history_ui = HeadlessUI(VISIBLE_ROWS=15, results_list=HeadlessWidget(), scrollbar=HeadlessWidget(),
+                            close_button=HeadlessWidget(), apply_button=HeadlessWidget(),
+                            clear_button=HeadlessWidget(), status_label=HeadlessWidget(), show_rows=shown.append)
+    scoreboard_ui = HeadlessUI(history_button=HeadlessWidget())
+    history = HistoryLogic(HeadlessUI(), scoreboard_ui, history_ui, ResultsInOut(filename),
+                           HeadlessUI(results_files=lambda: None))
+    return history, shown
+
+
+def test_query(results_files, tmp_path):
+    filename = copy_results(results_files, tmp_path, 100_000)
+    index = ResultsIndex([filename])
+    df = pd.read_csv(filename, parse_dates=["timestamp"])
+    assert len(index) == len(df)
+
+    view = index.query("wpm", descending=True, duration=30, start=datetime.date(2021, 1, 1),
+                       end=datetime.date(2022, 1, 1), min_wpm=50, max_wpm=70)
+    expected = df[(df["duration"] == 30) & (df["timestamp"] >= "2021-01-01") & (df["timestamp"] < "2022-01-01")
+                  & (df["wpm"] >= 50) & (df["wpm"] <= 70)]
+    assert len(view) == len(expected)
+    assert np.array_equal(index.columns["wpm"][view], np.sort(expected["wpm"].to_numpy())[::-1])
+    # Views are cached
+    assert index.query("wpm", descending=True, duration=30, start=datetime.date(2021, 1, 1),
+                       end=datetime.date(2022, 1, 1), min_wpm=50, max_wpm=70) is view
+
+    newest = index.rows(index.query()[:1])[0]
+    assert newest[0] == df["timestamp"].max().strftime("%Y-%m-%d %H:%M")
+
+
+def test_update(results_files, tmp_path):
+    filename = copy_results(results_files, tmp_path, 1000)
+    index = ResultsIndex([filename])
+    assert not index.refresh()
+
+    results_io = ResultsInOut(filename)
+    results_io.save_data(123.4, 98.0, datetime.datetime(2030, 1, 1, 12), 60, "en-00000001")
+    results_io.flush()
+    assert index.refresh()
+    assert len(index) == 1001
+    assert index.rows(index.query("wpm")[:1]) == [("2030-01-01 12:00", "123.4", "98%", "60s", "en-00000001")]
+
+    # A new index reads the cached columns
+    cached = ResultsIndex([filename])
+    assert len(cached) == 1001
+    assert cached._files[0].offset == index._files[0].offset
+
+    # Archived results are still included once the results file has been replaced
+    compact(filename, 365, now=datetime.datetime(2024, 1, 1))
+    assert index.refresh()
+    assert len(index) == 1001
+
+
+def test_parse_filters():
+    filters = parse_filters({"duration": "30 seconds", "start": "2024-01-01", "end": "2024-01-31", "min_wpm": "",
+                             "max_wpm": "80"})
+    assert filters == {"duration": 30, "start": datetime.date(2024, 1, 1), "end": datetime.date(2024, 2, 1),
+                       "min_wpm": None, "max_wpm": 80.0}
+    with pytest.raises(ValueError):
+        parse_filters({"duration": "All durations", "start": "01/01/2024", "end": "", "min_wpm": "", "max_wpm": ""})
+
+
+def test_history_scroll(results_files, tmp_path):
+    history, shown = history_logic(copy_results(results_files, tmp_path, 1000))
+    history.open_history()
+    assert len(shown[-1]) == 15
+
+    history.scroll("moveto", "1.0")
+    assert history.first == 1000 - 15
+    history.scroll("scroll", "1", "pages")
+    assert history.first == 1000 - 15
+    history.sort("wpm")
+    assert history.first == 0
+    assert float(shown[-1][0][1]) >= float(shown[-1][-1][1])
+
+
+@pytest.mark.parametrize("rows", [100_000, pytest.param(1_000_000, marks=pytest.mark.slow)])
+def test_history_scroll_benchmark(benchmark, results_files, tmp_path, rows):
+    history, shown = history_logic(copy_results(results_files, tmp_path, rows))
+    history.open_history()
+    positions = np.random.default_rng(0).integers(0, rows, 100).tolist()
+
+    def scroll():
+        for position in positions:
+            history.scroll_to(position)
+
+    benchmark(scroll)
+    assert len(shown[-1]) == 15
+
+
+@pytest.mark.parametrize("rows", [100_000, pytest.param(1_000_000, marks=pytest.mark.slow)])
+def test_sort_and_filter_benchmark(benchmark, results_files, tmp_path, rows):
+    index = ResultsIndex([copy_results(results_files, tmp_path, rows)])
+    for key in ["timestamp", "wpm", "accuracy"]:
+        index.sort_order(key)  # Precomputed once, when first used
+
+    def query():
+        index._views.clear()
+        return [index.query(key, min_wpm=40, max_wpm=90) for key in ["timestamp", "wpm", "accuracy"]]
+
+    views = benchmark(query)
+    assert len(views[0]) == len(views[1])
+
+
+def test_time_range(results_files, tmp_path):
+    index = ResultsIndex([copy_results(results_files, tmp_path, 10_000)])
+    start, end = datetime.date(2021, 3, 1), datetime.datetime(2021, 9, 1, 12)
+    positions = index.time_range(start, end)
+    timestamps = index.columns["timestamp"]
+    in_range = (timestamps >= np.datetime64(start)) & (timestamps < np.datetime64(end))
+    assert np.array_equal(np.sort(positions), np.flatnonzero(in_range))
+    assert (np.diff(timestamps[positions]) >= np.timedelta64(0)).all()
+    assert len(index.time_range()) == 10_000
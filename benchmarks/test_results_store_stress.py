@@ -0,0 +1,59 @@
+"""
+Stress tests for several app instances sharing one results file.
+"""
+import datetime
+import multiprocessing
+
+import pytest
+
+from results_io import ResultsInOut
+
+PROCESSES = 4
+RESULTS_PER_PROCESS = 2000
+
+
+def save_results(filename, worker):
+    """
+    Saves RESULTS_PER_PROCESS results from one process, each with a unique test ID.
+    """
+    results_io = ResultsInOut()
+    results_io.filename = filename
+    timestamp = datetime.datetime(2024, 1, 1)
+    for i in range(RESULTS_PER_PROCESS):
+        results_io.save_data(60.0, 95.0, timestamp, 15, test_id=f"w{worker}-{i}")
+    results_io.close()
+
+
+@pytest.fixture
+def results_io(tmp_path):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    return results_io
+
+
+def test_concurrent_writers_lose_no_rows(results_io):
+    processes = [multiprocessing.Process(target=save_results, args=(results_io.filename, worker))
+                 for worker in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    df = results_io.load_data()
+    assert len(df) == PROCESSES * RESULTS_PER_PROCESS
+    assert df["test_id"].nunique() == PROCESSES * RESULTS_PER_PROCESS
+    assert results_io.torn_rows == 0
+
+
+def test_torn_write_is_ignored_then_repaired(results_io):
+    timestamp = datetime.datetime(2024, 1, 1)
+    results_io.save_data(60.0, 95.0, timestamp, 15)
+    results_io.flush()
+    with open(results_io.filename, "a") as f:
+        f.write("71.2,9")  # A write cut short by a crash
+
+    assert len(results_io.load_data()) == 1
+    results_io.save_data(70.0, 97.0, timestamp, 30)
+    df = results_io.load_data()
+    assert df["wpm"].tolist() == [60.0, 70.0]
@@ -0,0 +1,93 @@
+"""
+Tests for the Tk event loop stall watchdog, driving its heartbeat by hand in place of the Tk mainloop.
+"""
+import json
+import time
+
+import pytest
+
+from stall_watchdog import BIN_EDGES, StallWatchdog
+
+
+class HeadlessRoot:
+    """
+    Stand-in for tkinter.Tk that keeps the callback scheduled with after() for the test to run.
+    """
+    def __init__(self):
+        self.scheduled = None
+
+    def after(self, ms, callback):
+        self.scheduled = callback
+        return "after#1"
+
+    def after_cancel(self, after_id):
+        self.scheduled = None
+
+    def run_next(self):
+        callback, self.scheduled = self.scheduled, None
+        callback()
+
+
+def slow_callback(seconds):
+    time.sleep(seconds)
+
+
+@pytest.fixture
+def watchdog():
+    root = HeadlessRoot()
+    watchdog = StallWatchdog(root, interval_ms=5, threshold_ms=50)
+    watchdog.start()
+    yield watchdog
+    watchdog.stop()
+
+
+def test_records_frame_times(watchdog):
+    for _ in range(20):
+        time.sleep(0.005)
+        watchdog.root.run_next()
+    assert len(watchdog.frame_times) == 20
+    assert watchdog.stall_count == 0
+    assert watchdog.histogram().sum() == 20
+    assert 5 <= watchdog.summary()["p50_ms"] < 50
+
+
+def test_records_stall_with_callback(watchdog, tmp_path):
+    watchdog.root.run_next()
+    slow_callback(0.2)  # Blocks the "event loop" like a slow Tk callback
+    watchdog.root.run_next()
+
+    assert watchdog.stall_count == 1
+    stall = watchdog.stalls[-1]
+    assert stall["ms"] >= 200
+    assert stall["callback"][-1].startswith("test_stall_watchdog.py:")
+    assert stall["callback"][-1].endswith(" slow_callback")
+    assert "slow_callback" in watchdog.overlay_text()
+
+    with open(watchdog.export(str(tmp_path))) as f:
+        exported = json.load(f)
+    assert exported["stall_count"] == 1
+    assert len(exported["counts"]) == len(BIN_EDGES) - 1
+    assert sum(exported["counts"]) == 2
+
+
+def test_stop(watchdog):
+    watchdog.stop()
+    assert watchdog.root.scheduled is None and not watchdog.is_running()
+
+
+def test_off_until_started():
+    # The app only starts the watchdog with diagnostics, so nothing is scheduled until then
+    root = HeadlessRoot()
+    watchdog = StallWatchdog(root, interval_ms=5, threshold_ms=50)
+    assert root.scheduled is None and not watchdog.is_running()
+    assert "diagnostics" in watchdog.overlay_text()
+
+    watchdog.start()
+    root.run_next()
+    watchdog.stop()
+    time.sleep(0.1)
+    watchdog.start()  # Switching diagnostics on again doesn't count the time it was off as a stall
+    time.sleep(0.005)
+    root.run_next()
+    watchdog.stop()
+    assert len(watchdog.frame_times) == 2 and watchdog.stall_count == 0
@@ -0,0 +1,157 @@
+"""
+Tests for the theme engine, and a benchmark of switching between every colour scheme.
+
+Without a display the benchmark is skipped, and switching is instead compared with the per-widget configuration used
+before the theme engine by counting the Tk configure calls each makes.
+"""
+import itertools
+from types import MethodType
+
+import pytest
+
+import theme as theme_module
+from analytics_ui import AnalyticsUI
+from colour_schemes import COLOUR_SCHEMES
+from conftest import DISPLAY_AVAILABLE
+from currentdisplay import CurrentDisplay
+from headless_tk import HeadlessUI, HeadlessWidget
+from home_ui import HomeUI
+from scoreboard_ui import ScoreboardUI
+from theme import ThemeEngine, compile_preview, compile_scheme
+
+# Widgets on each page that were configured one by one when the colour scheme changed, before the theme engine
+PER_WIDGET_PAGES = {"home": 17, "scoreboard": 10, "options": 13, "analytics": 8}
+# Typing feedback tags of the home text widget, which were configured along with it
+TEXT_TAGS = ["correct", "incorrect", "finished", "last_word", "current_char"]
+
+
+class CountingWidget(HeadlessWidget):
+    """
+    Widget stand-in that records its configure calls in a shared list.
+    """
+    def __init__(self, calls, children=None, tags=()):
+        super().__init__(children)
+        self.calls = calls
+        self.tags = tags
+
+    def configure(self, **options):
+        self.calls.append("configure")
+
+    config = configure
+
+    def tag_config(self, tag, **options):
+        self.calls.append("tag_config")
+
+
+class CountingStyle:
+    """
+    ttk.Style stand-in that records the styles it configures and maps in a shared list.
+    """
+    def __init__(self, calls):
+        self.calls = calls
+
+    def theme_use(self, theme_name):
+        pass
+
+    def configure(self, style_name, **options):
+        self.calls.append("style.configure")
+
+    def map(self, style_name, **options):
+        self.calls.append("style.map")
+
+
+def per_widget_walk(widget, colour_scheme):
+    """
+    Applies a colour scheme the way the app did before the theme engine, configuring every widget one by one.
+    """
+    widget.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
+    for tag in widget.tags:
+        widget.tag_config(tag, foreground=colour_scheme["highlight"])
+    for child in widget.winfo_children():
+        per_widget_walk(child, colour_scheme)
+
+
+def per_widget_tree(calls):
+    """
+    Builds a stand-in of the app's widget tree before the theme engine: a frame for each page holding its widgets.
+    """
+    pages = []
+    for page, widgets in PER_WIDGET_PAGES.items():
+        children = [CountingWidget(calls) for _ in range(widgets - 1)]
+        if page == "home":
+            children[0].tags = TEXT_TAGS
+        pages.append(CountingWidget(calls, children))
+    return CountingWidget(calls, pages)
+
+
+def themed_display(calls, monkeypatch):
+    """
+    Builds a stand-in of the current display whose set_colour_scheme runs the theme engine and the UI pages' own
+    colour methods, on widgets that count their configure calls.
+    """
+    monkeypatch.setattr(theme_module.ttk, "Style", lambda root: CountingStyle(calls))
+    home_ui = HeadlessUI(text=CountingWidget(calls))
+    home_ui.config_home_ui = MethodType(HomeUI.config_home_ui, home_ui)
+    scoreboard_ui = HeadlessUI(scoreboards=[CountingWidget(calls) for _ in range(3)])
+    scoreboard_ui.config_scores_ui = MethodType(ScoreboardUI.config_scores_ui, scoreboard_ui)
+    analytics_ui = HeadlessUI()
+    analytics_ui.configure_cs = MethodType(AnalyticsUI.configure_cs, analytics_ui)
+    return HeadlessUI(theme=ThemeEngine(HeadlessWidget()), root=CountingWidget(calls), home_ui=home_ui,
+                      scoreboard_ui=scoreboard_ui, analytics_ui=analytics_ui)
+
+
+@pytest.mark.parametrize("colour_scheme", COLOUR_SCHEMES, ids=[cs["name"] for cs in COLOUR_SCHEMES])
+def test_compile_scheme(colour_scheme):
+    configure, state_maps = compile_scheme(colour_scheme)
+    # A handful of style definitions replace configuring every widget
+    assert len(configure) + len(state_maps) <= 10
+    assert configure["."]["background"] == colour_scheme["background"]
+    assert configure["Primary.TButton"]["background"] == colour_scheme["main_text"]
+    assert configure["Primary.TButton"]["foreground"] == colour_scheme["highlight"]
+    assert configure["Accent.TButton"]["background"] == colour_scheme["highlight"]
+    assert configure["Timer.TLabel"]["foreground"] == colour_scheme["highlight"]
+
+    configure, _ = compile_preview(colour_scheme)
+    assert configure["Preview.TLabel"]["background"] == colour_scheme["background"]
+
+
+@pytest.mark.skipif(not DISPLAY_AVAILABLE, reason="ttk styles need a display")
+def test_switch_colour_schemes(benchmark, tk_root, tmp_path):
+    from history_ui import HistoryUI
+    from options_ui import OptionsUI
+    from results_io import ResultsInOut
+
+    theme = ThemeEngine(tk_root)
+    current_display = CurrentDisplay(tk_root, HomeUI(tk_root), ScoreboardUI(tk_root), OptionsUI(tk_root, theme),
+                                     AnalyticsUI(tk_root, HeadlessUI()), HistoryUI(tk_root),
+                                     ResultsInOut(str(tmp_path / "results.csv")), theme, str(tmp_path / "default_cs.txt"))
+    schemes = itertools.cycle(COLOUR_SCHEMES)
+
+    def switch_all():
+        for _ in COLOUR_SCHEMES:
+            current_display.set_colour_scheme(next(schemes))
+        tk_root.update_idletasks()  # Include redrawing the widgets
+
+    benchmark(switch_all)
+    assert theme.style.lookup("Primary.TButton", "background") == COLOUR_SCHEMES[-1]["main_text"]
+
+
+def test_switch_colour_schemes_configure_calls(monkeypatch):
+    old_calls = []
+    tree = per_widget_tree(old_calls)
+    for colour_scheme in COLOUR_SCHEMES:
+        per_widget_walk(tree, colour_scheme)
+
+    new_calls = []
+    current_display = themed_display(new_calls, monkeypatch)
+    new_calls.clear()  # Fonts are set on the styles once, when the theme engine is created
+    for colour_scheme in COLOUR_SCHEMES:
+        CurrentDisplay.set_colour_scheme(current_display, colour_scheme)
+
+    per_scheme = len(old_calls) // len(COLOUR_SCHEMES), len(new_calls) // len(COLOUR_SCHEMES)
+    configure, state_maps = compile_scheme(COLOUR_SCHEMES[0])
+    # The root, one per page frame and the widgets in them, and the text widget's tags
+    assert per_scheme[0] == 1 + sum(PER_WIDGET_PAGES.values()) + len(TEXT_TAGS) == 54
+    # The styles, the root, the home text widget and its three colour scheme tags, and the three scoreboards
+    assert per_scheme[1] == len(configure) + len(state_maps) + 1 + 4 + 3 == 18
+    assert new_calls.count("configure") + new_calls.count("tag_config") == 8 * len(COLOUR_SCHEMES)
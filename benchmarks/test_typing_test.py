@@ -0,0 +1,177 @@
+"""
+Benchmarks for the per-keystroke handlers and test setup in typing_test.py.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from key_stats import KeyStats
+from results_io import ResultsInOut
+from colour_schemes import COLOUR_SCHEMES
+from typing_test import TypingTestLogic
+from typing_timeline import TypingTimeline, timeline_figure
+
+
+def key(char):
+    """
+    Builds a key press event for the given character.
+    """
+    keysyms = {" ": "space", "\b": "BackSpace"}
+    return SimpleNamespace(char=char, keysym=keysyms.get(char, char))
+
+
+@pytest.fixture
+def typing_test(tk_root, home_ui, tmp_path):
+    results_io = ResultsInOut()
+    results_io.filename = str(tmp_path / "results.csv")
+    return TypingTestLogic(tk_root, home_ui, results_io, KeyStats(str(tmp_path / "key_stats.npz")))
+
+
+def type_text(typing_test, keystrokes):
+    """
+    Feeds keystrokes to the handlers in the same way the Tk bindings do.
+    """
+    for event in keystrokes:
+        if event.keysym == "space":
+            typing_test.check_word(event)
+        else:
+            typing_test.check_char(event)
+
+
+def page_keystrokes(words):
+    """
+    Keystrokes for typing a page of words with one typo, corrected with backspace, in every third word.
+    """
+    keystrokes = []
+    for i, word in enumerate(words):
+        if i % 3 == 0:
+            keystrokes += [key("#"), key("\b")]
+        keystrokes += [key(c) for c in word]
+        keystrokes.append(key(" "))
+    return keystrokes
+
+
+def test_get_char_index_end_of_page(benchmark, typing_test):
+    typing_test.current_word = 29
+    typing_test.current_char = 3
+    benchmark(typing_test.get_char_index)
+
+
+def test_keystroke_sequence(benchmark, typing_test):
+    def setup():
+        typing_test.setup_test()
+        typing_test.test_started = True
+        return (typing_test, page_keystrokes(typing_test.test_words[:29])), {}
+
+    benchmark.pedantic(type_text, setup=setup, rounds=50)
+
+
+def test_back_space_excess_chars(benchmark, typing_test):
+    word = typing_test.test_words[0]
+
+    def setup():
+        typing_test.prepare_user_input()
+        typing_test.test_started = True
+        type_text(typing_test, [key(c) for c in word + "xyz"])
+        return (), {}
+
+    def delete_excess():
+        for _ in range(3):
+            typing_test.back_space(word)
+
+    benchmark.pedantic(delete_excess, setup=setup, rounds=200)
+
+
+def test_generate_words(benchmark, typing_test):
+    benchmark(typing_test.generate_words)
+
+
+def test_setup_test_from_queue(benchmark, typing_test):
+    def setup():
+        typing_test.test_queue.fill()
+        return (), {}
+
+    benchmark.pedantic(typing_test.setup_test, setup=setup, rounds=50)
+    assert typing_test.test_queue.misses == 1  # Only the first test, set up before the queue was filled
+
+
+def test_char_index_uses_page_offsets(typing_test):
+    words = typing_test.test_words
+    for page_num in range(3):
+        for current_word in range(30):
+            typing_test.page_num, typing_test.current_word, typing_test.current_char = page_num, current_word, 2
+            expected = 2 + sum(len(word) + 1 for word in words[page_num * 30:page_num * 30 + current_word])
+            assert typing_test.get_char_index() == expected
+
+
+def test_quick_restart(typing_test):
+    typing_test.test_queue.fill()
+    words = typing_test.test_words
+    type_text(typing_test, [key(c) for c in words[0]])
+    assert typing_test.test_started and typing_test.countdown_id is not None
+    assert typing_test.test_queue.paused
+
+    typing_test.quick_restart()
+    assert not typing_test.test_started and typing_test.countdown_id is None
+    assert typing_test.test_words != words
+    assert not typing_test.test_queue.paused
+
+
+def test_practice_tests_discarded_after_test(typing_test):
+    typing_test.practice_mode = True
+    typing_test.setup_test()
+    typing_test.test_queue.fill()
+    typing_test.test_started = True
+    typing_test.stop_test()
+    assert not typing_test.test_queue.queues[(0, True, "")]
+
+
+def test_stop_test_when_key_stats_cant_be_saved(typing_test, tmp_path):
+    typing_test.key_stats.filename = str(tmp_path / "missing" / "key_stats.npz")  # e.g. a read-only profile folder
+    for char in typing_test.test_words[0] + " ":
+        typing_test.check_char(key(char))
+    typing_test.stop_test()
+    assert typing_test.key_stats.char_attempts.sum() == len(typing_test.test_words[0])  # Kept in memory
+
+
+def test_obtain_test_statistics(benchmark, typing_test):
+    typing_test.test_duration = 60
+    typing_test.user_input = list(" ".join(typing_test.test_words[:80]) + " ")
+    wpm, accuracy, timestamp = benchmark(typing_test.obtain_test_statistics)
+    assert accuracy == 100
+
+
+def test_test_id_rebuilds_same_words(typing_test):
+    typing_test.setup_test()
+    words, test_id = typing_test.test_words, typing_test.test_id
+    typing_test.setup_test()
+    typing_test.home_ui.test_id_entry.get = lambda: test_id
+    typing_test.load_test_id()
+    assert typing_test.test_words == words and typing_test.test_id == test_id
+
+
+def test_timeline(benchmark):
+    # 60 seconds at ~6 keystrokes a second, with a burst of errors between 20 and 21 seconds
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.uniform(0, 60, 360))
+    keystrokes = [(t, "x" if 20 <= t < 21 else "a", "a") for t in times]
+
+    def build():
+        timeline = TypingTimeline(keystrokes, 60)
+        fig = timeline_figure(timeline, COLOUR_SCHEMES[0])
+        fig.canvas.draw()
+        return timeline
+
+    timeline = benchmark.pedantic(build, rounds=5)
+    assert timeline.raw_wpm.sum() == 360 * 12
+    assert len(timeline.error_clusters) == 1
+    assert 0 < timeline.consistency < 100
+
+
+def test_timeline_leaves_out_keystrokes_after_duration():
+    # Two keystrokes a second for 15 seconds, then more while the countdown shows zero
+    keystrokes = [(i / 2, "a", "a") for i in range(30)] + [(15 + i / 10, "a", "a") for i in range(10)]
+    timeline = TypingTimeline(keystrokes, 15)
+    assert list(timeline.raw_wpm) == [24] * 15
+    assert timeline.burst_wpm == 24 and timeline.cv == 0
@@ -0,0 +1,48 @@
+"""
+Benchmarks for loading the word corpus, from the compiled binary and from the text file.
+"""
+import shutil
+
+import pytest
+
+import word_corpus
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    path = tmp_path / "word_list.txt"
+    shutil.copy("word_list.txt", path)
+    return str(path)
+
+
+def test_load_compiled_corpus(benchmark, word_list):
+    word_corpus.build_corpus(word_list)
+    corpus = benchmark(word_corpus.load_corpus, word_list)
+    assert len(corpus) == 2963
+
+
+def test_load_from_text(benchmark, word_list):
+    def compile_from_text():
+        with open(word_list, "r", encoding="utf-8") as word_file:
+            return word_corpus.WordCorpus(word_corpus.compile_words(word_file.read().splitlines()))
+
+    corpus = benchmark(compile_from_text)
+    assert len(corpus) == 2963
+
+
+def test_stale_corpus_is_rebuilt(word_list):
+    word_corpus.build_corpus(word_list)
+    with open(word_list, "a", encoding="utf-8") as word_file:
+        word_file.write("\nzzyzx")
+    corpus = word_corpus.load_corpus(word_list)
+    assert corpus[len(corpus) - 1] == "zzyzx"
+    assert corpus.is_fresh(word_list)
+
+
+def test_build_step_compiles_named_files(word_list, tmp_path):
+    other = tmp_path / "other.txt"
+    other.write_text("alpha\nbeta\n", encoding="utf-8")
+    word_corpus.main([word_list, str(other), "--weighting", "frequency"])
+    corpus = word_corpus.load_corpus(str(other), "frequency")
+    assert len(corpus) == 2 and corpus.weighting == "frequency"
+    assert word_corpus._map_corpus(word_corpus.cache_path(word_list)).is_fresh(word_list)
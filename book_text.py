@@ -0,0 +1,432 @@
+"""
+Book mode: tests made of the text of any file, e.g. a novel or the source of a project, typed in order.
+
+The file is memory-mapped and never read whole. Each test is tokenised from the current position by matching words
+directly in the mapped file, so only the pages of the file around the position are read from disk, however large the
+file is. After a test the position moves past the words typed and is saved, so the next session continues where the
+last one stopped.
+
+Seeking to a fraction of the file is by byte offset, so it's instant without an index. To show progress in words and
+lines, and to seek to a word or line number, a sparse index of the byte offset and line number of every
+CHECKPOINT_WORDS-th word is built by a background thread, scanning the file a chunk at a time with NumPy. Any word
+is then found by scanning forward from the checkpoint before it. The index is cached in BOOK_INDEX_DIR, keyed by the
+file's path and checked against its size and modification time.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+
+import numpy as np
+
+from prepared_tests import TEST_WORDS, PreparedTest
+
+# Remembers the book in use and the position reached in each book. One per profile.
+BOOK_POSITIONS_FILENAME = "book_positions.json"
+# Directory holding the cached word indexes of books
+BOOK_INDEX_DIR = "book_index"
+# Number of words between the checkpoints of the word index
+CHECKPOINT_WORDS = 1024
+# Number of bytes of the file scanned at a time when building the word index
+SCAN_CHUNK = 1 << 23
+# Version of the cached index format; caches of other versions are rebuilt
+INDEX_VERSION = 1
+
+# Words are runs of bytes other than ASCII whitespace and control characters. Multi-byte UTF-8 characters never
+# contain those bytes, so files can be split into words without decoding them.
+WORD = re.compile(rb"[^\x00-\x20]+")
+NEWLINE = ord("\n")
+
+
+def index_cache_path(filename):
+    """
+    Returns the path of the cached word index of a book.
+    """
+    key = hashlib.sha1(os.path.abspath(filename).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(BOOK_INDEX_DIR, f"{key}.npz")
+
+
+class BookIndex:
+    """
+    Sparse index of the words and lines of a book.
+
+    Attributes
+    ----------
+    offsets : numpy.ndarray
+        Byte offset of every CHECKPOINT_WORDS-th word, starting with the first.
+    lines : numpy.ndarray
+        Line number (from 0) of each checkpoint word.
+    word_count : int
+        Number of words in the book.
+    line_count : int
+        Number of lines in the book.
+    """
+    def __init__(self, offsets, lines, word_count, line_count):
+        self.offsets = offsets
+        self.lines = lines
+        self.word_count = word_count
+        self.line_count = line_count
+
+    @classmethod
+    def build(cls, buffer, stop=None):
+        """
+        Scans a book for its words and lines, a chunk at a time.
+
+        Parameters
+        ----------
+        buffer : mmap.mmap
+            The mapped book.
+        stop : threading.Event
+            Stops the scan early when set, e.g. because the book was closed.
+
+        Returns
+        -------
+        index : BookIndex
+            The index, or None if the scan was stopped.
+        """
+        offsets, lines = [], []
+        word_count = line_count = 0
+        previous_space = True  # Whether the byte before the chunk is a space, i.e. the start of the file
+        for start in range(0, len(buffer), SCAN_CHUNK):
+            if stop is not None and stop.is_set():
+                return None
+            chunk = np.frombuffer(buffer, np.uint8, min(SCAN_CHUNK, len(buffer) - start), start)
+            space = chunk <= 0x20
+            word_starts = np.flatnonzero(~space[1:] & space[:-1]) + 1
+            if not space[0] and previous_space:
+                word_starts = np.concatenate([[0], word_starts])
+            # Words numbered CHECKPOINT_WORDS apart, counting from the start of the book
+            checkpoints = word_starts[(-word_count) % CHECKPOINT_WORDS::CHECKPOINT_WORDS]
+            newlines = np.flatnonzero(chunk == NEWLINE)
+            offsets.append(checkpoints + start)
+            lines.append(np.searchsorted(newlines, checkpoints) + line_count)
+            word_count += len(word_starts)
+            line_count += len(newlines)
+            previous_space = bool(space[-1])
+            del chunk  # Release the view of the buffer, so it can be closed
+        if len(buffer) and buffer[-1] != NEWLINE:
+            line_count += 1  # The last line doesn't end with a newline
+        offsets = np.concatenate(offsets).astype(np.int64) if offsets else np.empty(0, np.int64)
+        lines = np.concatenate(lines).astype(np.int64) if lines else np.empty(0, np.int64)
+        return cls(offsets, lines, word_count, line_count)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Loads the cached index of a book, if it is up to date with the book.
+
+        Returns
+        -------
+        index : BookIndex
+            The index, or None if there is no usable cache.
+        """
+        try:
+            stat = os.stat(filename)
+            with np.load(index_cache_path(filename), allow_pickle=False) as cache:
+                meta = json.loads(str(cache["meta"]))
+                if meta["version"] != INDEX_VERSION or (meta["size"], meta["mtime_ns"]) != (stat.st_size,
+                                                                                           stat.st_mtime_ns):
+                    return None
+                return cls(cache["offsets"], cache["lines"], meta["word_count"], meta["line_count"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, filename):
+        """
+        Caches the index of a book. The cache is only an optimisation, so failing to save it is ignored.
+        """
+        path = index_cache_path(filename)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            stat = os.stat(filename)
+            meta = {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                    "word_count": self.word_count, "line_count": self.line_count}
+            os.makedirs(BOOK_INDEX_DIR, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), offsets=self.offsets, lines=self.lines)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+
+class Book:
+    """
+    A text file being typed through, memory-mapped and tokenised from the current position.
+
+    Attributes
+    ----------
+    filename : str
+        Path of the file.
+    name : str
+        File name without its directory, shown with the progress.
+    size : int
+        Size of the file in bytes.
+    position : int
+        Byte offset of the first word of the next test.
+    index : BookIndex
+        Word index of the book, or None until it has been built.
+    test_offsets : list
+        Byte offsets of each word of the last test, followed by the offset just after its last word. They go back to
+        the beginning if the test reached the end of the book.
+    """
+    def __init__(self, filename, position=0):
+        """
+        Maps the file.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the file.
+        position : int
+            Byte offset to start from, e.g. where the previous session stopped.
+
+        Raises
+        ------
+        OSError
+            If the file can't be opened.
+        ValueError
+            If the file is empty or has no words.
+        """
+        self.filename = filename
+        self.name = os.path.basename(filename)
+        with open(filename, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            if not self.size:
+                raise ValueError(f"{self.name} is empty")
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if WORD.search(self._buffer) is None:
+            self._buffer.close()
+            raise ValueError(f"{self.name} has no words")
+        self.position = position if 0 <= position < self.size else 0
+        self.index = None
+        self.test_offsets = []
+        self._stop = threading.Event()
+        self._indexer = None
+
+    def start_indexing(self):
+        """
+        Loads the cached word index, or starts building it in a background thread.
+        """
+        self.index = BookIndex.load(self.filename)
+        if self.index is None and self._indexer is None:
+            self._indexer = threading.Thread(target=self._build_index, name="book-indexer", daemon=True)
+            self._indexer.start()
+
+    def _build_index(self):
+        """
+        Builds and caches the word index. The thread maps the file itself, so closing the book doesn't wait for it.
+        """
+        with open(self.filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            index = BookIndex.build(buffer, self._stop)
+        if index is not None:
+            index.save(self.filename)
+            self.index = index
+
+    def wait_for_index(self, timeout=None):
+        """
+        Waits for the background thread building the word index to finish.
+        """
+        if self._indexer is not None:
+            self._indexer.join(timeout)
+
+    def close(self):
+        """
+        Stops building the index and unmaps the file.
+        """
+        self._stop.set()
+        self._buffer.close()
+
+    def read_words(self, offset, count):
+        """
+        Tokenises words from a byte offset.
+
+        Parameters
+        ----------
+        offset : int
+            Byte offset to start at. A word that starts before it is cut.
+        count : int
+            Maximum number of words to read.
+
+        Returns
+        -------
+        words : list
+            The words.
+        offsets : list
+            Byte offset of each word, followed by the offset just after the last word.
+        """
+        words, offsets = [], []
+        end = offset
+        for match in WORD.finditer(self._buffer, offset):
+            if len(words) == count:
+                break
+            words.append(match.group().decode("utf-8", "replace"))
+            offsets.append(match.start())
+            end = match.end()
+        offsets.append(end)
+        return words, offsets
+
+    def next_test(self, count=TEST_WORDS):
+        """
+        Prepares a test of the words from the current position, continuing from the beginning at the end of the
+        book.
+
+        Parameters
+        ----------
+        count : int
+            Number of words in the test.
+
+        Returns
+        -------
+        test : PreparedTest
+            The test.
+        """
+        words, self.test_offsets = self.read_words(self.position, count)
+        while len(words) < count:  # Continue from the beginning at the end of the book
+            more, offsets = self.read_words(0, count - len(words))
+            words += more
+            self.test_offsets[-1:] = offsets
+        return PreparedTest(words)
+
+    def advance(self, words_typed):
+        """
+        Moves the position past the words typed in the last test.
+
+        Parameters
+        ----------
+        words_typed : int
+            Number of words of the last test that were typed.
+        """
+        if self.test_offsets:
+            self.position = self.test_offsets[min(words_typed, len(self.test_offsets) - 1)]
+
+    def seek_fraction(self, fraction):
+        """
+        Moves the position to the first word starting at or after a fraction of the way through the file.
+
+        Parameters
+        ----------
+        fraction : float
+            Fraction of the file, from 0 to 1.
+        """
+        offset = int(min(max(fraction, 0), 1) * self.size)
+        if 0 < offset < self.size and self._buffer[offset - 1] > 0x20:  # Inside a word, so skip to its end
+            match = WORD.match(self._buffer, offset)
+            offset = match.end() if match else offset
+        match = WORD.search(self._buffer, offset)
+        self.position = match.start() if match else 0
+
+    def seek_word(self, word_number):
+        """
+        Moves the position to a word, counting from 0. Needs the word index.
+
+        Parameters
+        ----------
+        word_number : int
+            Number of the word.
+        """
+        word_number = min(max(word_number, 0), self.index.word_count - 1)
+        checkpoint = word_number // CHECKPOINT_WORDS
+        _, offsets = self.read_words(int(self.index.offsets[checkpoint]), word_number % CHECKPOINT_WORDS + 1)
+        self.position = offsets[-2]
+
+    def seek_line(self, line_number):
+        """
+        Moves the position to the first word on or after a line, counting from 0. Needs the word index.
+
+        Parameters
+        ----------
+        line_number : int
+            Number of the line.
+        """
+        checkpoint = max(int(np.searchsorted(self.index.lines, line_number, side="right")) - 1, 0)
+        offset, line = int(self.index.offsets[checkpoint]), int(self.index.lines[checkpoint])
+        while line < line_number:
+            newline = self._buffer.find(b"\n", offset)
+            if newline < 0:
+                break
+            offset, line = newline + 1, line + 1
+        match = WORD.search(self._buffer, offset)
+        self.position = match.start() if match else 0
+
+    def word_number(self, offset=None):
+        """
+        Counts the words before a byte offset. Needs the word index.
+
+        Parameters
+        ----------
+        offset : int
+            The byte offset. The current position if not given.
+
+        Returns
+        -------
+        word_number : int
+            Number of the word at the offset, counting from 0.
+        """
+        offset = self.position if offset is None else offset
+        checkpoint = max(int(np.searchsorted(self.index.offsets, offset, side="right")) - 1, 0)
+        start = int(self.index.offsets[checkpoint]) if len(self.index.offsets) else 0
+        between = sum(1 for _ in WORD.finditer(self._buffer, start, offset))
+        return checkpoint * CHECKPOINT_WORDS + between
+
+    def progress(self):
+        """
+        Describes how far through the book the current position is, in words once the index has been built.
+        """
+        percent = self.position / self.size * 100
+        if self.index is None:
+            return f"{percent:.1f}% (indexing...)"
+        return f"{percent:.1f}%, word {self.word_number() + 1:,} of {self.index.word_count:,}"
+
+
+class BookPositions:
+    """
+    The book in use and the position reached in each book, stored as JSON.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the file the positions are stored in.
+    current : str
+        Path of the book in use, or None when tests use the word lists.
+    positions : dict
+        Maps the absolute path of each book to the byte offset reached in it.
+    """
+    def __init__(self, filename=BOOK_POSITIONS_FILENAME):
+        self.filename = filename
+        self.current = None
+        self.positions = {}
+        self.load()
+
+    def load(self):
+        """
+        Loads the positions from the file, if it exists.
+        """
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.current, self.positions = data["current"], data["positions"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.current, self.positions = None, {}
+
+    def save(self):
+        """
+        Saves the positions to the file.
+        """
+        temp_path = f"{self.filename}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"current": self.current, "positions": self.positions}, f)
+        os.replace(temp_path, self.filename)
+
+    def get(self, book_filename):
+        """
+        Returns the position reached in a book, or 0 for a new book.
+        """
+        return self.positions.get(os.path.abspath(book_filename), 0)
+
+    def set(self, book: Book):
+        """
+        Records the current position of a book.
+        """
+        self.positions[os.path.abspath(book.filename)] = book.position
@@ -0,0 +1,182 @@
+"""
+Test content other than plain lowercase words: punctuation, capitals and numbers mixed into the words, and passages of
+quotes.
+
+The content of a test is given by a short code, which is part of the test's ID so shared tests have the same content.
+Plain words have the empty code; the modifiers PUNCTUATION, CAPITALS and NUMBERS can be combined, e.g. "pc"; and
+quote passages are "q" followed by a quote length from QUOTE_LENGTHS, e.g. "qm". Modifiers are applied to the words
+with the test's random generator, so they are reproduced along with the words.
+
+The quotes are compiled into a corpus like the word lists (see word_corpus.py), with one quote per entry. Its length
+index groups the quotes by their number of characters, so the quotes of a length are found with one slice of the
+index.
+"""
+import functools
+
+from word_corpus import WordCorpus, load_corpus
+
+PUNCTUATION = "p"
+CAPITALS = "c"
+NUMBERS = "n"
+# The modifiers, in the order they appear in content codes
+MODIFIERS = PUNCTUATION + CAPITALS + NUMBERS
+QUOTES = "q"
+QUOTES_FILE = "word_lists/quotes.txt"
+# Names and ranges of number of characters of the quote lengths, by the letter identifying each in content codes
+QUOTE_LENGTHS = {"s": ("Short", 0, 99), "m": ("Medium", 100, 299), "l": ("Long", 300, None)}
+
+# Share of words replaced by numbers
+NUMBER_SHARE = 0.15
+# Share of words capitalised when capitals are used without punctuation
+CAPITAL_SHARE = 0.25
+# Number of words in a sentence when punctuation is used
+SENTENCE_WORDS = (4, 12)
+# Share of words within a sentence followed by a comma, semicolon or colon, and share of words in quotation marks or
+# brackets
+CLAUSE_SHARE = 0.15
+WRAPPED_SHARE = 0.04
+
+
+def is_valid_content(content):
+    """
+    Checks whether a content code is valid: a combination of modifiers in order, or quotes of a given length.
+    """
+    if content.startswith(QUOTES):
+        return content[1:] in QUOTE_LENGTHS
+    return "".join(modifier for modifier in MODIFIERS if modifier in content) == content
+
+
+def toggle_modifier(content, modifier):
+    """
+    Adds a modifier to a content code, or removes it if it's already there. Modifiers replace quotes.
+
+    Parameters
+    ----------
+    content : str
+        The content code.
+    modifier : str
+        One of MODIFIERS.
+
+    Returns
+    -------
+    content : str
+        The new content code.
+    """
+    modifiers = "" if content.startswith(QUOTES) else content
+    modifiers = modifiers.replace(modifier, "") if modifier in modifiers else modifiers + modifier
+    return "".join(m for m in MODIFIERS if m in modifiers)
+
+
+def next_quote_length(content):
+    """
+    Cycles a content code through the quote lengths and back to words.
+
+    Parameters
+    ----------
+    content : str
+        The content code.
+
+    Returns
+    -------
+    content : str
+        Quotes of the next length, or plain words after the longest.
+    """
+    lengths = list(QUOTE_LENGTHS)
+    if not content.startswith(QUOTES):
+        return QUOTES + lengths[0]
+    position = lengths.index(content[1:]) + 1
+    return QUOTES + lengths[position] if position < len(lengths) else ""
+
+
+def apply_modifiers(words, content, rng):
+    """
+    Mixes punctuation, capitals and numbers into the words of a test.
+
+    With punctuation, the words are split into sentences ending with a full stop, question mark or exclamation mark,
+    with clauses separated by commas, semicolons and colons. Capitals then start each sentence; without punctuation,
+    a share of the words are capitalised.
+
+    Parameters
+    ----------
+    words : list
+        The words.
+    content : str
+        Content code giving the modifiers to apply.
+    rng : random.Random
+        The test's random generator.
+
+    Returns
+    -------
+    words : list
+        The modified words.
+    """
+    words = list(words)
+    if NUMBERS in content:
+        for i in range(len(words)):
+            if rng.random() < NUMBER_SHARE:
+                words[i] = str(rng.randrange(10 ** rng.randint(1, 4)))
+
+    if PUNCTUATION in content:
+        sentence_end = 0
+        for i in range(len(words)):
+            if i == sentence_end:  # The first word of a sentence
+                if CAPITALS in content:
+                    words[i] = words[i][:1].upper() + words[i][1:]
+                sentence_end = i + rng.randint(*SENTENCE_WORDS)
+            if i == sentence_end - 1:
+                words[i] += rng.choices(".?!", weights=[0.7, 0.15, 0.15])[0]
+            elif rng.random() < CLAUSE_SHARE:
+                words[i] += rng.choice(",,,,;:")
+            elif rng.random() < WRAPPED_SHARE:
+                words[i] = rng.choice(['"{}"', "({})", "'{}'"]).format(words[i])
+    elif CAPITALS in content:
+        for i in range(len(words)):
+            if rng.random() < CAPITAL_SHARE:
+                words[i] = words[i][:1].upper() + words[i][1:]
+    return words
+
+
+@functools.lru_cache(maxsize=1)
+def get_quotes():
+    """
+    Loads the quote corpus the first time it is needed.
+
+    Returns
+    -------
+    quotes : word_corpus.WordCorpus
+        The quotes, one per entry.
+    """
+    return load_corpus(QUOTES_FILE)
+
+
+def quote_words(quotes: WordCorpus, length, count, rng):
+    """
+    Selects quotes of a length at random, joined into a passage of at least the given number of words.
+
+    Parameters
+    ----------
+    quotes : word_corpus.WordCorpus
+        The quote corpus.
+    length : str
+        The quote length, a key of QUOTE_LENGTHS.
+    count : int
+        Number of words needed.
+    rng : random.Random
+        The test's random generator.
+
+    Returns
+    -------
+    words : list
+        The words of the quotes. Empty if there are no quotes.
+    """
+    if not len(quotes):  # The quote file is empty
+        return []
+    _, min_length, max_length = QUOTE_LENGTHS[length]
+    quote_ids = quotes.ids_of_length(min_length, max_length)
+    if not len(quote_ids):  # The quote file has been edited
+        quote_ids = quotes.ids_of_length(0)
+    words = []
+    while len(words) < count:
+        words += quotes[rng.choice(quote_ids)].split()
+    return words
+
@@ -3,6 +3,12 @@ from scoreboard_ui import ScoreboardUI
 from options_ui import OptionsUI
 from colour_schemes import COLOUR_SCHEMES
 from analytics_ui import AnalyticsUI
+from history_ui import HistoryUI
+from results_io import ResultsInOut
+from diagnostics import profiled
+from theme import ThemeEngine
+
+CS_FILENAME = "default_cs.txt"
 
 
 class CurrentDisplay:
@@ -27,8 +33,16 @@ class CurrentDisplay:
         Instance of the OptionsUI class.
     analytics_ui : AnalyticsUI
         Instance of the AnalyticsUI class.
+    history_ui : HistoryUI
+        Instance of the HistoryUI class.
     ui_list : list
         List of the UI instances.
+    results_io : ResultsInOut
+        Instance of the ResultsInOut class, whose queued results are written when the application closes.
+    theme : ThemeEngine
+        The theme engine, which applies colour schemes to the ttk widgets.
+    cs_filename : str
+        Name of the file storing the current profile's default colour scheme index.
 
     Methods
     -------
@@ -36,8 +50,11 @@ class CurrentDisplay:
         Applies the given colour scheme to each UI component
     open_ui(ui_to_open)
         Opens the given UI.
+    load_default_cs(cs_filename)
+        Applies the default colour scheme stored in the given file.
     """
-    def __init__(self, root, home_ui: HomeUI, scoreboard_ui: ScoreboardUI, options_ui: OptionsUI, analytics_ui: AnalyticsUI):
+    def __init__(self, root, home_ui: HomeUI, scoreboard_ui: ScoreboardUI, options_ui: OptionsUI, analytics_ui: AnalyticsUI,
+                 history_ui: HistoryUI, results_io: ResultsInOut, theme: ThemeEngine, cs_filename=CS_FILENAME):
         """
         Initialises the current display.
 
@@ -55,30 +72,38 @@ class CurrentDisplay:
             Instance of the OptionsUI class.
         analytics_ui : AnalyticsUI
             Instance of the AnalyticsUI class.
+        history_ui : HistoryUI
+            Instance of the HistoryUI class.
+        results_io : ResultsInOut
+            Instance of the ResultsInOut class.
+        theme : ThemeEngine
+            The theme engine, which applies colour schemes to the ttk widgets.
+        cs_filename : str
+            Name of the file storing the current profile's default colour scheme index.
         """
         self.root = root
+        self.results_io = results_io
+        self.theme = theme
         self.root.rowconfigure(tuple(range(5)), weight=1)
         self.root.columnconfigure(tuple(range(5)), weight=1)
 
         self.is_fullscreen = False
         self.root.bind("<F11>", self.toggle_fullscreen)
         self.root.bind("<Escape>", self.exit_fullscreen)
-
-        # Initially apply the default colour scheme
-        self.colour_schemes = COLOUR_SCHEMES
-        self.default_cs_index = self.get_default_cs()
-        options_ui.default_cs_index = self.default_cs_index
-        options_ui.configure_preview(self.default_cs_index)
-        self.max_cs_index = len(self.colour_schemes) - 1
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)  # Closing the window also writes queued results
 
         self.home_ui = home_ui
         self.scoreboard_ui = scoreboard_ui
         self.options_ui = options_ui
         self.analytics_ui = analytics_ui
+        self.history_ui = history_ui
 
-        self.ui_list = [self.home_ui, self.scoreboard_ui, self.options_ui, self.analytics_ui]
+        self.ui_list = [self.home_ui, self.scoreboard_ui, self.options_ui, self.analytics_ui, self.history_ui]
 
-        self.set_colour_scheme(self.colour_schemes[self.default_cs_index])
+        # Initially apply the default colour scheme
+        self.colour_schemes = COLOUR_SCHEMES
+        self.max_cs_index = len(self.colour_schemes) - 1
+        self.load_default_cs(cs_filename)
 
         # Open the home screen on startup
         self.open_ui(home_ui)
@@ -93,36 +118,56 @@ class CurrentDisplay:
             Index of the default colour scheme.
         """
         try:
-            with open("default_cs.txt", "r") as f:
+            with open(self.cs_filename, "r") as f:
                 default_cs_index = int(f.read())
             return default_cs_index
         except FileNotFoundError:
-            with open("default_cs.txt", "w") as f:
+            with open(self.cs_filename, "w") as f:
                 f.write("0")
             return 0
 
+    def load_default_cs(self, cs_filename):
+        """
+        Applies the default colour scheme stored in the given file, e.g. when switching profile.
+
+        Parameters
+        ----------
+        cs_filename : str
+            Name of the file storing the default colour scheme index.
+        """
+        self.cs_filename = cs_filename
+        self.default_cs_index = self.get_default_cs()
+        self.options_ui.default_cs_index = self.default_cs_index
+        self.options_ui.configure_preview(self.default_cs_index)
+        self.set_colour_scheme(self.colour_schemes[self.default_cs_index])
+
+    @profiled
     def set_colour_scheme(self, colour_scheme):
         """
         Set the colour scheme of the whole application to the given colour scheme.
 
+        The ttk widgets are coloured by redefining the theme engine's styles, so only the root window and the widgets
+        ttk can't style are configured here.
+
         Parameters
         ----------
         colour_scheme : dict
             The colour scheme to be applied.
         """
+        self.theme.apply(colour_scheme)
         self.root.config(bg=colour_scheme["background"])
         self.home_ui.config_home_ui(colour_scheme)
         self.scoreboard_ui.config_scores_ui(colour_scheme)
-        self.options_ui.config_options_ui(colour_scheme)
         self.analytics_ui.configure_cs(colour_scheme)
 
+    @profiled
     def open_ui(self, ui_to_open):
         """
         Opens the given UI component.
 
         Parameters
         ----------
-        ui_to_open : HomeUI, AnalyticsUI, ScoreboardUI, OptionsUI
+        ui_to_open : HomeUI, AnalyticsUI, ScoreboardUI, OptionsUI, HistoryUI
             The UI page which is to be displayed.
         """
         for ui in self.ui_list:
@@ -148,6 +193,7 @@ class CurrentDisplay:
 
     def exit_app(self):
         """
-        Closes the application.
+        Writes any queued results and closes the application.
         """
+        self.results_io.close()
         self.root.destroy()
@@ -0,0 +1,178 @@
+"""
+Diagnostics mode: profiles the app's Tk callbacks to find out why it feels slow.
+
+Callbacks decorated with @profiled run under cProfile while diagnostics are on, and tracemalloc records the memory
+they allocate. Stopping the session (or closing the app) writes to a new folder in DIAGNOSTICS_DIR:
+
+- profile.pstats: the cProfile statistics of every profiled callback, for pstats or snakeviz,
+- profile.txt: the same statistics as text, sorted by cumulative time,
+- callbacks.txt: the number of calls, total and slowest time and peak memory of each callback,
+- memory.txt: the lines that allocated the most memory during the session, from tracemalloc snapshots.
+
+Diagnostics are switched on from the options page, or for the whole run by setting the TYPING_TEST_DIAGNOSTICS
+environment variable. When they are off, a profiled callback only costs one extra function call and a global lookup.
+"""
+import atexit
+import cProfile
+import datetime
+import functools
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+DIAGNOSTICS_DIR = "diagnostics"
+ENV_VARIABLE = "TYPING_TEST_DIAGNOSTICS"
+# Frames kept for each tracemalloc allocation
+TRACEBACK_FRAMES = 5
+# Lines listed in the memory and profile reports
+TOP_LINES = 30
+
+_session = None
+
+
+class DiagnosticsSession:
+    """
+    Profile and memory statistics collected between starting and stopping diagnostics.
+
+    Attributes
+    ----------
+    directory : str
+        Folder the reports are written to.
+    callbacks : dict
+        For each callback name, a list of [calls, total seconds, slowest seconds, peak bytes allocated].
+    """
+    def __init__(self, directory):
+        """
+        Parameters
+        ----------
+        directory : str
+            Folder to write the reports to. It's created when the session stops.
+        """
+        self.directory = directory
+        self.callbacks = {}
+        self._profile = cProfile.Profile()
+        self._depth = 0  # Callbacks called from other profiled callbacks are part of the outer one's profile
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACEBACK_FRAMES)
+        self._start_snapshot = tracemalloc.take_snapshot()
+
+    def run(self, name, func, args, kwargs):
+        """
+        Calls a callback, profiling it and recording its time and peak memory.
+        """
+        if self._depth:
+            return func(*args, **kwargs)
+        self._depth += 1
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return self._profile.runcall(func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - start_memory
+            self._depth -= 1
+            stats = self.callbacks.setdefault(name, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] = max(stats[3], peak)
+
+    def stop(self):
+        """
+        Stops tracing memory and writes the reports.
+        """
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+        os.makedirs(self.directory, exist_ok=True)
+
+        with open(os.path.join(self.directory, "callbacks.txt"), "w") as f:
+            f.write(f"{'callback':<45}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'peak KiB':>10}\n")
+            for name, (calls, total, slowest, peak) in sorted(self.callbacks.items(), key=lambda item: -item[1][1]):
+                f.write(f"{name:<45}{calls:>8}{total * 1000:>12.1f}{total / calls * 1000:>10.2f}"
+                        f"{slowest * 1000:>10.2f}{peak / 1024:>10.1f}\n")
+
+        with open(os.path.join(self.directory, "memory.txt"), "w") as f:
+            f.write(f"Allocated during the session, by line (top {TOP_LINES}):\n")
+            for stat in snapshot.compare_to(self._start_snapshot, "lineno")[:TOP_LINES]:
+                f.write(f"{stat}\n")
+            f.write(f"\nLargest allocations still held at the end, with tracebacks (top {TOP_LINES // 3}):\n")
+            for stat in snapshot.statistics("traceback")[:TOP_LINES // 3]:
+                f.write(f"{stat}\n" + "".join(f"    {line}\n" for line in stat.traceback.format()))
+
+        if not self.callbacks:
+            return
+        self._profile.dump_stats(os.path.join(self.directory, "profile.pstats"))
+        text = io.StringIO()
+        pstats.Stats(self._profile, stream=text).sort_stats("cumulative").print_stats(TOP_LINES)
+        with open(os.path.join(self.directory, "profile.txt"), "w") as f:
+            f.write(text.getvalue())
+
+
+def profiled(func):
+    """
+    Decorator for callbacks that should be profiled while diagnostics are on.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _session
+        if session is None:
+            return func(*args, **kwargs)
+        return session.run(name, func, args, kwargs)
+    return wrapper
+
+
+def is_enabled():
+    """
+    Returns whether diagnostics are on.
+    """
+    return _session is not None
+
+
+def start(base_dir=DIAGNOSTICS_DIR):
+    """
+    Switches diagnostics on, starting a new session, unless they're already on.
+
+    Parameters
+    ----------
+    base_dir : str
+        Folder in which the session's folder is created.
+    """
+    global _session
+    if _session is None:
+        name = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        _session = DiagnosticsSession(os.path.join(base_dir, name))
+
+
+def stop():
+    """
+    Switches diagnostics off and writes the session's reports.
+
+    Returns
+    -------
+    directory : str or None
+        Folder the reports were written to, or None if diagnostics were off.
+    """
+    global _session
+    session, _session = _session, None
+    if session is None:
+        return None
+    session.stop()
+    return session.directory
+
+
+def start_from_environment():
+    """
+    Switches diagnostics on if the TYPING_TEST_DIAGNOSTICS environment variable is set.
+    """
+    if os.environ.get(ENV_VARIABLE):
+        start()
+
+
+atexit.register(stop)
@@ -0,0 +1,252 @@
+"""
+Ghost races: a ghost cursor replays the user's best run of a test while they take it again.
+
+After each test with an ID, its keystrokes are replayed to find where the cursor was after each one, and the run is
+stored if it's the best on that test and duration. Nothing extra is recorded while the user types.
+
+During a race the ghost is moved by one deadline-driven Tk callback: each call moves the ghost past every keystroke
+that is due, then schedules itself for the next keystroke's time, but never sooner than FRAME_INTERVAL. Fast typing
+is drawn in batches of one frame rather than one callback per keystroke, and the user's own key presses, which are
+handled between the ghost's callbacks, never wait for more than one ghost move.
+"""
+import bisect
+import json
+import math
+import os
+import time
+
+# Remembers the best run of each test. One per profile.
+GHOSTS_FILENAME = "ghosts.json"
+# Number of best runs kept; the slowest are forgotten first
+MAX_GHOSTS = 200
+# Shortest time in seconds between moves of the ghost cursor
+FRAME_INTERVAL = 0.016
+
+
+def replay_positions(keystrokes, duration):
+    """
+    Replays a test's keystrokes to find where the cursor was after each one, in the same way as the keystroke
+    handlers in typing_test.py move it.
+
+    Parameters
+    ----------
+    keystrokes : list
+        Tuples of (time, character typed, character expected) for every keystroke of the test.
+    duration : int
+        Duration of the test in seconds. Keystrokes after it are left out.
+
+    Returns
+    -------
+    times : list
+        Time of each keystroke in seconds after the first, which started the test.
+    words : list
+        Index in the test words of the word the cursor was on after each keystroke.
+    chars : list
+        Position of the cursor in that word, including excess characters.
+    """
+    times, words, chars = [], [], []
+    if not keystrokes:
+        return times, words, chars
+    start = keystrokes[0][0]
+    word = char = 0
+    for keystroke_time, typed, _ in keystrokes:
+        if keystroke_time - start > duration:
+            break
+        if typed == " ":
+            word, char = word + 1, 0
+        elif typed == "\b":
+            char -= 1
+        else:
+            char += 1
+        times.append(round(keystroke_time - start, 3))
+        words.append(word)
+        chars.append(char)
+    return times, words, chars
+
+
+class GhostRun:
+    """
+    A stored run of a test, which the ghost replays.
+
+    Attributes
+    ----------
+    wpm : float
+        Words per minute of the run.
+    times : list
+        Time of each keystroke in seconds after the start of the run.
+    words : list
+        Index of the word the cursor was on after each keystroke.
+    chars : list
+        Position of the cursor in that word after each keystroke.
+    """
+    def __init__(self, wpm, times, words, chars):
+        self.wpm = wpm
+        self.times = times
+        self.words = words
+        self.chars = chars
+
+
+class GhostStore:
+    """
+    The best run of each test and duration, stored as JSON.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the file the runs are stored in.
+    runs : dict
+        Maps "<test ID>@<duration>" to the best run of that test, as a dict of GhostRun's attributes.
+    """
+    def __init__(self, filename=GHOSTS_FILENAME):
+        self.filename = filename
+        self.runs = {}
+        self.load()
+
+    def load(self):
+        """
+        Loads the runs from the file, if it exists.
+        """
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                self.runs = json.load(f)
+        except (OSError, ValueError):
+            self.runs = {}
+
+    def save(self):
+        """
+        Saves the runs to the file.
+        """
+        temp_path = f"{self.filename}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.runs, f, separators=(",", ":"))
+        os.replace(temp_path, self.filename)
+
+    def best(self, test_id, duration):
+        """
+        Returns the best run of a test, or None if it hasn't been taken.
+
+        Parameters
+        ----------
+        test_id : str
+            ID of the test.
+        duration : int
+            Duration of the test in seconds.
+        """
+        run = self.runs.get(f"{test_id}@{duration}")
+        return GhostRun(**run) if run else None
+
+    def fastest(self, duration):
+        """
+        Returns the ID of the test with the fastest stored run of a duration, or None if there isn't one.
+        """
+        candidates = [(run["wpm"], key) for key, run in self.runs.items() if key.endswith(f"@{duration}")]
+        return max(candidates)[1].rpartition("@")[0] if candidates else None
+
+    def record(self, test_id, duration, wpm, keystrokes):
+        """
+        Stores a run of a test if it's faster than the best run so far.
+
+        Parameters
+        ----------
+        test_id : str
+            ID of the test.
+        duration : int
+            Duration of the test in seconds.
+        wpm : float
+            Words per minute of the run.
+        keystrokes : list
+            Tuples of (time, character typed, character expected) for every keystroke of the run.
+
+        Returns
+        -------
+        new_best : bool
+            Whether the run was stored.
+        """
+        key = f"{test_id}@{duration}"
+        if not keystrokes or (key in self.runs and self.runs[key]["wpm"] >= wpm):
+            return False
+        times, words, chars = replay_positions(keystrokes, duration)
+        self.runs[key] = {"wpm": wpm, "times": times, "words": words, "chars": chars}
+        if len(self.runs) > MAX_GHOSTS:
+            del self.runs[min(self.runs, key=lambda k: self.runs[k]["wpm"])]
+        return True
+
+
+class GhostRace:
+    """
+    Moves the ghost cursor through a stored run in real time.
+
+    Attributes
+    ----------
+    root : tkinter.Tk
+        The root window, which schedules the ghost's moves.
+    move : callable
+        Called with the word index and position in the word to move the ghost cursor.
+    run : GhostRun
+        The run being replayed, or None.
+    start_time : float
+        Time the race started, from time.perf_counter().
+    position : int
+        Number of the run's keystrokes the ghost has made.
+    moves : int
+        Number of times the ghost cursor has been moved in this race.
+    """
+    def __init__(self, root, move):
+        """
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The root window.
+        move : callable
+            Called with the word index and position in the word to move the ghost cursor.
+        """
+        self.root = root
+        self.move = move
+        self.run = None
+        self.start_time = None
+        self.position = 0
+        self.moves = 0
+        self._after_id = None
+
+    def start(self, run: GhostRun, start_time=None):
+        """
+        Starts replaying a run.
+
+        Parameters
+        ----------
+        run : GhostRun
+            The run to replay.
+        start_time : float
+            Time the race started, from time.perf_counter(). Now if not given.
+        """
+        self.stop()
+        self.run = run
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.position = 0
+        self.moves = 0
+        self.tick()
+
+    def tick(self):
+        """
+        Moves the ghost past every keystroke that is due, and schedules the next move.
+        """
+        self._after_id = None
+        times = self.run.times
+        elapsed = time.perf_counter() - self.start_time
+        position = bisect.bisect_right(times, elapsed, self.position)
+        if position > self.position:
+            self.position = position
+            self.moves += 1
+            self.move(self.run.words[position - 1], self.run.chars[position - 1])
+        if position < len(times):
+            delay = max(times[position] - elapsed, FRAME_INTERVAL)
+            self._after_id = self.root.after(math.ceil(delay * 1000), self.tick)
+
+    def stop(self):
+        """
+        Stops the race.
+        """
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.run = None
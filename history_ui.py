@@ -0,0 +1,272 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Columns of the results list, with their headings and widths
+HISTORY_COLUMNS = [("timestamp", "Date", 190), ("wpm", "WPM", 90), ("accuracy", "Accuracy", 110),
+                   ("duration", "Duration", 110), ("test_id", "Test ID", 150)]
+DURATION_CHOICES = ["All durations", "15 seconds", "30 seconds", "60 seconds"]
+
+
+def parse_duration(choice):
+    """
+    Returns the test duration in seconds chosen from a duration menu, or None for all durations.
+
+    Parameters
+    ----------
+    choice : str
+        The menu choice, one of DURATION_CHOICES.
+    """
+    return int(choice.split()[0]) if choice in DURATION_CHOICES[1:] else None
+
+
+class HistoryUI:
+    """
+    Class responsible for setting up the results history screen UI components.
+
+    The results list is virtualised: it only ever holds VISIBLE_ROWS rows, whose values are replaced as the list is
+    scrolled, so it takes the same time to draw whether there are ten results or a million. The scrollbar isn't linked
+    to the list, but set to the position of the visible rows among all results.
+
+    Attributes
+    ----------
+    root : tkinter.Tk
+        The parent widget
+    history_frame : tkinter.ttk.Frame
+        Tkinter frame containing the history widgets.
+    duration_var : tkinter.StringVar
+        The duration chosen in the duration filter.
+    duration_menu : tkinter.ttk.OptionMenu
+        Menu to filter the results by test duration.
+    start_entry : tkinter.ttk.Entry
+        Entry for the first date of the results shown, as YYYY-MM-DD.
+    end_entry : tkinter.ttk.Entry
+        Entry for the last date of the results shown, as YYYY-MM-DD.
+    min_wpm_entry : tkinter.ttk.Entry
+        Entry for the lowest WPM of the results shown.
+    max_wpm_entry : tkinter.ttk.Entry
+        Entry for the highest WPM of the results shown.
+    apply_button : tkinter.ttk.Button
+        Button to apply the filters.
+    clear_button : tkinter.ttk.Button
+        Button to clear the filters.
+    results_list : tkinter.ttk.Treeview
+        List showing the visible rows of results.
+    scrollbar : tkinter.ttk.Scrollbar
+        Scrollbar showing the position of the visible rows among all results.
+    status_label : tkinter.ttk.Label
+        Label showing which results are visible, or why the filters couldn't be applied.
+    close_button : tkinter.ttk.Button
+        Button to close the history screen and return to the scoreboard.
+
+    Methods
+    -------
+    show_rows(rows)
+        Shows the given rows in the results list.
+    set_scroll(first, last)
+        Sets the scrollbar position.
+    config_sort_headings(sort_by, descending)
+        Marks the column the results are sorted by.
+    filter_values()
+        Returns the values entered in the filters.
+    clear_filters()
+        Clears the filters.
+    hide()
+        Hides the history UI.
+    show()
+        Shows the history UI.
+    """
+    VISIBLE_ROWS = 15
+
+    def __init__(self, root):
+        """
+        Initialises the history UI.
+
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The parent widget.
+        """
+        self.root = root
+        self.history_frame = self.setup_history_frame()
+        filter_widgets = self.setup_filters(self.history_frame)
+        (self.duration_var, self.duration_menu, self.start_entry, self.end_entry, self.min_wpm_entry,
+         self.max_wpm_entry, self.apply_button, self.clear_button) = filter_widgets
+        self.results_list, self.scrollbar = self.setup_results_list(self.history_frame)
+
+        self.status_label = ttk.Label(self.history_frame, style="Small.TLabel")
+        self.status_label.grid(row=3, column=0, pady=10)
+        self.close_button = ttk.Button(self.history_frame, text="Close", style="Accent.TButton")
+        self.close_button.grid(row=4, column=0)
+
+    def setup_history_frame(self):
+        """
+        Sets up the history frame widget.
+
+        Returns
+        -------
+        history_frame : tkinter.ttk.Frame
+            Tkinter frame containing the history widgets.
+        """
+        history_frame = ttk.Frame(self.root)
+        history_frame.grid(row=0, column=0, columnspan=5, rowspan=5, sticky="news")
+        history_frame.columnconfigure(0, weight=1)
+        history_frame.rowconfigure(2, weight=1)
+        ttk.Label(history_frame, text="Results History", style="Heading.TLabel").grid(row=0, column=0, pady=10)
+        return history_frame
+
+    def setup_filters(self, history_frame):
+        """
+        Sets up the filter widgets.
+
+        Parameters
+        ----------
+        history_frame : tkinter.ttk.Frame
+            The frame to attach the filter widgets to.
+
+        Returns
+        -------
+        duration_var : tkinter.StringVar
+            The duration chosen in the duration filter.
+        duration_menu : tkinter.ttk.OptionMenu
+            Menu to filter the results by test duration.
+        start_entry, end_entry : tkinter.ttk.Entry
+            Entries for the date range of the results shown.
+        min_wpm_entry, max_wpm_entry : tkinter.ttk.Entry
+            Entries for the WPM range of the results shown.
+        apply_button : tkinter.ttk.Button
+            Button to apply the filters.
+        clear_button : tkinter.ttk.Button
+            Button to clear the filters.
+        """
+        filters_frame = ttk.Frame(history_frame)
+        filters_frame.grid(row=1, column=0, pady=10)
+
+        duration_var = tk.StringVar(value=DURATION_CHOICES[0])
+        duration_menu = ttk.OptionMenu(filters_frame, duration_var, DURATION_CHOICES[0], *DURATION_CHOICES)
+        duration_menu.grid(row=0, column=0, padx=10)
+
+        ttk.Label(filters_frame, text="From", style="Small.TLabel").grid(row=0, column=1)
+        start_entry = ttk.Entry(filters_frame, width=11, font=("Arial", "14"))
+        start_entry.grid(row=0, column=2, padx=5)
+        ttk.Label(filters_frame, text="to", style="Small.TLabel").grid(row=0, column=3)
+        end_entry = ttk.Entry(filters_frame, width=11, font=("Arial", "14"))
+        end_entry.grid(row=0, column=4, padx=5)
+
+        ttk.Label(filters_frame, text="WPM", style="Small.TLabel").grid(row=0, column=5, padx=(10, 0))
+        min_wpm_entry = ttk.Entry(filters_frame, width=5, font=("Arial", "14"))
+        min_wpm_entry.grid(row=0, column=6, padx=5)
+        ttk.Label(filters_frame, text="to", style="Small.TLabel").grid(row=0, column=7)
+        max_wpm_entry = ttk.Entry(filters_frame, width=5, font=("Arial", "14"))
+        max_wpm_entry.grid(row=0, column=8, padx=5)
+
+        apply_button = ttk.Button(filters_frame, text="Apply", style="Small.Primary.TButton")
+        apply_button.grid(row=0, column=9, padx=(10, 5))
+        clear_button = ttk.Button(filters_frame, text="Clear", style="Small.Primary.TButton")
+        clear_button.grid(row=0, column=10, padx=5)
+        return (duration_var, duration_menu, start_entry, end_entry, min_wpm_entry, max_wpm_entry, apply_button,
+                clear_button)
+
+    def setup_results_list(self, history_frame):
+        """
+        Sets up the results list and its scrollbar. The list's rows are created once and reused.
+
+        Parameters
+        ----------
+        history_frame : tkinter.ttk.Frame
+            The frame to attach the results list to.
+
+        Returns
+        -------
+        results_list : tkinter.ttk.Treeview
+            List showing the visible rows of results.
+        scrollbar : tkinter.ttk.Scrollbar
+            Scrollbar showing the position of the visible rows among all results.
+        """
+        list_frame = ttk.Frame(history_frame)
+        list_frame.grid(row=2, column=0, sticky="ns")
+        list_frame.rowconfigure(0, weight=1)
+
+        results_list = ttk.Treeview(list_frame, columns=[column for column, _, _ in HISTORY_COLUMNS],
+                                    show="headings", height=self.VISIBLE_ROWS, selectmode="none")
+        for column, heading, width in HISTORY_COLUMNS:
+            results_list.heading(column, text=heading)
+            results_list.column(column, width=width, anchor="center")
+        for row in range(self.VISIBLE_ROWS):
+            results_list.insert("", "end", iid=str(row))
+        results_list.grid(row=0, column=0, sticky="ns")
+
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        return results_list, scrollbar
+
+    def show_rows(self, rows):
+        """
+        Shows the given rows in the results list, leaving the remaining rows blank.
+
+        Parameters
+        ----------
+        rows : list
+            Tuples of the values of each column in HISTORY_COLUMNS, at most VISIBLE_ROWS of them.
+        """
+        for row in range(self.VISIBLE_ROWS):
+            self.results_list.item(str(row), values=rows[row] if row < len(rows) else ())
+
+    def set_scroll(self, first, last):
+        """
+        Sets the scrollbar position.
+
+        Parameters
+        ----------
+        first, last : float
+            Positions of the first and last visible rows among all results, as fractions.
+        """
+        self.scrollbar.set(first, last)
+
+    def config_sort_headings(self, sort_by, descending):
+        """
+        Marks the column the results are sorted by with an arrow.
+
+        Parameters
+        ----------
+        sort_by : str
+            The column the results are sorted by.
+        descending : bool
+            Whether the results are sorted in descending order.
+        """
+        for column, heading, _ in HISTORY_COLUMNS:
+            if column == sort_by:
+                heading += " ▼" if descending else " ▲"
+            self.results_list.heading(column, text=heading)
+
+    def filter_values(self):
+        """
+        Returns the values entered in the filters.
+
+        Returns
+        -------
+        values : dict
+            The duration menu choice and the text of each entry, by the names duration, start, end, min_wpm and
+            max_wpm.
+        """
+        return {"duration": self.duration_var.get(), "start": self.start_entry.get(), "end": self.end_entry.get(),
+                "min_wpm": self.min_wpm_entry.get(), "max_wpm": self.max_wpm_entry.get()}
+
+    def clear_filters(self):
+        """
+        Clears the filters.
+        """
+        self.duration_var.set(DURATION_CHOICES[0])
+        for entry in [self.start_entry, self.end_entry, self.min_wpm_entry, self.max_wpm_entry]:
+            entry.delete(0, tk.END)
+
+    def show(self):
+        """
+        Shows the history UI.
+        """
+        self.history_frame.grid()
+
+    def hide(self):
+        """
+        Hides the history UI.
+        """
+        self.history_frame.grid_remove()
@@ -0,0 +1,233 @@
+from currentdisplay import CurrentDisplay
+from history_ui import HistoryUI, parse_duration
+from results_index import ResultsIndex, parse_date
+from results_io import ResultsInOut
+from scoreboard_ui import ScoreboardUI
+from scoreboardlogic import ScoreBoardLogic
+from diagnostics import profiled
+
+
+def parse_filters(values):
+    """
+    Parses the values entered in the history filters.
+
+    Parameters
+    ----------
+    values : dict
+        The values entered, as returned by HistoryUI.filter_values().
+
+    Returns
+    -------
+    filters : dict
+        Keyword arguments for ResultsIndex.query(): duration, start, end, min_wpm and max_wpm, each None if not given.
+
+    Raises
+    ------
+    ValueError
+        If a date or WPM isn't valid.
+    """
+    filters = {"duration": parse_duration(values["duration"])}
+    filters["start"] = parse_date(values["start"])
+    filters["end"] = parse_date(values["end"], end=True)
+    for name in ["min_wpm", "max_wpm"]:
+        text = values[name].strip()
+        try:
+            filters[name] = float(text) if text else None
+        except ValueError:
+            raise ValueError(f"WPM must be a number, not {text!r}") from None
+    return filters
+
+
+class HistoryLogic:
+    """
+    Class that provides the functionality for the results history screen, which lists every result and can sort and
+    filter them.
+
+    The results are read into a ResultsIndex when the screen is opened, which only reads results saved since it was
+    last opened. Sorting and filtering select the positions of the matching results from the index, and only the
+    results in the visible rows of the list are formatted and shown.
+
+    Attributes
+    ----------
+    current_display : CurrentDisplay
+        Instance of the CurrentDisplay class.
+    history_ui : HistoryUI
+        Instance of the HistoryUI class.
+    results_io : ResultsInOut
+        Instance of the ResultsInOut class.
+    scoreboard : ScoreBoardLogic
+        Instance of the ScoreBoardLogic class, which decides whose results are shown.
+    index : ResultsIndex
+        Index of the results shown, or None before the screen is first opened.
+    sort_by : str
+        The column the results are sorted by.
+    descending : bool
+        Whether the results are sorted in descending order.
+    filters : dict
+        The filters applied, as keyword arguments for ResultsIndex.query().
+    view : numpy.ndarray
+        Positions in the index of the results matching the filters, in the order shown.
+    first : int
+        Position in the view of the first visible row.
+    """
+    def __init__(self, current_display: CurrentDisplay, scoreboard_ui: ScoreboardUI, history_ui: HistoryUI,
+                 results_io: ResultsInOut, scoreboard: ScoreBoardLogic):
+        """
+        Configures the functionality of the history screen's widgets.
+
+        Parameters
+        ----------
+        current_display : CurrentDisplay
+            Instance of the CurrentDisplay class.
+        scoreboard_ui : ScoreboardUI
+            Instance of the ScoreboardUI class, which has the button to open the history screen.
+        history_ui : HistoryUI
+            Instance of the HistoryUI class.
+        results_io : ResultsInOut
+            Instance of the ResultsInOut class.
+        scoreboard : ScoreBoardLogic
+            Instance of the ScoreBoardLogic class.
+        """
+        self.current_display = current_display
+        self.history_ui = history_ui
+        self.results_io = results_io
+        self.scoreboard = scoreboard
+        self.index = None
+        self.sort_by = "timestamp"
+        self.descending = True
+        self.filters = {}
+        self.view = None
+        self.first = 0
+
+        scoreboard_ui.history_button.configure(command=self.open_history)
+        history_ui.close_button.configure(command=lambda: current_display.open_ui(scoreboard_ui))
+        history_ui.apply_button.configure(command=self.apply_filters)
+        history_ui.clear_button.configure(command=self.clear_filters)
+        history_ui.scrollbar.configure(command=self.scroll)
+        for column in ["timestamp", "wpm", "accuracy", "duration"]:
+            history_ui.results_list.heading(column, command=lambda column=column: self.sort(column))
+
+        results_list = history_ui.results_list
+        results_list.bind("<MouseWheel>", self.mouse_wheel)
+        results_list.bind("<Button-4>", lambda event: self.scroll_by(-3))  # Mouse wheel on X11
+        results_list.bind("<Button-5>", lambda event: self.scroll_by(3))
+        results_list.bind("<Up>", lambda event: self.scroll_by(-1))
+        results_list.bind("<Down>", lambda event: self.scroll_by(1))
+        results_list.bind("<Prior>", lambda event: self.scroll_by(-history_ui.VISIBLE_ROWS))
+        results_list.bind("<Next>", lambda event: self.scroll_by(history_ui.VISIBLE_ROWS))
+        results_list.bind("<Home>", lambda event: self.scroll_to(0))
+        results_list.bind("<End>", lambda event: self.scroll_to(len(self.view)))
+
+    def results_files(self):
+        """
+        Returns the results files shown: those the scoreboard is showing.
+        """
+        return self.scoreboard.results_files() or [self.results_io.filename]
+
+    @profiled
+    def open_history(self):
+        """
+        Opens the history screen, bringing the index up to date with the results files.
+        """
+        self.current_display.open_ui(self.history_ui)
+        self.results_io.flush()  # Include results waiting to be written
+        files = self.results_files()
+        if self.index is None or self.index.filenames != files:
+            self.index = ResultsIndex(files)
+        else:
+            self.index.refresh()
+        self.update_view()
+
+    def update_view(self):
+        """
+        Selects the results to show with the current sort order and filters, and scrolls back to the top.
+        """
+        self.view = self.index.query(self.sort_by, self.descending, **self.filters)
+        self.history_ui.config_sort_headings(self.sort_by, self.descending)
+        self.scroll_to(0)
+
+    def sort(self, column):
+        """
+        Sorts the results by a column, or reverses the order if they're already sorted by it.
+
+        Parameters
+        ----------
+        column : str
+            The column to sort by.
+        """
+        self.descending = not self.descending if column == self.sort_by else True
+        self.sort_by = column
+        self.update_view()
+
+    def apply_filters(self):
+        """
+        Shows only the results matching the filters entered.
+        """
+        try:
+            self.filters = parse_filters(self.history_ui.filter_values())
+        except ValueError as e:
+            self.history_ui.status_label.configure(text=str(e))
+            return
+        self.update_view()
+
+    def clear_filters(self):
+        """
+        Clears the filters and shows every result.
+        """
+        self.history_ui.clear_filters()
+        self.filters = {}
+        self.update_view()
+
+    def scroll_to(self, first):
+        """
+        Shows the rows of results starting at the given position in the view.
+
+        Parameters
+        ----------
+        first : int
+            Position in the view of the first row to show. Positions past the end show the last rows.
+        """
+        visible_rows = self.history_ui.VISIBLE_ROWS
+        total = len(self.view)
+        self.first = max(0, min(first, total - visible_rows))
+        last = min(self.first + visible_rows, total)
+        self.history_ui.show_rows(self.index.rows(self.view[self.first:last]))
+        if total:
+            self.history_ui.set_scroll(self.first / total, last / total)
+            self.history_ui.status_label.configure(text=f"Results {self.first + 1}-{last} of {total:,}")
+        else:
+            self.history_ui.set_scroll(0, 1)
+            self.history_ui.status_label.configure(text="No results")
+        return "break"
+
+    def scroll_by(self, rows):
+        """
+        Scrolls the results list by a number of rows.
+        """
+        return self.scroll_to(self.first + rows)
+
+    def scroll(self, action, amount, unit=None):
+        """
+        Scrolls the results list when the scrollbar is used.
+
+        Parameters
+        ----------
+        action : str
+            "moveto" when the scrollbar is dragged, "scroll" when its arrows or trough are clicked.
+        amount : str
+            The fraction of the results to move to, or the number of units to scroll by.
+        unit : str
+            "units" to scroll by rows, "pages" to scroll by pages.
+        """
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.view)))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.history_ui.VISIBLE_ROWS)
+        else:
+            self.scroll_by(int(amount))
+
+    def mouse_wheel(self, event):
+        """
+        Scrolls the results list with the mouse wheel on Windows and macOS.
+        """
+        return self.scroll_by(-3 if event.delta > 0 else 3)
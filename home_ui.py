@@ -1,4 +1,7 @@
 import tkinter as tk
+from tkinter import ttk
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 
 class HomeUI:
@@ -12,27 +15,67 @@ class HomeUI:
     ----------
     root : tkinter.Tk
         The parent widget
-    home_frame : tkinter.Frame
+    home_frame : tkinter.ttk.Frame
         A Tkinter frame containing the main test widgets
     text : tkinter.Text
         A Tkinter text widget for displaying the test words
-    timer_txt : tkinter.Label
+    timer_txt : tkinter.ttk.Label
         A Tkinter Label widget which displays the timer
-    start_buttons_frame : tkinter.Button
+    start_buttons_frame : tkinter.ttk.Frame
         A Tkinter frame containing the start (test setup buttons) buttons
-    utility_buttons_frame : tkinter.Frame
+    utility_buttons_frame : tkinter.ttk.Frame
         A Tkinter frame containing the utility buttons: view scores, options
-    options_button : tkinter.Button
+    options_button : tkinter.ttk.Button
         A Tkinter button to open the options page
     start_buttons : list
         List containing Tkinter buttons responsible for setting up tests
     utility_buttons : list
         List containing Tkinter buttons with non-test functionality
+    test_id_frame : tkinter.ttk.Frame
+        A Tkinter frame containing the test ID widgets
+    test_id_label : tkinter.ttk.Label
+        A Tkinter label displaying the ID of the current test
+    retry_button : tkinter.ttk.Button
+        A Tkinter button to retake the previous test
+    test_id_entry : tkinter.ttk.Entry
+        A Tkinter entry where the user can type the ID of a test to take
+    load_id_button : tkinter.ttk.Button
+        A Tkinter button to load the test with the entered ID
+    race_button : tkinter.ttk.Button
+        A Tkinter button to race a ghost of the user's fastest run
+    profile_var : tkinter.StringVar
+        Name of the profile in use, shown by the profile menu
+    profile_menu : tkinter.ttk.OptionMenu
+        A Tkinter option menu to switch between user profiles or create a new one
+    colour_scheme : dict
+        The colour scheme currently applied to the home UI
+    timeline_canvas : FigureCanvasTkAgg
+        Canvas showing the WPM timeline of the last test, or None
+    frame_stats_label : tkinter.ttk.Label
+        A Tkinter label overlaid on the top right corner, showing the event loop's frame times (see stall_watchdog.py)
+    racers_label : tkinter.ttk.Label
+        A Tkinter label below the test listing the other people racing the same test
 
     Methods
     -------
     config_home_ui(colour_scheme)
         Configures the home screen widgets according to the given colour scheme.
+    config_test_id(test_id)
+        Displays the ID of the current test.
+    config_book_progress(name, progress)
+        Displays how far through the book the current test is.
+    config_racers(standings)
+        Lists the other people racing the same test.
+    config_profiles(names, current, switch_command, new_command)
+        Fills the profile menu.
+    show_timeline(fig)
+        Shows the WPM timeline of the last test below the results.
+    hide_timeline()
+        Removes the WPM timeline.
+    show_frame_stats(text)
+        Shows the frame time overlay.
+    hide_frame_stats()
+        Hides the frame time overlay.
     hide()
         Hides the home UI
     show()
@@ -63,7 +106,29 @@ class HomeUI:
         self.start_buttons = self.start_buttons_frame.winfo_children()
         self.utility_buttons = self.utility_buttons_frame.winfo_children()
 
+        test_id_widgets = self.setup_test_id_bar()
+        self.test_id_frame = test_id_widgets[0]
+        self.test_id_label = test_id_widgets[1]
+        self.retry_button = test_id_widgets[2]
+        self.test_id_entry = test_id_widgets[3]
+        self.load_id_button = test_id_widgets[4]
+        self.race_button = test_id_widgets[5]
+
+        self.profile_var, self.profile_menu = self.setup_profile_menu()
+
+        # Tags for the text to give typing feedback to the user. The finished tag follows the colour scheme.
+        self.text.tag_config("correct", foreground='green')
+        self.text.tag_config("incorrect", foreground='red')
+        self.text.tag_config("last_word", foreground='grey')
+        self.text.tag_config("current_char", underline=True)
+
         self.test_focus = True  # Maintains that the home screen is in a test-ready state
+        self.colour_scheme = None
+        self.timeline_canvas = None
+        self.frame_stats_label = ttk.Label(self.root, style="Overlay.TLabel", justify="right")
+        self.racers_label = ttk.Label(self.home_frame, style="Small.TLabel")
+        self.racers_label.grid(row=5, column=0, columnspan=5)
+        self.racers_label.grid_remove()
 
     def setup_home_main(self):
         """
@@ -71,14 +136,14 @@ class HomeUI:
 
         Returns
         -------
-        home_frame : tkinter.Frame
+        home_frame : tkinter.ttk.Frame
             A Tkinter frame containing the main test widgets
         text : tkinter.Text
             A Tkinter text widget for displaying the test words
-        timer_txt : tkinter.Label
+        timer_txt : tkinter.ttk.Label
             A Tkinter Label widget which displays the timer
         """
-        home_frame = tk.Frame(self.root)
+        home_frame = ttk.Frame(self.root)
         home_frame.grid(row=0, column=0, columnspan=5)
         # Set up the text widget
         text = tk.Text(home_frame, width=50, height=4, highlightthickness=0, bd=0, font=("Arial", "32"),
@@ -86,7 +151,7 @@ class HomeUI:
         text.grid(row=1, column=0, columnspan=5, rowspan=2, pady=80)
 
         # Set up the timer widget
-        timer_txt = tk.Label(home_frame, text="Timer", font=("Helvetica", "24"))
+        timer_txt = ttk.Label(home_frame, text="Timer", style="Timer.TLabel")
         timer_txt.grid(row=0, column=2, columnspan=5, pady=80)
         timer_txt.grid_remove()
 
@@ -98,16 +163,16 @@ class HomeUI:
 
         Returns
         -------
-        start_buttons_frame : tkinter.Frame
+        start_buttons_frame : tkinter.ttk.Frame
             A Tkinter frame containing the start (test setup buttons) buttons
-        utility_buttons_frame : tkinter.Frame
+        utility_buttons_frame : tkinter.ttk.Frame
             A Tkinter frame containing the utility buttons: view scores, options
-        options_button : tkinter.Button
+        options_button : tkinter.ttk.Button
             A Tkinter button to open the options page
         """
-        start_button_frame = tk.Frame(self.root)
+        start_button_frame = ttk.Frame(self.root)
         start_button_frame.grid(row=4, column=0, columnspan=3, sticky="ew")
-        utility_button_frame = tk.Frame(self.root)
+        utility_button_frame = ttk.Frame(self.root)
         utility_button_frame.grid(row=4, column=3, columnspan=2, sticky="ew")
         # Allow frames to resize
         for i in range(3):
@@ -116,48 +181,190 @@ class HomeUI:
             utility_button_frame.columnconfigure(i, weight=1)
 
         # Set up buttons
-        start_btn_15 = tk.Button(start_button_frame, text="15s", font=("Arial", "16"), bd=2)
+        start_btn_15 = ttk.Button(start_button_frame, text="15s", style="Primary.TButton")
         start_btn_15.grid(row=4, column=0, sticky='new')
-        start_btn_30 = tk.Button(start_button_frame, text="30s", font=("Arial", "16"), bd=2)
+        start_btn_30 = ttk.Button(start_button_frame, text="30s", style="Primary.TButton")
         start_btn_30.grid(row=4, column=1, sticky='new')
-        start_btn_60 = tk.Button(start_button_frame, text="60s", font=("Arial", "16"), bd=2)
+        start_btn_60 = ttk.Button(start_button_frame, text="60s", style="Primary.TButton")
         start_btn_60.grid(row=4, column=2, sticky='new')
-        score_button = tk.Button(utility_button_frame, text="View Scores", font=("Arial", "16"))
+        score_button = ttk.Button(utility_button_frame, text="View Scores", style="Accent.TButton")
         score_button.grid(row=4, column=3, sticky='new')
-        options_button = tk.Button(utility_button_frame, text="Options", font=("Arial", "16"))
+        options_button = ttk.Button(utility_button_frame, text="Options", style="Accent.TButton")
         options_button.grid(row=4, column=4, sticky='new')
 
         return start_button_frame, utility_button_frame, options_button
 
+    def setup_test_id_bar(self):
+        """
+        Sets up the frame and widgets for retrying tests and loading tests by ID
+
+        Returns
+        -------
+        test_id_frame : tkinter.ttk.Frame
+            A Tkinter frame containing the test ID widgets
+        test_id_label : tkinter.ttk.Label
+            A Tkinter label displaying the ID of the current test
+        retry_button : tkinter.ttk.Button
+            A Tkinter button to retake the previous test
+        test_id_entry : tkinter.ttk.Entry
+            A Tkinter entry where the user can type the ID of a test to take
+        load_id_button : tkinter.ttk.Button
+            A Tkinter button to load the test with the entered ID
+        race_button : tkinter.ttk.Button
+            A Tkinter button to race a ghost of the user's fastest run
+        """
+        test_id_frame = ttk.Frame(self.home_frame)
+        test_id_frame.grid(row=3, column=0, columnspan=5)
+
+        test_id_label = ttk.Label(test_id_frame, style="Small.TLabel")
+        test_id_label.grid(row=0, column=0, padx=10)
+        retry_button = ttk.Button(test_id_frame, text="Retry", style="Small.Primary.TButton")
+        retry_button.grid(row=0, column=1, padx=10)
+        test_id_entry = ttk.Entry(test_id_frame, width=16, font=("Arial", "14"))
+        test_id_entry.grid(row=0, column=2, padx=10)
+        load_id_button = ttk.Button(test_id_frame, text="Load Test ID", style="Small.Primary.TButton")
+        load_id_button.grid(row=0, column=3, padx=10)
+        race_button = ttk.Button(test_id_frame, text="Race Best", style="Small.Primary.TButton")
+        race_button.grid(row=0, column=4, padx=10)
+
+        return test_id_frame, test_id_label, retry_button, test_id_entry, load_id_button, race_button
+
+    def setup_profile_menu(self):
+        """
+        Sets up the profile menu at the end of the test ID bar, so it is hidden during tests
+
+        Returns
+        -------
+        profile_var : tkinter.StringVar
+            Name of the profile in use, shown by the profile menu
+        profile_menu : tkinter.ttk.OptionMenu
+            A Tkinter option menu to switch between user profiles or create a new one
+        """
+        profile_var = tk.StringVar(self.root)
+        profile_menu = ttk.OptionMenu(self.test_id_frame, profile_var, "")
+        profile_menu.grid(row=0, column=5, padx=10)
+        return profile_var, profile_menu
+
+    def config_profiles(self, names, current, switch_command, new_command):
+        """
+        Fills the profile menu with the profiles and an entry to create a new one.
+
+        Parameters
+        ----------
+        names : list
+            Names of the profiles.
+        current : str
+            Name of the profile in use.
+        switch_command : function
+            Called with a profile name when that profile is selected.
+        new_command : function
+            Called when the new profile entry is selected.
+        """
+        menu = self.profile_menu["menu"]
+        menu.delete(0, "end")
+        for name in names:
+            menu.add_command(label=name, command=lambda name=name: switch_command(name))
+        menu.add_separator()
+        menu.add_command(label="New profile...", command=new_command)
+        self.profile_var.set(current)
+
+    def show_timeline(self, fig):
+        """
+        Shows the WPM timeline of the last test below the results, replacing any previous timeline.
+
+        Parameters
+        ----------
+        fig : matplotlib.figure.Figure
+            The timeline figure.
+        """
+        self.hide_timeline()
+        self.timeline_canvas = FigureCanvasTkAgg(fig, self.home_frame)
+        self.timeline_canvas.draw_idle()
+        self.timeline_canvas.get_tk_widget().grid(row=4, column=0, columnspan=5, pady=10)
+
+    def hide_timeline(self):
+        """
+        Removes the WPM timeline.
+        """
+        if self.timeline_canvas:
+            self.timeline_canvas.get_tk_widget().destroy()
+            self.timeline_canvas = None
+
+    def show_frame_stats(self, text):
+        """
+        Shows the frame time overlay in the top right corner of the window.
+
+        Parameters
+        ----------
+        text : str
+            The frame time statistics.
+        """
+        self.frame_stats_label.configure(text=text)
+        self.frame_stats_label.place(relx=1, rely=0, anchor="ne")
+        self.frame_stats_label.lift()
+
+    def hide_frame_stats(self):
+        """
+        Hides the frame time overlay.
+        """
+        self.frame_stats_label.place_forget()
+
+    def config_test_id(self, test_id):
+        """
+        Displays the ID of the current test.
+
+        Parameters
+        ----------
+        test_id : str
+            The test ID. Practice tests don't have one.
+        """
+        self.test_id_label.configure(text=f"Test ID: {test_id or 'practice test'}")
+
+    def config_book_progress(self, name, progress):
+        """
+        Displays how far through the book the current test is, in place of the test ID.
+
+        Parameters
+        ----------
+        name : str
+            Name of the book.
+        progress : str
+            Description of the position in the book.
+        """
+        self.test_id_label.configure(text=f"{name}: {progress}")
+
+    def config_racers(self, standings):
+        """
+        Lists the other people racing the same test, or hides the list if there aren't any.
+
+        Parameters
+        ----------
+        standings : list
+            A line for each racer, furthest ahead first.
+        """
+        if standings:
+            self.racers_label.configure(text="Racing: " + ", ".join(standings))
+            self.racers_label.grid()
+        else:
+            self.racers_label.grid_remove()
+
     def config_home_ui(self, colour_scheme):
         """
-        Updates the colour properties of the home widgets according to the given colour scheme.
+        Updates the colours of the home widgets that aren't styled by the theme engine (see theme.py): the text
+        widget, its typing feedback tags and the ghost and racer cursors.
 
         Parameters
         ----------
         colour_scheme : dict
             The colour scheme to apply to the home UI.
         """
-        # Frames
-        self.home_frame.configure(bg=colour_scheme["background"])
-        self.start_buttons_frame.configure(bg=colour_scheme["background"])
-        self.utility_buttons_frame.configure(bg=colour_scheme["background"])
+        self.colour_scheme = colour_scheme
 
-        # Text and timer
+        # Text widget and the tags that give typing feedback to the user
         self.text.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        # Tags for the text to give typing feedback to the user
-        self.text.tag_config("correct", foreground='green')
-        self.text.tag_config("incorrect", foreground='red')
         self.text.tag_config("finished", foreground=colour_scheme["highlight"])
-        self.text.tag_config("last_word", foreground='grey')
-        self.text.tag_config("current_char", underline=True)
-        self.timer_txt.configure(bg=colour_scheme["background"], fg=colour_scheme["highlight"])
-
-        # buttons
-        for button in self.start_buttons:
-            button.configure(bg=colour_scheme["main_text"], fg=colour_scheme["highlight"])
-        for button in self.utility_buttons:
-            button.configure(bg=colour_scheme["highlight"], fg=colour_scheme["main_text"])
+        self.text.tag_config("ghost", background=colour_scheme["markers2"], foreground=colour_scheme["background"])
+        self.text.tag_config("racer", background=colour_scheme["markers3"], foreground=colour_scheme["background"])
 
     def show(self):
         """
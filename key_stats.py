@@ -0,0 +1,205 @@
+import os
+import random
+
+import numpy as np
+
+from word_corpus import BigramIndex, WordCorpus
+
+FILENAME = "key_stats.npz"
+
+# Statistics are kept for the printable ASCII characters, indexed by their code point minus FIRST_CHAR.
+FIRST_CHAR = 32
+NUM_CHARS = 95
+# Gaps between keystrokes longer than this are pauses, not typing latency.
+MAX_LATENCY = 2.0
+# Bigrams need this many attempts before they can be considered weak.
+MIN_ATTEMPTS = 5
+# Proportion of the words in a practice test that are chosen for the user's weakest bigrams.
+PRACTICE_SHARE = 0.5
+
+
+def char_code(char):
+    """
+    Returns the index of a character in the statistics arrays, or -1 if it isn't tracked.
+    """
+    if len(char) != 1:
+        return -1
+    code = ord(char) - FIRST_CHAR
+    return code if 0 <= code < NUM_CHARS else -1
+
+
+class KeyStats:
+    """
+    Persistent per-character and per-bigram error and latency statistics, built up from every test's keystrokes.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the file the statistics are saved to.
+    char_attempts : numpy.ndarray
+        Number of times each character was expected.
+    char_errors : numpy.ndarray
+        Number of times a different key was typed when each character was expected.
+    char_latency : numpy.ndarray
+        Total time in seconds taken to type each character after the previous keystroke.
+    char_timed : numpy.ndarray
+        Number of keystrokes included in char_latency.
+    bigram_attempts : numpy.ndarray
+        As char_attempts, for each (previous character, character) pair.
+    bigram_errors : numpy.ndarray
+        As char_errors, for each (previous character, character) pair.
+    bigram_latency : numpy.ndarray
+        As char_latency, for each (previous character, character) pair.
+    bigram_timed : numpy.ndarray
+        As char_timed, for each (previous character, character) pair.
+
+    Methods
+    -------
+    update(keystrokes)
+        Adds a test's keystrokes to the statistics.
+    weak_bigrams(n)
+        Finds the bigrams the user struggles with the most.
+    """
+    ARRAYS = ["char_attempts", "char_errors", "char_latency", "char_timed",
+              "bigram_attempts", "bigram_errors", "bigram_latency", "bigram_timed"]
+
+    def __init__(self, filename=FILENAME):
+        """
+        Loads the statistics from the file, or starts from zero if there isn't one.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file the statistics are saved to.
+        """
+        self.filename = filename
+        self.load()
+
+    def load(self):
+        """
+        Loads the statistics from the file.
+        """
+        for name in self.ARRAYS:
+            shape = (NUM_CHARS,) if name.startswith("char") else (NUM_CHARS, NUM_CHARS)
+            setattr(self, name, np.zeros(shape))
+        try:
+            with np.load(self.filename) as data:
+                for name in self.ARRAYS:
+                    if name in data:
+                        getattr(self, name)[...] = data[name]
+        except (FileNotFoundError, ValueError, OSError):
+            pass
+
+    def save(self):
+        """
+        Saves the statistics, replacing the file atomically.
+        """
+        temp_path = self.filename + ".tmp.npz"
+        np.savez(temp_path, **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(temp_path, self.filename)
+
+    def update(self, keystrokes):
+        """
+        Adds a test's keystrokes to the statistics.
+
+        Parameters
+        ----------
+        keystrokes : list
+            Tuples of (time in seconds, character typed, character expected) in the order they were typed. The
+            expected character is empty for backspaces and excess characters, which are not counted.
+        """
+        if not keystrokes:
+            return
+        times, typed, expected = zip(*keystrokes)
+        codes = np.array([char_code(char) for char in expected])
+        errors = np.array(typed) != np.array(expected)
+        latency = np.diff(np.array(times), prepend=np.nan)
+
+        counted = codes >= 0
+        timed = counted & (latency < MAX_LATENCY)  # The comparison is False for the NaN of the first keystroke
+        np.add.at(self.char_attempts, codes[counted], 1)
+        np.add.at(self.char_errors, codes[counted & errors], 1)
+        np.add.at(self.char_latency, codes[timed], latency[timed])
+        np.add.at(self.char_timed, codes[timed], 1)
+
+        # A bigram is a keystroke together with the one before it, when both were counted.
+        previous = np.roll(codes, 1)
+        pair = counted & (previous >= 0)
+        pair[0] = False
+        pair_timed = pair & timed
+        np.add.at(self.bigram_attempts, (previous[pair], codes[pair]), 1)
+        np.add.at(self.bigram_errors, (previous[pair & errors], codes[pair & errors]), 1)
+        np.add.at(self.bigram_latency, (previous[pair_timed], codes[pair_timed]), latency[pair_timed])
+        np.add.at(self.bigram_timed, (previous[pair_timed], codes[pair_timed]), 1)
+
+    def weak_bigrams(self, n=10):
+        """
+        Finds the bigrams the user struggles with the most.
+
+        A bigram's weakness is its error rate (smoothed towards 5% for bigrams with few attempts) multiplied by how
+        slow it is relative to the user's average bigram.
+
+        Parameters
+        ----------
+        n : int
+            Maximum number of bigrams to return.
+
+        Returns
+        -------
+        weak_bigrams : dict
+            Maps each of the weakest bigrams to its weakness score.
+        """
+        error_rate = (self.bigram_errors + 0.05 * MIN_ATTEMPTS) / (self.bigram_attempts + MIN_ATTEMPTS)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_latency = self.bigram_latency / self.bigram_timed
+        overall_latency = self.bigram_latency.sum() / max(self.bigram_timed.sum(), 1)
+        slowness = np.where(self.bigram_timed > 0, mean_latency / (overall_latency or 1), 1.0)
+        weakness = np.where(self.bigram_attempts >= MIN_ATTEMPTS, error_rate * slowness, 0.0)
+        # Space isn't part of any word, so bigrams containing it can't be practised with word choice.
+        weakness[0, :] = weakness[:, 0] = 0
+
+        flat = np.argsort(weakness, axis=None)[::-1][:n]
+        weak_bigrams = {}
+        for first, second in zip(*np.unravel_index(flat, weakness.shape)):
+            if weakness[first, second] > 0:
+                bigram = chr(first + FIRST_CHAR) + chr(second + FIRST_CHAR)
+                weak_bigrams[bigram] = float(weakness[first, second])
+        return weak_bigrams
+
+
+def practice_choices(corpus: WordCorpus, bigram_index: BigramIndex, key_stats: KeyStats, k, rng=random):
+    """
+    Selects words for a practice test, over-sampling words that contain the user's weakest bigrams.
+
+    Parameters
+    ----------
+    corpus : WordCorpus
+        The corpus to select words from.
+    bigram_index : BigramIndex
+        The corpus's bigram index.
+    key_stats : KeyStats
+        The user's keystroke statistics.
+    k : int
+        Number of words to select.
+    rng : random.Random
+        Source of randomness.
+
+    Returns
+    -------
+    words : list
+        The selected words.
+    """
+    scores = np.zeros(len(corpus))
+    for bigram, weakness in key_stats.weak_bigrams().items():
+        word_ids = np.frombuffer(bigram_index.words_with(bigram), dtype=np.uint32)
+        np.add.at(scores, word_ids, weakness)
+
+    candidates = np.flatnonzero(scores)
+    if not len(candidates):  # Not enough keystrokes recorded yet
+        return corpus.choices(k, rng)
+
+    practice_count = round(k * PRACTICE_SHARE)
+    word_ids = rng.choices(candidates.tolist(), weights=scores[candidates].tolist(), k=practice_count)
+    words = [corpus[word_id] for word_id in word_ids] + corpus.choices(k - practice_count, rng)
+    rng.shuffle(words)
+    return words
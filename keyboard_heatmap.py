@@ -0,0 +1,153 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+from key_stats import KeyStats, char_code
+
+# QWERTY layout: the character on each key, the character typed with shift, and the finger (an index into FINGERS)
+# used in touch typing.
+KEYBOARD_ROWS = ["`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./"]
+SHIFTED_ROWS = ["~!@#$%^&*()_+", "QWERTYUIOP{}|", "ASDFGHJKL:\"", "ZXCVBNM<>?"]
+FINGER_ROWS = ["0012334456777", "0123344567777", "01233445677", "0123344567"]
+# Horizontal offset of each row, in key widths
+ROW_OFFSETS = [0, 1.5, 1.75, 2.25]
+FINGERS = ["Left pinky", "Left ring", "Left middle", "Left index", "Right index", "Right middle", "Right ring",
+           "Right pinky", "Thumbs"]
+SPACE_FINGER = 8
+
+
+def _build_layout():
+    """
+    Builds the key positions and the statistics array indices of each key's characters.
+
+    Returns
+    -------
+    labels : list
+        The character shown on each key.
+    positions : numpy.ndarray
+        (x, y) position of each key's bottom left corner, in key widths. The space bar is last.
+    codes : numpy.ndarray
+        Statistics array index of each key's unshifted and shifted characters.
+    fingers : numpy.ndarray
+        Index into FINGERS of the finger that types each key.
+    """
+    labels, positions, codes, fingers = [], [], [], []
+    for row, (keys, shifted, row_fingers) in enumerate(zip(KEYBOARD_ROWS, SHIFTED_ROWS, FINGER_ROWS)):
+        for column, (key, shifted_key, finger) in enumerate(zip(keys, shifted, row_fingers)):
+            labels.append(key)
+            positions.append((ROW_OFFSETS[row] + column, len(KEYBOARD_ROWS) - row))
+            codes.append((char_code(key), char_code(shifted_key)))
+            fingers.append(int(finger))
+    labels.append("space")
+    positions.append((3.5, 0))
+    codes.append((char_code(" "), char_code(" ")))
+    fingers.append(SPACE_FINGER)
+    return labels, np.array(positions, dtype=float), np.array(codes), np.array(fingers)
+
+
+KEY_LABELS, KEY_POSITIONS, KEY_CODES, KEY_FINGERS = _build_layout()
+SPACE_WIDTH = 6
+
+
+class KeyboardStats:
+    """
+    Per-key and per-finger error rate and mean latency, summed from the per-character arrays of a KeyStats instance.
+
+    KeyStats keeps its arrays up to date after every test, so computing this takes the same time however many tests
+    have been taken.
+
+    Attributes
+    ----------
+    key_error_rate : numpy.ndarray
+        Proportion of attempts at each key (see KEY_LABELS) that were errors, or NaN for keys that haven't been typed.
+    key_latency : numpy.ndarray
+        Mean time in seconds taken to type each key after the previous keystroke, or NaN.
+    finger_error_rate : numpy.ndarray
+        As key_error_rate, for each finger in FINGERS.
+    finger_latency : numpy.ndarray
+        As key_latency, for each finger in FINGERS.
+    """
+    def __init__(self, key_stats: KeyStats):
+        """
+        Parameters
+        ----------
+        key_stats : KeyStats
+            The keystroke statistics.
+        """
+        # The space bar's two codes are the same character, so only count it once.
+        counted = np.ones(KEY_CODES.shape, dtype=bool)
+        counted[-1, 1] = False
+
+        def per_key(array):
+            return np.where(counted, array[KEY_CODES], 0).sum(axis=1)
+
+        attempts, errors = per_key(key_stats.char_attempts), per_key(key_stats.char_errors)
+        latency, timed = per_key(key_stats.char_latency), per_key(key_stats.char_timed)
+        finger_attempts, finger_errors, finger_latency, finger_timed = (
+            np.bincount(KEY_FINGERS, weights=array, minlength=len(FINGERS))
+            for array in (attempts, errors, latency, timed))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.key_error_rate = np.where(attempts > 0, errors / attempts, np.nan)
+            self.key_latency = np.where(timed > 0, latency / timed, np.nan)
+            self.finger_error_rate = np.where(finger_attempts > 0, finger_errors / finger_attempts, np.nan)
+            self.finger_latency = np.where(finger_timed > 0, finger_latency / finger_timed, np.nan)
+
+
+def heatmap_figure(key_stats: KeyStats, colour_scheme):
+    """
+    Draws a keyboard heatmap of the error rate of each key, labelled with its mean latency, and a chart of the
+    error rate and mean latency of each finger.
+
+    Parameters
+    ----------
+    key_stats : KeyStats
+        The keystroke statistics.
+    colour_scheme : dict
+        Colour scheme for the figure.
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
+        The figure.
+    """
+    stats = KeyboardStats(key_stats)
+    text_colour = colour_scheme["main_text"]
+    fig = Figure(figsize=(8, 6), facecolor=colour_scheme["background"])
+    keyboard_ax, finger_ax = fig.subplots(2, 1, gridspec_kw={"height_ratios": [3, 2]})
+
+    # Keyboard: colour from the background (no errors) to the highlight colour (the worst key)
+    worst = np.nanmax(stats.key_error_rate) if np.isfinite(stats.key_error_rate).any() else 0
+    for label, (x, y), error_rate, latency in zip(KEY_LABELS, KEY_POSITIONS, stats.key_error_rate,
+                                                   stats.key_latency):
+        width = SPACE_WIDTH if label == "space" else 1
+        alpha = 0.05 if np.isnan(error_rate) else 0.15 + 0.85 * (error_rate / worst if worst else 0)
+        keyboard_ax.add_patch(Rectangle((x + 0.05, y + 0.05), width - 0.1, 0.9, facecolor=colour_scheme["highlight"],
+                                        alpha=alpha, edgecolor=text_colour, linewidth=0.5))
+        keyboard_ax.text(x + 0.5 * width, y + 0.62, label, ha="center", va="center", fontsize=9, color=text_colour)
+        if not np.isnan(latency):
+            keyboard_ax.text(x + 0.5 * width, y + 0.28, f"{latency * 1000:.0f}", ha="center", va="center",
+                             fontsize=6, color=text_colour)
+    keyboard_ax.set_xlim(0, 15)
+    keyboard_ax.set_ylim(0, len(KEYBOARD_ROWS) + 1)
+    keyboard_ax.set_aspect("equal")
+    keyboard_ax.axis("off")
+    keyboard_ax.set_title("Error rate by key (mean latency in ms)", fontsize=13, color=text_colour)
+
+    # Fingers
+    positions = np.arange(len(FINGERS))
+    finger_ax.bar(positions, np.nan_to_num(stats.finger_error_rate) * 100, color=colour_scheme["highlight"],
+                  edgecolor=text_colour)
+    finger_ax.set_ylabel("Error rate (%)", color=text_colour)
+    latency_ax = finger_ax.twinx()
+    latency_ax.plot(positions, stats.finger_latency * 1000, "o", color=colour_scheme["markers2"])
+    latency_ax.set_ylabel("Mean latency (ms)", color=text_colour)
+    finger_ax.set_xticks(positions, [finger.replace(" ", "\n") for finger in FINGERS], fontsize=7)
+    for ax in (finger_ax, latency_ax):
+        ax.set_facecolor(colour_scheme["background"])
+        ax.tick_params(colors=text_colour)
+        for spine in ax.spines.values():
+            spine.set_color(text_colour)
+    finger_ax.set_title("Fingers", fontsize=13, color=text_colour)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,472 @@
+"""
+Exporting results and merging exports from many machines into a combined leaderboard.
+
+An export is a JSON lines file: a header identifying the machine and profile, one line per result, and a summary line
+holding the aggregates (see results_io.ResultsAggregates) of every exported result. Archived results (see
+results_archive) are exported along with the results file. Each result has an ID derived from its machine, profile and
+values, so exporting a file again, even after its old results have been archived, produces the same IDs.
+
+Merging is safe to repeat: results already on the leaderboard are skipped, and only the most recent summary from each
+machine and profile is kept, since a newer export includes everything in an older one. The leaderboard only holds the
+top results for each duration and one summary per machine and profile, so its memory doesn't grow with the number of
+results merged.
+
+Command line usage::
+
+    python leaderboard.py export [--profile NAME] [-o FILE]
+    python leaderboard.py merge EXPORT [EXPORT ...] [-o leaderboard.json]
+    python leaderboard.py serve [--port 8765] [-o leaderboard.json]
+    python leaderboard.py upload EXPORT [--url http://localhost:8765]
+"""
+import argparse
+import csv
+import datetime
+import gzip
+import heapq
+import http.server
+import io
+import json
+import os
+import threading
+import urllib.request
+
+from leaderboard_client import machine_id, result_id
+from profiles import ProfileManager
+from results_io import FILENAME, ResultsAggregates, archive_dir, archive_index, complete_rows, replace_file
+
+EXPORT_FORMAT = "typing-test-export"
+EXPORT_VERSION = 1
+LEADERBOARD_FILE = "leaderboard.json"
+DEFAULT_PORT = 8765
+# Number of exported results added to the export summary at a time
+SUMMARY_BATCH = 10_000
+
+
+def open_text(path, mode="r"):
+    """
+    Opens an export or leaderboard file as text, gzip compressed if the name ends with .gz.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _parse_rows(f):
+    """
+    Parses the rows of an open results csv, skipping rows that can't be parsed.
+    """
+    for row in csv.DictReader(f):
+        try:
+            timestamp = row["timestamp"]
+            try:
+                # Archiving rewrites timestamps with pandas, e.g. adding zero microseconds, so they're put back in the
+                # form the results file was written with, keeping result IDs the same
+                timestamp = str(datetime.datetime.fromisoformat(timestamp))
+            except ValueError:
+                pass
+            yield {"wpm": float(row["wpm"]),
+                   "accuracy": float(row["accuracy"]),
+                   "timestamp": timestamp,
+                   "duration": int(float(row["duration"])),
+                   "test_id": row.get("test_id") or ""}
+        except (KeyError, TypeError, ValueError):
+            continue
+
+
+def read_results(filename):
+    """
+    Reads the results in a results file and its archive one row at a time, skipping rows that can't be parsed.
+
+    Archive segments are read oldest first, one at a time, followed by the results file.
+
+    Yields
+    ------
+    row : dict
+        The result's wpm, accuracy and duration as numbers, and its timestamp and test_id as strings.
+    """
+    for name, segment in sorted(archive_index(filename).items(), key=lambda item: item[1]["first"]):
+        try:
+            with gzip.open(os.path.join(archive_dir(filename), name), "rt", encoding="utf-8", newline="") as f:
+                yield from _parse_rows(f)
+        except FileNotFoundError:
+            continue
+    try:
+        source, _ = complete_rows(filename)
+    except FileNotFoundError:
+        return
+    with (open(source, "r", newline="") if isinstance(source, str) else
+          io.TextIOWrapper(source, newline="")) as f:
+        yield from _parse_rows(f)
+
+
+def export_results(results_file, output, machine, profile):
+    """
+    Exports the results in a results file, including its archived results.
+
+    Parameters
+    ----------
+    results_file : str
+        Name of the results file.
+    output : file object
+        Text file the export is written to.
+    machine : str
+        ID of this machine.
+    profile : str
+        Name of the profile the results belong to.
+
+    Returns
+    -------
+    aggregates : ResultsAggregates
+        Aggregates of the exported results, as written to the summary line.
+    """
+    exported = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    output.write(json.dumps({"format": EXPORT_FORMAT, "version": EXPORT_VERSION, "machine": machine,
+                             "profile": profile, "exported": exported}) + "\n")
+    aggregates = ResultsAggregates()
+    batch = []
+    for row in read_results(results_file):
+        output.write(json.dumps({"id": result_id(machine, profile, row), **row}) + "\n")
+        batch.append([row["wpm"], row["accuracy"], row["timestamp"], row["duration"], row["test_id"]])
+        if len(batch) == SUMMARY_BATCH:
+            aggregates.add_rows(batch)
+            batch = []
+    aggregates.add_rows(batch)
+    output.write(json.dumps({"summary": aggregates.to_dict()}) + "\n")
+    return aggregates
+
+
+class Leaderboard:
+    """
+    Combined leaderboard merged from the exports of many machines and profiles.
+
+    Attributes
+    ----------
+    sources : dict
+        Maps each "machine/profile" source to the time of its latest merged export and that export's summary.
+    top : dict
+        Maps each test duration to a min-heap of its best results, as (wpm, id, machine, profile, timestamp) lists.
+    top_n : int
+        Number of results kept for each duration.
+    exports_merged : int
+        Number of exports merged.
+    results_seen : int
+        Number of result lines read from the exports, including duplicates.
+    records_skipped : int
+        Number of lines in the merged exports that weren't valid results or summaries, and were skipped.
+
+    Methods
+    -------
+    merge_export(lines)
+        Merges an export into the leaderboard.
+    add_results(machine, results)
+        Adds uploaded results to the top results.
+    aggregates()
+        Combines the latest summary of every source.
+    top_scores()
+        Returns the best results for each duration.
+    """
+    TOP_N = 10
+
+    def __init__(self, top_n=TOP_N):
+        """
+        Parameters
+        ----------
+        top_n : int
+            Number of results kept for each duration.
+        """
+        self.top_n = top_n
+        self.sources = {}
+        self.top = {}
+        self.exports_merged = 0
+        self.results_seen = 0
+        self.records_skipped = 0
+
+    def merge_export(self, lines):
+        """
+        Merges an export into the leaderboard, reading it one line at a time. Lines that can't be parsed are skipped.
+
+        Parameters
+        ----------
+        lines : iterable
+            Lines of the export.
+
+        Returns
+        -------
+        skipped : int
+            Number of lines in the export that were skipped.
+
+        Raises
+        ------
+        ValueError
+            If the lines aren't an export in a supported format.
+        """
+        lines = iter(lines)
+        try:
+            header = json.loads(next(lines))
+        except StopIteration:
+            raise ValueError("Empty export")
+        if header.get("format") != EXPORT_FORMAT or header.get("version") != EXPORT_VERSION:
+            raise ValueError("Not a supported results export")
+        machine, profile, exported = header["machine"], header["profile"], header["exported"]
+
+        skipped = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if "summary" in record:
+                    ResultsAggregates.from_dict(record["summary"])  # Checks the summary can be combined later
+                    self._merge_summary(f"{machine}/{profile}", exported, record["summary"])
+                    continue
+                entry = [float(record["wpm"]), str(record["id"]), machine, profile, str(record["timestamp"])]
+                duration = int(record["duration"])
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            self.results_seen += 1
+            self._add_result(entry, duration)
+        self.exports_merged += 1
+        self.records_skipped += skipped
+        return skipped
+
+    def add_results(self, machine, results):
+        """
+        Adds uploaded results to the top results. Uploads don't carry a summary, so the aggregates are unchanged.
+
+        Parameters
+        ----------
+        machine : str
+            ID of the machine the results were recorded on.
+        results : list
+            Results as dictionaries with the profile, id, wpm, timestamp and duration.
+        """
+        for record in results:
+            self.results_seen += 1
+            self._add_result([record["wpm"], record["id"], machine, record["profile"], record["timestamp"]],
+                             record["duration"])
+
+    def _merge_summary(self, source, exported, summary):
+        """
+        Keeps a source's summary if it comes from a newer export than the one already kept.
+        """
+        if source not in self.sources or exported > self.sources[source]["exported"]:
+            self.sources[source] = {"exported": exported, "summary": summary}
+
+    def _add_result(self, entry, duration):
+        """
+        Adds a result to its duration's heap if it's one of the best and isn't already there.
+        """
+        heap = self.top.setdefault(int(duration), [])
+        if any(existing[1] == entry[1] for existing in heap):
+            return
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def aggregates(self):
+        """
+        Combines the latest summary of every source.
+
+        Returns
+        -------
+        aggregates : ResultsAggregates
+            Aggregates of every merged result.
+        """
+        aggregates = ResultsAggregates()
+        for source in self.sources.values():
+            aggregates.merge(ResultsAggregates.from_dict(source["summary"]))
+        return aggregates
+
+    def top_scores(self):
+        """
+        Returns the best results for each duration.
+
+        Returns
+        -------
+        top_scores : dict
+            Maps each duration to its best results, as (wpm, id, machine, profile, timestamp) lists in descending
+            order of WPM.
+        """
+        return {duration: sorted(self.top[duration], reverse=True) for duration in sorted(self.top)}
+
+    def to_dict(self):
+        """
+        Returns the leaderboard as a JSON-serialisable dictionary.
+        """
+        return {"top_n": self.top_n,
+                "sources": self.sources,
+                "top": {str(duration): heap for duration, heap in self.top.items()},
+                "exports_merged": self.exports_merged,
+                "results_seen": self.results_seen,
+                "records_skipped": self.records_skipped}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a leaderboard from a dictionary made by to_dict().
+        """
+        leaderboard = cls(data.get("top_n", cls.TOP_N))
+        leaderboard.sources = data["sources"]
+        leaderboard.top = {int(duration): heap for duration, heap in data["top"].items()}
+        for heap in leaderboard.top.values():
+            heapq.heapify(heap)
+        leaderboard.exports_merged = data.get("exports_merged", 0)
+        leaderboard.results_seen = data.get("results_seen", 0)
+        leaderboard.records_skipped = data.get("records_skipped", 0)
+        return leaderboard
+
+
+def load_leaderboard(path):
+    """
+    Loads a saved leaderboard, or returns an empty one if there isn't one.
+    """
+    try:
+        with open_text(path) as f:
+            return Leaderboard.from_dict(json.load(f))
+    except FileNotFoundError:
+        return Leaderboard()
+
+
+def save_leaderboard(leaderboard: Leaderboard, path):
+    """
+    Saves a leaderboard, replacing the file atomically.
+    """
+    replace_file(path, lambda f: json.dump(leaderboard.to_dict(), f))
+
+
+class UploadHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Request handler for the local leaderboard server.
+
+    POST /upload merges the export in the request body into the leaderboard. GET /leaderboard returns the combined top
+    results and aggregates as JSON.
+    """
+    def do_POST(self):
+        if self.path != "/upload":
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            with self.server.lock:
+                self.server.leaderboard.merge_export(body.decode("utf-8").splitlines())
+                save_leaderboard(self.server.leaderboard, self.server.leaderboard_file)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_error(400, str(e))
+            return
+        self._send_json({"merged": True})
+
+    def do_GET(self):
+        if self.path != "/leaderboard":
+            self.send_error(404)
+            return
+        with self.server.lock:
+            leaderboard = self.server.leaderboard
+            response = {"top": {str(duration): scores for duration, scores in leaderboard.top_scores().items()},
+                        "aggregates": leaderboard.aggregates().to_dict()}
+        self._send_json(response)
+
+    def _send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port=DEFAULT_PORT, leaderboard_file=LEADERBOARD_FILE, host="localhost"):
+    """
+    Creates the local leaderboard server, which keeps the leaderboard in memory and saves it after each upload.
+
+    Parameters
+    ----------
+    port : int
+        Port to listen on. 0 picks a free port.
+    leaderboard_file : str
+        File the leaderboard is loaded from and saved to.
+    host : str
+        Address to listen on.
+
+    Returns
+    -------
+    server : http.server.ThreadingHTTPServer
+        The server. Call serve_forever() to start it.
+    """
+    server = http.server.ThreadingHTTPServer((host, port), UploadHandler)
+    server.lock = threading.Lock()
+    server.leaderboard = load_leaderboard(leaderboard_file)
+    server.leaderboard_file = leaderboard_file
+    return server
+
+
+def upload(export_path, url=f"http://localhost:{DEFAULT_PORT}"):
+    """
+    Uploads an export to a leaderboard server.
+    """
+    with open_text(export_path) as f:
+        body = f.read().encode("utf-8")
+    request = urllib.request.Request(f"{url}/upload", data=body, method="POST",
+                                     headers={"Content-Type": "application/x-ndjson"})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export results and merge them into a combined leaderboard.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export a profile's results.")
+    export_parser.add_argument("--profile", help="Profile to export (default: the current profile).")
+    export_parser.add_argument("-o", "--output", help="Export file, .gz to compress (default: <machine>-<profile>.jsonl).")
+
+    merge_parser = commands.add_parser("merge", help="Merge exports into a leaderboard file.")
+    merge_parser.add_argument("exports", nargs="+")
+    merge_parser.add_argument("-o", "--output", default=LEADERBOARD_FILE)
+
+    serve_parser = commands.add_parser("serve", help="Run a local server that receives uploaded exports.")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("-o", "--output", default=LEADERBOARD_FILE)
+
+    upload_parser = commands.add_parser("upload", help="Upload an export to a leaderboard server.")
+    upload_parser.add_argument("export")
+    upload_parser.add_argument("--url", default=f"http://localhost:{DEFAULT_PORT}")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        profiles = ProfileManager()
+        profile = args.profile or profiles.current
+        machine = machine_id()
+        output = args.output or f"{machine[:8]}-{profile}.jsonl"
+        with open_text(output, "w") as f:
+            aggregates = export_results(profiles.path(FILENAME, profile), f, machine, profile)
+        print(f"Exported {aggregates.rows} results to {output}")
+    elif args.command == "merge":
+        leaderboard = load_leaderboard(args.output)
+        skipped = 0
+        for export in args.exports:
+            with open_text(export) as f:
+                skipped += leaderboard.merge_export(f)
+        save_leaderboard(leaderboard, args.output)
+        print(f"Merged {len(args.exports)} exports into {args.output} "
+              f"({leaderboard.aggregates().rows} results from {len(leaderboard.sources)} sources)")
+        if skipped:
+            print(f"Skipped {skipped} malformed records")
+    elif args.command == "serve":
+        server = make_server(args.port, args.output)
+        print(f"Leaderboard server listening on http://localhost:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    elif args.command == "upload":
+        print(upload(args.export, args.url))
+
+
+if __name__ == "__main__":
+    main()
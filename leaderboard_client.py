@@ -0,0 +1,152 @@
+"""
+Client side of the leaderboard: machine and result IDs, and a pool of persistent HTTP connections used to upload
+results to a leaderboard server.
+"""
+import hashlib
+import http.client
+import json
+import os
+import queue
+import urllib.parse
+import uuid
+
+MACHINE_ID_FILE = "machine_id.txt"
+# Seconds to wait for the server before an upload attempt fails
+REQUEST_TIMEOUT = 5.0
+
+
+def machine_id(base_dir="."):
+    """
+    Returns this machine's ID, creating one the first time.
+
+    Parameters
+    ----------
+    base_dir : str
+        Directory holding the machine ID file.
+
+    Returns
+    -------
+    machine_id : str
+        A random hexadecimal ID, the same every time it is read on this machine.
+    """
+    path = os.path.join(base_dir, MACHINE_ID_FILE)
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        new_id = uuid.uuid4().hex
+        with open(path, "w") as f:
+            f.write(new_id)
+        return new_id
+
+
+def result_id(machine, profile, row):
+    """
+    Returns the ID of a result, derived from where it was recorded and its values.
+
+    Parameters
+    ----------
+    machine : str
+        ID of the machine the result was recorded on.
+    profile : str
+        Name of the profile the result was recorded by.
+    row : dict
+        The result's wpm, accuracy, timestamp, duration and test_id.
+
+    Returns
+    -------
+    result_id : str
+        A 16 character hexadecimal ID.
+    """
+    key = "/".join([machine, profile] + [str(row[column]) for column in
+                                         ["wpm", "accuracy", "timestamp", "duration", "test_id"]])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class ConnectionPool:
+    """
+    A pool of persistent (keep-alive) HTTP connections to one server.
+
+    Connections are reused between requests, so uploads don't pay for a new TCP connection each time. A connection that
+    fails is closed and replaced on the next request.
+
+    Attributes
+    ----------
+    host : str
+        Host name of the server.
+    port : int
+        Port of the server.
+    size : int
+        Maximum number of idle connections kept open.
+    connections_opened : int
+        Number of connections opened so far.
+
+    Methods
+    -------
+    request_json(method, path, data)
+        Sends a request with an optional JSON body and returns the decoded JSON response.
+    close()
+        Closes the idle connections.
+    """
+    def __init__(self, url, size=2):
+        """
+        Parameters
+        ----------
+        url : str
+            Base URL of the server, e.g. http://localhost:8766.
+        size : int
+            Maximum number of idle connections kept open.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.size = size
+        self.connections_opened = 0
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def request_json(self, method, path, data=None):
+        """
+        Sends a request with an optional JSON body and returns the decoded JSON response.
+
+        Raises
+        ------
+        OSError
+            If the request fails or the server responds with an error status. http.client.HTTPException is raised for
+            malformed responses.
+        """
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            self.connections_opened += 1
+
+        body = None if data is None else json.dumps(data).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                self._idle.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+        if response.status >= 400:
+            raise OSError(f"Leaderboard server responded {response.status} {response.reason}")
+        return json.loads(payload) if payload else None
+
+    def close(self):
+        """
+        Closes the idle connections.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
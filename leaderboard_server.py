@@ -0,0 +1,200 @@
+"""
+A small asyncio leaderboard service that receives results uploaded by many app instances.
+
+The service speaks just enough HTTP/1.1 for the app's uploader and the load test, keeping connections open between
+requests:
+
+- ``POST /results`` with a JSON body ``{"machine": ..., "results": [...]}`` adds results to the leaderboard. Each
+  result has the id, profile, wpm, accuracy, timestamp, duration and test_id of one test. Results already on the
+  leaderboard are ignored, so retried uploads are harmless.
+- ``GET /top?duration=30&n=10`` returns the best results for a duration from the in-memory index.
+- ``GET /stats`` reports the number of requests and results received.
+
+Run it with ``python leaderboard_server.py [--port 8766]`` and start the app with the TYPING_TEST_LEADERBOARD
+environment variable set to the server's URL, e.g. ``http://localhost:8766``.
+"""
+import argparse
+import asyncio
+import json
+import urllib.parse
+
+from leaderboard import Leaderboard
+
+DEFAULT_PORT = 8766
+# Results kept for each duration, i.e. the largest n answered by /top
+INDEX_SIZE = 100
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class LeaderboardService:
+    """
+    The leaderboard service: an in-memory index of the best results for each duration, and the connection handler.
+
+    Attributes
+    ----------
+    leaderboard : Leaderboard
+        The index of the best results for each duration.
+    requests : int
+        Number of requests handled.
+    results_received : int
+        Number of results uploaded, including duplicates.
+
+    Methods
+    -------
+    handle_connection(reader, writer)
+        Serves the requests on one client connection until the client closes it.
+    """
+    def __init__(self, index_size=INDEX_SIZE):
+        """
+        Parameters
+        ----------
+        index_size : int
+            Number of results kept for each duration.
+        """
+        self.leaderboard = Leaderboard(index_size)
+        self.requests = 0
+        self.results_received = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves the requests on one client connection until the client closes it.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body can't be skipped without its length, so the connection is closed after the response
+                    self._write_response(writer, 400, {"error": "Invalid Content-Length"}, close=True)
+                    await writer.drain()
+                    break
+                if length > MAX_BODY:
+                    self._write_response(writer, 413, {"error": "Request body too large"}, close=True)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, response = self.dispatch(request_line, body)
+                close = headers.get("connection", "").lower() == "close"
+                self._write_response(writer, status, response, close)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, request_line, body):
+        """
+        Handles one request.
+
+        Parameters
+        ----------
+        request_line : str
+            The HTTP request line, e.g. "GET /top?duration=30 HTTP/1.1".
+        body : bytes
+            The request body.
+
+        Returns
+        -------
+        status : int
+            HTTP status code of the response.
+        response : dict
+            The response, to be sent as JSON.
+        """
+        self.requests += 1
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"error": "Malformed request line"}
+        url = urllib.parse.urlsplit(target)
+
+        if url.path == "/results":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            try:
+                upload = json.loads(body)
+                self.leaderboard.add_results(upload["machine"], upload["results"])
+            except (ValueError, KeyError, TypeError) as e:
+                return 400, {"error": f"Invalid upload: {e}"}
+            self.results_received += len(upload["results"])
+            return 200, {"accepted": len(upload["results"])}
+
+        if url.path == "/top":
+            query = urllib.parse.parse_qs(url.query)
+            try:
+                duration = int(query["duration"][0])
+                n = min(int(query.get("n", ["10"])[0]), self.leaderboard.top_n)
+            except (KeyError, ValueError):
+                return 400, {"error": "Give the duration and optionally n, e.g. /top?duration=30&n=10"}
+            scores = sorted(self.leaderboard.top.get(duration, []), reverse=True)[:n]
+            return 200, {"duration": duration, "top": scores}
+
+        if url.path == "/stats":
+            return 200, {"requests": self.requests, "results_received": self.results_received,
+                         "results_indexed": sum(len(heap) for heap in self.leaderboard.top.values())}
+
+        return 404, {"error": "Not found"}
+
+    def _write_response(self, writer, status, response, close=False):
+        body = json.dumps(response).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+
+async def start_server(service: LeaderboardService, host="localhost", port=DEFAULT_PORT):
+    """
+    Starts serving the leaderboard service.
+
+    Parameters
+    ----------
+    service : LeaderboardService
+        The service handling the connections.
+    host : str
+        Address to listen on.
+    port : int
+        Port to listen on. 0 picks a free port.
+
+    Returns
+    -------
+    server : asyncio.Server
+        The running server.
+    """
+    return await asyncio.start_server(service.handle_connection, host, port, backlog=4096)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the local leaderboard service.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = await start_server(LeaderboardService(), args.host, args.port)
+    print(f"Leaderboard service listening on http://{args.host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
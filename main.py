@@ -1,15 +1,32 @@
+import time
+START_TIME = time.perf_counter()  # Before the other imports, so the startup time includes loading the libraries
+
+import os
 import tkinter as tk
 
 from typing_test import TypingTestLogic
 from scoreboardlogic import ScoreBoardLogic
+from historylogic import HistoryLogic
 from home_ui import HomeUI
 from options_ui import OptionsUI
 from scoreboard_ui import ScoreboardUI
-from currentdisplay import CurrentDisplay
+from history_ui import HistoryUI
+from currentdisplay import CurrentDisplay, CS_FILENAME
 from optionslogic import OptionsLogic
-from results_io import ResultsInOut
+from results_io import ResultsInOut, FILENAME as RESULTS_FILENAME
 from analytics_brain import AnalyticsBrain
 from analytics_ui import AnalyticsUI
+from key_stats import KeyStats, FILENAME as KEY_STATS_FILENAME
+from book_text import BookPositions, BOOK_POSITIONS_FILENAME
+from ghost_race import GhostStore, GHOSTS_FILENAME
+from race_client import RaceClient
+from profiles import ProfileManager
+from profilelogic import ProfileLogic
+from results_archive import compact_in_background
+import diagnostics
+from stall_watchdog import FrameTimeOverlay, StallWatchdog
+from theme import ThemeEngine
+from metrics import MetricSet, exporter_from_environment
 
 
 class TypingSpeedApp:
@@ -20,6 +37,10 @@ class TypingSpeedApp:
     ----------
     root : tkinter.Tk
         The root window widget.
+    metrics : MetricSet
+        The app's startup time (see metrics.py).
+    metrics_exporter : MetricsExporter
+        Exports the metrics of the app and its parts, or None if they aren't exported.
     """
     def __init__(self, root: tk.Tk):
         # Set up the main window
@@ -28,19 +49,49 @@ class TypingSpeedApp:
         self.root.minsize(height=700, width=900)
 
         # Initialise the UI
+        theme = ThemeEngine(root)
         home_ui = HomeUI(root)
         scoreboard_ui = ScoreboardUI(root)
-        options_ui = OptionsUI(root)
+        options_ui = OptionsUI(root, theme)
+        history_ui = HistoryUI(root)
 
-        results_io = ResultsInOut()
-        analytics_brain = AnalyticsBrain(results_io)
+        profiles = ProfileManager()
+        # Results are also uploaded to a leaderboard server if one is given (see leaderboard_server.py)
+        results_io = ResultsInOut(profiles.path(RESULTS_FILENAME), os.environ.get("TYPING_TEST_LEADERBOARD"),
+                                  profiles.current)
+        # Archive results older than the profile's retention period (see results_archive.py) without delaying startup
+        compact_in_background(results_io.filename)
+        key_stats = KeyStats(profiles.path(KEY_STATS_FILENAME))
+        analytics_brain = AnalyticsBrain(results_io, key_stats)
         analytics_ui = AnalyticsUI(root, analytics_brain)
 
-        current_display = CurrentDisplay(root, home_ui, scoreboard_ui, options_ui, analytics_ui)
+        current_display = CurrentDisplay(root, home_ui, scoreboard_ui, options_ui, analytics_ui, history_ui, results_io,
+                                         theme, profiles.path(CS_FILENAME))
+
+        book_positions = BookPositions(profiles.path(BOOK_POSITIONS_FILENAME))
+        ghosts = GhostStore(profiles.path(GHOSTS_FILENAME))
+        # Races against other people on the local network go through a relay if one is given (see race_relay.py)
+        race_client = None
+        if os.environ.get("TYPING_TEST_RACE_RELAY"):
+            race_client = RaceClient(os.environ["TYPING_TEST_RACE_RELAY"], profiles.current)
+            race_client.start()
+        typing_test = TypingTestLogic(root, home_ui, results_io, key_stats, book_positions, ghosts, race_client)
+        scoreboard = ScoreBoardLogic(current_display, home_ui, scoreboard_ui, results_io, analytics_ui, profiles)
+        history = HistoryLogic(current_display, scoreboard_ui, history_ui, results_io, scoreboard)
+        # Watch for callbacks that freeze the window while diagnostics are on; F12 shows the frame times
+        self.watchdog = StallWatchdog(root)
+        if diagnostics.is_enabled():
+            self.watchdog.start()
+        self.frame_time_overlay = FrameTimeOverlay(root, self.watchdog, home_ui)
+        options = OptionsLogic(current_display, home_ui, options_ui, typing_test, self.watchdog)
+        profile = ProfileLogic(root, profiles, current_display, home_ui, options, results_io, key_stats)
 
-        typing_test = TypingTestLogic(root, home_ui, results_io)
-        scoreboard = ScoreBoardLogic(current_display, home_ui, scoreboard_ui, results_io, analytics_ui)
-        options = OptionsLogic(current_display, home_ui, options_ui)
+        # Metrics for monitoring the app, exported if TYPING_TEST_METRICS_FILE or TYPING_TEST_METRICS_PORT is set
+        self.metrics = MetricSet()
+        startup = self.metrics.gauge("typing_test_startup_seconds", "Time from starting the app until it was ready.")
+        root.after_idle(lambda: startup.set(time.perf_counter() - START_TIME))
+        self.metrics_exporter = exporter_from_environment([self.metrics, typing_test.metrics, results_io.metrics,
+                                                           analytics_brain.metrics])
 
     def run(self):
         """
@@ -50,6 +101,7 @@ class TypingSpeedApp:
 
 
 if __name__ == "__main__":
+    diagnostics.start_from_environment()
     root = tk.Tk()
     app = TypingSpeedApp(root)
     app.run()
@@ -0,0 +1,404 @@
+"""
+Metrics for watching many copies of the app, e.g. on kiosks: counters, gauges and histograms exported in the
+OpenMetrics text format.
+
+The classes being measured each keep a MetricSet of their own metrics. Every metric is only updated by one thread (the
+Tk thread, or the results writer thread for the write metrics), so updates are plain additions to attributes and lists,
+without locks. The exporter reads them from its own thread. A histogram read between the two additions of an
+observation can have its sum one observation behind its counts, which scrapers tolerate.
+
+The metrics are exported by a background thread (see MetricsExporter), to a text file for the node exporter's textfile
+collector every EXPORT_INTERVAL seconds, and/or over HTTP on a localhost port, at /metrics. Set the
+TYPING_TEST_METRICS_FILE and TYPING_TEST_METRICS_PORT environment variables to turn them on.
+"""
+import atexit
+import bisect
+import functools
+import http.server
+import os
+import threading
+import time
+
+FILE_VARIABLE = "TYPING_TEST_METRICS_FILE"
+PORT_VARIABLE = "TYPING_TEST_METRICS_PORT"
+# Seconds between writes of the metrics file
+EXPORT_INTERVAL = 15
+# Upper bounds in seconds of the histogram buckets for latencies, from a fraction of a key press to a slow file read
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class Counter:
+    """
+    A count that only goes up.
+
+    Attributes
+    ----------
+    value : float
+        The count.
+    """
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        """
+        Adds to the count.
+        """
+        self.value += amount
+
+    def samples(self):
+        return [("_total", (), self.value)]
+
+
+class Gauge:
+    """
+    A value that can go up and down, or None until it is first set.
+
+    Attributes
+    ----------
+    value : float
+        The value.
+    """
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        """
+        Sets the value.
+        """
+        self.value = value
+
+    def samples(self):
+        return [] if self.value is None else [("", (), self.value)]
+
+
+class Histogram:
+    """
+    Counts of observations, such as latencies, falling into fixed buckets.
+
+    Attributes
+    ----------
+    buckets : tuple
+        Upper bound of each bucket, in increasing order. Larger observations are counted in the +Inf bucket.
+    counts : list
+        Number of observations in each bucket, not cumulative, with the +Inf bucket last.
+    sum : float
+        Sum of the observations.
+    """
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Counts an observation in the first bucket whose upper bound is at least the value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def count(self):
+        """
+        Returns the number of observations.
+        """
+        return sum(self.counts)
+
+    def samples(self):
+        counts = list(self.counts)
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            samples.append(("_bucket", (("le", "+Inf" if bound == float("inf") else repr(float(bound))),), cumulative))
+        samples.append(("_count", (), cumulative))
+        samples.append(("_sum", (), self.sum))
+        return samples
+
+
+class Metric:
+    """
+    A named metric, either a single Counter, Gauge or Histogram, or one for each value of a label.
+
+    Attributes
+    ----------
+    name : str
+        Name of the metric family, without the _total suffix of counters.
+    help : str
+        Description of the metric.
+    label : str
+        Name of the label, or None.
+    children : dict
+        Maps each label value to its Counter, Gauge or Histogram. The only key is None if there isn't a label.
+    """
+    def __init__(self, name, help, metric_type, label=None, **kwargs):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.kind = metric_type.kind
+        self.children = {}
+        self._new_child = functools.partial(metric_type, **kwargs)
+        if label is None:
+            self.children[None] = self._new_child()
+
+    def labels(self, value=None):
+        """
+        Returns the Counter, Gauge or Histogram for a label value, creating it the first time.
+        """
+        child = self.children.get(value)
+        if child is None:
+            child = self.children.setdefault(value, self._new_child())
+        return child
+
+    def inc(self, amount=1):
+        self.children[None].inc(amount)
+
+    def set(self, value):
+        self.children[None].set(value)
+
+    def observe(self, value):
+        self.children[None].observe(value)
+
+    def render(self):
+        """
+        Returns the metric's lines in the OpenMetrics text format.
+        """
+        lines = [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {escape(self.help)}"]
+        for label_value, child in sorted(list(self.children.items()), key=lambda item: str(item[0])):
+            labels = () if label_value is None else ((self.label, str(label_value)),)
+            for suffix, extra_labels, value in child.samples():
+                label_text = ",".join(f'{name}="{escape(text)}"' for name, text in labels + extra_labels)
+                lines.append(f"{self.name}{suffix}{{{label_text}}} {value}" if label_text
+                             else f"{self.name}{suffix} {value}")
+        return lines
+
+
+class MetricSet:
+    """
+    The metrics of one part of the app.
+
+    Attributes
+    ----------
+    metrics : dict
+        Maps each metric's name to the Metric.
+    """
+    def __init__(self):
+        self.metrics = {}
+
+    def __getitem__(self, name):
+        return self.metrics[name]
+
+    def counter(self, name, help, label=None):
+        """
+        Adds a counter. Name it without the _total suffix, which is added when it's exported.
+        """
+        return self._add(Metric(name, help, Counter, label))
+
+    def gauge(self, name, help, label=None):
+        """
+        Adds a gauge.
+        """
+        return self._add(Metric(name, help, Gauge, label))
+
+    def histogram(self, name, help, label=None, buckets=LATENCY_BUCKETS):
+        """
+        Adds a histogram with fixed buckets.
+        """
+        return self._add(Metric(name, help, Histogram, label, buckets=buckets))
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+
+def escape(text):
+    """
+    Escapes a label value or help text for the OpenMetrics text format.
+    """
+    return str(text).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(metric_sets):
+    """
+    Renders metrics in the OpenMetrics text format.
+
+    Parameters
+    ----------
+    metric_sets : list
+        The MetricSets to render.
+
+    Returns
+    -------
+    text : str
+        The metrics, ending with the "# EOF" line.
+    """
+    lines = []
+    for metric_set in metric_sets:
+        for metric in list(metric_set.metrics.values()):
+            lines.extend(metric.render())
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def timed(metric_name):
+    """
+    Decorator for methods whose time is observed in a histogram of the instance's metrics (self.metrics), labelled
+    with the method's name.
+
+    Parameters
+    ----------
+    metric_name : str
+        Name of the histogram.
+    """
+    def decorator(func):
+        label = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.metrics[metric_name].labels(label).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class MetricsExporter:
+    """
+    Exports metrics from a background thread, to a text file and/or over HTTP on a localhost port.
+
+    Attributes
+    ----------
+    metric_sets : list
+        The MetricSets exported.
+    filename : str
+        File the metrics are written to, or None.
+    interval : float
+        Seconds between writes of the file.
+    server : http.server.ThreadingHTTPServer
+        Server answering GET /metrics, or None.
+    exports : int
+        Number of times the file has been written.
+    """
+    def __init__(self, metric_sets, filename=None, port=None, interval=EXPORT_INTERVAL):
+        """
+        Parameters
+        ----------
+        metric_sets : list
+            The MetricSets to export.
+        filename : str
+            File to write the metrics to, e.g. in the node exporter's textfile directory.
+        port : int
+            Localhost port to serve the metrics on. 0 picks a free port.
+        interval : float
+            Seconds between writes of the file.
+        """
+        self.metric_sets = metric_sets
+        self.filename = filename
+        self.interval = interval
+        self.server = None
+        self.exports = 0
+        self._stop = threading.Event()
+        self._threads = []
+        if port is not None:
+            self.server = http.server.ThreadingHTTPServer(("localhost", port), _MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.exporter = self
+
+    def render(self):
+        """
+        Returns the metrics in the OpenMetrics text format.
+        """
+        return render(self.metric_sets)
+
+    def write(self):
+        """
+        Writes the metrics file, replacing it in one step so readers never see a partial file.
+        """
+        temp_path = f"{self.filename}.tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(self.render())
+        os.replace(temp_path, self.filename)
+        self.exports += 1
+
+    def start(self):
+        """
+        Starts the export threads.
+        """
+        if self.filename:
+            self._threads.append(threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True))
+        if self.server is not None:
+            self._threads.append(threading.Thread(target=self.server.serve_forever, name="metrics-server",
+                                                  daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops the export threads, writing the file a last time.
+        """
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def _write_loop(self):
+        while True:
+            try:
+                self.write()
+            except OSError:
+                pass  # Try again next time, e.g. if the directory was unavailable
+            if self._stop.wait(self.interval):
+                break
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.exporter.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes aren't logged
+
+
+def exporter_from_environment(metric_sets):
+    """
+    Starts exporting metrics if the TYPING_TEST_METRICS_FILE or TYPING_TEST_METRICS_PORT environment variable is set,
+    until the app exits.
+
+    Parameters
+    ----------
+    metric_sets : list
+        The MetricSets to export.
+
+    Returns
+    -------
+    exporter : MetricsExporter
+        The running exporter, or None if neither variable is set.
+    """
+    filename = os.environ.get(FILE_VARIABLE)
+    port = os.environ.get(PORT_VARIABLE)
+    if not filename and not port:
+        return None
+    exporter = MetricsExporter(metric_sets, filename or None, int(port) if port else None)
+    exporter.start()
+    atexit.register(exporter.stop)  # Write the file a last time when the app closes
+    return exporter
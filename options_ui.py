@@ -1,6 +1,12 @@
-import tkinter as tk
+from tkinter import ttk
 
 from colour_schemes import COLOUR_SCHEMES
+from theme import ThemeEngine
+from content_modes import CAPITALS, MODIFIERS, NUMBERS, PUNCTUATION, QUOTE_LENGTHS, QUOTES
+from word_data import WORD_LISTS
+
+# Names shown on the content buttons for each modifier
+MODIFIER_NAMES = {PUNCTUATION: "Punctuation", CAPITALS: "Capitals", NUMBERS: "Numbers"}
 
 
 class OptionsUI:
@@ -14,41 +20,71 @@ class OptionsUI:
     ----------
     root : tkinter.Tk
         The parent widget
-    options_frame : tkinter.Frame
+    theme : ThemeEngine
+        The theme engine, which colours the preview box.
+    options_frame : tkinter.ttk.Frame
         Tkinter frame containing the options widgets.
-    options_title : tkinter.Label
+    options_title : tkinter.ttk.Label
         Tkinter label that displays the options title.
     colour_schemes : list
         List of colour schemes.
     default_cs_index : int
         Index of the default colour scheme.
-    set_col_label : tkinter.Label
+    set_col_label : tkinter.ttk.Label
         Tkinter label for the option to change colour scheme.
-    next_cs_button : tkinter.Button
+    next_cs_button : tkinter.ttk.Button
         Tkinter button to cycle through the colour scheme options.
-    apply_button : tkinter.Button
+    apply_button : tkinter.ttk.Button
         Tkinter button to update the colour scheme for the whole GUI.
-    close_options_button : tkinter.Button
+    close_options_button : tkinter.ttk.Button
         Tkinter button to close the options and return to the home screen.
-    set_default_button : tkinter.Button
+    set_default_button : tkinter.ttk.Button
         Button to set a particular colour scheme to be the default colour scheme for the app.
-    fullscreen_button : tkinter.Button
+    fullscreen_button : tkinter.ttk.Button
         Button to toggle full screen mode.
-    ext_button : tkinter.Button
+    ext_button : tkinter.ttk.Button
         Button to exit the application.
-    preview_frame : tkinter.Frame
+    preview_frame : tkinter.ttk.Frame
         Tkinter frame containing the colour scheme preview.
+    word_list_label : tkinter.ttk.Label
+        Tkinter label for the option to change word list.
+    word_list_button : tkinter.ttk.Button
+        Button showing the current word list, which cycles through the word lists.
+    practice_button : tkinter.ttk.Button
+        Button to toggle the weak key practice mode.
+    diagnostics_button : tkinter.ttk.Button
+        Button to toggle the diagnostics mode, which profiles the app.
+    book_button : tkinter.ttk.Button
+        Button to choose a text file for book mode, or to leave book mode.
+    book_position_scale : tkinter.ttk.Scale
+        Slider to move to a position in the book, as a percentage.
+    book_progress_label : tkinter.ttk.Label
+        Label showing how far through the book the user is.
+    content_label : tkinter.ttk.Label
+        Tkinter label for the options to change the test content.
+    modifier_buttons : dict
+        Buttons to toggle each modifier (see content_modes.py), by the modifier's code.
+    quotes_button : tkinter.ttk.Button
+        Button to cycle through the quote lengths, or back to words.
+    retention_button : tkinter.ttk.Button
+        Button to cycle through the retention periods of the profile's results (see results_archive.py).
 
     Methods
     -------
-    config_options_ui(colour_scheme)
-                Configures the options screen widgets according to the given colour scheme.
+    configure_preview(colour_scheme_index)
+        Shows the given colour scheme in the preview box.
+    config_book_options(name, fraction, progress)
+        Shows the book in use and how far through it the user is.
+    config_content_btns(content)
+        Shows the content of tests on the content buttons.
+    config_retention_btn(days)
+        Shows the retention period of the profile's results on the retention button.
     hide()
         Hides the options UI.
     show()
         Shows the options UI.
     """
-    def __init__(self, root):
+    def __init__(self, root, theme: ThemeEngine):
         """
         Initialises the options UI.
 
@@ -56,8 +92,11 @@ class OptionsUI:
         ----------
         root : tkinter.Tk
             The parent widget.
+        theme : ThemeEngine
+            The theme engine, which colours the preview box.
         """
         self.root = root
+        self.theme = theme
         self.options_frame = self.setup_options_frame()
         self.options_title, self.close_options_button = self.setup_options()
 
@@ -76,16 +115,36 @@ class OptionsUI:
 
         self.preview_frame = self.setup_colours_preview()
 
+        self.word_list_label, self.word_list_button = self.setup_word_list_options()
+        self.config_word_list_btn(0)
+
+        self.practice_button = self.setup_practice_option()
+        self.config_practice_btn(False)
+
+        self.diagnostics_button = self.setup_diagnostics_option()
+        self.config_diagnostics_btn(False)
+
+        self.book_button, self.book_position_scale, self.book_progress_label = self.setup_book_options()
+        self.config_book_options(None)
+
+        self.content_label, self.modifier_buttons, self.quotes_button = self.setup_content_options()
+        self.config_content_btns("")
+
+        self.retention_button = self.setup_retention_option()
+        self.config_retention_btn(None)
+
     def setup_options_frame(self):
         """
         Sets up the options frame.
 
         Returns
         -------
-        options_frame : tkinter.Frame
+        theme : ThemeEngine
+        The theme engine, which colours the preview box.
+    options_frame : tkinter.ttk.Frame
             Tkinter frame widget to contain all the options widgets.
         """
-        options_frame = tk.Frame(self.root)
+        options_frame = ttk.Frame(self.root)
         options_frame.grid(row=0, column=0, columnspan=5, rowspan=5, sticky="news")
         # Allow the options frame to resize
         for i in range(5):
@@ -99,15 +158,15 @@ class OptionsUI:
 
         Returns
         -------
-        options_title : tkinter.Label
+        options_title : tkinter.ttk.Label
             Tkinter label widget for the title.
-        close_options_button : tkinter.Button
+        close_options_button : tkinter.ttk.Button
             Button to close the options page.
         """
-        options_title = tk.Label(self.options_frame, text="Options", font=("Arial", "30"))
+        options_title = ttk.Label(self.options_frame, text="Options", style="Title.TLabel")
         options_title.grid(row=0, column=0, pady=50, sticky="n")
 
-        close_options_button = tk.Button(self.options_frame, text="Close", font=("Arial", "16"))
+        close_options_button = ttk.Button(self.options_frame, text="Close", style="Accent.TButton")
         close_options_button.grid(row=7, column=0, sticky="news", pady=100)
 
         return options_title, close_options_button
@@ -118,22 +177,22 @@ class OptionsUI:
 
         Returns
         -------
-        set_col_label : tkinter.Label
+        set_col_label : tkinter.ttk.Label
             Tkinter label for the option to change colour scheme.
-        next_col_scheme : tkinter.Button
+        next_col_scheme : tkinter.ttk.Button
             Tkinter button to cycle through the colour scheme options.
-        apply_button : tkinter.Button
+        apply_button : tkinter.ttk.Button
             Tkinter button to update the colour scheme for the whole GUI.
-        close_options_button : tkinter.Button
+        close_options_button : tkinter.ttk.Button
             Tkinter button to close the options and return to the home screen.
         """
-        set_col_label = tk.Label(self.options_frame, text="Select Colour Scheme:", font=("Arial", "16"), height=1)
+        set_col_label = ttk.Label(self.options_frame, text="Select Colour Scheme:")
         set_col_label.grid(row=1, column=0, columnspan=1, sticky="news")
-        next_col_scheme = tk.Button(self.options_frame, text="Next", font=("Arial", "16"))
+        next_col_scheme = ttk.Button(self.options_frame, text="Next", style="Primary.TButton")
         next_col_scheme.grid(row=2, column=0, sticky="ews")
-        apply_button = tk.Button(self.options_frame, text="Apply", font=("Arial", "16"))
+        apply_button = ttk.Button(self.options_frame, text="Apply", style="Primary.TButton")
         apply_button.grid(row=3, column=0, sticky="news")
-        set_default_button = tk.Button(self.options_frame, text="Set Default", font=("Arial", "16"))
+        set_default_button = ttk.Button(self.options_frame, text="Set Default", style="Primary.TButton")
         set_default_button.grid(row=4, column=0, sticky="new")
 
         return set_col_label, next_col_scheme, apply_button, set_default_button
@@ -142,7 +201,7 @@ class OptionsUI:
         """
         Sets up the button to toggle full screen.
         """
-        fullscreen_button = tk.Button(self.options_frame, font=("Arial", "16"))
+        fullscreen_button = ttk.Button(self.options_frame, style="Primary.TButton")
         fullscreen_button.grid(row=5, column=0, pady=50, sticky="ew")
         return fullscreen_button
 
@@ -166,7 +225,7 @@ class OptionsUI:
         """
         Sets up the exit application button.
         """
-        exit_button = tk.Button(self.options_frame, text="Exit Application", font=("Arial", "16"))
+        exit_button = ttk.Button(self.options_frame, text="Exit Application", style="Primary.TButton")
         exit_button.grid(row=6, column=0, sticky="ew")
         return exit_button
 
@@ -176,16 +235,16 @@ class OptionsUI:
 
         Returns
         -------
-        preview_frame : tkinter.Frame
+        preview_frame : tkinter.ttk.Frame
             Tkinter frame containing the colour scheme preview.
         """
-        preview_frame = tk.Frame(self.options_frame, highlightthickness=2)
+        preview_frame = ttk.Frame(self.options_frame, style="Preview.TFrame")
         preview_frame.grid(row=2, column=1, columnspan=1, rowspan=3, padx=50, pady=0, sticky="news")
         preview_frame.columnconfigure(1, weight=1)
 
-        preview_label = tk.Label(preview_frame, text="Preview", font=("Arial", "16"))
+        preview_label = ttk.Label(preview_frame, text="Preview", style="Preview.TLabel")
         preview_label.grid(row=0, column=1, sticky="news", pady=10)
-        preview_button = tk.Button(preview_frame, font=("Arial", "16"))
+        preview_button = ttk.Button(preview_frame, style="Preview.TButton")
         preview_button.grid(row=2, column=1, sticky="new", padx=50, pady=10)
 
         return preview_frame
@@ -207,28 +266,195 @@ class OptionsUI:
         else:
             preview_text = ""
 
-        self.preview_frame.configure(bg=colour_scheme["background"], highlightbackground=colour_scheme["highlight"])
-        preview_label.configure(text=f"Preview", bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        preview_button.configure(text=colour_scheme["name"]+preview_text, bg=colour_scheme["highlight"], fg=colour_scheme["main_text"])
+        self.theme.apply_preview(colour_scheme)
+        preview_button.configure(text=colour_scheme["name"]+preview_text)
+
+    def setup_word_list_options(self):
+        """
+        Sets up the widgets for the word list option.
+
+        Returns
+        -------
+        word_list_label : tkinter.ttk.Label
+            Tkinter label for the option to change word list.
+        word_list_button : tkinter.ttk.Button
+            Button to cycle through the word lists.
+        """
+        word_list_label = ttk.Label(self.options_frame, text="Word List:")
+        word_list_label.grid(row=1, column=2, sticky="news")
+        word_list_button = ttk.Button(self.options_frame, style="Primary.TButton")
+        word_list_button.grid(row=2, column=2, sticky="ews")
+        return word_list_label, word_list_button
 
-    def config_options_ui(self, colour_scheme):
+    def config_word_list_btn(self, word_list_index):
         """
-        Configures the colour properties of the options page widgets according to the given colour scheme.
+        Shows the name of the given word list on the word list button.
 
         Parameters
         ----------
-        colour_scheme : dict
-            The colour scheme to apply to the options UI.
-        """
-        self.options_frame.configure(bg=colour_scheme["background"])
-        self.options_title.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.set_col_label.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
-        self.next_cs_button.configure(bg=colour_scheme["main_text"], fg=colour_scheme["highlight"])
-        self.apply_button.configure(bg=colour_scheme["main_text"], fg=colour_scheme["highlight"])
-        self.set_default_button.configure(bg=colour_scheme["main_text"], fg=colour_scheme["highlight"])
-        self.close_options_button.configure(bg=colour_scheme["highlight"], fg=colour_scheme["main_text"])
-        self.fullscreen_button.configure(bg=colour_scheme["main_text"], fg=colour_scheme["highlight"])
-        self.exit_button.configure(bg=colour_scheme["main_text"], fg=colour_scheme["highlight"])
+        word_list_index : int
+            Index of the word list in WORD_LISTS.
+        """
+        self.word_list_button.configure(text=WORD_LISTS[word_list_index]["name"])
+
+    def setup_practice_option(self):
+        """
+        Sets up the button to toggle the weak key practice mode.
+        """
+        practice_button = ttk.Button(self.options_frame, style="Primary.TButton")
+        practice_button.grid(row=3, column=2, sticky="new")
+        return practice_button
+
+    def config_practice_btn(self, practice_mode):
+        """
+        Adjusts the text on the practice button to reflect whether the practice mode is on.
+
+        Parameters
+        ----------
+        practice_mode : bool
+            States whether tests over-sample words containing the user's weakest bigrams.
+        """
+        if practice_mode:
+            text = "Practise weak keys: On"
+        else:
+            text = "Practise weak keys: Off"
+
+        self.practice_button.configure(text=text)
+
+    def setup_diagnostics_option(self):
+        """
+        Sets up the button to toggle the diagnostics mode.
+        """
+        diagnostics_button = ttk.Button(self.options_frame, style="Primary.TButton")
+        diagnostics_button.grid(row=4, column=2, sticky="new")
+        return diagnostics_button
+
+    def config_diagnostics_btn(self, diagnostics_on):
+        """
+        Adjusts the text on the diagnostics button to reflect whether the diagnostics mode is on.
+
+        Parameters
+        ----------
+        diagnostics_on : bool
+            States whether the app's callbacks are being profiled.
+        """
+        if diagnostics_on:
+            text = "Diagnostics: On"
+        else:
+            text = "Diagnostics: Off"
+
+        self.diagnostics_button.configure(text=text)
+
+    def setup_book_options(self):
+        """
+        Sets up the widgets for book mode.
+
+        Returns
+        -------
+        book_button : tkinter.ttk.Button
+            Button to choose a text file for book mode, or to leave book mode.
+        book_position_scale : tkinter.ttk.Scale
+            Slider to move to a position in the book, as a percentage.
+        book_progress_label : tkinter.ttk.Label
+            Label showing how far through the book the user is.
+        """
+        book_button = ttk.Button(self.options_frame, style="Primary.TButton")
+        book_button.grid(row=5, column=2, sticky="ew")
+
+        book_frame = ttk.Frame(self.options_frame)
+        book_frame.grid(row=6, column=2, sticky="new")
+        book_frame.columnconfigure(0, weight=1)
+        book_position_scale = ttk.Scale(book_frame, from_=0, to=100, orient="horizontal")
+        book_position_scale.grid(row=0, column=0, sticky="ew")
+        book_progress_label = ttk.Label(book_frame, style="Small.TLabel")
+        book_progress_label.grid(row=1, column=0)
+        return book_button, book_position_scale, book_progress_label
+
+    def config_book_options(self, name, fraction=0, progress=""):
+        """
+        Shows the book in use and how far through it the user is. The position slider is disabled outside book mode.
+
+        Parameters
+        ----------
+        name : str
+            Name of the book, or None when tests use the word lists.
+        fraction : float
+            Fraction of the way through the book.
+        progress : str
+            Description of the position in the book.
+        """
+        if name is None:
+            self.book_button.configure(text="Book mode: Off")
+            self.book_position_scale.state(["disabled"])
+            self.book_progress_label.configure(text="Choose a text file to type through")
+        else:
+            self.book_button.configure(text=f"Book mode: {name}")
+            self.book_position_scale.state(["!disabled"])
+            self.book_position_scale.set(fraction * 100)
+            self.book_progress_label.configure(text=progress)
+
+    def setup_content_options(self):
+        """
+        Sets up the widgets for the test content options.
+
+        Returns
+        -------
+        content_label : tkinter.ttk.Label
+            Tkinter label for the options to change the test content.
+        modifier_buttons : dict
+            Buttons to toggle each modifier, by the modifier's code.
+        quotes_button : tkinter.ttk.Button
+            Button to cycle through the quote lengths.
+        """
+        content_label = ttk.Label(self.options_frame, text="Test Content:")
+        content_label.grid(row=1, column=3, sticky="news")
+        modifier_buttons = {}
+        for row, modifier in enumerate(MODIFIERS, start=2):
+            modifier_buttons[modifier] = ttk.Button(self.options_frame, style="Primary.TButton")
+            modifier_buttons[modifier].grid(row=row, column=3, sticky="new")
+        quotes_button = ttk.Button(self.options_frame, style="Primary.TButton")
+        quotes_button.grid(row=len(MODIFIERS) + 2, column=3, sticky="new")
+        return content_label, modifier_buttons, quotes_button
+
+    def config_content_btns(self, content):
+        """
+        Adjusts the text on the content buttons to reflect the content of tests.
+
+        Parameters
+        ----------
+        content : str
+            Code of the content of tests (see content_modes.py).
+        """
+        quotes = content.startswith(QUOTES)
+        for modifier, button in self.modifier_buttons.items():
+            on = modifier in content and not quotes
+            button.configure(text=f"{MODIFIER_NAMES[modifier]}: {'On' if on else 'Off'}")
+        quote_length = QUOTE_LENGTHS[content[1:]][0] if quotes else "Off"
+        self.quotes_button.configure(text=f"Quotes: {quote_length}")
+
+    def setup_retention_option(self):
+        """
+        Sets up the button to change how long results are kept in the results file before they are archived.
+        """
+        retention_button = ttk.Button(self.options_frame, style="Primary.TButton")
+        retention_button.grid(row=len(MODIFIERS) + 3, column=3, sticky="new")
+        return retention_button
+
+    def config_retention_btn(self, days):
+        """
+        Adjusts the text on the retention button to show the retention period.
+
+        Parameters
+        ----------
+        days : int
+            Number of days results are kept in the results file before they are archived, or None to keep them all.
+        """
+        if days is None:
+            text = "Archive results: Never"
+        else:
+            text = f"Archive results after: {days} days"
+
+        self.retention_button.configure(text=text)
 
     def show(self):
         """
@@ -1,6 +1,14 @@
+from tkinter import filedialog, messagebox
+
+import diagnostics
 from currentdisplay import CurrentDisplay
 from home_ui import HomeUI
 from options_ui import OptionsUI
+from results_archive import RETENTION_CHOICES, compact_in_background, load_retention, save_retention
+from stall_watchdog import StallWatchdog
+from typing_test import TypingTestLogic
+from content_modes import next_quote_length, toggle_modifier
+from word_data import WORD_LISTS
 
 
 class OptionsLogic:
@@ -15,8 +23,13 @@ class OptionsLogic:
         Index for the colour scheme displayed in the preview box.
     options_ui : OptionsUI
         Instance of the OptionsUI class.
+    typing_test : TypingTestLogic
+        Instance of the TypingTestLogic class.
+    watchdog : StallWatchdog
+        Watchdog for stalls of the event loop, which runs while diagnostics are on, or None.
     """
-    def __init__(self, current_display: CurrentDisplay, home_ui: HomeUI, options_ui: OptionsUI):
+    def __init__(self, current_display: CurrentDisplay, home_ui: HomeUI, options_ui: OptionsUI,
+                 typing_test: TypingTestLogic, watchdog: StallWatchdog = None):
         """
         Configures the options buttons to have functionality.
 
@@ -28,22 +41,55 @@ class OptionsLogic:
             Instance of the HomeUI class.
         options_ui : OptionsUI
             Instance of the OptionsUI class.
+        typing_test : TypingTestLogic
+            Instance of the TypingTestLogic class.
+        watchdog : StallWatchdog
+            Watchdog for stalls of the event loop, started and stopped with diagnostics.
         """
         self.current_display = current_display
         self.preview_cs_index = self.current_display.default_cs_index  # Preview starts by showing the default colour screen
 
         self.options_ui = options_ui
+        self.typing_test = typing_test
+        self.watchdog = watchdog
 
         # configure option buttons
         options_ui.next_cs_button.config(command=self.preview_next_colour_scheme)
         options_ui.apply_button.config(command=self.apply_colour_scheme)
-        home_ui.options_button.config(command=lambda: self.current_display.open_ui(options_ui))
+        home_ui.options_button.config(command=self.open_options)
         options_ui.close_options_button.config(command=lambda: self.current_display.open_ui(home_ui))
         options_ui.set_default_button.config(command=self.set_default_cs)
         options_ui.fullscreen_button.config(command=self.fullscreen_button_pressed)
         options_ui.exit_button.config(command=self.current_display.exit_app)
+        options_ui.word_list_button.config(command=self.next_word_list)
+        options_ui.practice_button.config(command=self.toggle_practice_mode)
+        options_ui.diagnostics_button.config(command=self.toggle_diagnostics)
+        options_ui.book_button.config(command=self.toggle_book_mode)
+        options_ui.book_position_scale.bind("<ButtonRelease-1>", self.seek_book)
+        for modifier, button in options_ui.modifier_buttons.items():
+            button.config(command=lambda modifier=modifier: self.toggle_modifier(modifier))
+        options_ui.quotes_button.config(command=self.next_quote_length)
+        options_ui.retention_button.config(command=self.next_retention)
 
         options_ui.config_fullscreen_btn(self.current_display.is_fullscreen)
+        options_ui.config_word_list_btn(typing_test.word_list_index)
+        options_ui.config_practice_btn(typing_test.practice_mode)
+        options_ui.config_diagnostics_btn(diagnostics.is_enabled())
+        options_ui.config_content_btns(typing_test.content)
+        options_ui.config_retention_btn(load_retention(typing_test.results_io.filename))
+        self.config_book_options()
+
+    def open_options(self):
+        """
+        Opens the options screen, showing the latest progress through the book, the test loaded by ID and the current
+        profile's retention period.
+        """
+        self.config_book_options()
+        self.options_ui.config_retention_btn(load_retention(self.typing_test.results_io.filename))
+        self.options_ui.config_word_list_btn(self.typing_test.word_list_index)
+        self.options_ui.config_practice_btn(self.typing_test.practice_mode)
+        self.options_ui.config_content_btns(self.typing_test.content)
+        self.current_display.open_ui(self.options_ui)
 
     def preview_next_colour_scheme(self):
         """
@@ -66,7 +112,7 @@ class OptionsLogic:
         """
         Saves the default colour scheme to the file and updates the relevant variables.
         """
-        with open("default_cs.txt", "w") as f:
+        with open(self.current_display.cs_filename, "w") as f:
             f.write(f"{self.preview_cs_index}")
         self.options_ui.default_cs_index = self.preview_cs_index
         self.options_ui.configure_preview(self.preview_cs_index)
@@ -78,3 +124,115 @@ class OptionsLogic:
         self.current_display.toggle_fullscreen()
         self.options_ui.config_fullscreen_btn(is_fullscreen=self.current_display.is_fullscreen)
 
+    def next_word_list(self):
+        """
+        Switches tests to the next word list and shows its name on the word list button.
+        """
+        word_list_index = (self.typing_test.word_list_index + 1) % len(WORD_LISTS)
+        self.typing_test.set_word_list(word_list_index)
+        self.options_ui.config_word_list_btn(word_list_index)
+        self.config_book_options()
+
+    def toggle_practice_mode(self):
+        """
+        Toggles the weak key practice mode and updates the text on the practice button.
+        """
+        self.typing_test.set_practice_mode(not self.typing_test.practice_mode)
+        self.options_ui.config_practice_btn(self.typing_test.practice_mode)
+        self.config_book_options()
+
+    def toggle_modifier(self, modifier):
+        """
+        Toggles mixing punctuation, capitals or numbers into the test words.
+
+        Parameters
+        ----------
+        modifier : str
+            Code of the modifier (see content_modes.py).
+        """
+        self.set_content(toggle_modifier(self.typing_test.content, modifier))
+
+    def next_quote_length(self):
+        """
+        Switches tests to quotes of the next length, or back to words after the longest.
+        """
+        self.set_content(next_quote_length(self.typing_test.content))
+
+    def set_content(self, content):
+        """
+        Changes the content of tests and updates the content buttons.
+
+        Parameters
+        ----------
+        content : str
+            Code of the content.
+        """
+        self.typing_test.set_content(content)
+        self.options_ui.config_content_btns(content)
+        self.config_book_options()
+
+    def next_retention(self):
+        """
+        Switches the current profile to the next retention period and archives any results older than it in the
+        background.
+        """
+        filename = self.typing_test.results_io.filename
+        days = load_retention(filename)
+        index = RETENTION_CHOICES.index(days) if days in RETENTION_CHOICES else 0  # e.g. set with --days
+        days = RETENTION_CHOICES[(index + 1) % len(RETENTION_CHOICES)]
+        save_retention(filename, days)
+        compact_in_background(filename)
+        self.options_ui.config_retention_btn(days)
+
+    def toggle_diagnostics(self):
+        """
+        Toggles the diagnostics mode, with the stall watchdog, and updates the text on the diagnostics button.
+        Switching it off writes the session's reports and says where they are.
+        """
+        if diagnostics.is_enabled():
+            directory = diagnostics.stop()
+            if self.watchdog is not None:
+                self.watchdog.stop()
+            messagebox.showinfo("Diagnostics", f"Profile and memory reports saved to {directory}")
+        else:
+            diagnostics.start()
+            if self.watchdog is not None:
+                self.watchdog.start()
+        self.options_ui.config_diagnostics_btn(diagnostics.is_enabled())
+
+    def toggle_book_mode(self):
+        """
+        Leaves book mode, or asks for a text file and switches to book mode with it.
+        """
+        if self.typing_test.book is not None:
+            self.typing_test.close_book()
+        else:
+            filename = filedialog.askopenfilename(title="Choose a text file to type",
+                                                  filetypes=[("Text files", "*.txt"), ("All files", "*")])
+            if not filename:  # Cancelled
+                return
+            try:
+                self.typing_test.open_book(filename)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Book mode", str(e))
+                return
+        self.typing_test.setup_test()
+        self.config_book_options()
+
+    def seek_book(self, event=None):
+        """
+        Bound to releasing the book position slider. Moves to the chosen position in the book.
+        """
+        if self.typing_test.book is not None:
+            self.typing_test.seek_book(self.options_ui.book_position_scale.get() / 100)
+        self.config_book_options()
+
+    def config_book_options(self):
+        """
+        Shows the book in use and how far through it the user is.
+        """
+        book = self.typing_test.book
+        if book is None:
+            self.options_ui.config_book_options(None)
+        else:
+            self.options_ui.config_book_options(book.name, book.position / book.size, book.progress())
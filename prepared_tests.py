@@ -0,0 +1,242 @@
+"""
+Tests generated ahead of time, so starting or restarting a test doesn't wait for its words to be generated.
+
+A PreparedTest holds everything needed to show a test: its words, the text of each page and the position of each word
+on its page. Starting a test takes one from a PreparedTestQueue, which is topped up when the Tk event loop is idle,
+one test per idle callback so it never holds up the window. The test durations all use the same 200 words, so one
+queue serves the 15, 30 and 60 second tests of each word list, mode and content.
+"""
+import collections
+import random
+
+from content_modes import QUOTES, apply_modifiers, get_quotes, quote_words
+from key_stats import KeyStats, practice_choices
+from word_data import get_bigram_index, get_corpus, make_test_id, new_seed
+
+# Number of words in a test
+TEST_WORDS = 200
+# Number of words typed on each page. Each page also shows the first word of the next page, greyed out.
+PAGE_WORDS = 30
+# Number of tests kept ready for each word list and mode
+QUEUE_SIZE = 3
+
+
+class PreparedTest:
+    """
+    A test ready to be shown.
+
+    Attributes
+    ----------
+    words : list
+        The test's words.
+    seed : int
+        Seed the words were generated from, or None.
+    test_id : str
+        Shareable ID of the test. Empty for practice tests and tests that weren't generated from a seed.
+    pages : list
+        Tuples of the text of each page and the first word of the next page with a space before it, which is shown
+        greyed out at the end of the page. Empty on the last page.
+    offsets : list
+        Position of the first character of each word on its page.
+    """
+    def __init__(self, words, seed=None, test_id=""):
+        """
+        Splits the words into pages.
+
+        Parameters
+        ----------
+        words : list
+            The test's words.
+        seed : int
+            Seed the words were generated from.
+        test_id : str
+            Shareable ID of the test.
+        """
+        self.words = words
+        self.seed = seed
+        self.test_id = test_id
+        self.pages = []
+        for left in range(0, len(words), PAGE_WORDS):
+            right = left + PAGE_WORDS
+            self.pages.append((" ".join(words[left:right]), f" {words[right]}" if right < len(words) else ""))
+        self.offsets = []
+        for i, word in enumerate(words):
+            if i % PAGE_WORDS == 0:
+                position = 0
+            self.offsets.append(position)
+            position += len(word) + 1
+
+
+def generate_test(word_list_index, practice_mode, key_stats: KeyStats, seed=None, content=""):
+    """
+    Randomly selects the words for a test.
+
+    Each test has its own random generator, so the same seed, word list and content always give the same words.
+
+    Parameters
+    ----------
+    word_list_index : int
+        Index of the word list (in word_data.WORD_LISTS) that test words are drawn from.
+    practice_mode : bool
+        Whether to over-sample words containing the user's weakest bigrams.
+    key_stats : KeyStats
+        The user's keystroke statistics, used in practice mode.
+    seed : int
+        Seed for the test's random generator. A new seed is chosen if not given.
+    content : str
+        Code of the test's content (see content_modes.py): modifiers applied to the words, or quotes of a length
+        instead of words. Empty for plain words, which quote tests also fall back to if there are no quotes.
+
+    Returns
+    -------
+    test : PreparedTest
+        The test.
+    """
+    seed = new_seed() if seed is None else seed
+    rng = random.Random(seed)
+    if content.startswith(QUOTES):
+        words = quote_words(get_quotes(), content[1:], TEST_WORDS, rng)
+        if words:
+            return PreparedTest(words[:TEST_WORDS], seed, make_test_id(word_list_index, seed, content))
+        content = ""  # Without quotes the test falls back to plain words, and is given their ID
+    corpus = get_corpus(word_list_index)
+    if practice_mode:
+        bigram_index = get_bigram_index(word_list_index)
+        words = practice_choices(corpus, bigram_index, key_stats, TEST_WORDS, rng)
+        return PreparedTest(apply_modifiers(words, content, rng), seed)
+    # The weighting makes 5-letter words the most likely
+    words = corpus.choices(TEST_WORDS, rng)
+    return PreparedTest(apply_modifiers(words, content, rng), seed, make_test_id(word_list_index, seed, content))
+
+
+class PreparedTestQueue:
+    """
+    Queues of tests generated ahead of time for each word list and mode, topped up when the Tk event loop is idle.
+
+    Attributes
+    ----------
+    root : tkinter.Tk
+        The root window, whose idle time is used to generate tests.
+    key_stats : KeyStats
+        The user's keystroke statistics, used for practice tests.
+    size : int
+        Number of tests kept ready in each queue.
+    queues : dict
+        Maps (word list index, practice mode, content) to a deque of prepared tests.
+    current : tuple
+        The word list index, practice mode and content of the last test taken, whose queue is topped up.
+    paused : bool
+        Whether topping up is paused, e.g. while a test is running.
+    hits : int
+        Number of tests taken from a queue.
+    misses : int
+        Number of tests generated when they were needed, because the queue was empty.
+    """
+    def __init__(self, root, key_stats: KeyStats, size=QUEUE_SIZE):
+        """
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The root window.
+        key_stats : KeyStats
+            The user's keystroke statistics.
+        size : int
+            Number of tests kept ready in each queue.
+        """
+        self.root = root
+        self.key_stats = key_stats
+        self.size = size
+        self.queues = {}
+        self.current = None
+        self.paused = False
+        self.hits = 0
+        self.misses = 0
+        self._refill_id = None
+
+    def get(self, word_list_index, practice_mode, content=""):
+        """
+        Takes a test from the queue of a word list, mode and content, or generates one if the queue is empty.
+
+        Parameters
+        ----------
+        word_list_index : int
+            Index of the word list in word_data.WORD_LISTS.
+        practice_mode : bool
+            Whether the test is a practice test.
+        content : str
+            Code of the test's content.
+
+        Returns
+        -------
+        test : PreparedTest
+            The test.
+        """
+        self.current = (word_list_index, practice_mode, content)
+        queue = self.queues.setdefault(self.current, collections.deque())
+        if queue:
+            self.hits += 1
+            return queue.popleft()
+        self.misses += 1
+        return generate_test(word_list_index, practice_mode, self.key_stats, content=content)
+
+    def fill(self, limit=None):
+        """
+        Generates tests for the current queue until it's full.
+
+        Parameters
+        ----------
+        limit : int
+            Maximum number of tests to generate. No limit if not given.
+
+        Returns
+        -------
+        full : bool
+            Whether the queue is full.
+        """
+        if self.current is None:
+            return True
+        word_list_index, practice_mode, content = self.current
+        queue = self.queues.setdefault(self.current, collections.deque())
+        while len(queue) < self.size and limit != 0:
+            queue.append(generate_test(word_list_index, practice_mode, self.key_stats, content=content))
+            limit = None if limit is None else limit - 1
+        return len(queue) >= self.size
+
+    def refill_when_idle(self):
+        """
+        Schedules topping up the current queue when the event loop is idle.
+        """
+        if self._refill_id is None and not self.paused:
+            self._refill_id = self.root.after_idle(self._refill_one)
+
+    def _refill_one(self):
+        """
+        Generates one test, and schedules the next until the queue is full.
+        """
+        self._refill_id = None
+        if not self.paused and not self.fill(limit=1):
+            self.refill_when_idle()
+
+    def pause(self):
+        """
+        Stops topping up the queues, e.g. while a test is running.
+        """
+        self.paused = True
+        if self._refill_id is not None:
+            self.root.after_cancel(self._refill_id)
+            self._refill_id = None
+
+    def resume(self):
+        """
+        Resumes topping up the queues.
+        """
+        self.paused = False
+        self.refill_when_idle()
+
+    def discard_practice_tests(self):
+        """
+        Discards the queued practice tests, e.g. when the keystroke statistics they were chosen from have changed.
+        """
+        for (word_list_index, practice_mode, content), queue in self.queues.items():
+            if practice_mode:
+                queue.clear()
@@ -0,0 +1,126 @@
+from tkinter import messagebox, simpledialog
+
+from currentdisplay import CurrentDisplay, CS_FILENAME
+from home_ui import HomeUI
+from key_stats import KeyStats, FILENAME as KEY_STATS_FILENAME
+from book_text import BOOK_POSITIONS_FILENAME
+from ghost_race import GHOSTS_FILENAME
+from optionslogic import OptionsLogic
+from profiles import ProfileManager
+from results_archive import compact_in_background
+from results_io import ResultsInOut, FILENAME as RESULTS_FILENAME
+
+
+class ProfileLogic:
+    """
+    Class that provides the functionality for the profile menu on the home screen.
+
+    Switching profile points the results, keystroke statistics, best runs, book positions and default colour scheme at
+    the new profile's files, and archives the new profile's old results. Nothing is loaded from the other profiles'
+    files.
+
+    Attributes
+    ----------
+    root : tkinter.Tk
+        The parent widget of the new profile dialog.
+    profiles : ProfileManager
+        Instance of the ProfileManager class.
+    current_display : CurrentDisplay
+        Instance of the CurrentDisplay class.
+    home_ui : HomeUI
+        Instance of the HomeUI class.
+    options : OptionsLogic
+        Instance of the OptionsLogic class.
+    results_io : ResultsInOut
+        Instance of the ResultsInOut class.
+    key_stats : KeyStats
+        Instance of the KeyStats class.
+    """
+    def __init__(self, root, profiles: ProfileManager, current_display: CurrentDisplay, home_ui: HomeUI,
+                 options: OptionsLogic, results_io: ResultsInOut, key_stats: KeyStats):
+        """
+        Fills the profile menu and configures its functionality.
+
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The parent widget of the new profile dialog.
+        profiles : ProfileManager
+            Instance of the ProfileManager class.
+        current_display : CurrentDisplay
+            Instance of the CurrentDisplay class.
+        home_ui : HomeUI
+            Instance of the HomeUI class.
+        options : OptionsLogic
+            Instance of the OptionsLogic class.
+        results_io : ResultsInOut
+            Instance of the ResultsInOut class.
+        key_stats : KeyStats
+            Instance of the KeyStats class.
+        """
+        self.root = root
+        self.profiles = profiles
+        self.current_display = current_display
+        self.home_ui = home_ui
+        self.options = options
+        self.results_io = results_io
+        self.key_stats = key_stats
+
+        self.config_profile_menu()
+
+    def config_profile_menu(self):
+        """
+        Fills the profile menu with the current list of profiles.
+        """
+        self.home_ui.config_profiles(self.profiles.names(), self.profiles.current, self.switch_profile,
+                                     self.new_profile)
+
+    def switch_profile(self, name):
+        """
+        Switches to the given profile.
+
+        Parameters
+        ----------
+        name : str
+            Name of the profile.
+        """
+        if name != self.profiles.current:
+            self.profiles.switch(name)
+            self.apply_profile()
+        self.config_profile_menu()
+
+    def apply_profile(self):
+        """
+        Points the app at the current profile's files and applies its default colour scheme.
+        """
+        self.results_io.set_filename(self.profiles.path(RESULTS_FILENAME), self.profiles.current)
+        compact_in_background(self.results_io.filename)  # With the new profile's retention period
+        self.key_stats.filename = self.profiles.path(KEY_STATS_FILENAME)
+        self.key_stats.load()
+        # Practice tests prepared from the previous profile's weak keys
+        self.options.typing_test.test_queue.discard_practice_tests()
+        self.current_display.load_default_cs(self.profiles.path(CS_FILENAME))
+        self.options.preview_cs_index = self.current_display.default_cs_index
+        typing_test = self.options.typing_test
+        typing_test.ghosts.filename = self.profiles.path(GHOSTS_FILENAME)
+        typing_test.ghosts.load()
+        if typing_test.race_client is not None:
+            typing_test.race_client.name = self.profiles.current
+        typing_test.switch_book_positions(self.profiles.path(BOOK_POSITIONS_FILENAME))
+        self.options.config_book_options()
+
+    def new_profile(self):
+        """
+        Asks for the name of a new profile, creates it and switches to it.
+        """
+        name = simpledialog.askstring("New profile", "Profile name:", parent=self.root)
+        if name is None:  # Cancelled
+            self.config_profile_menu()
+            return
+        try:
+            self.profiles.create(name)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("New profile", str(e), parent=self.root)
+            self.config_profile_menu()
+            return
+        self.switch_profile(name.strip())
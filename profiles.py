@@ -0,0 +1,129 @@
+import os
+import re
+
+# Profiles other than the default one keep their files in a directory of their own inside PROFILES_DIR.
+PROFILES_DIR = "profiles"
+DEFAULT_PROFILE = "Default"
+# Remembers which profile was in use when the app was last closed.
+CURRENT_PROFILE_FILE = "current_profile.txt"
+PROFILE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9 _-]{0,31}")
+
+
+class ProfileManager:
+    """
+    Keeps track of the user profiles and where each profile's files are stored.
+
+    Each profile has its own results file, aggregates, keystroke statistics and default colour scheme. The default
+    profile uses the files in the working directory, so results recorded before profiles existed belong to it.
+
+    Attributes
+    ----------
+    base_dir : str
+        Directory containing the default profile's files and the profiles directory.
+    current : str
+        Name of the profile in use.
+
+    Methods
+    -------
+    names()
+        Lists the names of all profiles.
+    path(filename, name)
+        Returns the path of one of a profile's files.
+    create(name)
+        Creates a new profile.
+    switch(name)
+        Changes the profile in use.
+    """
+    def __init__(self, base_dir="."):
+        """
+        Parameters
+        ----------
+        base_dir : str
+            Directory containing the default profile's files and the profiles directory.
+        """
+        self.base_dir = base_dir
+        try:
+            with open(os.path.join(base_dir, CURRENT_PROFILE_FILE), "r") as f:
+                current = f.read().strip()
+        except FileNotFoundError:
+            current = DEFAULT_PROFILE
+        self.current = current if current in self.names() else DEFAULT_PROFILE
+
+    def names(self):
+        """
+        Lists the names of all profiles, starting with the default profile.
+
+        Returns
+        -------
+        names : list
+            The profile names.
+        """
+        try:
+            entries = os.listdir(os.path.join(self.base_dir, PROFILES_DIR))
+        except FileNotFoundError:
+            entries = []
+        others = sorted(entry for entry in entries if os.path.isdir(os.path.join(self.base_dir, PROFILES_DIR, entry))
+                        and entry != DEFAULT_PROFILE)
+        return [DEFAULT_PROFILE] + others
+
+    def path(self, filename, name=None):
+        """
+        Returns the path of one of a profile's files.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file, e.g. "results.csv".
+        name : str
+            Name of the profile. Defaults to the profile in use.
+
+        Returns
+        -------
+        path : str
+            Path of the profile's file.
+        """
+        name = name or self.current
+        if name == DEFAULT_PROFILE:
+            return os.path.join(self.base_dir, filename)
+        return os.path.join(self.base_dir, PROFILES_DIR, name, filename)
+
+    def create(self, name):
+        """
+        Creates a new, empty profile.
+
+        Parameters
+        ----------
+        name : str
+            Name of the profile: up to 32 letters, digits, spaces, hyphens and underscores.
+
+        Raises
+        ------
+        ValueError
+            If the name isn't valid or is already taken.
+        """
+        name = name.strip()
+        if not PROFILE_NAME.fullmatch(name):
+            raise ValueError(f"Invalid profile name: {name!r}")
+        if name.lower() in (existing.lower() for existing in self.names()):
+            raise ValueError(f"Profile already exists: {name!r}")
+        os.makedirs(os.path.join(self.base_dir, PROFILES_DIR, name))
+
+    def switch(self, name):
+        """
+        Changes the profile in use and remembers it for the next time the app is opened.
+
+        Parameters
+        ----------
+        name : str
+            Name of the profile.
+
+        Raises
+        ------
+        ValueError
+            If there is no profile with that name.
+        """
+        if name not in self.names():
+            raise ValueError(f"Unknown profile: {name!r}")
+        self.current = name
+        with open(os.path.join(self.base_dir, CURRENT_PROFILE_FILE), "w") as f:
+            f.write(name)
@@ -0,0 +1,215 @@
+"""
+The app's connection to the race relay (see race_relay.py).
+
+The connection runs on an asyncio event loop in a background thread, so the Tk thread never waits for the network:
+messages from the Tk thread are handed to the loop, and progress received from the other racers is kept in a dict of
+each racer's latest update, which the Tk thread takes whenever it next redraws. The Tk side sends its own progress at
+most once every PROGRESS_INTERVAL (see TypingTestLogic.race_tick).
+"""
+import asyncio
+import json
+import threading
+import urllib.parse
+
+from race_relay import DEFAULT_PORT, encode
+
+# Seconds between progress updates sent to the relay, and between redraws of the other racers
+PROGRESS_INTERVAL = 0.1
+# Seconds to wait before reconnecting after the relay is lost
+RECONNECT_DELAY = 2
+
+
+def parse_address(address):
+    """
+    Finds the host and port of the relay from an address such as "192.168.1.10:8767".
+
+    Returns
+    -------
+    host : str
+        The relay's host.
+    port : int
+        The relay's port, DEFAULT_PORT if the address doesn't give one.
+    """
+    parsed = urllib.parse.urlsplit(address if "//" in address else f"//{address}")
+    return parsed.hostname or "localhost", parsed.port or DEFAULT_PORT
+
+
+class RaceClient:
+    """
+    A connection to the race relay, kept open in a background thread and reconnected if it's lost.
+
+    Attributes
+    ----------
+    host : str
+        The relay's host.
+    port : int
+        The relay's port.
+    name : str
+        Name shown to the other racers.
+    room : str
+        The room joined, or an empty string.
+    racer_id : int
+        The relay's id for this racer while connected, or None.
+    messages_sent : int
+        Number of messages written to the relay.
+    updates_received : int
+        Number of progress updates received from other racers.
+    """
+    def __init__(self, address, name):
+        """
+        Parameters
+        ----------
+        address : str
+            The relay's address, e.g. "192.168.1.10:8767".
+        name : str
+            Name shown to the other racers.
+        """
+        self.host, self.port = parse_address(address)
+        self.name = name
+        self.room = ""
+        self.racer_id = None
+        self.messages_sent = 0
+        self.updates_received = 0
+        self._progress = None  # Latest progress message, sent again after reconnecting
+        self._updates = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._writer = None
+        self._closing = None
+        self._thread = None
+
+    def start(self):
+        """
+        Starts connecting to the relay in a background thread.
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="race-client", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def close(self):
+        """
+        Closes the connection and stops the background thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._closing.set)
+            self._thread.join()
+
+    def join(self, room):
+        """
+        Leaves the current room and joins another, forgetting the other racers.
+
+        Parameters
+        ----------
+        room : str
+            The room, named by the test ID and duration. An empty string leaves without joining another.
+        """
+        with self._lock:
+            self.room = room
+            self._updates = {}
+        self._progress = None
+        self._send({"type": "join", "room": room, "name": self.name})
+
+    def send_progress(self, word, char, wpm, done=False):
+        """
+        Sends the cursor position and speed to the other racers in the room.
+
+        Parameters
+        ----------
+        word : int
+            Index in the test words of the word the cursor is on.
+        char : int
+            Position of the cursor in the word.
+        wpm : float
+            Typing speed so far.
+        done : bool
+            Whether the test has finished.
+        """
+        if not self.room:
+            return
+        self._progress = {"type": "progress", "word": word, "char": char, "wpm": round(wpm, 1), "done": done}
+        self._send(self._progress)
+
+    def take_updates(self):
+        """
+        Returns the progress received since the last call.
+
+        Returns
+        -------
+        updates : dict
+            Maps the ids of the other racers to their latest progress message, or to None if they have left.
+        """
+        with self._lock:
+            updates, self._updates = self._updates, {}
+        return updates
+
+    def _send(self, message):
+        """
+        Hands a message to the event loop to be written. Dropped if the relay isn't connected.
+        """
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._write, encode(message))
+        except RuntimeError:  # The loop has stopped
+            pass
+
+    def _write(self, data):
+        if self._writer is not None:
+            self._writer.write(data)
+            self.messages_sent += 1
+
+    def _run_loop(self, ready):
+        loop = asyncio.new_event_loop()
+        self._closing = asyncio.Event()
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_until_complete(self._run())
+        finally:
+            self._loop = None
+            loop.close()
+
+    async def _run(self):
+        """
+        Connects to the relay and reads from it, reconnecting whenever the connection is lost, until closed.
+        """
+        closing = asyncio.ensure_future(self._closing.wait())
+        while not self._closing.is_set():
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.wait([closing], timeout=RECONNECT_DELAY)
+                continue
+            self._writer = writer
+            if self.room:  # Rejoin after reconnecting
+                self._write(encode({"type": "join", "room": self.room, "name": self.name}))
+                if self._progress is not None:
+                    self._write(encode(self._progress))
+            reading = asyncio.ensure_future(self._read(reader))
+            await asyncio.wait([reading, closing], return_when=asyncio.FIRST_COMPLETED)
+            self._writer = None
+            self.racer_id = None
+            reading.cancel()
+            writer.close()
+            if not self._closing.is_set():
+                await asyncio.wait([closing], timeout=RECONNECT_DELAY)
+
+    async def _read(self, reader):
+        """
+        Reads messages from the relay until the connection is lost.
+        """
+        try:
+            while True:
+                message = json.loads(await reader.readuntil(b"\n"))
+                if message["type"] == "welcome":
+                    self.racer_id = message["id"]
+                    continue
+                with self._lock:
+                    if message["type"] == "progress" and message["room"] == self.room:
+                        self._updates[message["id"]] = message
+                        self.updates_received += 1
+                    elif message["type"] == "left":
+                        self._updates[message["id"]] = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, KeyError):
+            pass
@@ -0,0 +1,263 @@
+"""
+A small asyncio relay for races between app instances on a local network.
+
+Racers taking the same test join the same room and see each other's progress live. The relay speaks newline-delimited
+JSON over TCP, one message per line:
+
+- ``{"type": "join", "room": "en-1f2e3d4c@30", "name": "Alice"}`` leaves the racer's current room and joins another.
+  Rooms are named by the test ID and duration, so everyone in a room takes the same seeded test. An empty room leaves.
+- ``{"type": "progress", "word": 12, "char": 3, "wpm": 54.2, "done": false}`` reports the racer's cursor position
+  and speed. It is relayed to the rest of the room with the racer's id, name and room added. Any other fields, such
+  as the send time used by the load test, are relayed unchanged.
+
+The relay answers a new connection with ``{"type": "welcome", "id": 7}``, sends a racer joining a room the latest
+progress of everyone already in it, and tells the room ``{"type": "left", "id": 7}`` when a racer leaves.
+
+Messages for each racer are collected while the event loop handles the incoming messages, and written in one call
+once it is idle, so a busy room costs one write per racer per loop iteration rather than one per update. Updates for
+a racer whose connection isn't keeping up are dropped: each update replaces the last, so the next one catches up.
+
+Run it with ``python race_relay.py [--port 8767]`` and start the app with the TYPING_TEST_RACE_RELAY environment
+variable set to the relay's address, e.g. ``192.168.1.10:8767``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+
+DEFAULT_PORT = 8767
+# Longest message accepted, in bytes
+MAX_LINE = 4096
+# Bytes waiting to be sent to a racer before further updates for it are dropped
+MAX_BUFFER = 1 << 18
+
+
+def encode(message):
+    """
+    Encodes a message as one line of JSON.
+    """
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class Racer:
+    """
+    A connection to the relay.
+
+    Attributes
+    ----------
+    racer_id : int
+        Number identifying the racer while they are connected.
+    writer : asyncio.StreamWriter
+        The racer's connection.
+    name : str
+        Name shown to the other racers.
+    room : str
+        The room the racer is in, or an empty string.
+    progress : bytes
+        The racer's latest progress message as relayed, sent to racers joining the room. None before the first.
+    outbox : list
+        Messages waiting to be written to the racer.
+    """
+    def __init__(self, racer_id, writer):
+        self.racer_id = racer_id
+        self.writer = writer
+        self.name = f"Racer {racer_id}"
+        self.room = ""
+        self.progress = None
+        self.outbox = []
+
+
+class RaceRelay:
+    """
+    The relay: the rooms of racers, and the connection handler.
+
+    Attributes
+    ----------
+    rooms : dict
+        Maps each room's name to a dict of the racers in it by id.
+    connections : int
+        Number of racers connected.
+    messages_received : int
+        Number of messages received from racers.
+    messages_relayed : int
+        Number of messages written to racers.
+    messages_dropped : int
+        Number of messages dropped because the racer's connection wasn't keeping up.
+    errors : int
+        Number of malformed messages ignored.
+
+    Methods
+    -------
+    handle_connection(reader, writer)
+        Relays one racer's messages until they disconnect.
+    """
+    def __init__(self):
+        self.rooms = {}
+        self.connections = 0
+        self.messages_received = 0
+        self.messages_relayed = 0
+        self.messages_dropped = 0
+        self.errors = 0
+        self._ids = itertools.count(1)
+        self._pending = set()  # Racers with messages in their outbox
+        self._flush_scheduled = False
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Relays one racer's messages until they disconnect.
+        """
+        racer = Racer(next(self._ids), writer)
+        self.connections += 1
+        self._send(racer, encode({"type": "welcome", "id": racer.racer_id}))
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    self.errors += 1
+                    break
+                self.messages_received += 1
+                try:
+                    self.dispatch(racer, json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    self.errors += 1
+        except ConnectionError:
+            pass
+        finally:
+            self._leave(racer)
+            self._pending.discard(racer)
+            self.connections -= 1
+            writer.close()
+
+    def dispatch(self, racer: Racer, message):
+        """
+        Handles one message from a racer.
+
+        Parameters
+        ----------
+        racer : Racer
+            The racer who sent the message.
+        message : dict
+            The decoded message.
+        """
+        if message["type"] == "progress":
+            if not racer.room:
+                return
+            message.update(id=racer.racer_id, name=racer.name, room=racer.room)
+            racer.progress = encode(message)
+            self._broadcast(racer, racer.progress)
+        elif message["type"] == "join":
+            self._leave(racer)
+            racer.name = str(message.get("name") or racer.name)[:40]
+            racer.room = str(message["room"])[:100]
+            if not racer.room:
+                return
+            members = self.rooms.setdefault(racer.room, {})
+            for other in members.values():
+                if other.progress is not None:
+                    self._send(racer, other.progress)
+            members[racer.racer_id] = racer
+        else:
+            raise ValueError(f"Unknown message type: {message['type']}")
+
+    def _leave(self, racer: Racer):
+        """
+        Removes a racer from their room, telling the others.
+        """
+        if not racer.room:
+            return
+        members = self.rooms[racer.room]
+        del members[racer.racer_id]
+        if members:
+            self._broadcast(racer, encode({"type": "left", "id": racer.racer_id}))
+        else:
+            del self.rooms[racer.room]
+        racer.room = ""
+        racer.progress = None
+
+    def _broadcast(self, sender: Racer, data):
+        """
+        Queues a message for everyone in the sender's room except the sender.
+        """
+        for racer in self.rooms[sender.room].values():
+            if racer is not sender:
+                self._send(racer, data)
+
+    def _send(self, racer: Racer, data):
+        """
+        Queues a message for a racer, to be written once the event loop is idle.
+        """
+        racer.outbox.append(data)
+        self._pending.add(racer)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        """
+        Writes each racer's queued messages in one call.
+        """
+        self._flush_scheduled = False
+        for racer in self._pending:
+            if racer.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                self.messages_dropped += len(racer.outbox)
+            else:
+                racer.writer.write(b"".join(racer.outbox))
+                self.messages_relayed += len(racer.outbox)
+            racer.outbox.clear()
+        self._pending.clear()
+
+    def stats(self):
+        """
+        Reports the number of racers and rooms, and the message counts.
+
+        Returns
+        -------
+        stats : dict
+            The connections, rooms, and messages received, relayed and dropped.
+        """
+        return {"connections": self.connections, "rooms": len(self.rooms),
+                "messages_received": self.messages_received, "messages_relayed": self.messages_relayed,
+                "messages_dropped": self.messages_dropped, "errors": self.errors}
+
+
+async def start_server(relay: RaceRelay, host="localhost", port=DEFAULT_PORT):
+    """
+    Starts serving the race relay.
+
+    Parameters
+    ----------
+    relay : RaceRelay
+        The relay handling the connections.
+    host : str
+        Address to listen on. Use "0.0.0.0" to accept racers from the local network.
+    port : int
+        Port to listen on. 0 picks a free port.
+
+    Returns
+    -------
+    server : asyncio.Server
+        The running server.
+    """
+    return await asyncio.start_server(relay.handle_connection, host, port, limit=MAX_LINE, backlog=1024)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the race relay for races on a local network.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = await start_server(RaceRelay(), args.host, args.port)
+    print(f"Race relay listening on {args.host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,181 @@
+"""
+Retention and compaction of result histories.
+
+Each results file can have a retention period, stored next to it (results.retention.json for results.csv). Compacting
+the file moves results older than the retention period out of the csv file into gzip compressed archive segments, one
+per month, in the file's archive directory (results.archive for results.csv):
+
+- Results archived from the same month are merged into that month's segment, so repeated compactions don't leave
+  lots of small files.
+- The archive index records the row count, time range and aggregates (see results_io.ResultsAggregates) of every
+  segment, so the scoreboard and statistics keep counting archived results without decompressing them.
+- The csv file is rewritten with only the results within the retention period.
+
+Archived results stay readable: ResultsInOut.load_data(include_archive=True) and results_io.load_archive() decompress
+segments on demand. Summaries are kept forever, the retention period only limits the raw csv.
+
+Command line usage::
+
+    python results_archive.py [--profile NAME] [--days N]
+
+--days sets the profile's retention period (0 keeps everything in the csv file) before compacting.
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import threading
+
+import pandas as pd
+
+from profiles import ProfileManager
+from results_io import (ARCHIVE_INDEX, COLUMNS, FILENAME, ResultsAggregates, archive_dir, archive_index,
+                        complete_rows, file_lock, parse_results, rebuild_aggregates, replace_file)
+
+RETENTION_SUFFIX = ".retention.json"
+# Retention periods the options page cycles through, in days. None keeps every result in the csv file.
+RETENTION_CHOICES = [None, 365, 90, 30]
+
+
+def retention_path(filename):
+    """
+    Returns the path of the file storing a results file's retention period.
+    """
+    return os.path.splitext(filename)[0] + RETENTION_SUFFIX
+
+
+def load_retention(filename):
+    """
+    Reads a results file's retention period.
+
+    Returns
+    -------
+    days : int or None
+        Number of days results are kept in the csv file, or None to keep them all.
+    """
+    try:
+        with open(retention_path(filename), "r") as f:
+            return json.load(f).get("raw_days")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_retention(filename, days):
+    """
+    Sets a results file's retention period.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the results file.
+    days : int or None
+        Number of days results are kept in the csv file, or None to keep them all.
+    """
+    replace_file(retention_path(filename), lambda f: json.dump({"raw_days": days}, f))
+
+
+def _write_segment(path, df):
+    """
+    Writes an archive segment, replacing it atomically.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False)
+    os.replace(temp_path, path)
+
+
+def compact(filename, retention_days, now=None):
+    """
+    Moves results older than the retention period from a results file into its compressed archive.
+
+    The archive segments and index are written before the csv file is rewritten, and a month's segment is
+    deduplicated when results are merged into it, so compaction can be safely repeated after an interruption.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the results file.
+    retention_days : int or None
+        Number of days results are kept in the csv file. Nothing is archived if None.
+    now : datetime.datetime
+        The current time. Defaults to now.
+
+    Returns
+    -------
+    report : dict
+        Number of results archived and kept, and the segments written.
+    """
+    report = {"archived": 0, "kept": 0, "segments": []}
+    if retention_days is None:
+        return report
+    cutoff = pd.Timestamp(now or datetime.datetime.now()) - pd.Timedelta(days=retention_days)
+
+    with file_lock(filename):
+        try:
+            source, _ = complete_rows(filename)
+            df = parse_results(source)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            return report
+        old = df["timestamp"] < cutoff
+        report["kept"] = int((~old).sum())
+        if not old.any():
+            return report
+
+        directory = archive_dir(filename)
+        os.makedirs(directory, exist_ok=True)
+        index = archive_index(filename)
+        for month, rows in df[old].groupby(df.loc[old, "timestamp"].dt.strftime("%Y-%m")):
+            name = f"{month}.csv.gz"
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                rows = pd.concat([parse_results(path), rows], ignore_index=True).drop_duplicates()
+            rows = rows.sort_values("timestamp")[COLUMNS]
+            _write_segment(path, rows)
+
+            aggregates = ResultsAggregates()
+            aggregates.add_frame(rows)
+            index[name] = {"rows": len(rows), "first": str(rows["timestamp"].iloc[0]),
+                           "last": str(rows["timestamp"].iloc[-1]), "aggregates": aggregates.to_dict()}
+            report["segments"].append(name)
+        replace_file(os.path.join(directory, ARCHIVE_INDEX), lambda f: json.dump(index, f))
+
+        recent = df[~old]
+        replace_file(filename, lambda f: recent.to_csv(f, index=False))
+        rebuild_aggregates(filename)
+        report["archived"] = int(old.sum())
+    return report
+
+
+def compact_in_background(filename):
+    """
+    Compacts a results file with its retention period in a background thread, so the window isn't held up.
+
+    Returns
+    -------
+    thread : threading.Thread
+        The thread compacting the file.
+    """
+    thread = threading.Thread(target=compact, args=(filename, load_retention(filename)), name="results-compaction",
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive results older than a profile's retention period.")
+    parser.add_argument("--profile", help="Profile to compact (default: the current profile).")
+    parser.add_argument("--days", type=int, help="Set the retention period in days first (0 keeps everything).")
+    args = parser.parse_args(argv)
+
+    profiles = ProfileManager()
+    filename = profiles.path(FILENAME, args.profile)
+    if args.days is not None:
+        save_retention(filename, args.days or None)
+    report = compact(filename, load_retention(filename))
+    print(f"Archived {report['archived']} results into {len(report['segments'])} segments, "
+          f"kept {report['kept']} in {filename}")
+
+
+if __name__ == "__main__":
+    main()
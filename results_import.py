@@ -0,0 +1,270 @@
+"""
+Imports results exported by other typing test programs.
+
+Exports are read in chunks, so memory use stays flat however large they are. Each chunk is:
+
+- mapped onto this app's columns, using the first matching column name in COLUMN_ALIASES unless a mapping is given,
+- validated, dropping rows that are missing a value or outside VALID_RANGES,
+- deduplicated against the results already saved (including archived ones) and the rows imported before it,
+- appended to the results file in a single write with ResultsInOut.save_frame.
+
+Command line usage::
+
+    python results_import.py EXPORT [EXPORT ...] [--profile NAME] [--map wpm=speed ...] [--sep ;]
+
+Exports can be csv files, JSON Lines (.jsonl or .ndjson) files or JSON files holding a list of results, optionally
+compressed (e.g. .csv.gz). JSON lists are loaded whole; use csv or JSON Lines for very large exports.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from profiles import ProfileManager
+from results_io import CHUNK_SIZE, COLUMNS, FILENAME, ResultsInOut, complete_rows, load_archive
+
+# Column names used by other programs for each of the imported columns, in order of preference
+COLUMN_ALIASES = {
+    "wpm": ["wpm", "net_wpm", "netwpm", "speed"],
+    "accuracy": ["accuracy", "acc", "accuracy_percent"],
+    "timestamp": ["timestamp", "date", "datetime", "time", "created_at"],
+    "duration": ["duration", "testduration", "test_duration", "seconds", "time_limit"],
+}
+IMPORTED_COLUMNS = list(COLUMN_ALIASES)
+# Inclusive range of valid values; rows outside them are dropped
+VALID_RANGES = {"wpm": (0, 400), "accuracy": (0, 100), "duration": (1, 3600)}
+# Numeric timestamps above this are taken to be in milliseconds rather than seconds since the epoch
+MILLISECOND_TIMESTAMPS = 1e11
+
+
+def read_chunks(filename, chunk_size=CHUNK_SIZE, sep=","):
+    """
+    Reads an export in chunks.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the export: csv, JSON Lines or JSON, optionally compressed.
+    chunk_size : int
+        Rows per chunk.
+    sep : str
+        Delimiter of csv exports.
+
+    Yields
+    ------
+    chunk : pandas.DataFrame
+        The next rows of the export, with their original columns.
+    """
+    name = filename.lower()
+    for suffix in (".gz", ".bz2", ".xz", ".zip", ".zst"):
+        name = name.removesuffix(suffix)
+
+    if name.endswith((".jsonl", ".ndjson")):
+        yield from pd.read_json(filename, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+    elif name.endswith(".json"):
+        data = pd.read_json(filename, dtype=False, convert_dates=False)
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    else:
+        yield from pd.read_csv(filename, sep=sep, chunksize=chunk_size, on_bad_lines="skip")
+
+
+def find_columns(columns, mapping=None):
+    """
+    Finds the columns of an export that hold each imported column.
+
+    Parameters
+    ----------
+    columns : list
+        Column names of the export.
+    mapping : dict
+        Export column names to use for some of the imported columns, overriding COLUMN_ALIASES.
+
+    Returns
+    -------
+    found : dict
+        The export column name for each imported column.
+
+    Raises
+    ------
+    ValueError
+        If no column was found for an imported column.
+    """
+    lowered = {str(column).strip().lower(): column for column in columns}
+    found = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        if mapping and column in mapping:
+            if mapping[column] not in columns:
+                raise ValueError(f"Column {mapping[column]!r} not found")
+            found[column] = mapping[column]
+            continue
+        match = next((lowered[alias] for alias in aliases if alias in lowered), None)
+        if match is None:
+            raise ValueError(f"No {column} column found, use --map {column}=COLUMN")
+        found[column] = match
+    return found
+
+
+def parse_timestamps(values):
+    """
+    Parses timestamps given as dates or as seconds or milliseconds since the epoch. Unparseable timestamps give NaT.
+    """
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.notna().all():
+        unit = "ms" if numbers.median() > MILLISECOND_TIMESTAMPS else "s"
+        return pd.to_datetime(numbers, unit=unit, errors="coerce")
+    # The format is inferred from the first timestamp, which is much faster than parsing each one separately
+    timestamps = pd.to_datetime(values, errors="coerce", utc=True)
+    return timestamps.dt.tz_convert(None)
+
+
+def normalise(chunk, columns):
+    """
+    Maps a chunk of an export onto the results columns and drops invalid rows.
+
+    Parameters
+    ----------
+    chunk : pandas.DataFrame
+        Rows of the export.
+    columns : dict
+        The export column name for each imported column, from find_columns().
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The valid rows, with the columns in COLUMNS.
+    """
+    df = pd.DataFrame({column: pd.to_numeric(chunk[columns[column]], errors="coerce")
+                       for column in VALID_RANGES})
+    df["timestamp"] = parse_timestamps(chunk[columns["timestamp"]]).dt.floor("s")
+    valid = df["timestamp"].notna()
+    for column, (low, high) in VALID_RANGES.items():
+        valid &= df[column].between(low, high)
+    df = df[valid]
+    df["wpm"] = df["wpm"].round(1)
+    df["accuracy"] = df["accuracy"].round(1)
+    df["duration"] = df["duration"].round().astype(int)
+    df["test_id"] = ""  # Tests from other programs can't be loaded from an ID
+    return df[COLUMNS]
+
+
+def result_keys(df):
+    """
+    Hashes the results' timestamp, WPM and duration, which identify a result when deduplicating.
+
+    Returns
+    -------
+    keys : numpy.ndarray
+        A 64 bit hash of each result.
+    """
+    identity = pd.DataFrame({"timestamp": pd.to_datetime(df["timestamp"]).astype("int64") // 10 ** 9,
+                             "wpm": (df["wpm"].astype(float) * 10).round().astype("int64"),
+                             "duration": df["duration"].astype("int64")})
+    return pd.util.hash_pandas_object(identity, index=False).to_numpy()
+
+
+def saved_keys(filename):
+    """
+    Returns the sorted keys (see result_keys()) of the results already saved, reading the results file in chunks.
+    """
+    keys = [np.empty(0, dtype=np.uint64)]
+    try:
+        source, _ = complete_rows(filename)
+        for chunk in pd.read_csv(source, usecols=["wpm", "timestamp", "duration"], parse_dates=["timestamp"],
+                                 chunksize=CHUNK_SIZE, on_bad_lines="skip"):
+            keys.append(result_keys(chunk.dropna()))
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        pass
+    archived = load_archive(filename)
+    if not archived.empty:
+        keys.append(result_keys(archived.dropna(subset=["wpm", "timestamp", "duration"])))
+    return np.unique(np.concatenate(keys))
+
+
+def import_results(results_io: ResultsInOut, filenames, mapping=None, sep=",", chunk_size=CHUNK_SIZE):
+    """
+    Imports exports into a results file.
+
+    Parameters
+    ----------
+    results_io : ResultsInOut
+        Results file to import into.
+    filenames : list
+        Names of the exports.
+    mapping : dict
+        Export column names to use for some of the imported columns (see find_columns()).
+    sep : str
+        Delimiter of csv exports.
+    chunk_size : int
+        Rows read and written at a time.
+
+    Returns
+    -------
+    report : dict
+        Number of rows read, imported, dropped as invalid and dropped as duplicates.
+    """
+    report = {"read": 0, "imported": 0, "invalid": 0, "duplicates": 0}
+    seen = saved_keys(results_io.filename)
+    for filename in filenames:
+        columns = None
+        for chunk in read_chunks(filename, chunk_size, sep):
+            columns = columns or find_columns(list(chunk.columns), mapping)
+            df = normalise(chunk, columns)
+            report["read"] += len(chunk)
+            report["invalid"] += len(chunk) - len(df)
+
+            keys = result_keys(df)
+            _, first = np.unique(keys, return_index=True)
+            new = np.zeros(len(df), dtype=bool)
+            new[first] = True
+            new &= ~np.isin(keys, seen)
+            report["duplicates"] += len(df) - int(new.sum())
+
+            results_io.save_frame(df[new])
+            seen = np.union1d(seen, keys[new])
+            report["imported"] += int(new.sum())
+    return report
+
+
+def parse_mapping(pairs):
+    """
+    Parses --map arguments of the form column=EXPORT_COLUMN.
+    """
+    mapping = {}
+    for pair in pairs:
+        column, _, export_column = pair.partition("=")
+        if column not in COLUMN_ALIASES or not export_column:
+            raise argparse.ArgumentTypeError(f"Invalid mapping {pair!r}, expected one of "
+                                             f"{', '.join(IMPORTED_COLUMNS)} followed by =COLUMN")
+        mapping[column] = export_column
+    return mapping
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import results exported by other typing test programs.")
+    parser.add_argument("exports", nargs="+", help="csv, JSON Lines or JSON exports.")
+    parser.add_argument("--profile", help="Profile to import into (default: the current profile).")
+    parser.add_argument("--map", nargs="*", default=[], metavar="COLUMN=EXPORT_COLUMN",
+                        help=f"Export column holding one of {', '.join(IMPORTED_COLUMNS)}.")
+    parser.add_argument("--sep", default=",", help="Delimiter of csv exports.")
+    args = parser.parse_args(argv)
+
+    try:
+        mapping = parse_mapping(args.map)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    profiles = ProfileManager()
+    name = args.profile or profiles.current
+    results_io = ResultsInOut(profiles.path(FILENAME, name), profile=name)
+    try:
+        report = import_results(results_io, args.exports, mapping, args.sep)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Import failed: {e}\n")
+    finally:
+        results_io.close()
+    print(f"Imported {report['imported']} of {report['read']} results ({report['invalid']} invalid, "
+          f"{report['duplicates']} duplicates) into {results_io.filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+Columnar index of the full results history, used by the results browser (see historylogic.py) and the filtered
+analytics (see analytics_brain.py).
+
+The results are held as NumPy arrays, one per column, so they can be filtered and paged through without building
+DataFrames. Each sort order is computed once with a stable argsort and kept until the results change; a filtered view
+only selects from the precomputed order, so it comes out sorted without sorting again. Date ranges are found by binary
+search of the timestamps in time order, and the aggregates of recent filters are cached.
+
+The columns of each results file are cached in an ".index.npz" file alongside it, together with the number of bytes
+of the results file that have been read. Results are only appended to the file between rewrites, so updating the
+index only parses the rows written since it was cached. The cache is rebuilt if the results file was replaced (e.g.
+when results were archived, see results_archive.py) or its archive changed.
+"""
+import collections
+import datetime
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from results_io import CHUNK_SIZE, COLUMNS, ResultsAggregates, archive_index, complete_rows, load_archive
+
+# Columns the results can be sorted by
+SORT_KEYS = ("timestamp", "wpm", "accuracy", "duration")
+# Number of filtered views, and of aggregates of filtered results, kept so switching back to a recent filter or sort
+# order is instant
+VIEW_CACHE_SIZE = 8
+# Version of the cache file format; caches of other versions are rebuilt
+INDEX_VERSION = 1
+
+
+def index_path(filename):
+    """
+    Returns the path of the index cache kept alongside a results file.
+    """
+    return os.path.splitext(filename)[0] + ".index.npz"
+
+
+def empty_columns():
+    """
+    Returns the columns of an index with no results.
+    """
+    return {"wpm": np.empty(0), "accuracy": np.empty(0), "timestamp": np.empty(0, "datetime64[s]"),
+            "duration": np.empty(0, np.int32), "test_id": np.empty(0, "S1")}
+
+
+def to_columns(df: pd.DataFrame):
+    """
+    Converts results to index columns, leaving out rows with missing or malformed values.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Results with the columns in COLUMNS. The test_id column may be missing, for results saved before tests had IDs.
+
+    Returns
+    -------
+    columns : dict
+        Maps each column name to a NumPy array of its values.
+    """
+    timestamp = pd.to_datetime(df["timestamp"], errors="coerce", format="ISO8601")
+    wpm = pd.to_numeric(df["wpm"], errors="coerce")
+    accuracy = pd.to_numeric(df["accuracy"], errors="coerce")
+    duration = pd.to_numeric(df["duration"], errors="coerce")
+    valid = (timestamp.notna() & wpm.notna() & accuracy.notna() & duration.notna()).to_numpy()
+    test_id = df["test_id"].to_numpy(str) if "test_id" in df else np.full(len(df), "")
+    try:  # Test IDs are ASCII, so they're stored as bytes, which take a quarter of the memory
+        test_id = test_id.astype("S")
+    except UnicodeEncodeError:
+        test_id = np.char.encode(test_id, "utf-8")
+    return {"wpm": wpm.to_numpy(float)[valid],
+            "accuracy": accuracy.to_numpy(float)[valid],
+            "timestamp": timestamp.to_numpy()[valid].astype("datetime64[s]"),
+            "duration": duration.to_numpy()[valid].astype(np.int32),
+            "test_id": test_id[valid]}
+
+
+def concat_columns(parts):
+    """
+    Joins index columns end to end.
+
+    Parameters
+    ----------
+    parts : list
+        Index columns, as returned by to_columns().
+    """
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def read_columns(source, header=True):
+    """
+    Reads results in csv format into index columns, a chunk at a time.
+
+    Parameters
+    ----------
+    source : str or file object
+        Path or buffer holding the results.
+    header : bool
+        Whether the results start with a header row. Without one, the columns are assumed to be those in COLUMNS.
+    """
+    options = {} if header else {"header": None, "names": COLUMNS}
+    try:
+        reader = pd.read_csv(source, dtype={"test_id": str}, keep_default_na=False,
+                             na_values={"wpm": [""], "accuracy": [""], "duration": [""]}, on_bad_lines="skip",
+                             chunksize=CHUNK_SIZE, **options)
+        return concat_columns([to_columns(chunk) for chunk in reader])
+    except pd.errors.EmptyDataError:
+        return empty_columns()
+
+
+class FileColumns:
+    """
+    The index columns of one results file and its archive, kept up to date with the file and cached on disk.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the results file.
+    columns : dict
+        Maps each column name to a NumPy array of its values. Archived results come first.
+    offset : int
+        Number of bytes of the results file read into the columns.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.columns = empty_columns()
+        self.offset = 0
+        self._inode = None
+        self._archive = None
+        self._loaded = False
+
+    def update(self):
+        """
+        Brings the columns up to date with the results file, reading only what was appended since they were last
+        updated, and saves them to the cache file if they changed.
+
+        Returns
+        -------
+        changed : bool
+            Whether the columns changed.
+        """
+        changed = False
+        if not self._loaded:
+            self._load_cache()
+            self._loaded = changed = True
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            stat = None
+        archive = json.dumps(sorted((name, segment["rows"]) for name, segment in archive_index(self.filename).items()))
+
+        if stat is None:
+            if self.offset or self._archive != archive:
+                self._rebuild(None, archive)
+                changed = True
+        elif stat.st_ino != self._inode or stat.st_size < self.offset or archive != self._archive:
+            self._rebuild(stat, archive)
+            changed = True
+        elif stat.st_size > self.offset:
+            changed = self._read_appended() or changed
+        else:
+            return changed
+        self._save_cache()
+        return changed
+
+    def _rebuild(self, stat, archive):
+        """
+        Reads the whole results file and its archive into the columns.
+        """
+        parts = []
+        if archive != "[]":
+            parts.append(to_columns(load_archive(self.filename)))
+        self.offset = 0
+        if stat is not None:
+            source, torn = complete_rows(self.filename)
+            parts.append(read_columns(source))
+            self.offset = source.getbuffer().nbytes if torn else stat.st_size
+        self.columns = concat_columns(parts)
+        self._inode = stat.st_ino if stat is not None else None
+        self._archive = archive
+
+    def _read_appended(self):
+        """
+        Reads the complete rows appended to the results file since it was last read.
+
+        Returns
+        -------
+        changed : bool
+            Whether any rows were read.
+        """
+        with open(self.filename, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        if not data:
+            return False
+        # Rows were appended after the header, unless the file was empty when it was last read
+        appended = read_columns(io.BytesIO(data), header=self.offset == 0)
+        self.columns = concat_columns([self.columns, appended])
+        self.offset += len(data)
+        return len(appended["wpm"]) > 0
+
+    def _load_cache(self):
+        """
+        Loads the columns from the cache file, if there is a usable one.
+        """
+        try:
+            with np.load(index_path(self.filename), allow_pickle=False) as cache:
+                meta = json.loads(str(cache["meta"]))
+                if meta["version"] != INDEX_VERSION:
+                    return
+                self.columns = {name: cache[name] for name in empty_columns()}
+        except (OSError, ValueError, KeyError):
+            return
+        self.offset, self._inode, self._archive = meta["offset"], meta["inode"], meta["archive"]
+
+    def _save_cache(self):
+        """
+        Saves the columns to the cache file. The cache is only an optimisation, so failing to save it is ignored.
+        """
+        meta = {"version": INDEX_VERSION, "offset": self.offset, "inode": self._inode, "archive": self._archive}
+        path = index_path(self.filename)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), **self.columns)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+
+class ResultsIndex:
+    """
+    Sortable and filterable index of the results of one or more results files.
+
+    Attributes
+    ----------
+    filenames : list
+        Names of the results files indexed.
+    columns : dict
+        Maps each column name to a NumPy array of its values for every result.
+    """
+    def __init__(self, filenames):
+        """
+        Parameters
+        ----------
+        filenames : list
+            Names of the results files to index, e.g. those of every profile.
+        """
+        self.filenames = list(filenames)
+        self.columns = empty_columns()
+        self._files = [FileColumns(filename) for filename in self.filenames]
+        self._orders = {}
+        self._sorted_timestamps = None
+        self._views = collections.OrderedDict()
+        self._aggregates = collections.OrderedDict()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.columns["wpm"])
+
+    def refresh(self):
+        """
+        Brings the index up to date with the results files. Sort orders, views and aggregates are recomputed if they
+        changed.
+
+        Returns
+        -------
+        changed : bool
+            Whether any results changed.
+        """
+        changed = False
+        for file_columns in self._files:
+            changed = file_columns.update() or changed
+        if changed:
+            self.columns = concat_columns([file_columns.columns for file_columns in self._files])
+            self._orders.clear()
+            self._sorted_timestamps = None
+            self._views.clear()
+            self._aggregates.clear()
+        return changed
+
+    def sort_order(self, key):
+        """
+        Returns the positions of the results in ascending order of a column, computing it the first time it's needed.
+        Results with equal values stay in the order they were saved.
+
+        Parameters
+        ----------
+        key : str
+            The column to sort by, one of SORT_KEYS.
+        """
+        if key not in SORT_KEYS:
+            raise ValueError(f"Results can't be sorted by {key!r}")
+        if key not in self._orders:
+            self._orders[key] = np.argsort(self.columns[key], kind="stable")
+        return self._orders[key]
+
+    def time_range(self, start=None, end=None):
+        """
+        Returns the positions of the results in a date range, in time order.
+
+        The range is found by binary search of the timestamps in time order, which are kept with the timestamp sort
+        order, so it takes the same time however many results are outside the range.
+
+        Parameters
+        ----------
+        start : datetime.date or datetime.datetime
+            Start of the range, or None for the first result.
+        end : datetime.date or datetime.datetime
+            End of the range (not included), or None for the last result.
+
+        Returns
+        -------
+        positions : numpy.ndarray
+            Positions of the results in the range in the index's columns, as a slice of the timestamp sort order.
+        """
+        order = self.sort_order("timestamp")
+        if self._sorted_timestamps is None:
+            self._sorted_timestamps = self.columns["timestamp"][order]
+        timestamps = self._sorted_timestamps
+        first = 0 if start is None else np.searchsorted(timestamps, np.datetime64(start, "s"), side="left")
+        last = len(order) if end is None else np.searchsorted(timestamps, np.datetime64(end, "s"), side="left")
+        return order[first:last]
+
+    def query(self, sort_by="timestamp", descending=True, duration=None, start=None, end=None, min_wpm=None,
+              max_wpm=None):
+        """
+        Returns the positions of the results matching the filters, in the given order.
+
+        Parameters
+        ----------
+        sort_by : str
+            The column to sort by, one of SORT_KEYS.
+        descending : bool
+            Whether to sort in descending order.
+        duration : int
+            Only include tests of this duration, in seconds.
+        start : datetime.date or datetime.datetime
+            Only include results from this time onwards.
+        end : datetime.date or datetime.datetime
+            Only include results from before this time.
+        min_wpm : float
+            Only include results of at least this WPM.
+        max_wpm : float
+            Only include results of at most this WPM.
+
+        Returns
+        -------
+        view : numpy.ndarray
+            Positions of the matching results in the index's columns.
+        """
+        key = (sort_by, descending, duration, start, end, min_wpm, max_wpm)
+        if key in self._views:
+            self._views.move_to_end(key)
+            return self._views[key]
+
+        if sort_by == "timestamp":
+            # The date range is found by binary search, so only the results within it are filtered further
+            view = self.time_range(start, end)
+            start = end = None
+        else:
+            view = self.sort_order(sort_by)
+        conditions = []
+        if duration is not None:
+            conditions.append(self.columns["duration"][view] == duration)
+        if start is not None:
+            conditions.append(self.columns["timestamp"][view] >= np.datetime64(start, "s"))
+        if end is not None:
+            conditions.append(self.columns["timestamp"][view] < np.datetime64(end, "s"))
+        if min_wpm is not None:
+            conditions.append(self.columns["wpm"][view] >= min_wpm)
+        if max_wpm is not None:
+            conditions.append(self.columns["wpm"][view] <= max_wpm)
+
+        if conditions:
+            view = view[np.logical_and.reduce(conditions)]
+        if descending:
+            view = view[::-1]
+
+        self._views[key] = view
+        if len(self._views) > VIEW_CACHE_SIZE:
+            self._views.popitem(last=False)
+        return view
+
+    def aggregates(self, start=None, end=None, duration=None):
+        """
+        Returns the aggregates of the results in a date range, optionally of one test duration. The aggregates of
+        recent filters are cached until the results change.
+
+        Parameters
+        ----------
+        start : datetime.date or datetime.datetime
+            Only include results from this time onwards.
+        end : datetime.date or datetime.datetime
+            Only include results from before this time.
+        duration : int
+            Only include tests of this duration, in seconds.
+
+        Returns
+        -------
+        aggregates : ResultsAggregates
+            Aggregates of the matching results.
+        """
+        key = (start, end, duration)
+        if key in self._aggregates:
+            self._aggregates.move_to_end(key)
+            return self._aggregates[key]
+
+        positions = self.query("timestamp", descending=False, duration=duration, start=start, end=end)
+        aggregates = ResultsAggregates()
+        aggregates.add_arrays(self.columns["wpm"][positions], self.columns["accuracy"][positions],
+                              self.columns["duration"][positions].astype(float))
+
+        self._aggregates[key] = aggregates
+        if len(self._aggregates) > VIEW_CACHE_SIZE:
+            self._aggregates.popitem(last=False)
+        return aggregates
+
+    def frame(self, positions) -> pd.DataFrame:
+        """
+        Returns results as a dataframe with the wpm, accuracy, timestamp and duration columns, e.g. for plotting.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            Positions of the results in the index's columns.
+        """
+        return pd.DataFrame({name: self.columns[name][positions]
+                             for name in ["wpm", "accuracy", "timestamp", "duration"]})
+
+    def rows(self, positions):
+        """
+        Formats results for display.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            Positions of the results in the index's columns, e.g. a page of a view returned by query().
+
+        Returns
+        -------
+        rows : list
+            Tuples of the date and time, WPM, accuracy, duration and test ID of each result.
+        """
+        timestamps = np.datetime_as_string(self.columns["timestamp"][positions], unit="m")
+        return [(timestamp.replace("T", " "), f"{wpm:.1f}", f"{accuracy:.0f}%", f"{duration}s", test_id.decode())
+                for timestamp, wpm, accuracy, duration, test_id in zip(
+                    timestamps.tolist(), self.columns["wpm"][positions].tolist(),
+                    self.columns["accuracy"][positions].tolist(), self.columns["duration"][positions].tolist(),
+                    self.columns["test_id"][positions].tolist())]
+
+
+
+def parse_date(text, end=False):
+    """
+    Parses a date entered in a filter.
+
+    Parameters
+    ----------
+    text : str
+        The date entered, as YYYY-MM-DD. Blank for no date.
+    end : bool
+        Whether the date ends a range, in which case the start of the following day is returned, so the range includes
+        the whole of the day.
+
+    Returns
+    -------
+    date : datetime.date
+        The date, or None if blank.
+
+    Raises
+    ------
+    ValueError
+        If the date isn't valid.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        date = datetime.date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Dates must be written as YYYY-MM-DD, not {text!r}") from None
+    return date + datetime.timedelta(days=1) if end else date
@@ -1,47 +1,597 @@
+import atexit
+import contextlib
+import csv
+import functools
+import http.client
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
 import pandas as pd
 
+from leaderboard_client import ConnectionPool, machine_id, result_id
+from metrics import MetricSet, timed
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
 
 FILENAME = "results.csv"
+COLUMNS = ["wpm", "accuracy", "timestamp", "duration", "test_id"]
+# Maximum number of results waiting to be written before save_data blocks
+WRITE_QUEUE_SIZE = 256
+# Rows read at a time when the aggregates have to be rebuilt from the results file
+CHUNK_SIZE = 100_000
+# Index of the compressed archive segments kept in a results file's archive directory (see results_archive.py)
+ARCHIVE_INDEX = "index.json"
+# Maximum number of written results waiting to be uploaded to the leaderboard; further results aren't uploaded
+UPLOAD_QUEUE_SIZE = 1024
+# Maximum number of results sent in one upload
+UPLOAD_BATCH = 100
+# Failed uploads are retried this many times, waiting UPLOAD_BACKOFF seconds and doubling the wait each time
+UPLOAD_RETRIES = 5
+UPLOAD_BACKOFF = 0.5
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Holds an exclusive advisory lock on a file, so several instances of the app can safely write to it.
+
+    The lock is taken on a separate ".lock" file, which lets the file itself be replaced while locked.
+
+    Parameters
+    ----------
+    path : str
+        The file to lock.
+    """
+    with open(path + ".lock", "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after 10 seconds
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def replace_file(path, write):
+    """
+    Replaces a file atomically: the new contents are written to a temporary file, which is then renamed over it.
+
+    Readers see either the old or the new file, never a partly written one.
+
+    Parameters
+    ----------
+    path : str
+        The file to replace.
+    write : callable
+        Called with the open temporary file to write the new contents.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", newline="") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def complete_rows(filename):
+    """
+    Returns what should be parsed from a results file: its path, or only its complete lines if the last write to it
+    was cut short.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the results file.
+
+    Returns
+    -------
+    source : str or io.BytesIO
+        The path of the file, or a buffer holding its complete lines.
+    torn : bool
+        Whether an incomplete last line was left out.
+    """
+    with open(filename, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return filename, False
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return filename, False
+        f.seek(0)
+        data = f.read()
+    return io.BytesIO(data[:data.rfind(b"\n") + 1]), True
+
+
+def parse_results(source) -> pd.DataFrame:
+    """
+    Parses results in csv format, skipping malformed rows.
+
+    Parameters
+    ----------
+    source : str or file object
+        Path or buffer holding the results, optionally gzip compressed if a path ending in .gz.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The results, with the columns in COLUMNS.
+    """
+    df = pd.read_csv(source, parse_dates=["timestamp"], dtype={"test_id": str},
+                     keep_default_na=False, na_values={"wpm": [""], "accuracy": [""], "duration": [""]},
+                     on_bad_lines="skip")
+    if "test_id" not in df:  # Results saved before tests had IDs
+        df["test_id"] = ""
+    return df
+
+
+def archive_dir(filename):
+    """
+    Returns the directory holding a results file's archived results.
+    """
+    return os.path.splitext(filename)[0] + ".archive"
+
+
+def archive_index(filename):
+    """
+    Reads the index of a results file's archive.
+
+    Returns
+    -------
+    index : dict
+        Maps the file name of each archive segment to its number of rows, first and last timestamps and aggregates.
+        Empty if nothing has been archived.
+    """
+    try:
+        with open(os.path.join(archive_dir(filename), ARCHIVE_INDEX), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+@functools.lru_cache(maxsize=8)
+def _read_segment(path, mtime_ns):
+    """
+    Decompresses and parses an archive segment. Cached by modification time, so a rewritten segment is read again.
+    """
+    return parse_results(path)
+
+
+def load_archive(filename, since=None) -> pd.DataFrame:
+    """
+    Loads archived results, decompressing only the segments that are needed.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the results file whose archive is loaded.
+    since : datetime.datetime
+        Only segments containing results from this time onwards are read. All segments are read if not given.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The archived results in time order, or an empty dataframe.
+    """
+    frames = []
+    for name, segment in sorted(archive_index(filename).items(), key=lambda item: item[1]["first"]):
+        if since is not None and pd.Timestamp(segment["last"]) < pd.Timestamp(since):
+            continue
+        path = os.path.join(archive_dir(filename), name)
+        try:
+            frames.append(_read_segment(path, os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            continue
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregates_path(filename):
+    """
+    Returns the path of the aggregates file kept alongside a results file.
+    """
+    return os.path.splitext(filename)[0] + ".aggregates.json"
+
+
+class ResultsAggregates:
+    """
+    Summary statistics of a results file, kept up to date as results are written so that the scoreboard and the
+    analytics statistics don't need to load every result.
+
+    Aggregates of several results files can be merged, e.g. to combine the results of every profile.
+
+    Attributes
+    ----------
+    rows : int
+        Number of results.
+    sum_wpm : float
+        Sum of the WPM results.
+    sum_accuracy : float
+        Sum of the accuracy results.
+    max_wpm : float
+        Highest WPM result.
+    sum_duration : float
+        Total duration of the tests in seconds.
+    sum_chars : float
+        Total number of characters typed.
+    top_scores : dict
+        Maps each test duration to its highest WPM results, in descending order.
+    histogram : dict
+        Maps each WPM bin (the WPM divided by BIN_WIDTH, rounded down) to its number of results.
+    file_size : int
+        Size of the results file these aggregates were computed from.
+    """
+    TOP_N = 10
+    BIN_WIDTH = 5
+
+    def __init__(self):
+        self.rows = 0
+        self.sum_wpm = 0.0
+        self.sum_accuracy = 0.0
+        self.max_wpm = 0.0
+        self.sum_duration = 0.0
+        self.sum_chars = 0.0
+        self.top_scores = {}
+        self.histogram = {}
+        self.file_size = 0
+
+    def add_frame(self, df: pd.DataFrame):
+        """
+        Adds results to the aggregates.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Results with at least the wpm, accuracy and duration columns.
+        """
+        df = df.dropna(subset=["wpm", "accuracy", "duration"])
+        if df.empty:
+            return
+        self.add_arrays(df["wpm"].to_numpy(float), df["accuracy"].to_numpy(float), df["duration"].to_numpy(float))
+
+    def add_arrays(self, wpm, accuracy, duration):
+        """
+        Adds results, given as arrays of each column without missing values, to the aggregates.
+
+        Parameters
+        ----------
+        wpm, accuracy, duration : numpy.ndarray
+            The WPM, accuracy and duration of each result.
+        """
+        if len(wpm) == 0:
+            return
+        self.rows += len(wpm)
+        self.sum_wpm += float(wpm.sum())
+        self.sum_accuracy += float(accuracy.sum())
+        self.max_wpm = max(self.max_wpm, float(wpm.max()))
+        self.sum_duration += float(duration.sum())
+        self.sum_chars += float((wpm * 5 * duration / 60).sum())
+
+        durations = duration.astype(int)
+        for test_duration in np.unique(durations).tolist():
+            group = wpm[durations == test_duration]
+            if len(group) > self.TOP_N:
+                group = np.partition(group, -self.TOP_N)[-self.TOP_N:]
+            top = self.top_scores.get(test_duration, []) + group.tolist()
+            self.top_scores[test_duration] = sorted(top, reverse=True)[:self.TOP_N]
+        wpm_bins, counts = np.unique((wpm // self.BIN_WIDTH).astype(int), return_counts=True)
+        for wpm_bin, count in zip(wpm_bins.tolist(), counts.tolist()):
+            self.histogram[wpm_bin] = self.histogram.get(wpm_bin, 0) + count
+
+    def add_rows(self, rows):
+        """
+        Adds results, given as lists of values in the order of COLUMNS, to the aggregates.
+        """
+        self.add_frame(pd.DataFrame(rows, columns=COLUMNS))
+
+    def merge(self, other):
+        """
+        Adds the results summarised by another instance to these aggregates.
+
+        Parameters
+        ----------
+        other : ResultsAggregates
+            The aggregates to merge in.
+        """
+        self.rows += other.rows
+        self.sum_wpm += other.sum_wpm
+        self.sum_accuracy += other.sum_accuracy
+        self.max_wpm = max(self.max_wpm, other.max_wpm)
+        self.sum_duration += other.sum_duration
+        self.sum_chars += other.sum_chars
+        for test_duration, scores in other.top_scores.items():
+            top = self.top_scores.get(test_duration, []) + scores
+            self.top_scores[test_duration] = sorted(top, reverse=True)[:self.TOP_N]
+        for wpm_bin, count in other.histogram.items():
+            self.histogram[wpm_bin] = self.histogram.get(wpm_bin, 0) + count
+
+    def to_dict(self):
+        """
+        Returns the aggregates as a JSON-serialisable dictionary.
+        """
+        data = dict(vars(self))
+        data["top_scores"] = {str(duration): scores for duration, scores in self.top_scores.items()}
+        data["histogram"] = {str(wpm_bin): count for wpm_bin, count in self.histogram.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates aggregates from a dictionary made by to_dict().
+        """
+        aggregates = cls()
+        vars(aggregates).update(data)
+        aggregates.top_scores = {int(duration): scores for duration, scores in data["top_scores"].items()}
+        aggregates.histogram = {int(wpm_bin): count for wpm_bin, count in data["histogram"].items()}
+        return aggregates
+
+
+def _read_aggregates(filename):
+    """
+    Reads the aggregates of a results file, if they are up to date.
+
+    Returns
+    -------
+    aggregates : ResultsAggregates or None
+        The aggregates, or None if they are missing or were computed from a different version of the results file.
+    """
+    try:
+        file_size = os.path.getsize(filename)
+    except FileNotFoundError:
+        file_size = 0
+    try:
+        with open(aggregates_path(filename), "r") as f:
+            aggregates = ResultsAggregates.from_dict(json.load(f))
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        return None
+    return aggregates if aggregates.file_size == file_size else None
+
+
+def _save_aggregates(filename, aggregates: ResultsAggregates):
+    """
+    Saves the aggregates of a results file. Must be called while holding the results file lock.
+    """
+    try:
+        aggregates.file_size = os.path.getsize(filename)
+    except FileNotFoundError:
+        aggregates.file_size = 0
+    replace_file(aggregates_path(filename), lambda f: json.dump(aggregates.to_dict(), f))
+
+
+def rebuild_aggregates(filename):
+    """
+    Computes the aggregates of a results file, reading it in chunks, and saves them.
+    Must be called while holding the results file lock.
+    """
+    aggregates = ResultsAggregates()
+    for segment in archive_index(filename).values():  # Archived results are summarised by the archive index
+        aggregates.merge(ResultsAggregates.from_dict(segment["aggregates"]))
+    try:
+        source, _ = complete_rows(filename)
+        for chunk in pd.read_csv(source, usecols=["wpm", "accuracy", "duration"], chunksize=CHUNK_SIZE,
+                                 on_bad_lines="skip"):
+            aggregates.add_frame(chunk)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        pass
+    _save_aggregates(filename, aggregates)
+    return aggregates
+
+
+def load_aggregates(filename):
+    """
+    Loads the aggregates of a results file, rebuilding them if they are missing or out of date.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the results file.
+
+    Returns
+    -------
+    aggregates : ResultsAggregates
+        The results file's aggregates.
+    """
+    aggregates = _read_aggregates(filename)
+    if aggregates is None:
+        with file_lock(filename):
+            aggregates = _read_aggregates(filename) or rebuild_aggregates(filename)
+    return aggregates
 
 
 class ResultsInOut:
     """
     Class that handles loading data and saving results to the file.
 
+    Results are saved by a background writer thread, so saving doesn't hold up the UI. Results that pile up while a
+    write is in progress are written together in one batch.
+
+    Several instances of the app can share the results file. Writes are appended under an advisory file lock, and whole
+    file rewrites are written to a temporary file which replaces the original. If a write was cut short (e.g. by a
+    crash), the incomplete last line is ignored when loading and removed before the next write.
+
+    The writer also keeps the results file's aggregates (see ResultsAggregates) up to date.
+
+    If a leaderboard URL is given, results are also uploaded to a leaderboard server (see leaderboard_server.py) once
+    they have been written to the file. A second background thread sends them in batches over a pooled keep-alive
+    connection, retrying failed uploads with exponential backoff. Uploading never holds up saving; results that can't
+    be uploaded stay in the results file, from which they can still be exported.
+
     Attributes
     ----------
     filename : str
         Name of the results file.
     empty_results : bool
         Describes whether the dataframe is empty.
+    rows_written : int
+        Number of results written by the writer thread.
+    batches_written : int
+        Number of writes made by the writer thread.
+    last_write_latency : float
+        Time in seconds taken by the most recent write.
+    max_write_latency : float
+        Longest time in seconds taken by a write.
+    write_errors : int
+        Number of writes that failed. Failed results are retried with the next batch.
+    torn_rows : int
+        Number of incomplete rows found at the end of the file when loading or writing.
+    profile : str
+        Name of the profile the results file belongs to, sent with uploaded results.
+    upload_url : str
+        URL of the leaderboard server, or None if results aren't uploaded.
+    rows_uploaded : int
+        Number of results uploaded to the leaderboard server.
+    upload_errors : int
+        Number of failed upload attempts.
+    uploads_dropped : int
+        Number of results given up on after failed uploads, or because the upload queue was full.
+    metrics : MetricSet
+        Write latency, results written and write errors, recorded by the writer thread, and the time taken to load
+        the results, recorded by the thread loading them (see metrics.py).
     """
-    def __init__(self):
-        self.filename = FILENAME
+    def __init__(self, filename=FILENAME, upload_url=None, profile="Default"):
+        """
+        Parameters
+        ----------
+        filename : str
+            Name of the results file.
+        upload_url : str
+            URL of the leaderboard server to upload results to, e.g. http://localhost:8766. None disables uploads.
+        profile : str
+            Name of the profile the results file belongs to.
+        """
+        self.filename = filename
+        self.profile = profile
+        self.upload_url = upload_url
         self.empty_results = False
 
-    def load_data(self) -> pd.DataFrame:
+        self.rows_written = 0
+        self.batches_written = 0
+        self.last_write_latency = 0.0
+        self.max_write_latency = 0.0
+        self.write_errors = 0
+        self.torn_rows = 0
+        self.rows_uploaded = 0
+        self.upload_errors = 0
+        self.uploads_dropped = 0
+        self.metrics = MetricSet()
+        self._write_seconds = self.metrics.histogram("typing_test_results_write_seconds",
+                                                     "Time taken to append a batch of results to the results file.")
+        self._results_written = self.metrics.counter("typing_test_results_written", "Results written to the file.")
+        self._write_errors = self.metrics.counter("typing_test_results_write_errors", "Failed writes of results.")
+        self.metrics.histogram("typing_test_results_load_seconds", "Time taken to load the results.", label="method")
+
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._unwritten = []  # Results from a failed write
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._checked_file = None  # Results file whose columns have been checked by the writer
+        self._upload_queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        self._uploader = None
+        self._closing = threading.Event()  # Stops upload retries when the application exits
+        self._pool = ConnectionPool(upload_url) if upload_url else None
+        self._machine = machine_id() if upload_url else None
+        atexit.register(self.close)
+
+    @timed("typing_test_results_load_seconds")
+    def load_data(self, include_archive=False) -> pd.DataFrame:
         """
         Loads the data from the csv file as a pandas dataframe
 
+        Results waiting to be written are written first, so they are included.
+
+        Parameters
+        ----------
+        include_archive : bool
+            Whether to include results that have been moved to the compressed archive (see results_archive.py). The
+            archive is only decompressed when this is set.
+
         Returns
         -------
         df : pandas.Dataframe
             Dataframe containing test results.
         """
+        self.flush()
         try:
-            df = pd.read_csv(self.filename, parse_dates=["timestamp"])
+            df = parse_results(self._complete_rows())
+            if include_archive and archive_index(self.filename):
+                df = pd.concat([load_archive(self.filename), df], ignore_index=True)
             if df.empty:
                 self.empty_results = True
             else:
                 self.empty_results = False
-        except FileNotFoundError:
-            df = pd.DataFrame(columns=["wpm", "accuracy", "timestamp", "duration"])
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            df = pd.DataFrame(columns=COLUMNS)
             self.empty_results = True
         return df
 
-    def save_data(self, wpm, accuracy, timestamp, duration):
+    @timed("typing_test_results_load_seconds")
+    def load_aggregates(self, filenames=None):
+        """
+        Loads the aggregates of the results file, including any results waiting to be written.
+
+        Parameters
+        ----------
+        filenames : list
+            Results files to combine the aggregates of instead, e.g. those of every profile. Each file's aggregates are
+            loaded separately and merged, so none of the files' results are loaded.
+
+        Returns
+        -------
+        aggregates : ResultsAggregates
+            The aggregates of the results file, or the merged aggregates of the given files.
+        """
+        self.flush()
+        if filenames is None:
+            aggregates = load_aggregates(self.filename)
+            self.empty_results = aggregates.rows == 0
+            return aggregates
+
+        aggregates = ResultsAggregates()
+        for filename in filenames:
+            aggregates.merge(load_aggregates(filename))
+        return aggregates
+
+    def set_filename(self, filename, profile=None):
+        """
+        Switches to a different results file, after writing the queued results to the current one.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the new results file.
+        profile : str
+            Name of the profile the new results file belongs to. Defaults to the current profile name.
+        """
+        self.flush()
+        self.filename = filename
+        self.profile = profile or self.profile
+
+    def save_data(self, wpm, accuracy, timestamp, duration, test_id=""):
         """
-        Saves the given data to the csv file.
+        Queues the given data to be saved to the csv file by the writer thread.
 
         Parameters
         ----------
@@ -53,9 +603,338 @@ class ResultsInOut:
             The time and date at which the test was completed.
         duration : int
             The duration of the test taken.
+        test_id : str
+            The ID of the test taken, which can be used to take the same test again.
+        """
+        self._start_writer()
+        self._queue.put([wpm, accuracy, timestamp, duration, test_id])
+
+    def flush(self):
+        """
+        Waits until every queued result has been written.
+        """
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        Writes any queued results and stops the writer thread. Called when the application exits.
+
+        Returns
+        -------
+        unwritten : list
+            Results that couldn't be written, e.g. because the results file is read-only. They are also logged, so
+            they can be recovered.
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+        unwritten = self._unwritten
+        if unwritten and writer is not None:  # Reported once, when the writer stops
+            logger.error("%d results couldn't be written to %s: %s", len(unwritten), self.filename, unwritten)
+
+        with self._writer_lock:
+            uploader, self._uploader = self._uploader, None
+        if uploader is not None:
+            self._closing.set()
+            self._upload_queue.put(None)
+            uploader.join()
+            self._pool.close()
+        return unwritten
+
+    def writer_stats(self):
+        """
+        Reports the state of the writer thread.
+
+        Returns
+        -------
+        stats : dict
+            The queue depth, the number of results and batches written, the latest and longest write latency in
+            seconds, the number of failed writes and of results waiting to be written again, and the upload queue depth
+            and counters.
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "last_write_latency": self.last_write_latency,
+            "max_write_latency": self.max_write_latency,
+            "write_errors": self.write_errors,
+            "unwritten": len(self._unwritten),
+            "upload_queue_depth": self._upload_queue.qsize(),
+            "rows_uploaded": self.rows_uploaded,
+            "upload_errors": self.upload_errors,
+            "uploads_dropped": self.uploads_dropped,
+        }
+
+    def _start_writer(self):
+        """
+        Starts the writer thread if it isn't running.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="results-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        """
+        Writes queued results until the stop signal (None) is received.
+        """
+        while True:
+            rows = [self._queue.get()]
+            # Take everything that piled up during the previous write
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in rows
+            try:
+                self._write_rows([row for row in rows if row is not None])
+            finally:
+                for _ in rows:  # Even if the write raised, or flush() would wait forever
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_rows(self, rows):
+        """
+        Appends a batch of results to the csv file, recording how long the write took.
+
+        Parameters
+        ----------
+        rows : list
+            Results to write, each a list of values in the order of COLUMNS.
+        """
+        rows = self._unwritten + rows
+        if not rows:
+            return
+        start = time.perf_counter()
+        data = io.StringIO(newline="")
+        writer = csv.writer(data)
+        writer.writerows(rows)
+        try:
+            with file_lock(self.filename):
+                self._upgrade_file()
+                self._repair_torn_tail()
+                aggregates = _read_aggregates(self.filename)
+                self._append(data.getvalue())
+                # The rows are in the file now, so they aren't written again even if the aggregates can't be updated
+                self._update_aggregates(aggregates, lambda aggregates: aggregates.add_rows(rows))
+        except Exception:  # Including pandas errors from a malformed file, which mustn't stop the writer thread
+            self.write_errors += 1
+            self._write_errors.inc()
+            self._unwritten = rows
+            return
+        self._unwritten = []
+        self.last_write_latency = time.perf_counter() - start
+        self.max_write_latency = max(self.max_write_latency, self.last_write_latency)
+        self._write_seconds.observe(self.last_write_latency)
+        self._results_written.inc(len(rows))
+        self.rows_written += len(rows)
+        self.batches_written += 1
+        if self.upload_url:
+            self._queue_uploads(rows)
+
+    def save_frame(self, df: pd.DataFrame):
+        """
+        Appends many results to the csv file in a single write, e.g. when importing results from another program.
+
+        Unlike save_data, the results are written before returning, and they aren't uploaded to the leaderboard.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Results to save, with the columns in COLUMNS. Timestamps are saved to the second.
+        """
+        if df.empty:
+            return
+        self.flush()
+        # Formatting the timestamps with NumPy and the rows with the csv module is much faster than DataFrame.to_csv
+        timestamps = np.datetime_as_string(pd.to_datetime(df["timestamp"]).to_numpy().astype("datetime64[s]"))
+        timestamps.view("U1").reshape(len(df), -1)[:, 10] = " "  # 2024-01-01T12:00:00 -> 2024-01-01 12:00:00
+        data = io.StringIO(newline="")
+        csv.writer(data).writerows(zip(df["wpm"].tolist(), df["accuracy"].tolist(), timestamps.tolist(),
+                                       df["duration"].tolist(), df["test_id"].tolist()))
+        with file_lock(self.filename):
+            self._upgrade_file()
+            self._repair_torn_tail()
+            aggregates = _read_aggregates(self.filename)
+            self._append(data.getvalue())
+            self._update_aggregates(aggregates, lambda aggregates: aggregates.add_frame(df))
+        self.rows_written += len(df)
+        self.batches_written += 1
+
+    def _update_aggregates(self, aggregates, add):
+        """
+        Updates the aggregates file after results have been appended. If that fails, the aggregates file is removed,
+        so it's rebuilt when next read instead of disagreeing with the results.
+
+        Must be called while holding the file lock.
+
+        Parameters
+        ----------
+        aggregates : ResultsAggregates
+            The aggregates from before the results were appended, or None if they have to be rebuilt.
+        add : callable
+            Adds the appended results to the aggregates.
+
+        Returns
+        -------
+        updated : bool
+            Whether the aggregates file was updated.
+        """
+        try:
+            if aggregates is None:
+                rebuild_aggregates(self.filename)
+            else:
+                add(aggregates)
+                _save_aggregates(self.filename, aggregates)
+        except Exception:
+            try:
+                os.remove(aggregates_path(self.filename))
+            except OSError:
+                pass
+            return False
+        return True
+
+    def _append(self, data):
+        """
+        Appends csv rows to the results file, writing the header first if the file is new.
+
+        Must be called while holding the file lock.
+
+        Parameters
+        ----------
+        data : str
+            The rows in csv format.
         """
-        df = self.load_data()
-        new_data = pd.DataFrame([[wpm, accuracy, timestamp, duration]], columns=["wpm", "accuracy", "timestamp", "duration"])
-        df = pd.concat([df, new_data], ignore_index=True)
-        df.to_csv(self.filename, index=False)
+        with open(self.filename, "a", newline="") as f:
+            if f.tell() == 0:
+                csv.writer(f).writerow(COLUMNS)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
 
+    def _queue_uploads(self, rows):
+        """
+        Queues written results to be uploaded to the leaderboard server, starting the uploader thread if needed.
+
+        Parameters
+        ----------
+        rows : list
+            Results that were written, each a list of values in the order of COLUMNS.
+        """
+        with self._writer_lock:
+            if self._uploader is None and not self._closing.is_set():
+                self._uploader = threading.Thread(target=self._upload_loop, name="results-uploader", daemon=True)
+                self._uploader.start()
+        for row in rows:
+            # The values match what an export reads back from the file, so the result gets the same ID either way
+            result = {"wpm": float(row[0]), "accuracy": float(row[1]), "timestamp": str(row[2]),
+                      "duration": int(row[3]), "test_id": row[4]}
+            result["id"] = result_id(self._machine, self.profile, result)
+            result["profile"] = self.profile
+            try:
+                self._upload_queue.put_nowait(result)
+            except queue.Full:
+                self.uploads_dropped += 1
+
+    def _upload_loop(self):
+        """
+        Uploads queued results in batches until the stop signal (None) is received.
+        """
+        while True:
+            results = [self._upload_queue.get()]
+            while len(results) < UPLOAD_BATCH:
+                try:
+                    results.append(self._upload_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in results
+            results = [result for result in results if result is not None]
+            if results:
+                self._upload(results)
+            if stop:
+                return
+
+    def _upload(self, results):
+        """
+        Uploads a batch of results, retrying with exponential backoff until it succeeds, the retries run out or the
+        application exits.
+
+        Parameters
+        ----------
+        results : list
+            Results to upload, as dictionaries.
+        """
+        for attempt in range(UPLOAD_RETRIES + 1):
+            try:
+                self._pool.request_json("POST", "/results", {"machine": self._machine, "results": results})
+            except (OSError, http.client.HTTPException, ValueError):
+                self.upload_errors += 1
+                if self._closing.wait(UPLOAD_BACKOFF * 2 ** attempt):
+                    break
+                continue
+            self.rows_uploaded += len(results)
+            return
+        self.uploads_dropped += len(results)
+
+    def _complete_rows(self):
+        """
+        Returns what should be parsed from the results file, counting any incomplete last line.
+        """
+        source, torn = complete_rows(self.filename)
+        self.torn_rows += torn
+        return source
+
+    def _repair_torn_tail(self):
+        """
+        Removes an incomplete last line from the results file, so appended rows start on a new line.
+
+        Must be called while holding the file lock.
+        """
+        try:
+            with open(self.filename, "r+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                if end == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) == b"\n":
+                    return
+                # Search backwards for the end of the last complete line
+                position = end
+                while position > 0:
+                    step = min(4096, position)
+                    position -= step
+                    f.seek(position)
+                    newline = f.read(step).rfind(b"\n")
+                    if newline != -1:
+                        position += newline + 1
+                        break
+                f.truncate(position)
+                self.torn_rows += 1
+        except FileNotFoundError:
+            pass
+
+    def _upgrade_file(self):
+        """
+        Rewrites a results file saved before tests had IDs, so new results can be appended to it.
+
+        Must be called while holding the file lock.
+        """
+        if self._checked_file == self.filename:
+            return
+        try:
+            with open(self.filename, "r", newline="") as f:
+                header = next(csv.reader(f), COLUMNS)
+        except FileNotFoundError:
+            return
+        if header != COLUMNS:
+            df = pd.read_csv(self._complete_rows()).reindex(columns=COLUMNS)
+            replace_file(self.filename, lambda f: df.to_csv(f, index=False))
+        self._checked_file = self.filename
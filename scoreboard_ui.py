@@ -1,4 +1,9 @@
 import tkinter as tk
+from tkinter import ttk
+
+# Test durations with a scoreboard, in the order of the boards. Results of other durations, e.g. imported ones, aren't
+# shown on the scoreboard
+DURATIONS = [15, 30, 60]
 
 
 class ScoreboardUI:
@@ -12,21 +17,27 @@ class ScoreboardUI:
         ----------
         root : tkinter.Tk
             The parent widget
-        scoreboard_frame : tkinter.Frame
+        scoreboard_frame : tkinter.ttk.Frame
             Tkinter frame containing the scoreboard widgets.
         score_titles : list
             List of tkinter labels for the titles of the scoreboards.
         scoreboards : list
             List of tkinter text widgets displaying the top 10 scores for each test duration.
-        close_scores_button : tkinter.Button
+        close_scores_button : tkinter.ttk.Button
             Tkinter button to close the scoreboard UI and return to the home UI.
-        analytics_button : tkinter.Button
+        analytics_button : tkinter.ttk.Button
             Button to open the analytics page.
+        history_button : tkinter.ttk.Button
+            Button to open the results history screen.
+        all_profiles_button : tkinter.ttk.Button
+            Button to switch between the scores of the current profile and those of all profiles.
 
         Methods
         -------
         config_scores_ui(colour_scheme)
                     Configures the scoreboard screen widgets according to the given colour scheme.
+        config_all_profiles_btn(all_profiles)
+            Configures the text on the all profiles button.
         hide()
             Hides the scoreboard UI.
         show()
@@ -46,7 +57,8 @@ class ScoreboardUI:
         scoreboard_widgets = self.setup_scoreboards(self.scoreboard_frame)
         self.score_titles = scoreboard_widgets[0]
         self.scoreboards = scoreboard_widgets[1]
-        self.close_scores_button, self.analytics_button = self.setup_scores_buttons(self.scoreboard_frame)
+        scores_buttons = self.setup_scores_buttons(self.scoreboard_frame)
+        self.close_scores_button, self.analytics_button, self.history_button, self.all_profiles_button = scores_buttons
 
     def setup_scoreboard_frame(self):
         """
@@ -54,15 +66,15 @@ class ScoreboardUI:
 
         Returns
         -------
-        scoreboard_frame : tkinter.Frame
+        scoreboard_frame : tkinter.ttk.Frame
             Tkinter frame containing the scoreboard widgets.
         """
-        scoreboard_frame = tk.Frame(self.root)
+        scoreboard_frame = ttk.Frame(self.root)
         scoreboard_frame.grid(row=0, column=0, columnspan=5, rowspan=5, sticky="news")
         # Allow the scoreboard frame to resize
         for i in range(3):
             scoreboard_frame.columnconfigure(i, weight=1)
-        for i in range(5):
+        for i in range(6):
             scoreboard_frame.rowconfigure(i, weight=1)
         return scoreboard_frame
 
@@ -72,7 +84,7 @@ class ScoreboardUI:
 
         Parameters
         ----------
-        scoreboard_frame : tkinter.Frame
+        scoreboard_frame : tkinter.ttk.Frame
             The frame to attach the scoreboard widgets to.
 
         Returns
@@ -85,9 +97,9 @@ class ScoreboardUI:
         score_titles = []
         scoreboards = []
         # Create scoreboards for each of the possible test durations: 15s, 30s and 60s.
-        for (duration, column) in [(15, 0), (30, 1), (60, 2)]:
+        for (column, duration) in enumerate(DURATIONS):
             # Create the Label widget for the scoreboard title
-            score_title = tk.Label(scoreboard_frame, text=f"{duration} seconds (wpm)", font=("Arial", "24"))
+            score_title = ttk.Label(scoreboard_frame, text=f"{duration} seconds (wpm)", style="Heading.TLabel")
             score_title.grid(row=0, column=column, padx=20, sticky="news")
             score_titles.append(score_title)
             # Create the text widget for the scoreboard
@@ -102,41 +114,56 @@ class ScoreboardUI:
 
         Parameters
         ----------
-        scoreboard_frame : tkinter.Frame
+        scoreboard_frame : tkinter.ttk.Frame
             The frame to attach the scoreboard widgets to.
 
         Returns
         -------
-        close_scores_button : tkinter.Button
+        close_scores_button : tkinter.ttk.Button
             Tkinter button to close the scoreboard UI and return to the home UI.
-        analytics_button : tkinter.Button
+        analytics_button : tkinter.ttk.Button
             Button to open the analytics page.
+        history_button : tkinter.ttk.Button
+            Button to open the results history screen.
+        all_profiles_button : tkinter.ttk.Button
+            Button to switch between the scores of the current profile and those of all profiles.
         """
-        close_button = tk.Button(scoreboard_frame, text="Close", font=("Arial", "16"))
-        close_button.grid(row=3, column=1, sticky="news")
+        close_button = ttk.Button(scoreboard_frame, text="Close", style="Accent.TButton")
+        close_button.grid(row=5, column=1, sticky="news")
 
-        analytics_button = tk.Button(scoreboard_frame, text="View Typing Analytics", font=("Arial", "16"))
+        analytics_button = ttk.Button(scoreboard_frame, text="View Typing Analytics", style="Accent.TButton")
         analytics_button.grid(row=2, column=1, sticky="news")
-        return close_button, analytics_button
+
+        history_button = ttk.Button(scoreboard_frame, text="Browse All Results", style="Accent.TButton")
+        history_button.grid(row=3, column=1, sticky="news")
+
+        all_profiles_button = ttk.Button(scoreboard_frame, text="Showing: This profile", style="Accent.TButton")
+        all_profiles_button.grid(row=4, column=1, sticky="news")
+        return close_button, analytics_button, history_button, all_profiles_button
 
     def config_scores_ui(self, colour_scheme):
         """
-        Configures the colour properties of the scoreboard UI widgets.
+        Configures the colour properties of the scoreboard text widgets, which aren't styled by the theme engine
+        (see theme.py).
 
         Parameters
         ----------
         colour_scheme : dict
             The colour scheme to apply to the scoreboard UI.
         """
-        self.scoreboard_frame.configure(bg=colour_scheme["background"])
-
-        for title in self.score_titles:
-            title.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
         for scoreboard in self.scoreboards:
             scoreboard.configure(bg=colour_scheme["background"], fg=colour_scheme["main_text"])
 
-        self.close_scores_button.configure(bg=colour_scheme["highlight"], fg=colour_scheme["main_text"])
-        self.analytics_button.configure(bg=colour_scheme["highlight"], fg=colour_scheme["main_text"])
+    def config_all_profiles_btn(self, all_profiles):
+        """
+        Configures the text on the all profiles button.
+
+        Parameters
+        ----------
+        all_profiles : bool
+            Whether the scores of all profiles are shown.
+        """
+        self.all_profiles_button.configure(text=f"Showing: {'All profiles' if all_profiles else 'This profile'}")
 
     def no_scores(self):
         """
@@ -152,7 +179,7 @@ class ScoreboardUI:
         """
         Restores the default scoreboard titles.
         """
-        for index, duration in enumerate([15, 30, 60], 0):
+        for index, duration in enumerate(DURATIONS, 0):
             self.score_titles[index].configure(text=f"{duration} seconds (wpm)")
 
     def show(self):
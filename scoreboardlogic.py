@@ -2,9 +2,12 @@ from tkinter import END
 
 from currentdisplay import CurrentDisplay
 from home_ui import HomeUI
-from scoreboard_ui import ScoreboardUI
+from scoreboard_ui import DURATIONS, ScoreboardUI
 from results_io import ResultsInOut
 from analytics_ui import AnalyticsUI
+from profiles import ProfileManager
+from diagnostics import profiled
+from results_io import FILENAME
 
 
 class ScoreBoardLogic:
@@ -29,8 +32,15 @@ class ScoreBoardLogic:
         Button to close the anlaytics page.
     results_io : ResultsInOut
         Instance of the ResultsInOut class.
+    analytics_ui : AnalyticsUI
+        Instance of the AnalyticsUI class.
+    profiles : ProfileManager
+        Instance of the ProfileManager class, or None if profiles aren't used.
+    all_profiles : bool
+        Whether the scores of all profiles are shown, instead of only the current profile's.
     """
-    def __init__(self, current_display: CurrentDisplay, home_ui: HomeUI, scoreboard_ui: ScoreboardUI, results_io: ResultsInOut, analytics_ui: AnalyticsUI):
+    def __init__(self, current_display: CurrentDisplay, home_ui: HomeUI, scoreboard_ui: ScoreboardUI, results_io: ResultsInOut, analytics_ui: AnalyticsUI,
+                 profiles: ProfileManager = None):
         """
         Configures the functionality of the open and close scoreboard buttons.
 
@@ -46,6 +56,8 @@ class ScoreBoardLogic:
             Instance of the ResultsInOut class.
         analytics_ui : AnalyticsUI
             Instance of the AnalyticsUI class.
+        profiles : ProfileManager
+            Instance of the ProfileManager class, or None if profiles aren't used.
         """
         self.current_display = current_display
         self.scoreboard_ui = scoreboard_ui
@@ -55,11 +67,15 @@ class ScoreBoardLogic:
         self.analytics_button = scoreboard_ui.analytics_button
         self.close_analytics = analytics_ui.close_button
         self.results_io = results_io
+        self.analytics_ui = analytics_ui
+        self.profiles = profiles
+        self.all_profiles = False
 
         home_ui.utility_buttons[0].configure(command=self.show_scoreboard)
         self.close_button.configure(command=lambda: current_display.open_ui(home_ui))
         self.analytics_button.configure(command=lambda: current_display.open_ui(analytics_ui))
         self.close_analytics.configure(command=lambda: current_display.open_ui(scoreboard_ui))
+        scoreboard_ui.all_profiles_button.configure(command=self.toggle_all_profiles)
 
 
         # Need to prevent focus being set to the scoreboards when they're clicked on because that would interfere with
@@ -73,23 +89,34 @@ class ScoreBoardLogic:
         """
         return "break"
 
+    def results_files(self):
+        """
+        Returns the results files the scoreboard and analytics are showing, or None for just the current profile's.
+        """
+        if not (self.all_profiles and self.profiles):
+            return None
+        return [self.profiles.path(FILENAME, name) for name in self.profiles.names()]
+
+    def toggle_all_profiles(self):
+        """
+        Switches between the scores of the current profile and those of all profiles, and refreshes the scoreboard.
+        """
+        self.all_profiles = not self.all_profiles
+        self.analytics_ui.analytics_brain.results_files = self.results_files()
+        self.scoreboard_ui.config_all_profiles_btn(self.all_profiles)
+        self.show_scoreboard()
+
     def obtain_scores(self):
         """
-        Loads data from the file to display the top 10 scores on the scoreboards.
+        Loads the results aggregates to display the top 10 scores on the scoreboards.
 
         Returns
         -------
         top_scores : dict
-            Dictionary of the top 10 scores for each test type.
+            Dictionary of the top 10 scores for each duration with a scoreboard, in the order of the boards.
         """
-        scores_data = self.results_io.load_data()
-        grouped_scores = scores_data.groupby("duration")
-
-        top_scores = {}
-
-        for duration, group in grouped_scores:
-            group_top_scores = group['wpm'].sort_values(ascending=False)[0:10].values
-            top_scores[duration] = group_top_scores
+        aggregates = self.results_io.load_aggregates(self.results_files())
+        top_scores = {duration: aggregates.top_scores.get(duration, []) for duration in DURATIONS}
 
         if all(len(score_list) == 0 for score_list in top_scores.values()):
             return "no scores"
@@ -97,6 +124,7 @@ class ScoreBoardLogic:
         return top_scores
 
 
+    @profiled
     def show_scoreboard(self):
         """
         Shows the scoreboard UI and inserts the scoreboard data into the scoreboards.
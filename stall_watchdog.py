@@ -0,0 +1,307 @@
+"""
+Watchdog for stalls of the Tk event loop.
+
+Tk runs every callback on one thread, so a slow callback freezes the whole window. The watchdog schedules a heartbeat
+with root.after every few milliseconds and measures the time between heartbeats (the frame time). A gap longer than
+the stall threshold means the event loop was blocked.
+
+To find out what blocked it, a background thread checks the heartbeat; once it is later than the threshold, the
+thread records the stack of the main thread, which is still inside the slow callback at that point. The stall is
+recorded when the heartbeat finally runs, with its length and the innermost frames of the app's own code.
+
+Frame times are kept for the last WINDOW heartbeats, so the histogram reflects recent behaviour. The app only runs
+the watchdog while diagnostics are on (see diagnostics.py), so normal sessions don't pay for the heartbeat. Press F12
+to show the frame time overlay on the home screen, and Ctrl+F12 to export the histogram and stalls to the diagnostics
+folder.
+"""
+import collections
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+import numpy as np
+
+from diagnostics import DIAGNOSTICS_DIR
+
+# Time between heartbeats, in milliseconds
+INTERVAL_MS = 16
+# Gaps between heartbeats longer than this are stalls, in milliseconds
+STALL_THRESHOLD_MS = 100
+# Number of frame times kept for the histogram
+WINDOW = 3600
+# Number of stalls kept
+MAX_STALLS = 100
+# Edges of the frame time histogram bins, in milliseconds
+BIN_EDGES = np.array([0, 17, 20, 25, 33, 50, 100, 200, 500, 1000, np.inf])
+# Frames of the stalled callback's stack kept with each stall
+STACK_DEPTH = 4
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StallWatchdog:
+    """
+    Measures the time between heartbeats of the Tk event loop and records stalls.
+
+    Attributes
+    ----------
+    root : tkinter.Tk
+        The root window, whose event loop is watched.
+    interval : float
+        Time between heartbeats in seconds.
+    threshold : float
+        Gaps between heartbeats longer than this many seconds are stalls.
+    frame_times : collections.deque
+        The last WINDOW gaps between heartbeats, in seconds.
+    stalls : collections.deque
+        The last MAX_STALLS stalls, as dictionaries with the time the stall started, its length in milliseconds and the
+        stack of the callback that was running.
+    stall_count : int
+        Total number of stalls recorded.
+    """
+    def __init__(self, root, interval_ms=INTERVAL_MS, threshold_ms=STALL_THRESHOLD_MS):
+        """
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The root window.
+        interval_ms : int
+            Time between heartbeats in milliseconds.
+        threshold_ms : int
+            Gaps between heartbeats longer than this many milliseconds are stalls.
+        """
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.frame_times = collections.deque(maxlen=WINDOW)
+        self.stalls = collections.deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+
+        self._last_beat = None
+        self._stalled_stack = None  # Stack sampled by the monitor thread during the current stall
+        self._main_thread = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._monitor = None
+        self._after_id = None
+
+    def start(self):
+        """
+        Starts the heartbeat and the monitor thread.
+        """
+        if self._monitor is not None:
+            return
+        self._stop.clear()
+        self._last_beat = time.perf_counter()
+        self._after_id = self.root.after(int(self.interval * 1000), self._beat)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="stall-watchdog", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        """
+        Stops the heartbeat and the monitor thread.
+        """
+        if self._monitor is None:
+            return
+        self._stop.set()
+        self._monitor.join()
+        self._monitor = None
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def is_running(self):
+        """
+        Returns whether the heartbeat and the monitor thread are running.
+        """
+        return self._monitor is not None
+
+    def _beat(self):
+        """
+        Heartbeat: records the time since the previous heartbeat and schedules the next.
+        """
+        now = time.perf_counter()
+        gap = now - self._last_beat
+        self._last_beat = now
+        self.frame_times.append(gap)
+        if gap > self.threshold:
+            self.stall_count += 1
+            started = datetime.datetime.now() - datetime.timedelta(seconds=gap)
+            self.stalls.append({"started": started.isoformat(sep=" ", timespec="milliseconds"),
+                                "ms": round(gap * 1000, 1),
+                                "callback": self._stalled_stack or []})
+        self._stalled_stack = None
+        if not self._stop.is_set():
+            self._after_id = self.root.after(int(self.interval * 1000), self._beat)
+
+    def _monitor_loop(self):
+        """
+        Samples the main thread's stack once the heartbeat is later than the stall threshold.
+        """
+        while not self._stop.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            if self._stalled_stack is None and time.perf_counter() - last_beat > self.threshold:
+                frame = sys._current_frames().get(self._main_thread)
+                # Don't attribute the stall if the heartbeat ran while the stack was being taken
+                if frame is not None and self._last_beat == last_beat:
+                    self._stalled_stack = app_frames(frame)
+
+    def histogram(self):
+        """
+        Counts the recent frame times in each bin of BIN_EDGES.
+
+        Returns
+        -------
+        counts : numpy.ndarray
+            Number of frame times in each bin.
+        """
+        counts, _ = np.histogram(np.array(self.frame_times) * 1000, BIN_EDGES)
+        return counts
+
+    def summary(self):
+        """
+        Returns the median, 99th percentile and longest recent frame time in milliseconds, or None for each if no
+        heartbeats have run.
+        """
+        if not self.frame_times:
+            return {"p50_ms": None, "p99_ms": None, "max_ms": None}
+        frame_times = np.array(self.frame_times) * 1000
+        p50, p99 = np.percentile(frame_times, [50, 99])
+        return {"p50_ms": float(p50), "p99_ms": float(p99), "max_ms": float(frame_times.max())}
+
+    def overlay_text(self):
+        """
+        Returns the text of the debug overlay: frame time statistics and the last stall.
+        """
+        summary = self.summary()
+        if summary["p50_ms"] is None:
+            return "Frame time: waiting" if self.is_running() else "Frame time: switch on diagnostics to measure"
+        text = (f"Frame time p50 {summary['p50_ms']:.0f} ms, p99 {summary['p99_ms']:.0f} ms, "
+                f"max {summary['max_ms']:.0f} ms\nStalls: {self.stall_count}")
+        if self.stalls:
+            stall = self.stalls[-1]
+            text += f", last {stall['ms']:.0f} ms in {stall['callback'][-1] if stall['callback'] else 'unknown'}"
+        return text
+
+    def export(self, directory=DIAGNOSTICS_DIR):
+        """
+        Writes the histogram, summary and stalls to a JSON file for offline analysis.
+
+        Parameters
+        ----------
+        directory : str
+            Folder to write the file to.
+
+        Returns
+        -------
+        path : str
+            The file written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"frame_times-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+        data = {"interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "bin_edges_ms": [float(edge) for edge in BIN_EDGES],
+                "counts": self.histogram().tolist(),
+                **self.summary(),
+                "stall_count": self.stall_count,
+                "stalls": list(self.stalls)}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+        return path
+
+
+def app_frames(frame, depth=STACK_DEPTH):
+    """
+    Describes the innermost frames of a stack that belong to the app's own modules.
+
+    Parameters
+    ----------
+    frame : frame
+        The innermost frame of the stack.
+    depth : int
+        Maximum number of frames described.
+
+    Returns
+    -------
+    frames : list
+        "module.py:line function" for each frame, outermost first.
+    """
+    stack = [entry for entry in traceback.extract_stack(frame)
+             if entry.filename.startswith(APP_DIR) and os.path.basename(entry.filename) != "stall_watchdog.py"]
+    return [f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}" for entry in stack[-depth:]]
+
+
+class FrameTimeOverlay:
+    """
+    Debug overlay on the home screen showing the watchdog's frame time statistics, toggled with F12. Ctrl+F12 exports
+    the statistics.
+
+    Attributes
+    ----------
+    watchdog : StallWatchdog
+        The watchdog whose statistics are shown.
+    home_ui : HomeUI
+        The home screen the overlay is shown on.
+    visible : bool
+        Whether the overlay is shown.
+    last_export : str
+        The file the statistics were last exported to, or None.
+    """
+    # Time between overlay updates, in milliseconds
+    REFRESH_MS = 500
+
+    def __init__(self, root, watchdog: StallWatchdog, home_ui):
+        """
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The root window.
+        watchdog : StallWatchdog
+            The watchdog whose statistics are shown.
+        home_ui : HomeUI
+            The home screen the overlay is shown on.
+        """
+        self.root = root
+        self.watchdog = watchdog
+        self.home_ui = home_ui
+        self.visible = False
+        self.last_export = None
+        self._after_id = None
+        root.bind("<F12>", self.toggle)
+        root.bind("<Control-F12>", self.export)
+
+    def toggle(self, event=None):
+        """
+        Shows or hides the overlay.
+        """
+        self.visible = not self.visible
+        if self.visible:
+            self.refresh()
+        else:
+            if self._after_id is not None:
+                self.root.after_cancel(self._after_id)
+                self._after_id = None
+            self.home_ui.hide_frame_stats()
+        return "break"
+
+    def refresh(self):
+        """
+        Updates the overlay text, and schedules the next update while it's shown.
+        """
+        text = self.watchdog.overlay_text()
+        if self.last_export:
+            text += f"\nExported to {self.last_export}"
+        self.home_ui.show_frame_stats(text)
+        self._after_id = self.root.after(self.REFRESH_MS, self.refresh)
+
+    def export(self, event=None):
+        """
+        Exports the watchdog's statistics and shows the overlay, which says where they were saved.
+        """
+        self.last_export = self.watchdog.export()
+        if not self.visible:
+            self.toggle()
+        return "break"
@@ -0,0 +1,181 @@
+"""
+Theme engine: applies colour schemes through a few named ttk styles instead of reconfiguring every widget.
+
+The app's widgets are ttk widgets, each given one of the styles below when it's created. Fonts are set on the styles
+once, and each colour scheme is compiled once into the colour options of the styles that depend on it. Switching
+colour scheme then only redefines those styles (see compile_scheme()), and Tk redraws the widgets itself. Only the
+few tk.Text widgets, which ttk can't style, are still configured one by one.
+
+Styles
+------
+"." (every ttk widget)
+    Background colour and main text colour.
+Primary.TButton, Small.Primary.TButton
+    Buttons in the main text colour with highlight coloured text, e.g. the start buttons.
+Accent.TButton
+    Highlight coloured buttons with main text coloured text, e.g. the close buttons.
+TLabel, Small.TLabel, Heading.TLabel, Title.TLabel, Overlay.TLabel
+    Labels in different sizes.
+Timer.TLabel
+    The highlight coloured timer.
+TMenubutton
+    The profile menu and the history duration filter, coloured like the primary buttons.
+Treeview, Heading
+    The results history list, with headings coloured like the primary buttons.
+Preview.TFrame, Preview.TLabel, Preview.TButton
+    The colour scheme preview on the options page, which shows a different colour scheme from the rest of the app.
+"""
+from tkinter import ttk
+
+from colour_schemes import COLOUR_SCHEMES
+
+# Built in ttk theme used as the base, as it lets every element's colours be changed on every platform
+BASE_THEME = "clam"
+FONT = ("Arial", 16)
+SMALL_FONT = ("Arial", 14)
+# Fonts of each style, which don't change with the colour scheme
+STYLE_FONTS = {
+    "TLabel": FONT,
+    "Small.TLabel": SMALL_FONT,
+    "Heading.TLabel": ("Arial", 24),
+    "Title.TLabel": ("Arial", 30),
+    "Timer.TLabel": ("Helvetica", 24),
+    "Overlay.TLabel": ("Courier", 10),
+    "TButton": FONT,
+    "Small.Primary.TButton": SMALL_FONT,
+    "TMenubutton": SMALL_FONT,
+    "Treeview": SMALL_FONT,
+    "Heading": SMALL_FONT,
+    "Preview.TLabel": FONT,
+    "Preview.TButton": FONT,
+}
+
+
+def _button(background, foreground):
+    """
+    Options of a button style with the given colours, which keep their colours when hovered or pressed.
+    """
+    configure = {"background": background, "foreground": foreground, "bordercolor": foreground,
+                 "lightcolor": background, "darkcolor": background}
+    state_map = {"background": [("pressed", foreground), ("active", background)],
+                 "foreground": [("pressed", background), ("active", foreground)]}
+    return configure, state_map
+
+
+def compile_scheme(colour_scheme):
+    """
+    Compiles a colour scheme into the options of the styles that depend on it.
+
+    Parameters
+    ----------
+    colour_scheme : dict
+        The colour scheme.
+
+    Returns
+    -------
+    configure : dict
+        Options to configure for each style name.
+    state_maps : dict
+        Options to map for each style name, giving the colours used in each widget state.
+    """
+    background, main_text, highlight = colour_scheme["background"], colour_scheme["main_text"], colour_scheme["highlight"]
+    primary, primary_map = _button(main_text, highlight)
+    accent, accent_map = _button(highlight, main_text)
+    configure = {
+        ".": {"background": background, "foreground": main_text, "fieldbackground": background,
+              "insertcolor": main_text, "bordercolor": main_text, "lightcolor": background, "darkcolor": background,
+              "troughcolor": background, "selectbackground": highlight, "selectforeground": main_text},
+        "Primary.TButton": primary,
+        "Accent.TButton": accent,
+        "TMenubutton": {**primary, "arrowcolor": highlight},
+        "Timer.TLabel": {"foreground": highlight},
+        "Heading": primary,
+    }
+    state_maps = {"Primary.TButton": primary_map, "Accent.TButton": accent_map, "TMenubutton": primary_map,
+                  "Heading": primary_map}
+    return configure, state_maps
+
+
+def compile_preview(colour_scheme):
+    """
+    Compiles a colour scheme into the options of the preview styles.
+
+    Returns
+    -------
+    configure : dict
+        Options to configure for each preview style name.
+    state_maps : dict
+        Options to map for each preview style name.
+    """
+    background, main_text, highlight = colour_scheme["background"], colour_scheme["main_text"], colour_scheme["highlight"]
+    button, button_map = _button(highlight, main_text)
+    configure = {
+        "Preview.TFrame": {"background": background, "bordercolor": highlight, "lightcolor": highlight,
+                           "darkcolor": highlight},
+        "Preview.TLabel": {"background": background, "foreground": main_text},
+        "Preview.TButton": button,
+    }
+    return configure, {"Preview.TButton": button_map}
+
+
+class ThemeEngine:
+    """
+    Applies colour schemes to the app's ttk styles.
+
+    Attributes
+    ----------
+    style : tkinter.ttk.Style
+        The app's ttk styles.
+    compiled : dict
+        The compiled styles of each colour scheme, by name.
+    compiled_previews : dict
+        The compiled preview styles of each colour scheme, by name.
+    """
+    def __init__(self, root, colour_schemes=COLOUR_SCHEMES):
+        """
+        Sets the base theme and fonts, and compiles the colour schemes.
+
+        Parameters
+        ----------
+        root : tkinter.Tk
+            The root window.
+        colour_schemes : list
+            The colour schemes to compile.
+        """
+        self.style = ttk.Style(root)
+        self.style.theme_use(BASE_THEME)
+        for style_name, font in STYLE_FONTS.items():
+            self.style.configure(style_name, font=font)
+        self.style.configure("Preview.TFrame", borderwidth=2, relief="solid")
+        self.style.configure("Treeview", rowheight=30)
+        self.compiled = {colour_scheme["name"]: compile_scheme(colour_scheme) for colour_scheme in colour_schemes}
+        self.compiled_previews = {colour_scheme["name"]: compile_preview(colour_scheme)
+                                  for colour_scheme in colour_schemes}
+
+    def apply(self, colour_scheme):
+        """
+        Applies a colour scheme to every ttk widget.
+
+        Parameters
+        ----------
+        colour_scheme : dict
+            The colour scheme.
+        """
+        self._set_styles(*self.compiled[colour_scheme["name"]])
+
+    def apply_preview(self, colour_scheme):
+        """
+        Shows a colour scheme in the preview box.
+
+        Parameters
+        ----------
+        colour_scheme : dict
+            The colour scheme.
+        """
+        self._set_styles(*self.compiled_previews[colour_scheme["name"]])
+
+    def _set_styles(self, configure, state_maps):
+        for style_name, options in configure.items():
+            self.style.configure(style_name, **options)
+        for style_name, options in state_maps.items():
+            self.style.map(style_name, **options)
@@ -1,11 +1,20 @@
-import random
 from tkinter import END
+from types import SimpleNamespace
 import json
 import datetime
+import time
 
+from diagnostics import profiled
+from metrics import MetricSet, timed
 from home_ui import HomeUI
-from word_data import word_list, weights
+from word_data import parse_test_id
 from results_io import ResultsInOut
+from key_stats import KeyStats
+from prepared_tests import PAGE_WORDS, PreparedTest, PreparedTestQueue, generate_test
+from book_text import Book, BookPositions
+from ghost_race import GhostRace, GhostStore
+from race_client import PROGRESS_INTERVAL, RaceClient
+from typing_timeline import TypingTimeline, timeline_figure
 
 
 class TypingTestLogic:
@@ -46,8 +55,51 @@ class TypingTestLogic:
         The state of the current test.
     user_input : list
         A list to store the characters typed by the user during the test.
+    word_list_index : int
+        Index of the word list (in word_data.WORD_LISTS) that test words are drawn from.
+    key_stats : KeyStats
+        Instance of the KeyStats class, which tracks errors and latency for each character and bigram.
+    practice_mode : bool
+        Whether tests over-sample words containing the user's weakest bigrams.
+    content : str
+        Code of the content of tests (see content_modes.py): punctuation, capitals and numbers mixed into the words,
+        or quotes. Empty for plain words.
+    keystrokes : list
+        Tuples of (time, character typed, character expected) for every keystroke of the current test.
+    test_seed : int
+        Seed the current test's words were generated from.
+    test_id : str
+        Shareable ID of the current test. Empty for practice tests, which depend on the user's own statistics.
+    prepared_test : PreparedTest
+        The current test, with the text of each page and the position of each word on its page.
+    test_queue : PreparedTestQueue
+        Tests generated ahead of time, so starting a test only has to take one from the queue.
+    countdown_id : str
+        ID of the scheduled countdown update while a test is running, or None.
+    book_positions : BookPositions
+        The book in use and the position reached in each book, or None if book mode isn't available.
+    book : Book
+        The book whose text tests are made of in book mode, or None when tests use the word lists.
+    book_test : bool
+        Whether the current test's words were taken from the book's position, so finishing it moves the position on.
+        False for retried tests and tests loaded by ID.
+    ghosts : GhostStore
+        The user's best run of each test, or None if ghost races aren't available.
+    ghost_race : GhostRace
+        Moves the ghost cursor through the best run of the current test while the user takes it.
+    ghost_run : GhostRun
+        The best run of the current test, which the ghost races, or None.
+    page_excess : list
+        Number of excess characters typed in each finished word of the current page.
+    race_client : RaceClient
+        Connection to the race relay, which shares progress with other people taking the same test, or None.
+    racers : dict
+        Latest progress message of each of the other racers on the current test, by their id.
+    metrics : MetricSet
+        Tests completed for each duration and the time taken by the key press and test handlers (see metrics.py).
     """
-    def __init__(self, root, home_ui: HomeUI, results_io: ResultsInOut):
+    def __init__(self, root, home_ui: HomeUI, results_io: ResultsInOut, key_stats: KeyStats,
+                 book_positions: BookPositions = None, ghosts: GhostStore = None, race_client: RaceClient = None):
         """
         Initialises the attributes needed for the tests and configures the functionality of the start buttons.
 
@@ -59,6 +111,14 @@ class TypingTestLogic:
             Instance of the HomeUI class.
         results_io : ResultsInOut
             Instance of the ResultsInOut class.
+        key_stats : KeyStats
+            Instance of the KeyStats class.
+        book_positions : BookPositions
+            The book in use and the position reached in each book. The book in use is opened again.
+        ghosts : GhostStore
+            The user's best run of each test, which the ghost races.
+        race_client : RaceClient
+            Connection to the race relay. Progress is exchanged with the relay while the app is open.
         """
         self.root = root
         self.home_ui = home_ui
@@ -67,6 +127,7 @@ class TypingTestLogic:
         self.start_buttons = home_ui.start_buttons
 
         self.results_io = results_io
+        self.key_stats = key_stats
 
         # Configure buttons to set up tests
         self.start_buttons[0].configure(command=self.test_15s)
@@ -76,6 +137,9 @@ class TypingTestLogic:
         # Binds user-input detection to the timer widget; key presses are only registered when the timer is in focus.
         self.timer_txt.bind('<space>', self.check_word)
         self.timer_txt.bind('<Key>', self.check_char)
+        # Tab restarts with a new test, during a test or after it has finished
+        self.timer_txt.bind('<Tab>', self.quick_restart)
+        home_ui.home_frame.bind('<Tab>', self.quick_restart)
 
         # cursor position
         self.current_word = 0
@@ -91,11 +155,45 @@ class TypingTestLogic:
         self.test_started = False
         self.user_input = []
         self.excess_chars = 0
+        self.word_list_index = 0
+        self.practice_mode = False
+        self.content = ""
+        self.keystrokes = []
+        self.test_seed = None
+        self.test_id = ""
+        self.prepared_test = None
+        self.test_queue = PreparedTestQueue(root, key_stats)
+        self.countdown_id = None
+        self.book_positions = book_positions
+        self.book = None
+        self.book_test = False
+        self.ghosts = ghosts
+        self.ghost_race = GhostRace(root, self.show_ghost)
+        self.ghost_run = None
+        self.page_excess = []
+        self.race_client = race_client
+        self.racers = {}
+        self._race_progress = None  # Last progress sent to the relay
+        self._racers_page = None  # Page the other racers' cursors were drawn on
+        self.metrics = MetricSet()
+        self._tests_completed = self.metrics.counter("typing_test_tests_completed", "Tests completed.", label="duration")
+        self.metrics.histogram("typing_test_handler_seconds", "Time taken by the key press and test handlers.",
+                               label="handler")
 
         # Prevent the focus from changing to the text widget when it is clicked on.
         self.text.bind('<Button-1>', self.mouse_click)
 
+        # Configure the test ID controls
+        home_ui.retry_button.configure(command=self.retry_test)
+        home_ui.load_id_button.configure(command=self.load_test_id)
+        home_ui.test_id_entry.bind('<Return>', self.load_test_id)
+        home_ui.race_button.configure(command=self.race_best)
+
+        if book_positions is not None:
+            self.resume_book()
         self.setup_test()
+        if race_client is not None:
+            self.race_tick()
 
     def mouse_click(self, event):
         """
@@ -127,33 +225,275 @@ class TypingTestLogic:
         self.test_duration = 60
         self.setup_test()
 
-    def setup_test(self):
+    @profiled
+    @timed("typing_test_handler_seconds")
+    def setup_test(self, seed=None, test_words=None):
         """
         Carries out the procedure to set up a test.
+
+        New tests are taken from the queue of prepared tests, so only the first page has to be inserted.
+
+        Parameters
+        ----------
+        seed : int
+            Seed to generate the test's words from. A new test is taken from the queue, or from the book in book
+            mode, if not given.
+        test_words : list
+            Words to use for the test instead of generating them, when retrying a test.
         """
         self.text['state'] = 'normal'  # Makes text widget editable
-        self.generate_words()
+        self.home_ui.hide_timeline()
+        self.ghost_race.stop()
+        self.book_test = self.book is not None and test_words is None and seed is None
+        if test_words is not None:
+            self.use_test(PreparedTest(test_words, self.test_seed, self.test_id))
+        elif seed is not None:
+            self.generate_words(seed)
+        elif self.book is not None:
+            self.use_test(self.book.next_test())
+        else:
+            self.use_test(self.test_queue.get(self.word_list_index, self.practice_mode, self.content))
+        if self.book is not None and seed is None:
+            self.home_ui.config_book_progress(self.book.name, self.book.progress())
+        else:
+            self.home_ui.config_test_id(self.test_id)
+        self.ghost_run = self.ghosts.best(self.test_id, self.test_duration) if self.ghosts and self.test_id else None
+        if self.race_client is not None:
+            self.join_race()
         self.test_started = False  # The timer doesn't start counting down until the user starts typing
         self.home_ui.test_focus = True
         self.prepare_user_input()
+        self.test_queue.resume()  # Replace the test taken from the queue once the window is idle
+
+    def generate_words(self, seed=None):
+        """
+        Randomly selects a list of words for the test, and shows the first page.
 
-    def generate_words(self):
+        Parameters
+        ----------
+        seed : int
+            Seed for the test's random generator. A new seed is chosen if not given.
         """
-        Randomly selects a list of words for the test.
+        self.use_test(generate_test(self.word_list_index, self.practice_mode, self.key_stats, seed, self.content))
+
+    def use_test(self, prepared_test: PreparedTest):
         """
-        self.test_words = (random.choices(word_list, weights=weights, k=200))  # The weighting makes 5-letter words the most likely
-        self.left, self.right = 0, 31
-        self.text.delete(1.0, END)
-        self.text.insert(1.0, " ".join(self.test_words[self.left:self.right]))
-        self.tag_last_word()
+        Makes a prepared test the current test and shows its first page.
 
-    def tag_last_word(self):
+        Parameters
+        ----------
+        prepared_test : PreparedTest
+            The test.
         """
-    `   Highlights the last word to indicate that it is part of the next page.
+        self.prepared_test = prepared_test
+        self.test_words = prepared_test.words
+        self.test_seed = prepared_test.seed
+        self.test_id = prepared_test.test_id
+        self.show_first_page()
+
+    def show_page(self, page_num):
         """
-        self.text.tag_remove("last_word", 1.0, END)
-        last_word_len = len(self.test_words[self.right - 1])
-        self.text.tag_add("last_word", f"end-{last_word_len + 1}c", END)
+        Replaces the text with a page of the test words, with the first word of the next page greyed out.
+
+        Parameters
+        ----------
+        page_num : int
+            The page to show.
+        """
+        self.left, self.right = page_num * PAGE_WORDS, page_num * PAGE_WORDS + PAGE_WORDS + 1
+        page_text, next_word = self.prepared_test.pages[page_num]
+        self.text.replace(1.0, END, page_text, (), next_word, "last_word")
+
+    def show_first_page(self):
+        """
+        Shows the first page of the test words.
+        """
+        self.show_page(0)
+
+    def set_word_list(self, word_list_index):
+        """
+        Changes the word list used for tests and sets up a new test with it.
+
+        Parameters
+        ----------
+        word_list_index : int
+            Index of the word list in word_data.WORD_LISTS.
+        """
+        self.word_list_index = word_list_index
+        self.close_book()
+        self.setup_test()
+
+    def set_practice_mode(self, practice_mode):
+        """
+        Turns the weak key practice mode on or off and sets up a new test.
+
+        Parameters
+        ----------
+        practice_mode : bool
+            Whether tests should over-sample words containing the user's weakest bigrams.
+        """
+        self.practice_mode = practice_mode
+        self.close_book()
+        self.setup_test()
+
+    def set_content(self, content):
+        """
+        Changes the content of tests and sets up a new test with it.
+
+        Parameters
+        ----------
+        content : str
+            Code of the content (see content_modes.py).
+        """
+        self.content = content
+        self.close_book()
+        self.setup_test()
+
+    def open_book(self, filename):
+        """
+        Switches to book mode, with tests made of the text of a file, starting where the user last stopped in it.
+
+        Parameters
+        ----------
+        filename : str
+            Path of the text file.
+
+        Raises
+        ------
+        OSError
+            If the file can't be opened.
+        ValueError
+            If the file is empty or has no words.
+        """
+        book = Book(filename, self.book_positions.get(filename))
+        self.close_book()
+        self.book = book
+        book.start_indexing()
+        self.book_positions.current = filename
+        self.save_book_position()
+
+    def resume_book(self):
+        """
+        Opens the book that was in use when the app was last closed, continuing where the user stopped.
+        """
+        if self.book_positions.current:
+            try:
+                self.open_book(self.book_positions.current)
+            except (OSError, ValueError):
+                self.book_positions.current = None  # The book has been moved or deleted
+
+    def switch_book_positions(self, filename):
+        """
+        Saves the position in the current book and switches to another profile's book positions, opening the book
+        that profile was using.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file the profile's book positions are stored in.
+        """
+        if self.book is not None:
+            self.save_book_position()
+            self.book.close()
+            self.book = None
+            self.book_test = False
+        self.book_positions.filename = filename
+        self.book_positions.load()
+        self.resume_book()
+        self.setup_test()
+
+    def close_book(self):
+        """
+        Leaves book mode, so tests use the word lists again.
+        """
+        if self.book is None:
+            return
+        self.book.close()
+        self.book = None
+        self.book_test = False
+        self.book_positions.current = None
+        self.save_book_position()
+
+    def seek_book(self, fraction):
+        """
+        Moves to a fraction of the way through the book and sets up a test from there.
+
+        Parameters
+        ----------
+        fraction : float
+            Fraction of the book, from 0 to 1.
+        """
+        self.book.seek_fraction(fraction)
+        self.save_book_position()
+        self.setup_test()
+
+    def save_book_position(self):
+        """
+        Saves the book in use and the position reached in it.
+        """
+        if self.book is not None:
+            self.book_positions.set(self.book)
+        try:
+            self.book_positions.save()
+        except OSError:
+            pass  # The position is kept in memory, and saved again after the next test
+
+    def quick_restart(self, event=None):
+        """
+        Bound to the Tab key. Starts a new test of the same duration straight away, abandoning the current test if
+        one is running.
+        """
+        if self.countdown_id is not None:  # A test is running
+            self.root.after_cancel(self.countdown_id)
+            self.countdown_id = None
+            self.home_ui.start_buttons_frame.grid()
+            self.home_ui.utility_buttons_frame.grid()
+            self.home_ui.test_id_frame.grid()
+        self.setup_test()
+        return "break"
+
+    def retry_test(self):
+        """
+        Bound to the retry button. Sets up the previous test again, with the same words.
+        """
+        self.setup_test(test_words=self.test_words)
+
+    def load_test_id(self, event=None):
+        """
+        Bound to the load button. Sets up the test with the ID entered by the user.
+        """
+        self.load_test(self.home_ui.test_id_entry.get())
+
+    def race_best(self):
+        """
+        Bound to the race button. Sets up the test of the current duration on which the user was fastest, so they race
+        a ghost of that run.
+        """
+        test_id = self.ghosts.fastest(self.test_duration) if self.ghosts else None
+        if test_id is None:
+            self.home_ui.config_test_id(f"no {self.test_duration}s runs to race yet")
+            return
+        self.load_test(test_id)
+
+    def load_test(self, test_id):
+        """
+        Sets up the test with the given ID.
+
+        Parameters
+        ----------
+        test_id : str
+            The test ID.
+        """
+        try:
+            word_list_index, seed, content = parse_test_id(test_id)
+        except ValueError:
+            self.home_ui.config_test_id("Invalid test ID")
+            return
+        self.word_list_index = word_list_index
+        self.content = content
+        self.practice_mode = False
+        self.close_book()
+        self.setup_test(seed)
 
     def prepare_user_input(self):
         """
@@ -165,7 +505,9 @@ class TypingTestLogic:
         self.page_num = 0
         self.space_counts = 0
         self.user_input = []
+        self.keystrokes = []
         self.excess_chars = 0
+        self.page_excess = []
 
         # Prepare timer for test
         self.timer_txt.grid()
@@ -177,11 +519,15 @@ class TypingTestLogic:
         Hides the button bar and starts the countdown.
         """
         self.test_started = True
+        self.test_queue.pause()  # Don't generate tests while the user is typing
         # hide the button bar
         self.home_ui.start_buttons_frame.grid_remove()
         self.home_ui.utility_buttons_frame.grid_remove()
+        self.home_ui.test_id_frame.grid_remove()
 
         self.countdown(self.test_duration)
+        if self.ghost_run is not None:
+            self.ghost_race.start(self.ghost_run)
 
     def countdown(self, seconds):
         """
@@ -194,21 +540,111 @@ class TypingTestLogic:
         """
         # End condition
         if seconds < 0:
+            self.countdown_id = None
             self.timer_txt.focus_set()
             self.stop_test()
         else:
             # After 1000ms, update the timer
             self.timer_txt.config(text=seconds)
-            self.root.after(1000, self.countdown, seconds - 1)
+            self.countdown_id = self.root.after(1000, self.countdown, seconds - 1)
 
     def get_char_index(self):
         """
         Uses the cursor position to obtain the index for the current character in the list of test words.
         """
-        index = self.current_char + self.excess_chars
-        for i in range(0 + self.page_num * 30, self.current_word + self.page_num * 30):
-            index += len(self.test_words[i]) + 1
-        return index
+        word_offset = self.prepared_test.offsets[self.current_word + self.page_num * PAGE_WORDS]
+        return word_offset + self.current_char + self.excess_chars
+
+    def cursor_index(self, word, char):
+        """
+        Finds where another cursor, such as the ghost's, is in the text.
+
+        Parameters
+        ----------
+        word : int
+            Index in the test words of the word the cursor is on.
+        char : int
+            Position of the cursor in the word. Excess characters typed by the other cursor aren't in the text, so it
+            waits at the end of the word.
+
+        Returns
+        -------
+        index : int
+            Position of the cursor in the text, or None if it isn't on the current page.
+        """
+        page_word = word - self.page_num * PAGE_WORDS
+        if not 0 <= page_word < PAGE_WORDS or word >= len(self.test_words):
+            return None
+        # Excess characters the user typed before the cursor's position move the cursor's word along
+        shift = sum(self.page_excess[:page_word])
+        if page_word > self.current_word:
+            shift += max(0, self.current_char - len(self.test_words[self.current_word + self.page_num * PAGE_WORDS]))
+        return self.prepared_test.offsets[word] + max(0, min(char, len(self.test_words[word]))) + shift
+
+    def show_ghost(self, word, char):
+        """
+        Moves the ghost cursor, if it's on the current page.
+
+        Parameters
+        ----------
+        word : int
+            Index in the test words of the word the ghost is on.
+        char : int
+            Position of the ghost in the word.
+        """
+        self.text.tag_remove("ghost", 1.0, END)
+        index = self.cursor_index(word, char)
+        if index is not None:
+            self.text.tag_add("ghost", f"1.{index}")
+
+    def join_race(self):
+        """
+        Joins the race on the current test, which everyone taking the same test at the same duration is in. Practice
+        and book tests don't have an ID, so they aren't raced.
+        """
+        self.race_client.join(f"{self.test_id}@{self.test_duration}" if self.test_id else "")
+        self.racers = {}
+        self._race_progress = None
+        self.show_racers()
+
+    def race_tick(self):
+        """
+        Sends the user's progress to the other racers if it has changed, and redraws theirs if it has. Runs every
+        PROGRESS_INTERVAL while the app is open, so key presses never wait for the network.
+        """
+        if self.test_started and self.keystrokes:
+            progress = (self.current_word + self.page_num * PAGE_WORDS, self.current_char)
+            if progress != self._race_progress:
+                self._race_progress = progress
+                elapsed = time.perf_counter() - self.keystrokes[0][0]
+                # Gross speed so far: every character typed counts
+                wpm = len(self.user_input) / 5 / (elapsed / 60) if elapsed > 0 else 0
+                self.race_client.send_progress(*progress, wpm)
+
+        updates = self.race_client.take_updates()
+        for racer_id, message in updates.items():
+            if message is None:
+                self.racers.pop(racer_id, None)
+            else:
+                self.racers[racer_id] = message
+        if updates or self._racers_page != self.page_num:
+            self.show_racers()
+        self.root.after(int(PROGRESS_INTERVAL * 1000), self.race_tick)
+
+    def show_racers(self):
+        """
+        Draws the other racers' cursors on the current page and lists their speeds.
+        """
+        self._racers_page = self.page_num
+        if self.test_words and self.text['state'] != 'disabled':  # No cursors over the results
+            self.text.tag_remove("racer", 1.0, END)
+            for message in self.racers.values():
+                index = self.cursor_index(message["word"], message["char"])
+                if index is not None:
+                    self.text.tag_add("racer", f"1.{index}")
+        standings = sorted(self.racers.values(), key=lambda message: (message["word"], message["char"]), reverse=True)
+        self.home_ui.config_racers([f"{message['name']}: {message['wpm']:.0f} wpm{' (done)' if message['done'] else ''}"
+                                    for message in standings])
 
     def back_space(self, word):
         """
@@ -223,6 +659,7 @@ class TypingTestLogic:
             return
 
         self.user_input.pop()  # Remove the last character input
+        self.keystrokes.append((time.perf_counter(), "\b", ""))
 
         if self.current_char > len(word):  # Delete excess characters
             self.current_char -= 1
@@ -240,6 +677,8 @@ class TypingTestLogic:
         self.text.tag_add("current_char", f"1.{index}", f"1.{index+1}")
         return
 
+    @profiled
+    @timed("typing_test_handler_seconds")
     def check_char(self, event):
         """
         Handles the response when a key is pressed.
@@ -249,7 +688,15 @@ class TypingTestLogic:
         event : tkinter.Event
             The key press event that has been registered.
         """
-        if event.keysym == 'Shift_L' or event.keysym == 'Shift_R' or event.keysym == "Escape" or event.keysym == "F11":
+        char = event.char
+        if not char or (char < " " and event.keysym != "BackSpace") or char == "\x7f":
+            return  # Modifier keys such as Shift, Caps Lock and AltGr, function keys and control characters
+        if len(char) > 1:  # Several characters entered at once, e.g. by an input method
+            for c in char:
+                if c == " ":
+                    self.check_word(SimpleNamespace(char=c, keysym="space"))
+                else:
+                    self.check_char(SimpleNamespace(char=c, keysym=c))
             return
 
         if not self.test_started:  # The timer starts the first time a key is pressed
@@ -262,6 +709,8 @@ class TypingTestLogic:
 
         # Track user's input, after establishing that the input was a character
         self.user_input.append(event.char)
+        expected = test_word[self.current_char] if self.current_char < len(test_word) else ""
+        self.keystrokes.append((time.perf_counter(), event.char, expected))
 
         if self.current_char >= len(test_word):  # Check for extra letters
             index = self.get_char_index()
@@ -296,17 +745,16 @@ class TypingTestLogic:
         """
         Shows the next page of the test words.
         """
-        self.left += 30  # 30 words are shown on a page.
-        self.right += 30
-        self.text.delete(1.0, END)
-        self.text.insert(1.0, " ".join(self.test_words[self.left:self.right]))
-        self.tag_last_word()
+        self.page_num += 1
+        self.show_page(self.page_num)
         # Reset cursor
         self.excess_chars = 0
+        self.page_excess = []
         self.current_char = 0
         self.current_word = 0
-        self.page_num += 1
 
+    @profiled
+    @timed("typing_test_handler_seconds")
     def check_word(self, event):
         """
         Handles the response to a spacebar press.
@@ -323,9 +771,12 @@ class TypingTestLogic:
         test_word = self.test_words[self.current_word + self.page_num * 30]
         if self.current_char > len(test_word):
             self.excess_chars += (self.current_char - len(test_word))
+        self.page_excess.append(max(0, self.current_char - len(test_word)))
 
         # Record the spacebar press and update cursor
         self.user_input.append(event.char)
+        expected = test_word[self.current_char] if self.current_char < len(test_word) else " "
+        self.keystrokes.append((time.perf_counter(), event.char, expected))
         self.current_char = 0
         self.current_word += 1
 
@@ -375,19 +826,70 @@ class TypingTestLogic:
 
         return wpm, accuracy, timestamp
 
+    def record_ghost(self, wpm):
+        """
+        Stores the run of the test that just finished if it's the user's best on this test, for the ghost to race.
+
+        Parameters
+        ----------
+        wpm : float
+            Words per minute of the run.
+
+        Returns
+        -------
+        race_result : str
+            Sentence comparing the run with the ghost's, or an empty string if there wasn't a ghost or a new best.
+        """
+        if self.ghosts is None or not self.test_id:
+            return ""
+        new_best = self.ghosts.record(self.test_id, self.test_duration, wpm, self.keystrokes)
+        if new_best:
+            try:
+                self.ghosts.save()
+            except OSError:
+                pass  # The run is kept in memory, and saved again after the next best
+        if self.ghost_run is not None:
+            outcome = "beat" if new_best else "didn't beat"
+            return f"\nYou {outcome} your ghost ({self.ghost_run.wpm:.1f} wpm)."
+        return "\nNew personal best on this test." if new_best else ""
+
+    @profiled
+    @timed("typing_test_handler_seconds")
     def stop_test(self):
         """
         Ends the test procedure and displays the user's test statistics. Makes the button bar visible again.
         """
+        self.ghost_race.stop()
         wpm, accuracy, timestamp = self.obtain_test_statistics()
 
-        self.results_io.save_data(wpm, accuracy, timestamp, duration=self.test_duration)
+        self.results_io.save_data(wpm, accuracy, timestamp, duration=self.test_duration, test_id=self.test_id)
+        self._tests_completed.labels(self.test_duration).inc()
+        self.key_stats.update(self.keystrokes)
+        try:
+            self.key_stats.save()
+        except OSError:
+            pass  # The statistics are kept in memory, and saved again after the next test
+        self.test_queue.discard_practice_tests()  # They were chosen from the old statistics
+        self.test_queue.resume()
+        if self.book_test:  # The next test continues after the words typed, which a retry has already passed
+            self.book.advance(self.page_num * PAGE_WORDS + self.current_word)
+            self.save_book_position()
+        race_result = self.record_ghost(wpm)
+        if self.race_client is not None:
+            self._race_progress = (self.current_word + self.page_num * PAGE_WORDS, self.current_char)
+            self.race_client.send_progress(*self._race_progress, wpm, done=True)
+
+        timeline = TypingTimeline(self.keystrokes, self.test_duration)
 
         self.text.delete(1.0, END)
-        self.text.insert(1.0, f"Your typing speed was: {wpm} words per minute.\nYour accuracy was {accuracy}%.")
+        self.text.insert(1.0, f"Your typing speed was: {wpm} words per minute.\nYour accuracy was {accuracy}%. "
+                              f"Consistency: {timeline.consistency:.0f}%, "
+                              f"{len(timeline.error_clusters)} error cluster(s).{race_result}")
         self.text['state'] = 'disabled'
+        self.home_ui.show_timeline(timeline_figure(timeline, self.home_ui.colour_scheme))
 
         self.home_ui.home_frame.focus_set()  # Stops listening for user input by taking focus away from the timer.
         self.home_ui.test_focus = False
         self.home_ui.start_buttons_frame.grid()
         self.home_ui.utility_buttons_frame.grid()
+        self.home_ui.test_id_frame.grid()
@@ -0,0 +1,134 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+# Errors closer together than this many seconds belong to the same cluster.
+CLUSTER_GAP = 1.0
+# Minimum number of errors in a cluster.
+CLUSTER_MIN_ERRORS = 3
+# A second's keystrokes are multiplied by this to give WPM: 60 seconds / 5 characters per word.
+WPM_PER_CHAR = 12
+
+
+class TypingTimeline:
+    """
+    Second by second breakdown of a test, computed from its keystrokes with vectorised NumPy operations.
+
+    Attributes
+    ----------
+    raw_wpm : numpy.ndarray
+        WPM for each second of the test, counting every character typed.
+    net_wpm : numpy.ndarray
+        WPM for each second of the test, counting only correctly typed characters.
+    cv : float
+        Coefficient of variation (standard deviation / mean) of raw_wpm. Lower is more consistent.
+    consistency : float
+        Consistency score out of 100: 100 * (1 - cv), clipped to 0.
+    burst_wpm : float
+        Highest raw WPM in a single second.
+    error_clusters : list
+        Tuples of (start second, end second, number of errors) for each burst of errors.
+    """
+    def __init__(self, keystrokes, duration):
+        """
+        Parameters
+        ----------
+        keystrokes : list
+            Tuples of (time in seconds, character typed, character expected), as recorded by TypingTestLogic. The
+            expected character is empty for backspaces and excess characters.
+        duration : int
+            Duration of the test in seconds.
+        """
+        self.raw_wpm = np.zeros(duration)
+        self.net_wpm = np.zeros(duration)
+        self.cv = 0.0
+        self.consistency = 0.0
+        self.burst_wpm = 0.0
+        self.error_clusters = []
+        if not keystrokes:
+            return
+
+        times, typed, expected = (np.array(column) for column in zip(*keystrokes))
+        times = times.astype(float) - times[0]  # The test starts with the first keystroke
+        # The countdown shows zero for a second before the test stops; keystrokes after the duration are left out
+        # rather than added to the last second
+        in_test = times < duration
+        times, typed, expected = times[in_test], typed[in_test], expected[in_test]
+        seconds = times.astype(int)
+        is_char = typed != "\b"
+        correct = is_char & (typed == expected)
+        errors = is_char & ~correct
+
+        self.raw_wpm = np.bincount(seconds[is_char], minlength=duration)[:duration] * WPM_PER_CHAR
+        self.net_wpm = np.bincount(seconds[correct], minlength=duration)[:duration] * WPM_PER_CHAR
+        mean = self.raw_wpm.mean()
+        self.cv = float(self.raw_wpm.std() / mean) if mean else 0.0
+        self.consistency = max(0.0, 100 * (1 - self.cv))
+        self.burst_wpm = float(self.raw_wpm.max())
+        self.error_clusters = find_error_clusters(times[errors])
+
+
+def find_error_clusters(error_times, gap=CLUSTER_GAP, min_errors=CLUSTER_MIN_ERRORS):
+    """
+    Groups errors that happened close together.
+
+    Parameters
+    ----------
+    error_times : numpy.ndarray
+        Times of the errors in seconds, in ascending order.
+    gap : float
+        Errors closer together than this many seconds belong to the same cluster.
+    min_errors : int
+        Minimum number of errors in a cluster.
+
+    Returns
+    -------
+    clusters : list
+        Tuples of (start time, end time, number of errors) for each cluster.
+    """
+    if not len(error_times):
+        return []
+    starts = np.flatnonzero(np.diff(error_times, prepend=-np.inf) > gap)  # Index of the first error of each cluster
+    ends = np.append(starts[1:], len(error_times)) - 1
+    counts = ends - starts + 1
+    keep = counts >= min_errors
+    return [(float(start), float(end), int(count)) for start, end, count in
+            zip(error_times[starts[keep]], error_times[ends[keep]], counts[keep])]
+
+
+def timeline_figure(timeline: TypingTimeline, colour_scheme):
+    """
+    Plots the raw and net WPM of each second of a test, shading the error clusters.
+
+    The figure is created without pyplot, so it doesn't touch pyplot's global state and is quick to embed.
+
+    Parameters
+    ----------
+    timeline : TypingTimeline
+        The test's timeline.
+    colour_scheme : dict
+        Colour scheme for the plot.
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
+        The figure.
+    """
+    fig = Figure(figsize=(8, 2.2), facecolor=colour_scheme["background"])
+    ax = fig.add_subplot()
+    seconds = np.arange(1, len(timeline.raw_wpm) + 1)
+    ax.plot(seconds, timeline.raw_wpm, color=colour_scheme["markers2"], linewidth=1, label="Raw")
+    ax.plot(seconds, timeline.net_wpm, color=colour_scheme["highlight"], linewidth=2, label="Net")
+    for start, end, _ in timeline.error_clusters:
+        ax.axvspan(start + 1, end + 1, color=colour_scheme["markers3"], alpha=0.3, linewidth=0)
+
+    ax.set_facecolor(colour_scheme["background"])
+    ax.set_xlabel("Second", color=colour_scheme["main_text"])
+    ax.set_ylabel("WPM", color=colour_scheme["main_text"])
+    ax.tick_params(colors=colour_scheme["main_text"])
+    for spine in ax.spines.values():
+        spine.set_color(colour_scheme["main_text"])
+    ax.set_xlim(1, max(len(seconds), 2))
+    ax.set_ylim(0)
+    ax.legend(loc="upper right", fontsize=8, labelcolor=colour_scheme["main_text"], facecolor=colour_scheme["background"])
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,363 @@
+import argparse
+import array
+import hashlib
+import mmap
+import os
+import random
+import struct
+import sys
+
+# Use weighting to make 5-letter words appear more frequently
+TARGET_LENGTH = 5
+CORPUS_SUFFIX = ".corpus"
+
+MAGIC = b"TSTWCRP\0"
+VERSION = 2
+# magic, version, word count, max word length, byte order flag, source size, source mtime (ns), source sha1, weighting
+HEADER = struct.Struct("<8sIIII Q q 20s I")
+# Codes stored in the header for the supported weightings
+WEIGHTINGS = {"length": 0, "frequency": 1}
+LITTLE_ENDIAN = 1 if sys.byteorder == "little" else 0
+
+
+def word_weight(word, rank=0, weighting="length"):
+    """
+    Weighting used when selecting words, so 5-letter words are the most likely.
+
+    With the "frequency" weighting, the word list is assumed to be ordered from most to least common, and the weight
+    also decreases with the word's rank in the list.
+
+    Parameters
+    ----------
+    word : str
+        The word to weight.
+    rank : int
+        Position of the word in the word list.
+    weighting : str
+        Either "length" or "frequency".
+
+    Returns
+    -------
+    weight : float
+        Relative probability of the word being selected.
+    """
+    weight = (1 / (abs(len(word) - TARGET_LENGTH) + 1)) ** 2
+    if weighting == "frequency":
+        weight /= (rank + 1) ** 0.5
+    return weight
+
+
+def cache_path(source):
+    """
+    Returns the path of the compiled corpus for a word list text file.
+    """
+    return os.path.splitext(source)[0] + CORPUS_SUFFIX
+
+
+def file_sha1(path):
+    """
+    Computes the SHA-1 digest of a file.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def compile_words(words, weighting="length", source_size=0, source_mtime_ns=0, source_sha1=b""):
+    """
+    Compiles a list of words into the binary corpus format.
+
+    The corpus is laid out as a fixed header followed by the cumulative weights (float64), the word offsets into the
+    blob (uint32, one more than the number of words), the length index (uint32 start positions for each word length,
+    followed by the word ids ordered by length) and finally the UTF-8 blob of all words.
+
+    Parameters
+    ----------
+    words : list
+        The words of the corpus.
+    weighting : str
+        How the selection weights are computed, see word_weight().
+    source_size : int
+        Size in bytes of the text file the words were read from.
+    source_mtime_ns : int
+        Modification time of the text file, in nanoseconds.
+    source_sha1 : bytes
+        SHA-1 digest of the text file.
+
+    Returns
+    -------
+    data : bytes
+        The compiled corpus.
+    """
+    encoded = [word.encode("utf-8") for word in words]
+    max_length = max((len(word) for word in words), default=0)
+
+    cum_weights = array.array("d")
+    total = 0.0
+    for rank, word in enumerate(words):
+        total += word_weight(word, rank, weighting)
+        cum_weights.append(total)
+
+    offsets = array.array("I", [0])
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+
+    by_length = array.array("I", sorted(range(len(words)), key=lambda i: len(words[i])))
+    length_starts = array.array("I", [0] * (max_length + 2))
+    for word in words:
+        length_starts[len(word) + 1] += 1
+    for length in range(1, max_length + 2):
+        length_starts[length] += length_starts[length - 1]
+
+    header = HEADER.pack(MAGIC, VERSION, len(words), max_length, LITTLE_ENDIAN,
+                         source_size, source_mtime_ns, source_sha1, WEIGHTINGS[weighting])
+    return b"".join([header, cum_weights.tobytes(), offsets.tobytes(), length_starts.tobytes(),
+                     by_length.tobytes(), b"".join(encoded)])
+
+
+def build_corpus(source, weighting="length"):
+    """
+    Compiles a word list text file into its binary corpus, stored next to it.
+
+    Parameters
+    ----------
+    source : str
+        Path of the word list, with one word per line.
+    weighting : str
+        How the selection weights are computed, see word_weight().
+
+    Returns
+    -------
+    data : bytes
+        The compiled corpus.
+    """
+    stat = os.stat(source)
+    with open(source, "r", encoding="utf-8") as word_file:
+        words = word_file.read().splitlines()
+    data = compile_words(words, weighting, stat.st_size, stat.st_mtime_ns, file_sha1(source))
+    temp_path = cache_path(source) + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, cache_path(source))
+    return data
+
+
+class WordCorpus:
+    """
+    A compiled word list, read directly from its binary buffer.
+
+    Attributes
+    ----------
+    cum_weights : memoryview
+        Cumulative selection weights of the words.
+    max_length : int
+        Length of the longest word.
+    source_size : int
+        Size of the text file the corpus was compiled from.
+    source_mtime_ns : int
+        Modification time of the text file, in nanoseconds.
+    source_sha1 : bytes
+        SHA-1 digest of the text file.
+    weighting : str
+        How the selection weights were computed, see word_weight().
+    """
+    def __init__(self, buffer):
+        """
+        Parameters
+        ----------
+        buffer : bytes or mmap.mmap
+            The compiled corpus.
+
+        Raises
+        ------
+        ValueError
+            If the buffer is not a valid corpus for this machine.
+        """
+        if len(buffer) < HEADER.size:
+            raise ValueError("Corpus is truncated.")
+        (magic, version, count, self.max_length, little_endian,
+         self.source_size, self.source_mtime_ns, self.source_sha1, weighting_code) = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION or little_endian != LITTLE_ENDIAN:
+            raise ValueError("Corpus was compiled by a different version or for a different machine.")
+        self.weighting = {code: name for name, code in WEIGHTINGS.items()}[weighting_code]
+
+        self._buffer = buffer
+        view = memoryview(buffer)
+        position = HEADER.size
+        sections = [("d", count), ("I", count + 1), ("I", self.max_length + 2), ("I", count)]
+        parsed = []
+        for typecode, length in sections:
+            size = length * array.array(typecode).itemsize
+            parsed.append(view[position:position + size].cast(typecode))
+            position += size
+        self.cum_weights, self._offsets, self._length_starts, self._by_length = parsed
+        self._blob = view[position:]
+        if len(self._blob) != self._offsets[-1]:
+            raise ValueError("Corpus is truncated.")
+
+    def __len__(self):
+        return len(self.cum_weights)
+
+    def __getitem__(self, index):
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def words_of_length(self, length):
+        """
+        Returns the words with the given number of characters.
+        """
+        return [self[i] for i in self.ids_of_length(length, length)]
+
+    def ids_of_length(self, min_length, max_length=None):
+        """
+        Returns the ids of the words with between min_length and max_length characters, as a slice of the length
+        index, so finding them takes the same time however many there are.
+
+        Parameters
+        ----------
+        min_length : int
+            Fewest characters.
+        max_length : int
+            Most characters. No limit if not given.
+
+        Returns
+        -------
+        word_ids : memoryview
+            The word ids, ordered by length.
+        """
+        max_length = self.max_length if max_length is None else min(max_length, self.max_length)
+        if min_length > max_length:
+            return self._by_length[0:0]
+        return self._by_length[self._length_starts[min_length]:self._length_starts[max_length + 1]]
+
+    def choices(self, k, rng=random):
+        """
+        Selects k words at random, with replacement, according to the word weights.
+
+        Parameters
+        ----------
+        k : int
+            Number of words to select.
+        rng : random.Random
+            Source of randomness.
+
+        Returns
+        -------
+        words : list
+            The selected words.
+        """
+        return [self[i] for i in rng.choices(range(len(self)), cum_weights=self.cum_weights, k=k)]
+
+    def is_fresh(self, source):
+        """
+        Checks whether the corpus still matches the text file it was compiled from.
+
+        The size and modification time are compared first; the file is only hashed when they differ, e.g. after a
+        fresh checkout.
+        """
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            return True  # Only the compiled corpus was installed.
+        if stat.st_size != self.source_size:
+            return False
+        if stat.st_mtime_ns == self.source_mtime_ns:
+            return True
+        return file_sha1(source) == self.source_sha1
+
+
+class BigramIndex:
+    """
+    Inverted index from each bigram (pair of adjacent characters) to the ids of the corpus words containing it.
+
+    Attributes
+    ----------
+    postings : dict
+        Maps each bigram to an array of word ids; a word containing a bigram twice appears twice.
+    """
+    def __init__(self, corpus: WordCorpus):
+        """
+        Parameters
+        ----------
+        corpus : WordCorpus
+            The corpus to index.
+        """
+        postings = {}
+        for word_id in range(len(corpus)):
+            word = corpus[word_id]
+            for i in range(len(word) - 1):
+                postings.setdefault(word[i:i + 2], array.array("I")).append(word_id)
+        self.postings = postings
+
+    def words_with(self, bigram):
+        """
+        Returns the ids of the words containing the given bigram.
+        """
+        return self.postings.get(bigram, array.array("I"))
+
+
+def _map_corpus(path):
+    """
+    Memory-maps a compiled corpus file.
+    """
+    with open(path, "rb") as f:
+        return WordCorpus(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def load_corpus(source, weighting="length"):
+    """
+    Loads the corpus for a word list, memory-mapping the compiled version when it is up to date.
+
+    Falls back to the text file when the compiled corpus is missing, stale or unreadable, and tries to rebuild it so
+    the next start is fast again.
+
+    Parameters
+    ----------
+    source : str
+        Path of the word list text file.
+    weighting : str
+        How the selection weights are computed, see word_weight().
+
+    Returns
+    -------
+    corpus : WordCorpus
+        The loaded corpus.
+    """
+    try:
+        corpus = _map_corpus(cache_path(source))
+        if corpus.weighting == weighting and corpus.is_fresh(source):
+            return corpus
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        return WordCorpus(build_corpus(source, weighting))
+    except OSError:  # The compiled corpus can't be written, e.g. a read-only install.
+        with open(source, "r", encoding="utf-8") as word_file:
+            return WordCorpus(compile_words(word_file.read().splitlines(), weighting))
+
+
+def main(argv=None):
+    """
+    Build step: compiles word lists ahead of time, by default every word list in word_data.WORD_LISTS and the quotes.
+    """
+    from content_modes import QUOTES_FILE
+    from word_data import WORD_LISTS
+
+    parser = argparse.ArgumentParser(description="Compile word lists into memory-mappable corpus files.")
+    parser.add_argument("files", nargs="*", help="Word list text files (default: every word list and the quotes).")
+    parser.add_argument("--weighting", choices=list(WEIGHTINGS),
+                        help="Weighting for files that aren't in WORD_LISTS (default: length).")
+    args = parser.parse_args(argv)
+
+    weightings = {os.path.normpath(word_list["file"]): word_list["weighting"] for word_list in WORD_LISTS}
+    weightings.setdefault(os.path.normpath(QUOTES_FILE), "length")
+    for source in args.files or list(weightings):
+        weighting = weightings.get(os.path.normpath(source), args.weighting or "length")
+        build_corpus(source, weighting)
+        print(f"Compiled {source} -> {cache_path(source)}")
+
+
+if __name__ == "__main__":
+    main()
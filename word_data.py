@@ -1,7 +1,145 @@
+import functools
+import random
 
-with open("word_list.txt", "r") as word_file:
-    word_list = word_file.read().splitlines()
-    # Use weighting to make 5-letter words appear more frequently
-    target_length = 5
-    weights = [(1/(abs(len(word)-target_length)+1))**2 for word in word_list]
+from word_corpus import BigramIndex, load_corpus
+from content_modes import is_valid_content
 
+# Word lists that can be selected from the options page. Lists ordered from most to least common use the
+# "frequency" weighting, so common words appear more often. The key identifies the list in test IDs.
+WORD_LISTS = [
+    {
+        "name": "English (full)",
+        "key": "en",
+        "file": "word_list.txt",
+        "weighting": "length"
+    },
+    {
+        "name": "English 200",
+        "key": "en200",
+        "file": "word_lists/english_200.txt",
+        "weighting": "frequency"
+    },
+    {
+        "name": "English 1k",
+        "key": "en1k",
+        "file": "word_lists/english_1k.txt",
+        "weighting": "frequency"
+    },
+    {
+        "name": "Spanish 200",
+        "key": "es200",
+        "file": "word_lists/spanish_200.txt",
+        "weighting": "frequency"
+    },
+    {
+        "name": "Python keywords",
+        "key": "py",
+        "file": "word_lists/python_keywords.txt",
+        "weighting": "length"
+    },
+]
+
+# Maximum number of word lists kept in memory at once
+MAX_LOADED_LISTS = 3
+
+
+@functools.lru_cache(maxsize=MAX_LOADED_LISTS)
+def get_corpus(word_list_index):
+    """
+    Loads the corpus for a word list the first time it is needed.
+
+    The most recently used corpora stay in memory, so switching back to one of them doesn't reload it.
+
+    Parameters
+    ----------
+    word_list_index : int
+        Index of the word list in WORD_LISTS.
+
+    Returns
+    -------
+    corpus : word_corpus.WordCorpus
+        The word list's corpus.
+    """
+    word_list = WORD_LISTS[word_list_index]
+    return load_corpus(word_list["file"], word_list["weighting"])
+
+
+@functools.lru_cache(maxsize=MAX_LOADED_LISTS)
+def get_bigram_index(word_list_index):
+    """
+    Builds the bigram index of a word list the first time it is needed, for the weak key practice mode.
+
+    Parameters
+    ----------
+    word_list_index : int
+        Index of the word list in WORD_LISTS.
+
+    Returns
+    -------
+    bigram_index : word_corpus.BigramIndex
+        Inverted index from bigrams to the ids of the words containing them.
+    """
+    return BigramIndex(get_corpus(word_list_index))
+
+
+def new_seed():
+    """
+    Returns a random seed for a new test.
+    """
+    return random.getrandbits(32)
+
+
+def make_test_id(word_list_index, seed, content=""):
+    """
+    Builds the shareable ID of a test, e.g. "en-1f2e3d4c", or "en.pc-1f2e3d4c" for a test with punctuation and
+    capitals.
+
+    Parameters
+    ----------
+    word_list_index : int
+        Index of the test's word list in WORD_LISTS.
+    seed : int
+        Seed the test's words were generated from.
+    content : str
+        Code of the test's content (see content_modes.py). Empty for plain words.
+
+    Returns
+    -------
+    test_id : str
+        The test ID.
+    """
+    key = WORD_LISTS[word_list_index]["key"]
+    return f"{key}.{content}-{seed:08x}" if content else f"{key}-{seed:08x}"
+
+
+def parse_test_id(test_id):
+    """
+    Finds the word list, seed and content of a test from its ID.
+
+    Parameters
+    ----------
+    test_id : str
+        The test ID, as built by make_test_id().
+
+    Returns
+    -------
+    word_list_index : int
+        Index of the test's word list in WORD_LISTS.
+    seed : int
+        Seed the test's words were generated from.
+    content : str
+        Code of the test's content.
+
+    Raises
+    ------
+    ValueError
+        If the ID is malformed or refers to an unknown word list or content.
+    """
+    key, _, seed = test_id.strip().lower().rpartition("-")
+    key, _, content = key.partition(".")
+    if not is_valid_content(content):
+        raise ValueError(f"Unknown test ID: {test_id}")
+    for word_list_index, word_list in enumerate(WORD_LISTS):
+        if word_list["key"] == key:
+            return word_list_index, int(seed, 16), content
+    raise ValueError(f"Unknown test ID: {test_id}")